@@ -40,6 +40,7 @@ setuptools.setup(
         'reactivex',
         'bleak',
         'textual',
-        'python-daemon'
+        'python-daemon',
+        'paramiko'
     ]
 )
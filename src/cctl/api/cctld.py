@@ -14,52 +14,22 @@ __status__ = 'Development'
 
 
 import asyncio
+from fnmatch import fnmatchcase
+import itertools
 import json
-from typing import Any, Dict, List, Tuple, Union
+import logging
+from typing import Any, Dict, Iterable, List, Literal, Optional, Tuple, \
+    Union
 import reactivex as rx
 import zmq
 import zmq.asyncio
 
-from cctl.models import Coachbot
+from cctl.models import Coachbot, Inventory
 from cctl.models.coachbot import CoachbotState, Signal
-from cctl.protocols import ipc
+from cctl.protocols import ble, codec, feed, ipc, job
 from cctl.utils.color import rgb_to_hex
 
 
-class _CCTLDClientRequest:
-    """This ContextManager enables atomic, simple, async calls to the cctld
-    server.
-    """
-    def __init__(self, ctx: zmq.asyncio.Context, cctl_ipc_path: str) -> None:
-        self._ctx = ctx
-        self._ipc = cctl_ipc_path
-        self._socket = None
-
-    def __enter__(self) -> '_CCTLDClientRequest':
-        self._socket = self._ctx.socket(zmq.REQ)
-        self._socket.connect(self._ipc)
-        return self
-
-    def __exit__(self, exc_t, exc_v, exc_tb):
-        if self._socket is not None:
-            self._socket.disconnect(self._ipc)
-            self._socket.setsockopt(zmq.LINGER, 0)
-            self._socket.close()
-
-        return False
-
-    async def request(self, request: ipc.Request) -> ipc.Response:
-        """Sends a request to the server and returns the response it gives
-        back."""
-        if self._socket is None:
-            raise ValueError('The CCTLDClient class can only be used as a '
-                             'context manager.')
-
-        await self._socket.send_string(request.serialize())
-        response_raw = await self._socket.recv_string()
-        return ipc.Response.deserialize(response_raw)
-
-
 class CCTLDRespEx(Exception):
     def __eq__(self, __o: object) -> bool:
         return self.__class__ == __o.__class__ and str(self) == str(__o)
@@ -84,6 +54,11 @@ class CCTLDClient:
     automatically for you. Use it as any other ``ContextManager``. All other
     use is prohibited.
 
+    The client keeps a single ``zmq.DEALER`` connection open for its whole
+    context. Every request is tagged with an identifier which **cctld** echoes
+    back, so any number of requests may be in flight at once. Concurrent calls
+    (e.g. through ``asyncio.gather``) are pipelined over the one connection.
+
     For example:
 
     .. code-block:: python
@@ -93,77 +68,307 @@ class CCTLDClient:
            # Let's pretend we're doing something here.
            await asyncio.sleep(10)
            print(await client.read_bot_state())
+
+    Parameters:
+        cctl_ipc_path (str): The URI of the **cctld** request feed.
+        encoding (str): The encoding in which ``CoachbotState`` objects are
+            requested. Either ``binary`` or ``json``. See
+            ``cctl.protocols.codec``.
     """
-    def __init__(self, cctl_ipc_path: str) -> None:
+    def __init__(self, cctl_ipc_path: str,
+                 encoding: str = codec.ENCODING_BINARY) -> None:
         self._path = cctl_ipc_path
-        self._ctx = None
+        self._ctx: Optional[zmq.asyncio.Context] = None
+        self._socket: Optional[zmq.asyncio.Socket] = None
+        self._receiver: Optional[asyncio.Task] = None
+        # The error which stopped the receiver, raised by every later request.
+        self._receiver_error: Optional[zmq.ZMQError] = None
+        self._pending: Dict[bytes, asyncio.Future] = {}
+        self._request_ids = itertools.count()
+        self._head = {'encoding': encoding}
+        # The user codes fetched so far, keyed by their hash, and the hash of
+        # the last user code fetched from every bot.
+        self._user_codes: Dict[str, str] = {}
+        self._user_code_hashes: Dict[int, str] = {}
 
     @staticmethod
-    def _raise_error_code(response: ipc.Response) -> None:
+    def error_for(response: ipc.Response) -> Optional[CCTLDRespEx]:
+        """Returns the exception corresponding to the result code of a
+        response, or ``None`` if it succeeded."""
         if response.result_code == ipc.ResultCode.NOT_FOUND:
-            raise CCTLDRespNotFound(response.body)
+            return CCTLDRespNotFound(response.body)
         if response.result_code == ipc.ResultCode.BAD_REQUEST:
-            raise CCTLDRespBadRequest(response.body)
+            return CCTLDRespBadRequest(response.body)
         if response.result_code != ipc.ResultCode.OK:
-            raise CCTLDRespInvalidState(response.body)
+            return CCTLDRespInvalidState(response.body)
+        return None
+
+    @staticmethod
+    def _raise_error_code(response: ipc.Response) -> None:
+        if (error := CCTLDClient.error_for(response)) is not None:
+            raise error
 
-    def __ensure_context(self):
-        """This function is to ensure that this object is instantiated within a
-        context manager, not to ensure a ZMQ context."""
-        if self._ctx is None:
-            raise ValueError('f{self.__class__.__name__} can only be used in '
+    def _read_head(self, fields: Optional[Iterable[str]]) -> Dict[str, Any]:
+        """Returns the head of a read of ``CoachbotState`` objects holding
+        only ``fields``."""
+        if fields is None:
+            return self._head
+        return {**self._head, 'fields': list(feed.parse_fields(fields))}
+
+    async def _batch(
+        self,
+        method: str,
+        endpoint: str,
+        bots: Union[Iterable[Coachbot], Literal['all', 'on']],
+        **fields: Any
+    ) -> Dict[int, Optional[CCTLDRespEx]]:
+        """Makes a single ``/bots/batch`` request targeting ``bots`` and
+        returns the error of every bot, or ``None`` if it succeeded."""
+        response = await self._request(ipc.Request(
+            method=method,
+            endpoint=f'/bots/batch{endpoint}',
+            body=json.dumps({
+                'ids': bots if isinstance(bots, str)
+                else [bot.identifier for bot in bots],
+                **fields
+            })
+        ))
+        self.__class__._raise_error_code(response)
+        return {
+            int(ident): self.__class__.error_for(ipc.Response(
+                result['result_code'], result['body']))
+            for ident, result in json.loads(response.body)
+        }
+
+    async def _request(self, request: ipc.Request) -> ipc.Response:
+        """Sends a request to the server and returns the response it gives
+        back.
+
+        Raises:
+            ValueError: If the client is used outside of its context.
+            zmq.ZMQError: If the connection to the server failed.
+        """
+        if self._socket is None:
+            raise ValueError(f'{self.__class__.__name__} can only be used in '
                              'a context.')
+        if self._receiver_error is not None:
+            raise self._receiver_error
+
+        request_id = b'%d' % next(self._request_ids)
+        future = self._pending[request_id] = \
+            asyncio.get_running_loop().create_future()
+        try:
+            # The empty frame delimits the envelope, which cctld echoes back.
+            await self._socket.send_multipart(
+                [request_id, b'', request.serialize().encode()])
+            return await future
+        finally:
+            self._pending.pop(request_id, None)
+
+    async def _receive_responses(self) -> None:
+        """Resolves the pending request every response belongs to."""
+        assert self._socket is not None
+        try:
+            while True:
+                *envelope, response_raw = await self._socket.recv_multipart()
+                if len(envelope) != 2 or \
+                        (future := self._pending.get(envelope[0])) is None:
+                    logging.getLogger('cctld-api').warning(
+                        'Dropping unexpected response %s.', envelope)
+                    continue
+                if not future.done():
+                    future.set_result(
+                        ipc.Response.deserialize(response_raw.decode()))
+        except zmq.ZMQError as err:
+            logging.getLogger('cctld-api').error(
+                'Could not receive responses: %s', err)
+            self._receiver_error = err
+            for future in self._pending.values():
+                if not future.done():
+                    future.set_exception(err)
 
     async def __aenter__(self) -> 'CCTLDClient':
         self._ctx = zmq.asyncio.Context()
+        self._receiver_error = None
+        self._socket = self._ctx.socket(zmq.DEALER)
+        self._socket.connect(self._path)
+        self._receiver = asyncio.create_task(self._receive_responses())
         return self
 
-    async def read_all_states(self) -> List[CoachbotState]:
+    async def read_all_states(
+        self,
+        fields: Optional[Iterable[str]] = None
+    ) -> Dict[int, CoachbotState]:
         """Returns the latest bot states of all the robots.
 
+        Parameters:
+            fields (Optional[Iterable[str]]): The fields to read (see
+                ``cctl.protocols.feed.FIELDS``). The other fields are
+                ``None``. Every field is read if ``None``.
+
         Returns:
-            List[CoachbotState]: The list of all coachbot states.
+            Dict[int, CoachbotState]: The states of all coachbots, keyed by
+            their identifiers, in ascending order.
         """
-        self.__ensure_context()
-        assert self._ctx is not None
-        with _CCTLDClientRequest(self._ctx, self._path) as req:
-            response = await req.request(ipc.Request(
-                method='read',
-                endpoint='/bots',
-            ))
-            if response.result_code != ipc.ResultCode.OK:
-                raise CCTLDRespInvalidState('Invalid result code from cctld.')
-            return [CoachbotState.from_dict(state) for state in
-                    json.loads(response.body)]
-
-    async def read_state(self, bot: Coachbot) -> CoachbotState:
+        response = await self._request(ipc.Request(
+            method='read',
+            endpoint='/bots',
+            head=self._read_head(fields)
+        ))
+        if response.result_code != ipc.ResultCode.OK:
+            raise CCTLDRespInvalidState('Invalid result code from cctld.')
+        if response.body[:1] == '[':
+            return {int(ident): CoachbotState.from_dict(state)
+                    for ident, state in json.loads(response.body)}
+        states = codec.loads_text(response.body, dict)
+        return {ident: states[ident] for ident in sorted(states)}
+
+    async def read_inventory(self) -> Inventory:
+        """Returns the inventory of the arena, listing every bot.
+
+        Returns:
+            Inventory: The inventory **cctld** is using.
+        """
+        response = await self._request(ipc.Request(
+            method='read',
+            endpoint='/inventory',
+        ))
+        self.__class__._raise_error_code(response)
+        return Inventory.deserialize(response.body)
+
+    async def read_presence(self) -> List[ble.Sighting]:
+        """Returns every Bluefruit board **cctld** recently heard
+        advertising, strongest signal first.
+
+        Returns:
+            List[ble.Sighting]: The boards in range.
+
+        Raises:
+            CCTLDRespNotFound: If **cctld** does not scan for boards.
+        """
+        response = await self._request(ipc.Request(
+            method='read',
+            endpoint='/bluetooth/presence',
+        ))
+        self.__class__._raise_error_code(response)
+        return [ble.Sighting.from_dict(sighting)
+                for sighting in json.loads(response.body)]
+
+    async def read_adapter_health(self) -> List[Dict[str, Any]]:
+        """Returns the health of every bluetooth interface of **cctld**. See
+        ``cctld.ble.health.AdapterHealth``.
+
+        Returns:
+            List[Dict[str, Any]]: The health of every interface, along with
+            its number as ``interface``.
+        """
+        response = await self._request(ipc.Request(
+            method='read',
+            endpoint='/bluetooth/adapters',
+        ))
+        self.__class__._raise_error_code(response)
+        return json.loads(response.body)
+
+    async def read_rtt(self) -> List[Dict[str, Any]]:
+        """Returns the round-trip time estimate of every bot **cctld**
+        commanded. See ``cctld.utils.rtt.RttEstimator``.
+
+        Returns:
+            List[Dict[str, Any]]: The estimate of every bot, along with its
+            identifier as ``id``.
+        """
+        response = await self._request(ipc.Request(
+            method='read',
+            endpoint='/bots/rtt',
+        ))
+        self.__class__._raise_error_code(response)
+        return json.loads(response.body)
+
+    async def read_snapshot(
+        self,
+        fields: Optional[Iterable[str]] = None
+    ) -> feed.StateFeedMessage:
+        """Returns a keyframe holding the full fleet state, stamped with the
+        state feed sequence number it corresponds to.
+
+        Parameters:
+            fields (Optional[Iterable[str]]): The fields to read, like the
+                ``view/<fields>/`` topic the snapshot is for. Every field is
+                read if ``None``.
+
+        Returns:
+            feed.StateFeedMessage: The fleet snapshot.
+        """
+        response = await self._request(ipc.Request(
+            method='read',
+            endpoint='/bots/snapshot',
+            head=self._read_head(fields)
+        ))
+        self.__class__._raise_error_code(response)
+        return codec.loads_text(response.body, feed.StateFeedMessage)
+
+    async def read_state(
+        self,
+        bot: Coachbot,
+        fields: Optional[Iterable[str]] = None
+    ) -> CoachbotState:
         """This function returns the latest bot state according to ``cctld``.
 
         Parameters:
             bot (Coachbot): The target coachbot.
+            fields (Optional[Iterable[str]]): The fields to read. Every field
+                is read if ``None``.
 
         Returns:
             CoachbotState: The state of the specified ``Coachbot``.
         """
-        self.__ensure_context()
-        assert self._ctx is not None
-        with _CCTLDClientRequest(self._ctx, self._path) as req:
-            response = await req.request(ipc.Request(
-                method='read',
-                endpoint=f'/bots/{bot.identifier}/state'
-            ))
-            return CoachbotState.deserialize(response.body)
+        response = await self._request(ipc.Request(
+            method='read',
+            endpoint=f'/bots/{bot.identifier}/state',
+            head=self._read_head(fields)
+        ))
+        return codec.loads_text(response.body, CoachbotState)
+
+    async def read_user_code(self, bot: Coachbot,
+                             code_hash: Optional[str] = None) -> Optional[str]:
+        """Returns the user code a bot holds. States only carry the hash of
+        the user code, so it is fetched separately and cached by its hash.
+
+        Parameters:
+            bot (Coachbot): The target coachbot.
+            code_hash (Optional[str]): The ``user_code_hash`` of a state of
+                the bot, if known. No request is made if the code with this
+                hash was already fetched.
+
+        Returns:
+            Optional[str]: The user code, or ``None`` if the bot did not
+            report any or **cctld** no longer holds it.
+        """
+        if code_hash is not None and code_hash in self._user_codes:
+            return self._user_codes[code_hash]
+        known = self._user_code_hashes.get(bot.identifier)
+        response = await self._request(ipc.Request(
+            method='read',
+            endpoint=f'/bots/{bot.identifier}/user-code',
+            head={} if known is None else {'if_none_match': known}
+        ))
+        if response.result_code == ipc.ResultCode.NO_CONTENT:
+            return self._user_codes[known]
+        if response.result_code == ipc.ResultCode.NOT_FOUND:
+            return None
+        self.__class__._raise_error_code(response)
+        body = json.loads(response.body)
+        self._user_codes[body['user_code_hash']] = body['user_code']
+        self._user_code_hashes[bot.identifier] = body['user_code_hash']
+        return body['user_code']
 
     async def read_config(self) -> Dict[str, Any]:
         """Returns the configuration of ``cctld`` as it reports it."""
-        self.__ensure_context()
-        assert self._ctx is not None
-        with _CCTLDClientRequest(self._ctx, self._path) as req:
-            response = await req.request(ipc.Request(
-                method='read',
-                endpoint='/config'
-            ))
-            return json.loads(response.body)
+        response = await self._request(ipc.Request(
+            method='read',
+            endpoint='/config'
+        ))
+        return json.loads(response.body)
 
     async def set_led_color(
         self,
@@ -177,16 +382,13 @@ class CCTLDClient:
             color (3-element | str): The RGB value (0-255) of the robot. If
             string, then interpreted as a hex value
         """
-        self.__ensure_context()
-        assert self._ctx is not None
-        with _CCTLDClientRequest(self._ctx, self._path) as req:
-            response = await req.request(ipc.Request(
-                method='update',
-                endpoint=f'/bots/{bot.identifier}/led/color',
-                body=(color if isinstance(color, str)
-                      else rgb_to_hex(color))
-            ))
-            self.__class__._raise_error_code(response)
+        response = await self._request(ipc.Request(
+            method='update',
+            endpoint=f'/bots/{bot.identifier}/led/color',
+            body=(color if isinstance(color, str)
+                  else rgb_to_hex(color))
+        ))
+        self.__class__._raise_error_code(response)
 
     async def set_is_on(self,
                         bot: Coachbot,
@@ -199,15 +401,12 @@ class CCTLDClient:
             state (bool): Whether the coachbot should be on or not.
             force (bool): Whether to force the booting procedure.
         """
-        self.__ensure_context()
-        assert self._ctx is not None
-        with _CCTLDClientRequest(self._ctx, self._path) as req:
-            response = await req.request(ipc.Request(
-                method='create' if state else 'delete',
-                endpoint=f'/bots/{bot.identifier}/state/is-on',
-                body=json.dumps({'force': force})
-            ))
-            self.__class__._raise_error_code(response)
+        response = await self._request(ipc.Request(
+            method='create' if state else 'delete',
+            endpoint=f'/bots/{bot.identifier}/state/is-on',
+            body=json.dumps({'force': force})
+        ))
+        self.__class__._raise_error_code(response)
 
     async def set_user_code_running(self, bot: Coachbot, state: bool) -> None:
         """This function sets the user code of the target bot to start or not,
@@ -223,14 +422,11 @@ class CCTLDClient:
         """
         method = 'create' if state else 'delete'
 
-        self.__ensure_context()
-        assert self._ctx is not None
-        with _CCTLDClientRequest(self._ctx, self._path) as req:
-            response = await req.request(ipc.Request(
-                method=method,
-                endpoint=f'/bots/{bot.identifier}/user-code/running'
-            ))
-            self.__class__._raise_error_code(response)
+        response = await self._request(ipc.Request(
+            method=method,
+            endpoint=f'/bots/{bot.identifier}/user-code/running'
+        ))
+        self.__class__._raise_error_code(response)
 
     async def update_user_code(self, bot: Coachbot, user_code: str) -> None:
         """Attempts to update the user code on the specified bot.
@@ -239,15 +435,142 @@ class CCTLDClient:
             CCTLDRespInvalidState: If the robot is in an invalid state for
             updating. This likely means it is turned off.
         """
-        self.__ensure_context()
-        assert self._ctx is not None
-        with _CCTLDClientRequest(self._ctx, self._path) as req:
-            response = await req.request(ipc.Request(
-                method='update',
-                endpoint=f'/bots/{bot.identifier}/user-code/code',
-                body=user_code
-            ))
+        response = await self._request(ipc.Request(
+            method='update',
+            endpoint=f'/bots/{bot.identifier}/user-code/code',
+            body=user_code
+        ))
+        self.__class__._raise_error_code(response)
+
+    async def set_bots_is_on(
+        self,
+        bots: Union[Iterable[Coachbot], Literal['all', 'on']],
+        state: bool,
+        force: bool = False
+    ) -> Dict[int, Optional[CCTLDRespEx]]:
+        """Turns many coachbots on or off in a single request.
+
+        Parameters:
+            bots (Iterable[Coachbot] | 'all' | 'on'): The target coachbots,
+                every bot in the inventory or every bot which is on.
+            state (bool): Whether the coachbots should be on or not.
+            force (bool): Whether to force the booting procedure.
+
+        Returns:
+            Dict[int, Optional[CCTLDRespEx]]: The error of every targeted bot,
+            or ``None`` if it succeeded.
+        """
+        return await self._batch('create' if state else 'delete',
+                                 '/state/is-on', bots, force=force)
+
+    async def set_bots_user_code_running(
+        self,
+        bots: Union[Iterable[Coachbot], Literal['all', 'on']],
+        state: bool
+    ) -> Dict[int, Optional[CCTLDRespEx]]:
+        """Starts or stops the user code on many coachbots in a single
+        request.
+
+        Returns:
+            Dict[int, Optional[CCTLDRespEx]]: The error of every targeted bot,
+            or ``None`` if it succeeded.
+        """
+        return await self._batch('create' if state else 'delete',
+                                 '/user-code/running', bots)
+
+    async def update_bots_user_code(
+        self,
+        bots: Union[Iterable[Coachbot], Literal['all', 'on']],
+        user_code: str
+    ) -> Dict[int, Optional[CCTLDRespEx]]:
+        """Updates the user code on many coachbots in a single request.
+
+        Returns:
+            Dict[int, Optional[CCTLDRespEx]]: The error of every targeted bot,
+            or ``None`` if it succeeded.
+        """
+        return await self._batch('update', '/user-code/code', bots,
+                                 code=user_code)
+
+    async def set_bots_led_color(
+        self,
+        bots: Union[Iterable[Coachbot], Literal['all', 'on']],
+        color: Union[str, Tuple[int, int, int]]
+    ) -> Dict[int, Optional[CCTLDRespEx]]:
+        """Sets the LED color on many coachbots in a single request.
+
+        Returns:
+            Dict[int, Optional[CCTLDRespEx]]: The error of every targeted bot,
+            or ``None`` if it succeeded.
+
+        Raises:
+            CCTLDRespBadRequest: If the color is invalid.
+        """
+        return await self._batch(
+            'update', '/led/color', bots,
+            color=color if isinstance(color, str) else rgb_to_hex(color))
+
+    async def submit_job(
+        self,
+        kind: str,
+        bots: Union[Iterable[Coachbot], Literal['all', 'on']],
+        **fields: Any
+    ) -> job.Job:
+        """Submits a long fleet operation which **cctld** runs in the
+        background. Use ``CCTLDJobObservable`` to follow its progress.
+
+        Parameters:
+            kind (str): One of ``cctl.protocols.job.KINDS``.
+            bots (Iterable[Coachbot] | 'all' | 'on'): The target coachbots,
+                every bot in the inventory or every bot which is on.
+            **fields: The parameters of the job, e.g. ``force`` for boots or
+                ``code`` for deployments.
+
+        Returns:
+            job.Job: The state of the job, as submitted.
+
+        Raises:
+            CCTLDRespBadRequest: If the job is malformed.
+        """
+        response = await self._request(ipc.Request(
+            method='create',
+            endpoint='/jobs',
+            body=json.dumps({
+                'kind': kind,
+                'ids': bots if isinstance(bots, str)
+                else [bot.identifier for bot in bots],
+                **fields
+            })
+        ))
+        if response.result_code != ipc.ResultCode.ACCEPTED:
             self.__class__._raise_error_code(response)
+        return job.Job.deserialize(response.body)
+
+    async def read_job(self, job_id: int) -> job.Job:
+        """Returns the current state of a job.
+
+        Raises:
+            CCTLDRespNotFound: If the job does not exist (anymore).
+        """
+        response = await self._request(ipc.Request(
+            method='read',
+            endpoint=f'/jobs/{job_id}'
+        ))
+        self.__class__._raise_error_code(response)
+        return job.Job.deserialize(response.body)
+
+    async def cancel_job(self, job_id: int) -> None:
+        """Cancels a running job.
+
+        Raises:
+            CCTLDRespNotFound: If the job does not exist (anymore).
+            CCTLDRespInvalidState: If the job is not running.
+        """
+        response = await self._request(ipc.Request(
+            method='delete',
+            endpoint=f'/jobs/{job_id}'
+        ))
+        self.__class__._raise_error_code(response)
 
     async def set_power_rail_on(self, state: bool) -> None:
         """Attempts to set the state of the power rail to on/off.
@@ -255,36 +578,62 @@ class CCTLDClient:
         Parameters:
             state (bool): The power rail target state.
         """
-        self.__ensure_context()
-        assert self._ctx is not None
-        with _CCTLDClientRequest(self._ctx, self._path) as req:
-            response = await req.request(ipc.Request(
-                method='create' if state else 'delete',
-                endpoint='/rail/is-on'
-            ))
-            self.__class__._raise_error_code(response)
+        response = await self._request(ipc.Request(
+            method='create' if state else 'delete',
+            endpoint='/rail/is-on'
+        ))
+        self.__class__._raise_error_code(response)
 
     async def get_video_info(self) -> Dict[str, Dict[str, str]]:
         """Returns information about the video streams."""
-        self.__ensure_context()
-        assert self._ctx is not None
-        with _CCTLDClientRequest(self._ctx, self._path) as req:
-            response = await req.request(ipc.Request(
-                method='read', endpoint='/info/video'))
-            return json.loads(response.body)
+        response = await self._request(ipc.Request(
+            method='read', endpoint='/info/video'))
+        return json.loads(response.body)
 
     async def __aexit__(self, exc_t, exc_v, exc_tb):
+        if self._receiver is not None:
+            self._receiver.cancel()
+            try:
+                await self._receiver
+            except asyncio.CancelledError:
+                pass
+            self._receiver = None
+        for future in self._pending.values():
+            future.cancel()
+        self._pending.clear()
+        if self._socket is not None:
+            self._socket.setsockopt(zmq.LINGER, 0)
+            self._socket.close()
+            self._socket = None
         if self._ctx is not None:
             self._ctx.destroy(0)
+            self._ctx = None
         return False
 
 
 async def CCTLDCoachbotStateObservable(
-        state_feed: str) -> Tuple[rx.Subject, asyncio.Task]:
+    state_feed: str,
+    request_feed: Optional[str] = None,
+    bots: Optional[Iterable[int]] = None,
+    fields: Optional[Iterable[str]] = None
+) -> Tuple[rx.Subject, asyncio.Task]:
     """The ``CCTLDCoachbotStateObservable`` is an ``rx.Observable`` that will
     call the ``on_next`` function of your observer as new ``CoachbotState``
     data comes through.
 
+    **cctld** only publishes the bots whose state changed. This observable
+    rebuilds the full fleet state from these deltas, so your observer always
+    receives the state of the whole fleet as a ``Dict[int, CoachbotState]``
+    keyed by the bot identifier.
+
+    If ``bots`` is given, only the ``bot/<id>/`` topics of these bots are
+    subscribed to, so that the states of other bots are never delivered and
+    your observer only receives the states of these bots.
+
+    If ``fields`` is given, the ``view/<fields>/`` topic is subscribed to
+    instead, so that only these fields are delivered and only the bots whose
+    fields changed are published. The other fields are ``None``.
+
     Note:
         This function will spawn an ``asyncio.Task`` that you are resonsible
         for managing. Failure to manage this task (possibly via cancelling it
@@ -294,33 +643,150 @@ async def CCTLDCoachbotStateObservable(
         state_feed (str): The URI to connect to the state feed. This should be
             the same state feed **cctld** is serving on. Can be of the form
             ``ipc://<PATH>`` or ``tcp://<HOST>:<PORT>``.
+        request_feed (Optional[str]): The URI of the **cctld** request feed.
+            If given, a snapshot of the fleet is requested upon connecting, so
+            that the first values are emitted immediately. Otherwise, nothing
+            is emitted until the next keyframe is published.
+        bots (Optional[Iterable[int]]): The identifiers of the bots to
+            observe (e.g. ``range(10, 20)``), or ``None`` to observe the
+            whole fleet.
+        fields (Optional[Iterable[str]]): The fields to observe (see
+            ``cctl.protocols.feed.FIELDS``), or ``None`` for every field.
+            Cannot be combined with ``bots``.
 
     Returns:
         Tuple[reactivex.Subject, asyncio.Task]: The Observable and the running
         task.
 
+    Raises:
+        ValueError: If a field is unknown or both ``bots`` and ``fields`` are
+            given.
+
     Example Usage:
 
     .. code-block:: python
 
        my_observable, task = await CCTLDCoachbotStateObservable(
-           'tcp://127.0.0.1:16791')
+           'tcp://127.0.0.1:16791', 'tcp://127.0.0.1:16790')
        my_observer = rx.Observer(on_next=lambda next: print(next))
        my_observable.subscribe(my_observer)
        await asyncio.wait([task])
     """
     my_subject = rx.Subject()
+    identifiers = None if bots is None else frozenset(bots)
+    if fields is not None:
+        if identifiers is not None:
+            raise ValueError('Either bots or fields may be observed.')
+        fields = feed.parse_fields(fields)
+
+    async def synchronize(reassembler: feed.StateFeedReassembler) -> None:
+        if request_feed is None:
+            return
+        async with CCTLDClient(request_feed) as client:
+            reassembler.apply(await client.read_snapshot(fields))
+        my_subject.on_next(dict(reassembler.states))
 
     async def run():
         context = zmq.asyncio.Context()
         socket = context.socket(zmq.SUB)
         socket.connect(state_feed)
-        socket.setsockopt_string(zmq.SUBSCRIBE, '')
+        if fields is not None:
+            socket.setsockopt(zmq.SUBSCRIBE, feed.view_topic(fields))
+        elif identifiers is None:
+            socket.setsockopt(zmq.SUBSCRIBE, feed.TOPIC_FLEET)
+        for ident in identifiers or ():
+            socket.setsockopt(zmq.SUBSCRIBE, feed.bot_topic(ident))
+        reassembler = feed.StateFeedReassembler(identifiers)
         try:
+            await synchronize(reassembler)
             while True:
-                msg = [CoachbotState.from_dict(bot)
-                       for bot in (await socket.recv_json())]
-                my_subject.on_next(msg)
+                _, payload = await socket.recv_multipart()
+                msg = codec.loads(payload, feed.StateFeedMessage)
+                try:
+                    if reassembler.apply(msg):
+                        my_subject.on_next(dict(reassembler.states))
+                except feed.StateFeedGapError as gap:
+                    logging.getLogger('cctld-api').debug(
+                        '%s Resynchronizing.', gap)
+                    await synchronize(reassembler)
+        except Exception as ex:
+            my_subject.on_error(ex)
+        finally:
+            my_subject.on_completed()
+            socket.disconnect(state_feed)
+            socket.setsockopt(zmq.LINGER, 0)
+            socket.close()
+            context.destroy()
+
+    return my_subject, asyncio.create_task(run())
+
+
+async def CCTLDJobObservable(
+    state_feed: str,
+    request_feed: str,
+    job_id: int
+) -> Tuple[rx.Subject, asyncio.Task]:
+    """The ``CCTLDJobObservable`` is an ``rx.Observable`` that will call the
+    ``on_next`` function of your observer with the ``cctl.protocols.job.Job``
+    every time one of its bots completes, and complete once the job does.
+
+    The observable subscribes to the ``job/<id>/`` topic before reading the
+    state of the job, so no progress is missed even if the job started
+    earlier.
+
+    Note:
+        This function will spawn an ``asyncio.Task`` that you are resonsible
+        for managing.
+
+    Parameters:
+        state_feed (str): The URI of the **cctld** state feed.
+        request_feed (str): The URI of the **cctld** request feed.
+        job_id (int): The job to follow.
+
+    Returns:
+        Tuple[reactivex.Subject, asyncio.Task]: The Observable and the running
+        task.
+
+    Example Usage:
+
+    .. code-block:: python
+
+       async with CCTLDClient(request_feed) as client:
+           submitted = await client.submit_job('boot', 'all')
+       my_observable, task = await CCTLDJobObservable(
+           state_feed, request_feed, submitted.job_id)
+       my_observable.subscribe(on_next=lambda job: print(len(job.results)))
+       await task
+    """
+    my_subject = rx.Subject()
+
+    async def run():
+        context = zmq.asyncio.Context()
+        socket = context.socket(zmq.SUB)
+        socket.connect(state_feed)
+        socket.setsockopt(zmq.SUBSCRIBE, feed.job_topic(job_id))
+        try:
+            async with CCTLDClient(request_feed) as client:
+                state = await client.read_job(job_id)
+                my_subject.on_next(state)
+                while not state.finished:
+                    try:
+                        _, payload = await asyncio.wait_for(
+                            socket.recv_multipart(), 1.0)
+                    except asyncio.TimeoutError:
+                        # The subscription may not have been in place yet
+                        # when the last events were published.
+                        if (polled := await client.read_job(job_id)).seq > \
+                                state.seq:
+                            state = polled
+                            my_subject.on_next(state)
+                        continue
+                    event = job.JobEvent.deserialize(payload.decode())
+                    if state.apply(event):
+                        my_subject.on_next(state)
+                    elif event.seq > state.seq:
+                        state = await client.read_job(job_id)
+                        my_subject.on_next(state)
         except Exception as ex:
             my_subject.on_error(ex)
         finally:
@@ -334,7 +800,8 @@ async def CCTLDCoachbotStateObservable(
 
 
 async def CCTLDSignalObservable(
-    signal_feed: str
+    signal_feed: str,
+    names: Optional[Iterable[str]] = None
 ) -> Tuple[rx.Subject, asyncio.Task]:
     """The ``CCTLDSignalObservable`` is an ``rx.Observable`` that will
     call the ``on_next`` function of your observer as new signals are fired by
@@ -349,6 +816,9 @@ async def CCTLDSignalObservable(
         signal_feed (str): The URI to connect to the state feed. This should be
             the same signal feed **cctld** is serving on. Can be of the form
             ``ipc://<PATH>`` or ``tcp://<HOST>:<PORT>``.
+        names (Optional[Iterable[str]]): ``fnmatch`` patterns (e.g.
+            ``'led-*'``) of the signal names to observe, or ``None`` to
+            observe every signal.
 
     Returns:
         Tuple[reactivex.Subject, asyncio.Task]: The Observable and the running
@@ -363,16 +833,28 @@ async def CCTLDSignalObservable(
        my_observable.subscribe(my_observer)
     """
     my_subject = rx.Subject()
+    patterns = None if names is None else tuple(names)
+
+    def wanted(topic: bytes) -> bool:
+        if patterns is None:
+            return True
+        name = feed.signal_name(topic)
+        return any(fnmatchcase(name, pattern) for pattern in patterns)
 
     async def run():
         context = zmq.asyncio.Context()
         socket = context.socket(zmq.SUB)
         socket.connect(signal_feed)
-        socket.setsockopt_string(zmq.SUBSCRIBE, '')
+        if patterns is None:
+            socket.setsockopt(zmq.SUBSCRIBE, feed.TOPIC_SIGNAL)
+        for pattern in patterns or ():
+            socket.setsockopt(zmq.SUBSCRIBE,
+                              feed.signal_topic_prefix(pattern))
         try:
             while True:
-                msg = Signal.from_dict(await socket.recv_json())
-                my_subject.on_next(msg)
+                topic, payload = await socket.recv_multipart()
+                if wanted(topic):
+                    my_subject.on_next(codec.loads(payload, Signal))
         except Exception as ex:
             my_subject.on_error(ex)
         finally:
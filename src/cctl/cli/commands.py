@@ -3,26 +3,29 @@
 """This module defines all the CLI commands that CCTL uses."""
 
 import os
-import asyncio
 from asyncio.subprocess import create_subprocess_exec
 from argparse import Namespace
 import sys
-from typing import List, Literal, Optional, Tuple, Union
-from collections import deque
+from typing import Dict, List, Literal, Optional, Tuple, Union
 import itertools
-import warnings
 import time
 from cctl.ui import ManageApp
 from cctl.utils.algos import group_els, iterable_flatten
 from reactivex import operators as rxops
 from cctl.api.cctld import CCTLDClient, CCTLDCoachbotStateObservable, \
-    CCTLDRespBadRequest, CCTLDRespEx, CCTLDRespInvalidState
-from cctl.models import Coachbot
-from cctl.utils import parsers
+    CCTLDJobObservable, CCTLDRespBadRequest, CCTLDRespEx
+from cctl.models import Coachbot, Inventory
+from cctl.models.inventory import install as install_inventory
+from cctl.protocols import job
+from cctl.utils import parsers, transfer
+from cctl.utils.net import SSHPool
 from cctl.cli.command import cctl_command
 from cctl.conf import Configuration
 
 
+FETCH_OUTPUT_PATH = '/home/pi/experiment_output'
+HASH_CACHE_PATH = os.path.expanduser('~/.cache/coachswarm/file-hashes.json')
+
 ARGUMENT_ID = (['id'],
                {'metavar': 'N', 'type': str, 'nargs': '*',
                 'help': 'Target Robots. Format must be %%d, %%d-%%d or "all". '
@@ -66,49 +69,76 @@ def _output_errors_for_bots(
     return 1
 
 
-async def _boot_bot(args: Namespace, config: Configuration, on: bool) -> int:
-    # Let us query the number of bluetooth dongles. This will be the batch size
-    # we will use. Using a batch size of about 2*BT_DONGLES seems to work well.
-    async with CCTLDClient(config.cctld.request_host) as client:
-        cctld_config = await client.read_config()
-    n_dongles = cctld_config['bluetooth']['n_dongles']
+async def _read_inventory(client: CCTLDClient) -> Inventory:
+    """Fetches the inventory from **cctld** and installs it, so that
+    ``Coachbot`` addresses resolve against it."""
+    inventory = await client.read_inventory()
+    install_inventory(inventory)
+    return inventory
+
 
-    target_bots = ([Coachbot.stateless(id) for id in range(100)]
-                   if (t_arg := _parse_arg_id(args.id)) == 'all'
-                   else [Coachbot.stateless(bot) for bot in t_arg])
+def _output_batch_results(results: Dict[int, Optional[CCTLDRespEx]],
+                          op_msg: str) -> int:
+    if len(results) == 0:
+        print('No bots were targeted.', file=sys.stderr)
+        return 0
+    grouped_by_err = itertools.groupby(
+        group_els(((Coachbot.stateless(ident), error)
+                   for ident, error in results.items()),
+                  key=lambda x: x[1]),
+        lambda x: x[1])
+    return _output_errors_for_bots([(k, list(v)) for k, v in grouped_by_err],
+                                   op_msg)
 
-    progress_queue_size = min(len(target_bots), 2 * n_dongles)
 
-    boot_queue = deque(target_bots)
-    in_progress_queue = asyncio.Queue(progress_queue_size)
+def _batch_targets(
+    arg_ids: List[str],
+    default: Literal['all', 'on']
+) -> Union[List[Coachbot], Literal['all', 'on']]:
+    """Returns the bots targeted by the ``id`` argument, or ``default`` if
+    none or ``all`` were given."""
+    if len(arg_ids) == 0 or (targets := _parse_arg_id(arg_ids)) == 'all':
+        return default
+    return [Coachbot.stateless(bot) for bot in targets]
 
-    for _ in range(progress_queue_size):
-        in_progress_queue.put_nowait(boot_queue.pop())
 
-    async def boot_bot(
-        client: CCTLDClient,
-    ) -> Tuple[Coachbot, Optional[CCTLDRespEx]]:
-        bot = await in_progress_queue.get()
-        try:
-            await client.set_is_on(bot, on, force=args.force)
+async def _run_job(config: Configuration, kind: str,
+                   bots: Union[List[Coachbot], Literal['all', 'on']],
+                   op_msg: str, **fields) -> int:
+    """Submits a job, reports its progress as bots complete and outputs the
+    errors of every bot once the job completes."""
+    async with CCTLDClient(config.cctld.request_host) as client:
+        submitted = await client.submit_job(kind, bots, **fields)
 
-            if len(boot_queue) > 0:
-                await in_progress_queue.put(boot_queue.pop())
+    latest = submitted
 
-            return (bot, None)
-        except CCTLDRespEx as error:
-            return (bot, error)
+    def on_progress(state: job.Job):
+        nonlocal latest
+        latest = state
+        print(f'\r{op_msg.capitalize()}... '
+              f'{len(state.results)}/{len(state.identifiers)}',
+              end='', file=sys.stderr, flush=True)
 
-    async with CCTLDClient(config.cctld.request_host) as client:
-        results = await asyncio.gather(*(
-            boot_bot(client)
-            for _ in range(len(target_bots))
-        ))
+    def on_error(error: Exception):
+        print(f'\nLost track of job {submitted.job_id}: {error}',
+              file=sys.stderr)
 
-    grouped_by_err = itertools.groupby(
-            group_els(results, key=lambda x: x[1]), lambda x: x[1])
-    return _output_errors_for_bots([(k, list(v)) for k, v in grouped_by_err],
-                                   f'turning {"on" if on else "off"}')
+    progress, task = await CCTLDJobObservable(
+        config.cctld.state_feed_host, config.cctld.request_host,
+        submitted.job_id)
+    progress.subscribe(on_next=on_progress, on_error=on_error)
+    await task
+    print(file=sys.stderr)
+    return _output_batch_results(
+        {ident: CCTLDClient.error_for(result)
+         for ident, result in latest.results.items()}, op_msg)
+
+
+async def _boot_bot(args: Namespace, config: Configuration, on: bool) -> int:
+    return await _run_job(config, job.KIND_BOOT if on else job.KIND_SHUTDOWN,
+                          _batch_targets(args.id, 'all'),
+                          f'turning {"on" if on else "off"}',
+                          force=args.force)
 
 
 @cctl_command('on', arguments=[
@@ -146,107 +176,109 @@ async def off_handle(args: Namespace, config: Configuration) -> int:
 @cctl_command('start', arguments=[ARGUMENT_ID])
 async def start_handle(args: Namespace, config: Configuration) -> int:
     """Starts the user code on the specified coachbots."""
-    targets = _parse_arg_id(args.id) if len(args.id) != 0 else 'all'
-
     async with CCTLDClient(config.cctld.request_host) as client:
-        target_bots = [bot for bot in (Coachbot(i, state) for i, state in
-                       enumerate(await client.read_all_states())
-                       if state.is_on)] \
-                if targets == 'all' \
-                else [Coachbot.stateless(bot) for bot in targets]
-
-        await asyncio.gather(*(
-            client.set_user_code_running(bot, True) for bot in target_bots))
-        return 0
+        results = await client.set_bots_user_code_running(
+            _batch_targets(args.id, 'on'), True)
+    return _output_batch_results(results, 'starting')
 
 
 @cctl_command('pause', arguments=[ARGUMENT_ID])
 async def pause_handle(args: Namespace, config: Configuration) -> int:
     """Stops the user code on the specified coachbots."""
-    targets = _parse_arg_id(args.id) if len(args.id) != 0 else 'all'
-
     async with CCTLDClient(config.cctld.request_host) as client:
-        target_bots = [bot for bot in (Coachbot(i, state) for i, state in
-                       enumerate(await client.read_all_states())
-                       if state.is_on)] \
-                if targets == 'all' \
-                else [Coachbot.stateless(bot) for bot in targets]
-
-        await asyncio.gather(*(
-            client.set_user_code_running(bot, False) for bot in target_bots))
-        return 0
+        results = await client.set_bots_user_code_running(
+            _batch_targets(args.id, 'on'), False)
+    return _output_batch_results(results, 'pausing')
 
 
 @cctl_command('manage')
 async def manage_handle(_, conf: Configuration) -> int:
     """Spawns a management TUI."""
+    async with CCTLDClient(conf.cctld.request_host) as client:
+        inventory = await _read_inventory(client)
+
     data_stream, _ = await CCTLDCoachbotStateObservable(
-        conf.cctld.state_feed_host)
+        conf.cctld.state_feed_host, conf.cctld.request_host)
 
     app = ManageApp(
         data_stream.pipe(
             rxops.map(
-                lambda sts: [Coachbot(i, st) for i, st in enumerate(sts)]
+                lambda sts: [Coachbot(i, st) for i, st in sts.items()]
             )
-        )
+        ),
+        inventory.identifiers
     )
     await app.run_async()
     return 1
 
 
+async def _update_os(conf: Configuration, jobs: int) -> int:
+    """Uploads the files of the operating system which differ to every bot
+    which is on."""
+    async with CCTLDClient(conf.cctld.request_host) as client:
+        await _read_inventory(client)
+        on_bots = [Coachbot(i, state) for i, state
+                   in (await client.read_all_states(['is_on'])).items()
+                   if state.is_on]
+
+    source = conf.coachswarm.os_source_path
+    cache = transfer.HashCache(HASH_CACHE_PATH)
+    manifest = transfer.local_manifest(source, cache)
+    cache.save()
+
+    started = time.monotonic()
+    async with SSHPool(conf.coachswarm.ssh_user, conf.coachswarm.ssh_key,
+                       max_concurrency=jobs) as pool:
+        results = await transfer.sync(
+            pool, [bot.ip_address for bot in on_bots], source, manifest,
+            conf.coachswarm.os_remote_path)
+    elapsed = time.monotonic() - started
+
+    failed = 0
+    for bot in on_bots:
+        result = results[bot.ip_address]
+        if result.error is not None:
+            failed += 1
+            print(f'{bot.identifier}\tFailed: {result.error}',
+                  file=sys.stderr)
+    uploaded = sum(result.stats.bytes for result in results.values())
+    print(f'Updated the operating system of {len(on_bots) - failed}/'
+          f'{len(on_bots)} bots in {elapsed:.1f}s, uploading '
+          f'{uploaded / 2 ** 20:.2f} MiB of changed files.', file=sys.stderr)
+    return 1 if failed else 0
+
+
 @cctl_command('update', arguments=[
     (['--operating-system', '-o'], {
         'dest': 'os_update', 'help': 'Also Update The Operating System',
         'action': 'store_true', 'default': False
     }),
+    (['-f', '--force'], {
+        'help': 'Send the code even to bots which already hold it.',
+        'action': 'store_true',
+        'required': False
+    }),
+    (['--jobs', '-j'], {
+        'dest': 'jobs', 'type': int, 'default': 16,
+        'help': 'The number of bots to update the operating system of at '
+                'once.'
+    }),
     (['usr_path'], {
         'metavar': 'PATH', 'type': str, 'nargs': 1,
         'help': 'The path to the user code.'
     })
 ])
 async def update_handler(args: Namespace, conf: Configuration) -> int:
-    """Updates the code on all robots."""
-    if args.os_update:  # TODO: This whole handler is garbage
-        warnings.warn('This API is not supported unless you are running '
-                      'on the control laptop. This is subject to change. '
-                      'Proceeding.')
-        async with CCTLDClient(conf.cctld.request_host) as client:
-            on_bots = [Coachbot(i, state) for i, state
-                       in enumerate(await client.read_all_states())
-                       if state.is_on]
-        for bot in on_bots:
-            cmd = ('scp -r /home/hanlin/coach/server_beta/temp/* '
-                   f'pi@{bot.ip_address}:~/control')
-            print(cmd)
-            os.system(cmd)
+    """Updates the code on all robots. With ``-o``, the operating system of
+    every bot which is on is also brought in line with the local copy, only
+    uploading the files which differ."""
+    os_status = await _update_os(conf, args.jobs) if args.os_update else 0
 
     with open(os.path.abspath(args.usr_path[0]), 'r') as source_f:
         source = source_f.read()
 
-    async def update_bot(client: CCTLDClient,
-                         bot: Coachbot) -> Tuple[Coachbot,
-                                                 Optional[CCTLDRespEx]]:
-        try:
-            await client.update_user_code(bot, source)
-            return (bot, None)
-        except CCTLDRespEx as error:
-            return (bot, error)
-
-    async with CCTLDClient(conf.cctld.request_host) as client:
-        target_bots = [
-            Coachbot(id, state)
-            for id, state in enumerate(await client.read_all_states())
-            if state.is_on
-        ]
-        results = await asyncio.gather(*(
-            update_bot(client, bot)
-            for bot in target_bots
-        ))
-
-    grouped_by_err = itertools.groupby(
-        group_els(results, key=lambda x: x[1]), lambda x: x[1])
-    return _output_errors_for_bots([(k, list(v)) for k, v in grouped_by_err],
-                                   'updating')
+    return await _run_job(conf, job.KIND_DEPLOY, 'on', 'updating',
+                          code=source, force=args.force) or os_status
 
 
 @cctl_command('cam.preview')
@@ -274,6 +306,26 @@ async def cam_info_handler(args: Namespace, conf: Configuration) -> int:
     return 0
 
 
+@cctl_command('ble.presence')
+async def ble_presence_handler(args: Namespace, conf: Configuration) -> int:
+    """Lists the Bluefruit boards cctld recently heard advertising. Boards
+    whose bot is not in the inventory are listed without an ID."""
+    async with CCTLDClient(conf.cctld.request_host) as client:
+        try:
+            sightings = await client.read_presence()
+        except CCTLDRespEx as ex:
+            print(f'Could not read the present bots. The error is {ex}',
+                  file=sys.stderr)
+            return -1
+
+    print('ID\tMAC\t\t\tRSSI\tAGE')
+    for sighting in sightings:
+        ident = '-' if sighting.identifier is None else sighting.identifier
+        print(f'{ident}\t{sighting.mac_address}\t{sighting.rssi}\t'
+              f'{sighting.age:.1f}s')
+    return 0
+
+
 @cctl_command('charger.on')
 async def charger_on_handler(args: Namespace, conf: Configuration) -> int:
     """Turns on the rail."""
@@ -313,26 +365,17 @@ async def charger_off_handler(args: Namespace, conf: Configuration) -> int:
 )
 async def led_handler(args: Namespace, conf: Configuration) -> int:
     """Sets the color of the LED."""
-    targets = _parse_arg_id(args.id)
     color_str = str(args.color)
 
     try:
         async with CCTLDClient(conf.cctld.request_host) as client:
-            target_bots = [bot for bot in (Coachbot(i, state) for i, state in
-                           enumerate(await client.read_all_states()))] \
-                    if targets == 'all' \
-                    else [Coachbot.stateless(bot) for bot in targets]
-
-            await asyncio.gather(*(
-                client.set_led_color(bot, color_str) for bot in target_bots))
-            return 0
-    except CCTLDRespInvalidState as err_state:
-        print(f'Error setting LED: {err_state}', file=sys.stderr)
-        return 1
+            results = await client.set_bots_led_color(
+                _batch_targets(args.id, 'on'), color_str)
     except CCTLDRespBadRequest:
         print(f'{color_str} does not appear to be a valid color.',
               file=sys.stderr)
         return 1
+    return _output_batch_results(results, 'setting the LED of')
 
 
 @cctl_command(
@@ -344,17 +387,22 @@ async def led_handler(args: Namespace, conf: Configuration) -> int:
             'help': 'Specify the output directory. Will be created if it does '
                     'not exist.',
             'action': 'store'
+        }),
+        (['--jobs', '-j'], {
+            'dest': 'jobs', 'type': int, 'default': 16,
+            'help': 'The number of bots to fetch from at once.'
+        }),
+        (['--compress', '-z'], {
+            'help': 'Compress the output on the bots. Compressed transfers '
+                    'cannot be resumed.',
+            'action': 'store_true', 'default': False
         })
     ]
 )
 async def fetch_output_handler(args: Namespace, conf: Configuration) -> int:
     """Fetches the output of the last experiment. The target coachbot must be
-    paused.
+    paused. Running it again resumes an interrupted fetch.
     """
-    warnings.warn('This API is not supported unless you are running '
-                  'on the control laptop. This command is subject to change. '
-                  'Proceeding.')
-
     targets = _parse_arg_id(args.id)
     output_dir = str(
         args.output_dir or
@@ -366,11 +414,12 @@ async def fetch_output_handler(args: Namespace, conf: Configuration) -> int:
 
     try:
         async with CCTLDClient(conf.cctld.request_host) as client:
+            await _read_inventory(client)
             # Select all coachbots which are on and not running if 'all' is the
             # query string.
             target_bots = (
                 [b for b in (Coachbot(i, state) for i, state in
-                 enumerate(await client.read_all_states()))
+                 (await client.read_all_states()).items())
                  if b.state.is_on]
                 if targets == 'all'
                 else [Coachbot.stateless(bot) for bot in targets]
@@ -379,10 +428,32 @@ async def fetch_output_handler(args: Namespace, conf: Configuration) -> int:
         print('Could not communicate with cctld.', file=sys.stderr)
         return 1
 
-    for bot in target_bots:
-        cmd = (f'scp -r pi@{bot.ip_address}:/home/pi/experiment_output '
-               f'{output_dir}/{bot.identifier}.txt')
-        print(cmd)
-        os.system(cmd)
+    extension = 'tar.gz' if args.compress else 'txt'
+    started = time.monotonic()
+    async with SSHPool(conf.coachswarm.ssh_user, conf.coachswarm.ssh_key,
+                       max_concurrency=args.jobs) as pool:
+        results = await transfer.fetch(pool, {
+            bot.ip_address:
+                os.path.join(output_dir, f'{bot.identifier}.{extension}')
+            for bot in target_bots
+        }, FETCH_OUTPUT_PATH, compress=args.compress)
+    elapsed = time.monotonic() - started
 
-    return 0
+    failed = 0
+    for bot in target_bots:
+        result = results[bot.ip_address]
+        if result.error is not None:
+            failed += 1
+            print(f'{bot.identifier}\tFailed: {result.error}',
+                  file=sys.stderr)
+            continue
+        print(f'{bot.identifier}\t{result.stats.files} files\t'
+              f'{result.stats.bytes / 2 ** 20:.2f} MiB\t'
+              f'{result.stats.throughput / 2 ** 20:.2f} MiB/s')
+
+    total = sum(result.stats.bytes for result in results.values())
+    print(f'Fetched {total / 2 ** 20:.2f} MiB from '
+          f'{len(target_bots) - failed}/{len(target_bots)} bots in '
+          f'{elapsed:.1f}s ({total / 2 ** 20 / max(elapsed, 1e-9):.2f} '
+          'MiB/s).', file=sys.stderr)
+    return 1 if failed else 0
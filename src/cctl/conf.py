@@ -32,6 +32,32 @@ class Configuration:
         def state_feed_host(self) -> str:
             return config.get('cctld', 'state_feed_host')
 
+    class Coachswarm:
+        @property
+        def ssh_user(self) -> str:
+            return config.get('coachswarm', 'ssh_user', fallback='pi')
+
+        @property
+        def ssh_key(self) -> str:
+            return os.path.expanduser(
+                config.get('coachswarm', 'ssh_key',
+                           fallback='~/.ssh/id_coachbot'))
+
+        @property
+        def os_source_path(self) -> str:
+            return os.path.expanduser(
+                config.get('coachswarm', 'os_source_path',
+                           fallback='/home/hanlin/coach/server_beta/temp'))
+
+        @property
+        def os_remote_path(self) -> str:
+            return config.get('coachswarm', 'os_remote_path',
+                              fallback='control')
+
     @property
     def cctld(self) -> 'Configuration.CCTLD':
         return Configuration.CCTLD()
+
+    @property
+    def coachswarm(self) -> 'Configuration.Coachswarm':
+        return Configuration.Coachswarm()
@@ -1,5 +1,7 @@
 #!/usr/bin/env python
 
 from .coachbot import CoachbotState, Coachbot, UserCodeState, Signal
+from .inventory import Inventory, InventoryEntry
 
-__all__ = ['CoachbotState', 'Coachbot', 'UserCodeState', 'Signal']
+__all__ = ['CoachbotState', 'Coachbot', 'UserCodeState', 'Signal',
+           'Inventory', 'InventoryEntry']
@@ -1,16 +1,12 @@
 #!/usr/bin/env python
 
+import hashlib
 import json
-import importlib.resources as pkg_resources
 from typing import Dict, Any, Optional
-from dataclasses import dataclass, asdict
+from dataclasses import dataclass, asdict, field
 
+from cctl.models import inventory
 from cctl.utils.math import Vec2
-import cctl_static
-
-
-COACHBOT_MAC_ADDRESSES = pkg_resources.read_text(
-    cctl_static, 'coachbot_btle_mac_addresses').split('\n')
 
 
 @dataclass
@@ -22,19 +18,23 @@ class Coachbot:
 
     @property
     def ip_address(self) -> str:
-        """Returns the ip address of this coachbot.
+        """Returns the ip address of this coachbot, according to the installed
+        ``cctl.models.inventory.Inventory``.
 
-        Todo:
-            This implementation may not necessarilly be robust if the network
-            changes.
+        Raises:
+            KeyError: If the coachbot is not in the inventory.
         """
-        # TODO: Not robust
-        return f'192.168.1.{self.identifier + 3}'
+        return inventory.current().ip_address(self.identifier)
 
     @property
     def bluetooth_mac_address(self) -> str:
-        """Returns the mac address of this coachbot's bluetooth module."""
-        return COACHBOT_MAC_ADDRESSES[self.identifier]
+        """Returns the mac address of this coachbot's bluetooth module,
+        according to the installed ``cctl.models.inventory.Inventory``.
+
+        Raises:
+            KeyError: If the coachbot is not in the inventory.
+        """
+        return inventory.current().mac_address(self.identifier)
 
     @staticmethod
     def stateless(identifier: int) -> 'Coachbot':
@@ -42,19 +42,53 @@ class Coachbot:
         return Coachbot(identifier, CoachbotState(None))
 
 
+def user_code_hash(user_code: str) -> str:
+    """Returns the content hash identifying a user code: the hex SHA-256 of
+    its UTF-8 encoding."""
+    return hashlib.sha256(user_code.encode('utf-8')).hexdigest()
+
+
+def normalize_user_code_hash(code_hash: Optional[str]) -> Optional[str]:
+    """Returns the given user code hash in lowercase, or ``None`` if it is
+    not the hex SHA-256 of a user code (see ``user_code_hash``). Bots report
+    the hash of their user code, which cannot be trusted to be well-formed.
+    """
+    if code_hash is None or len(code_hash) != 2 * hashlib.sha256().digest_size:
+        return None
+    try:
+        bytes.fromhex(code_hash)
+    except ValueError:
+        return None
+    return code_hash.lower()
+
+
 @dataclass
 class UserCodeState:
-    """Represents the state of user code."""
+    """Represents the state of user code.
+
+    **cctld** only publishes the ``user_code_hash`` of the user code (see
+    ``user_code_hash``), leaving ``user_code`` as ``None``, so that the full
+    source does not travel with every state.
+    """
     is_running: Optional[bool] = None
     version: Optional[str] = None
     name: Optional[str] = None
     author: Optional[str] = None
     requires_version: Optional[str] = None
     user_code: Optional[str] = None
+    user_code_hash: Optional[str] = None
 
     def to_dict(self) -> Dict[str, Any]:
         """Converts this object to a dictionary."""
-        return asdict(self)
+        return {
+            'is_running': self.is_running,
+            'version': self.version,
+            'name': self.name,
+            'author': self.author,
+            'requires_version': self.requires_version,
+            'user_code': self.user_code,
+            'user_code_hash': self.user_code_hash
+        }
 
     @staticmethod
     def from_dict(as_dict) -> 'UserCodeState':
@@ -70,7 +104,7 @@ class CoachbotState:
     bat_voltage: Optional[float] = None
     position: Optional[Vec2] = None
     theta: Optional[float] = None
-    user_code_state: UserCodeState = UserCodeState()
+    user_code_state: UserCodeState = field(default_factory=UserCodeState)
 
     def serialize(self) -> str:
         """Converts the StatusMessage into a serialized form.
@@ -88,10 +122,13 @@ class CoachbotState:
                 serialized.
         """
         return {
-            **asdict(self),
-            'user_code_state': self.user_code_state.to_dict(),
-            'position': [self.position.x, self.position.y]
-            if self.position is not None else None
+            'is_on': self.is_on,
+            'os_version': self.os_version,
+            'bat_voltage': self.bat_voltage,
+            'position': [float(self.position.x), float(self.position.y)]
+            if self.position is not None else None,
+            'theta': self.theta,
+            'user_code_state': self.user_code_state.to_dict()
         }
 
     @staticmethod
@@ -0,0 +1,210 @@
+#!/usr/bin/env python
+
+"""This module defines the ``Inventory``, the list of all ``Coachbots`` that
+exist in the arena along with their network and bluetooth addresses.
+
+The inventory is loaded once, at startup, by **cctld** from a CSV file of the
+form:
+
+.. code-block:: text
+
+   # identifier,ip_address,mac_address
+   0,192.168.1.3,e2:21:04:b6:49:cc
+   1,192.168.1.4,ef:65:2b:0b:7d:3e
+   250,192.168.2.3,d1:0b:5c:94:90:6b
+
+Identifiers need not be contiguous. If no inventory is configured, the legacy
+fleet of 100 bots is used. Clients fetch the inventory from **cctld** via
+``read /inventory``.
+
+The inventory in use by this process is installed with ``install`` and is what
+``Coachbot.ip_address`` and ``Coachbot.bluetooth_mac_address`` resolve against.
+"""
+
+import csv
+import importlib.resources as pkg_resources
+import json
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import cctl_static
+
+
+__author__ = 'Marko Vejnovic <contact@markovejnovic.com>'
+__copyright__ = 'Copyright 2022, Northwestern University'
+__credits__ = ['Marko Vejnovic', 'Lin Liu', 'Billie Strong']
+__license__ = 'Proprietary'
+__version__ = '0.6.0'
+__maintainer__ = 'Marko Vejnovic'
+__email__ = 'contact@markovejnovic.com'
+__status__ = 'Development'
+
+
+LEGACY_FLEET_SIZE = 100
+
+
+@dataclass(frozen=True)
+class InventoryEntry:
+    """Represents a single ``Coachbot`` in the inventory.
+
+    Attributes:
+        identifier (int): The identifier of the bot.
+        ip_address (str): The IP address of the bot.
+        mac_address (Optional[str]): The MAC address of the bluetooth module
+            of the bot, if it has one.
+    """
+    identifier: int
+    ip_address: str
+    mac_address: Optional[str] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Converts this object into a dictionary."""
+        return {
+            'identifier': self.identifier,
+            'ip_address': self.ip_address,
+            'mac_address': self.mac_address
+        }
+
+    @staticmethod
+    def from_dict(as_dict: Dict[str, Any]) -> 'InventoryEntry':
+        """Creates an InventoryEntry from a dictionary."""
+        return InventoryEntry(int(as_dict['identifier']),
+                              as_dict['ip_address'],
+                              as_dict.get('mac_address'))
+
+
+class Inventory:
+    """Holds every ``Coachbot`` of the arena, indexed by its identifier.
+
+    Parameters:
+        entries (Iterable[InventoryEntry]): The bots in the arena.
+
+    Raises:
+        ValueError: If an identifier appears more than once.
+    """
+    def __init__(self, entries: Iterable[InventoryEntry]) -> None:
+        self._entries: Dict[int, InventoryEntry] = {}
+        for entry in sorted(entries, key=lambda entry: entry.identifier):
+            if entry.identifier in self._entries:
+                raise ValueError(
+                    f'Bot {entry.identifier} is in the inventory twice.')
+            self._entries[entry.identifier] = entry
+        self._identifiers = tuple(self._entries)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __iter__(self) -> Iterator[InventoryEntry]:
+        return iter(self._entries.values())
+
+    def __contains__(self, identifier: object) -> bool:
+        return identifier in self._entries
+
+    def __getitem__(self, identifier: int) -> InventoryEntry:
+        """Returns the entry of the given bot.
+
+        Raises:
+            KeyError: If the bot is not in the inventory.
+        """
+        return self._entries[identifier]
+
+    def __eq__(self, other: object) -> bool:
+        return isinstance(other, Inventory) and \
+            self._entries == other._entries
+
+    @property
+    def identifiers(self) -> Tuple[int, ...]:
+        """Returns the identifiers of all bots, in ascending order."""
+        return self._identifiers
+
+    def ip_address(self, identifier: int) -> str:
+        """Returns the IP address of the given bot.
+
+        Raises:
+            KeyError: If the bot is not in the inventory.
+        """
+        return self._entries[identifier].ip_address
+
+    def mac_address(self, identifier: int) -> str:
+        """Returns the bluetooth MAC address of the given bot.
+
+        Raises:
+            KeyError: If the bot is not in the inventory or has no bluetooth
+                module.
+        """
+        if (mac := self._entries[identifier].mac_address) is None:
+            raise KeyError(f'Bot {identifier} has no bluetooth MAC address.')
+        return mac
+
+    def to_dict(self) -> List[Dict[str, Any]]:
+        """Converts this object into a list ready for serialization."""
+        return [entry.to_dict() for entry in self]
+
+    def serialize(self) -> str:
+        """Converts this inventory into a JSON string."""
+        return json.dumps(self.to_dict())
+
+    @staticmethod
+    def from_dict(as_list: List[Dict[str, Any]]) -> 'Inventory':
+        """Creates an Inventory from a list of dictionaries."""
+        return Inventory(InventoryEntry.from_dict(entry) for entry in as_list)
+
+    @staticmethod
+    def deserialize(data: str) -> 'Inventory':
+        """Creates an Inventory from a JSON string."""
+        return Inventory.from_dict(json.loads(data))
+
+    @staticmethod
+    def load(path: str) -> 'Inventory':
+        """Loads an inventory from a CSV file. Empty lines and lines starting
+        with ``#`` are ignored.
+
+        Raises:
+            ValueError: If the file is malformed.
+        """
+        entries = []
+        with open(path, 'r', newline='') as inventory_f:
+            for line_no, row in enumerate(csv.reader(inventory_f), 1):
+                if not row or row[0].lstrip().startswith('#'):
+                    continue
+                row = [column.strip() for column in row]
+                if len(row) not in (2, 3):
+                    raise ValueError(f'{path}:{line_no}: Expected '
+                                     'identifier,ip_address[,mac_address].')
+                try:
+                    identifier = int(row[0])
+                except ValueError as err:
+                    raise ValueError(f'{path}:{line_no}: {err}') from err
+                entries.append(InventoryEntry(
+                    identifier, row[1],
+                    row[2] if len(row) == 3 and row[2] else None))
+        return Inventory(entries)
+
+    @staticmethod
+    def legacy() -> 'Inventory':
+        """Returns the legacy inventory of ``LEGACY_FLEET_SIZE`` bots with
+        contiguous identifiers, where bot ``i`` has the IP address
+        ``192.168.1.{i + 3}``."""
+        macs = pkg_resources.read_text(
+            cctl_static, 'coachbot_btle_mac_addresses').split('\n')
+        return Inventory(
+            InventoryEntry(i, f'192.168.1.{i + 3}', macs[i])
+            for i in range(LEGACY_FLEET_SIZE))
+
+
+_installed: Optional[Inventory] = None
+
+
+def install(inventory: Inventory) -> None:
+    """Installs the inventory used by this process."""
+    global _installed  # pylint: disable=global-statement
+    _installed = inventory
+
+
+def current() -> Inventory:
+    """Returns the inventory used by this process. If none was installed, the
+    legacy inventory is installed."""
+    if _installed is None:
+        install(Inventory.legacy())
+    assert _installed is not None
+    return _installed
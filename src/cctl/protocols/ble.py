@@ -1,6 +1,7 @@
 #!/usr/bin/env python
 
 from dataclasses import dataclass
+from typing import Any, Dict, Optional
 
 
 class BluefruitProtocolError(Exception):
@@ -32,3 +33,36 @@ class BluefruitMode:
             raise BluefruitProtocolError('Invalid Response Value.')
 
         return BluefruitMode(response[0] == '1')
+
+
+@dataclass
+class Sighting:
+    """Represents the last advertisement received from a Bluefruit board, as
+    returned by ``read /bluetooth/presence``.
+
+    Attributes:
+        mac_address (str): The lowercase MAC address of the board.
+        rssi (int): The signal strength of the advertisement, in dBm.
+        age (float): The number of seconds since the advertisement.
+        identifier (Optional[int]): The bot the board belongs to, or ``None``
+            if its MAC address is not in the inventory.
+    """
+    mac_address: str
+    rssi: int
+    age: float
+    identifier: Optional[int] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Converts this object into a dictionary."""
+        return {
+            'mac_address': self.mac_address,
+            'rssi': self.rssi,
+            'age': self.age,
+            'identifier': self.identifier
+        }
+
+    @staticmethod
+    def from_dict(as_dict: Dict[str, Any]) -> 'Sighting':
+        """Creates a Sighting from a dictionary."""
+        return Sighting(as_dict['mac_address'], int(as_dict['rssi']),
+                        float(as_dict['age']), as_dict.get('identifier'))
@@ -0,0 +1,470 @@
+#!/usr/bin/env python
+
+"""This module defines the compact binary encoding used on the wire between
+coach-os, **cctld** and its API consumers.
+
+Every binary message starts with a header byte of the form ``0b10vvvvvv``,
+where ``v`` is the codec version, followed by a type tag byte. Because no
+UTF-8 string (and hence no JSON document) can start with such a byte, decoders
+can sniff whether a message is binary or JSON and JSON remains available for
+debugging on every path.
+
+The layout of a ``CoachbotState`` is a ``uint16`` bitfield marking which of
+the optional fields are present (and the values of the boolean fields),
+followed by the numeric fields as ``float64`` (zeroed when absent), the byte
+lengths of the strings and finally the strings themselves. This fixed-size
+head is unpacked in a single call. Since version 2, the strings may be
+followed by the 32-byte SHA-256 content hash of the user code. All integers
+are little-endian. Messages of version 1, which never hold the hash, are
+still decoded.
+
+Example:
+
+.. code-block:: python
+
+   data = codec.dumps(state, codec.ENCODING_BINARY)
+   assert codec.loads(data, CoachbotState) == state
+"""
+
+import base64
+import binascii
+import json
+import struct
+from typing import (Any, Callable, Dict, List, Optional, Tuple, Type, TypeVar,
+                    Union)
+
+from cctl.models import CoachbotState, Signal, UserCodeState
+from cctl.protocols import feed, status
+from cctl.utils.math import Vec2
+
+
+__author__ = 'Marko Vejnovic <contact@markovejnovic.com>'
+__copyright__ = 'Copyright 2022, Northwestern University'
+__credits__ = ['Marko Vejnovic', 'Lin Liu', 'Billie Strong']
+__license__ = 'Proprietary'
+__version__ = '0.6.0'
+__maintainer__ = 'Marko Vejnovic'
+__email__ = 'contact@markovejnovic.com'
+__status__ = 'Development'
+
+
+VERSION = 2
+_SUPPORTED_VERSIONS = (1, 2)
+ENCODING_JSON = 'json'
+ENCODING_BINARY = 'binary'
+ENCODINGS = (ENCODING_JSON, ENCODING_BINARY)
+
+_HEADER = 0x80 | VERSION
+
+_TAG_STATE = b'S'[0]
+_TAG_USER_CODE_STATE = b'U'[0]
+_TAG_SIGNAL = b'G'[0]
+_TAG_STATES = b'F'[0]
+_TAG_STATUS_REQUEST = b'R'[0]
+_TAG_FEED_MESSAGE = b'D'[0]
+
+_FEED_KINDS = (feed.KIND_DELTA, feed.KIND_KEYFRAME)
+_STATUS_TYPES = ('state', 'signal')
+
+# CoachbotState presence/value bits.
+_IS_ON = 1 << 0
+_IS_ON_VALUE = 1 << 1
+_BAT_VOLTAGE = 1 << 2
+_POSITION = 1 << 3
+_THETA = 1 << 4
+_IS_RUNNING = 1 << 5
+_IS_RUNNING_VALUE = 1 << 6
+_OS_VERSION = 1 << 7
+_UC_VERSION = 1 << 8
+_UC_NAME = 1 << 9
+_UC_AUTHOR = 1 << 10
+_UC_REQUIRES_VERSION = 1 << 11
+_UC_USER_CODE = 1 << 12
+_UC_USER_CODE_HASH = 1 << 13
+_STRINGS = (_OS_VERSION | _UC_VERSION | _UC_NAME | _UC_AUTHOR |
+            _UC_REQUIRES_VERSION | _UC_USER_CODE)
+
+_HASH_SIZE = 32
+_U16 = struct.Struct('<H')
+_U32 = struct.Struct('<I')
+_PREAMBLE = struct.Struct('<BB')
+_FEED_PREAMBLE = struct.Struct('<QBI')
+_STATUS_PREAMBLE = struct.Struct('<IB')
+# The fixed part of a CoachbotState: the flags, bat_voltage, position.x,
+# position.y and theta (zeroed when absent) and the byte lengths of the six
+# optional strings (zero when absent), so that it is unpacked in one go.
+_STATE_FIXED = struct.Struct('<HddddHHHHHI')
+
+# The presence bits of the optional strings of a CoachbotState, in wire order.
+# The first one belongs to the CoachbotState, the rest to its UserCodeState.
+_STATE_STRINGS = (_OS_VERSION, _UC_VERSION, _UC_NAME, _UC_AUTHOR,
+                  _UC_REQUIRES_VERSION, _UC_USER_CODE)
+_NO_STRINGS = (None,) * len(_STATE_STRINGS)
+
+T = TypeVar('T')
+
+
+class CodecError(ValueError):
+    """Raised when a message cannot be encoded or decoded."""
+
+
+def is_binary(data: Union[bytes, bytearray, memoryview]) -> bool:
+    """Returns whether the given message is binary-encoded, as opposed to
+    being JSON."""
+    return len(data) > 0 and data[0] & 0xC0 == 0x80
+
+
+def _pack_str(out: bytearray, value: str, length: struct.Struct) -> None:
+    encoded = value.encode('utf-8')
+    out += length.pack(len(encoded))
+    out += encoded
+
+
+def _unpack_str(buf: bytes, offset: int,
+                length: struct.Struct) -> Tuple[str, int]:
+    (size,) = length.unpack_from(buf, offset)
+    offset += length.size
+    return buf[offset:offset + size].decode('utf-8'), offset + size
+
+
+def _encode_strings(values: Tuple[Optional[str], ...]
+                    ) -> Tuple[int, List[bytes]]:
+    """Returns the presence flags and UTF-8 encodings of the given
+    ``_STATE_STRINGS``."""
+    flags = 0
+    encoded = []
+    for bit, value in zip(_STATE_STRINGS, values):
+        if value is not None:
+            flags |= bit
+            encoded.append(value.encode('utf-8'))
+        else:
+            encoded.append(b'')
+    return flags, encoded
+
+
+def _decode_strings(buf: bytes, offset: int, flags: int,
+                    sizes: Tuple[int, ...]
+                    ) -> Tuple[Tuple[Optional[str], ...], int]:
+    if not flags & _STRINGS:
+        return _NO_STRINGS, offset
+    values: List[Optional[str]] = []
+    for bit, size in zip(_STATE_STRINGS, sizes):
+        if flags & bit:
+            values.append(buf[offset:offset + size].decode('utf-8'))
+            offset += size
+        else:
+            values.append(None)
+    return tuple(values), offset
+
+
+def _is_running_flags(ucs: UserCodeState) -> int:
+    if ucs.is_running is None:
+        return 0
+    return _IS_RUNNING | (_IS_RUNNING_VALUE if ucs.is_running else 0)
+
+
+def _user_code_state(flags: int, strings: Tuple[Optional[str], ...],
+                     code_hash: Optional[str]) -> UserCodeState:
+    return UserCodeState(
+        bool(flags & _IS_RUNNING_VALUE) if flags & _IS_RUNNING else None,
+        strings[1], strings[2], strings[3], strings[4], strings[5],
+        code_hash)
+
+
+def _pack_hash(code_hash: str) -> bytes:
+    try:
+        packed = bytes.fromhex(code_hash)
+    except ValueError:
+        packed = b''
+    if len(packed) != _HASH_SIZE:
+        raise CodecError(f'{code_hash!r} is not a SHA-256 user code hash.')
+    return packed
+
+
+def _pack_state(out: bytearray, state: CoachbotState) -> None:
+    ucs = state.user_code_state
+    code_hash = None
+    if ucs.user_code_hash is not None:
+        code_hash = _pack_hash(ucs.user_code_hash)
+    flags, strings = _encode_strings((
+        state.os_version, ucs.version, ucs.name, ucs.author,
+        ucs.requires_version, ucs.user_code))
+    flags |= _is_running_flags(ucs)
+    if code_hash is not None:
+        flags |= _UC_USER_CODE_HASH
+    if state.is_on is not None:
+        flags |= _IS_ON | (_IS_ON_VALUE if state.is_on else 0)
+    if (bat_voltage := state.bat_voltage) is not None:
+        flags |= _BAT_VOLTAGE
+    else:
+        bat_voltage = 0.0
+    if (position := state.position) is not None:
+        flags |= _POSITION
+        x, y = position.x, position.y
+    else:
+        x = y = 0.0
+    if (theta := state.theta) is not None:
+        flags |= _THETA
+    else:
+        theta = 0.0
+
+    out += _STATE_FIXED.pack(flags, bat_voltage, x, y, theta,
+                             *(len(string) for string in strings))
+    for string in strings:
+        out += string
+    if code_hash is not None:
+        out += code_hash
+
+
+def _unpack_state(buf: bytes, offset: int) -> Tuple[CoachbotState, int]:
+    flags, bat_voltage, x, y, theta, *sizes = \
+        _STATE_FIXED.unpack_from(buf, offset)
+    strings, offset = _decode_strings(buf, offset + _STATE_FIXED.size,
+                                      flags, sizes)
+    code_hash = None
+    if flags & _UC_USER_CODE_HASH:
+        if offset + _HASH_SIZE > len(buf):
+            raise IndexError('The user code hash is truncated.')
+        code_hash = buf[offset:offset + _HASH_SIZE].hex()
+        offset += _HASH_SIZE
+    return CoachbotState(
+        bool(flags & _IS_ON_VALUE) if flags & _IS_ON else None,
+        strings[0],
+        bat_voltage if flags & _BAT_VOLTAGE else None,
+        Vec2(x, y) if flags & _POSITION else None,
+        theta if flags & _THETA else None,
+        _user_code_state(flags, strings, code_hash)
+    ), offset
+
+
+def _pack_states(out: bytearray, states: Dict[int, CoachbotState]) -> None:
+    out += _U32.pack(len(states))
+    for ident, state in states.items():
+        out += _U32.pack(ident)
+        _pack_state(out, state)
+
+
+def _unpack_states(buf: bytes,
+                   offset: int) -> Tuple[Dict[int, CoachbotState], int]:
+    (count,) = _U32.unpack_from(buf, offset)
+    offset += _U32.size
+    states = {}
+    for _ in range(count):
+        (ident,) = _U32.unpack_from(buf, offset)
+        states[ident], offset = _unpack_state(buf, offset + _U32.size)
+    return states, offset
+
+
+def _pack_signal(out: bytearray, signal: Signal) -> None:
+    _pack_str(out, signal.name, _U16)
+    _pack_str(out, json.dumps(signal.body), _U32)
+
+
+def _unpack_signal(buf: bytes, offset: int) -> Tuple[Signal, int]:
+    name, offset = _unpack_str(buf, offset, _U16)
+    body, offset = _unpack_str(buf, offset, _U32)
+    return Signal(name, json.loads(body)), offset
+
+
+def encode_state(state: CoachbotState) -> bytes:
+    """Encodes a ``CoachbotState`` into its binary form."""
+    out = bytearray(_PREAMBLE.pack(_HEADER, _TAG_STATE))
+    _pack_state(out, state)
+    return bytes(out)
+
+
+def encode_user_code_state(ucs: UserCodeState) -> bytes:
+    """Encodes a ``UserCodeState`` into its binary form."""
+    out = bytearray(_PREAMBLE.pack(_HEADER, _TAG_USER_CODE_STATE))
+    _pack_state(out, CoachbotState(user_code_state=ucs))
+    return bytes(out)
+
+
+def encode_signal(signal: Signal) -> bytes:
+    """Encodes a ``Signal`` into its binary form. The signal body is encoded
+    as JSON within the binary message, as it is free-form."""
+    out = bytearray(_PREAMBLE.pack(_HEADER, _TAG_SIGNAL))
+    _pack_signal(out, signal)
+    return bytes(out)
+
+
+def encode_states(states: Dict[int, CoachbotState]) -> bytes:
+    """Encodes a dictionary of ``CoachbotState`` objects, keyed by the bot
+    identifier, into its binary form."""
+    out = bytearray(_PREAMBLE.pack(_HEADER, _TAG_STATES))
+    _pack_states(out, states)
+    return bytes(out)
+
+
+def encode_status_request(request: status.Request) -> bytes:
+    """Encodes a ``cctl.protocols.status.Request`` into its binary form."""
+    out = bytearray(_PREAMBLE.pack(_HEADER, _TAG_STATUS_REQUEST))
+    out += _STATUS_PREAMBLE.pack(request.identifier,
+                                 _STATUS_TYPES.index(request.type))
+    if isinstance(request.body, CoachbotState):
+        _pack_state(out, request.body)
+    else:
+        _pack_signal(out, request.body)
+    return bytes(out)
+
+
+def encode_feed_message(message: feed.StateFeedMessage) -> bytes:
+    """Encodes a ``cctl.protocols.feed.StateFeedMessage`` into its binary
+    form."""
+    out = bytearray(_PREAMBLE.pack(_HEADER, _TAG_FEED_MESSAGE))
+    out += _FEED_PREAMBLE.pack(message.seq, _FEED_KINDS.index(message.kind),
+                               message.merged)
+    _pack_states(out, message.states)
+    return bytes(out)
+
+
+def _decode_user_code_state(buf: bytes,
+                            offset: int) -> Tuple[UserCodeState, int]:
+    state, offset = _unpack_state(buf, offset)
+    return state.user_code_state, offset
+
+
+def _decode_status_request(buf: bytes,
+                           offset: int) -> Tuple[status.Request, int]:
+    identifier, req_type = _STATUS_PREAMBLE.unpack_from(buf, offset)
+    offset += _STATUS_PREAMBLE.size
+    body: Union[CoachbotState, Signal]
+    if _STATUS_TYPES[req_type] == 'state':
+        body, offset = _unpack_state(buf, offset)
+    else:
+        body, offset = _unpack_signal(buf, offset)
+    return status.Request(identifier, _STATUS_TYPES[req_type], body), offset
+
+
+def _decode_feed_message(buf: bytes,
+                         offset: int) -> Tuple[feed.StateFeedMessage, int]:
+    seq, kind, merged = _FEED_PREAMBLE.unpack_from(buf, offset)
+    states, offset = _unpack_states(buf, offset + _FEED_PREAMBLE.size)
+    return feed.StateFeedMessage(seq, _FEED_KINDS[kind], states,
+                                 merged), offset
+
+
+_DECODERS: Dict[int, Tuple[type, Callable[[bytes, int],
+                                          Tuple[Any, int]]]] = {
+    _TAG_STATE: (CoachbotState, _unpack_state),
+    _TAG_USER_CODE_STATE: (UserCodeState, _decode_user_code_state),
+    _TAG_SIGNAL: (Signal, _unpack_signal),
+    _TAG_STATES: (dict, _unpack_states),
+    _TAG_STATUS_REQUEST: (status.Request, _decode_status_request),
+    _TAG_FEED_MESSAGE: (feed.StateFeedMessage, _decode_feed_message),
+}
+
+_ENCODERS: Dict[type, Callable[[Any], bytes]] = {
+    CoachbotState: encode_state,
+    UserCodeState: encode_user_code_state,
+    Signal: encode_signal,
+    dict: encode_states,
+    status.Request: encode_status_request,
+    feed.StateFeedMessage: encode_feed_message,
+}
+
+
+def decode(data: Union[bytes, bytearray, memoryview]) -> Any:
+    """Decodes any binary-encoded message.
+
+    Raises:
+        CodecError: If the message is not binary, was encoded by an
+            unsupported codec version or is malformed.
+    """
+    buf = bytes(data)
+    try:
+        header, tag = _PREAMBLE.unpack_from(buf, 0)
+        if not is_binary(buf) or header & 0x3F not in _SUPPORTED_VERSIONS:
+            raise CodecError(f'Unsupported codec header {header:#x}.')
+        value, offset = _DECODERS[tag][1](buf, _PREAMBLE.size)
+    except (struct.error, KeyError, IndexError, UnicodeDecodeError) as err:
+        raise CodecError(f'Malformed binary message: {err!r}') from err
+    if offset != len(buf):
+        raise CodecError('Trailing bytes after binary message.')
+    return value
+
+
+def _to_json(value: Any) -> str:
+    if isinstance(value, dict):
+        return json.dumps([[ident, state.to_dict()]
+                           for ident, state in value.items()])
+    if hasattr(value, 'serialize'):
+        return value.serialize()
+    return json.dumps(value.to_dict())
+
+
+def _from_json(data: str, cls: Type[T]) -> T:
+    if cls is dict:
+        return {int(ident): CoachbotState.from_dict(state)  # type: ignore
+                for ident, state in json.loads(data)}
+    if hasattr(cls, 'deserialize'):
+        return cls.deserialize(data)  # type: ignore
+    return cls.from_dict(json.loads(data))  # type: ignore
+
+
+def dumps(value: Any, encoding: str = ENCODING_BINARY) -> bytes:
+    """Encodes a ``CoachbotState``, ``UserCodeState``, ``Signal``,
+    ``Dict[int, CoachbotState]``, ``cctl.protocols.status.Request`` or
+    ``cctl.protocols.feed.StateFeedMessage``.
+
+    Parameters:
+        value: The object to encode.
+        encoding (str): Either ``binary`` or ``json``.
+
+    Returns:
+        bytes: The encoded message. JSON is returned UTF-8 encoded.
+
+    Raises:
+        CodecError: If a state holds a malformed user code hash.
+    """
+    if encoding == ENCODING_JSON:
+        return _to_json(value).encode('utf-8')
+    if encoding != ENCODING_BINARY:
+        raise ValueError(f'Unsupported encoding {encoding}.')
+    return _ENCODERS[type(value)](value)
+
+
+def loads(data: Union[bytes, bytearray, memoryview, str], cls: Type[T]) -> T:
+    """Decodes a message produced by ``dumps``, sniffing whether it is binary
+    or JSON.
+
+    Parameters:
+        data: The encoded message.
+        cls: The expected type of the message.
+
+    Raises:
+        CodecError: If the message cannot be decoded into ``cls``.
+    """
+    if isinstance(data, str):
+        return _from_json(data, cls)
+    if not is_binary(data):
+        return _from_json(bytes(data).decode('utf-8'), cls)
+    value = decode(data)
+    if not isinstance(value, cls):
+        raise CodecError(f'Expected {cls.__name__} but decoded '
+                         f'{type(value).__name__}.')
+    return value
+
+
+def dumps_text(value: Any, encoding: str = ENCODING_BINARY) -> str:
+    """Encodes a value like ``dumps``, but into a string that can be embedded
+    into the body of a ``cctl.protocols.ipc.Response``. Binary messages are
+    base64-encoded."""
+    if encoding == ENCODING_JSON:
+        return _to_json(value)
+    return base64.b64encode(dumps(value, encoding)).decode('ascii')
+
+
+def loads_text(data: str, cls: Type[T]) -> T:
+    """Decodes a string produced by ``dumps_text``, sniffing whether it holds
+    JSON or a base64-encoded binary message.
+
+    Raises:
+        CodecError: If the message cannot be decoded into ``cls``.
+    """
+    if data[:1] in ('{', '['):
+        return _from_json(data, cls)
+    try:
+        return loads(base64.b64decode(data, validate=True), cls)
+    except binascii.Error as err:
+        raise CodecError(f'Malformed base64 message: {err}') from err
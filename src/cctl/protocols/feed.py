@@ -0,0 +1,336 @@
+#!/usr/bin/env python
+
+"""This module defines the protocol spoken over the **cctld** state feed.
+
+Rather than publishing the whole fleet every time a single ``Coachbot``
+reports, the state feed publishes *deltas* -- messages holding only the bots
+whose state changed. Periodically, **cctld** also publishes a *keyframe*
+holding the state of the full fleet. Every message is stamped with a
+monotonically increasing sequence number which subscribers can use to detect
+dropped messages and resynchronize.
+
+A late subscriber can request a keyframe (a snapshot) over the request feed
+(``read /bots/snapshot``) and then apply every delta with a greater sequence
+number.
+
+Every publication on the **cctld** feeds is a two-frame message whose first
+frame is its topic, so that subscribers can filter what they receive inside
+zmq:
+
+* ``fleet/`` -- The fleet-wide deltas and keyframes described above.
+* ``bot/<id>/`` -- The same deltas and keyframes, restricted to one bot. These
+  are only published while someone is subscribed to them.
+* ``view/<fields>/`` -- The fleet-wide deltas and keyframes, holding only
+  the comma-separated ``fields`` (see ``FIELDS`` and ``view_topic``). The
+  other fields are ``None``. These are only published while someone is
+  subscribed to them.
+* ``job/<id>/`` -- The progress of a job, see ``cctl.protocols.job``.
+* ``signal/<name>/`` -- The signals, on the signal feed.
+
+Topics end in ``/`` so that subscribing to ``bot/1/`` does not also match
+``bot/17/``.
+"""
+
+import dataclasses
+import json
+from dataclasses import dataclass
+from typing import Any, Container, Dict, Iterable, List, Optional, Tuple
+
+from cctl.models import CoachbotState, UserCodeState
+
+
+__author__ = 'Marko Vejnovic <contact@markovejnovic.com>'
+__copyright__ = 'Copyright 2022, Northwestern University'
+__credits__ = ['Marko Vejnovic', 'Lin Liu', 'Billie Strong']
+__license__ = 'Proprietary'
+__version__ = '0.6.0'
+__maintainer__ = 'Marko Vejnovic'
+__email__ = 'contact@markovejnovic.com'
+__status__ = 'Development'
+
+
+KIND_DELTA = 'delta'
+KIND_KEYFRAME = 'keyframe'
+
+TOPIC_FLEET = b'fleet/'
+TOPIC_BOT = b'bot/'
+TOPIC_JOB = b'job/'
+TOPIC_SIGNAL = b'signal/'
+TOPIC_VIEW = b'view/'
+
+# The fields a view may hold. The first five belong to the CoachbotState, the
+# rest to its UserCodeState.
+FIELDS = ('is_on', 'os_version', 'bat_voltage', 'position', 'theta',
+          'is_running', 'version', 'name', 'author', 'requires_version',
+          'user_code_hash')
+_STATE_FIELDS = FIELDS[:5]
+
+
+def bot_topic(identifier: int) -> bytes:
+    """Returns the topic on which the state of the given bot is published."""
+    return b'bot/%d/' % identifier
+
+
+def job_topic(job_id: int) -> bytes:
+    """Returns the topic on which the events of the given job are
+    published."""
+    return b'job/%d/' % job_id
+
+
+def signal_topic(name: str) -> bytes:
+    """Returns the topic on which signals of the given name are published."""
+    return TOPIC_SIGNAL + name.encode('utf-8') + b'/'
+
+
+def signal_name(topic: bytes) -> str:
+    """Returns the signal name a ``signal_topic`` was built from."""
+    return topic[len(TOPIC_SIGNAL):-1].decode('utf-8')
+
+
+def signal_topic_prefix(pattern: str) -> bytes:
+    """Returns the longest topic prefix matched by every signal whose name
+    matches the given ``fnmatch`` pattern. Subscribing to it lets zmq drop
+    most non-matching signals before they reach the subscriber.
+
+    Example:
+
+    .. code-block:: python
+
+       signal_topic_prefix('ping')   # b'signal/ping/'
+       signal_topic_prefix('led-*')  # b'signal/led-'
+    """
+    wildcard = min((i for i, char in enumerate(pattern) if char in '*?['),
+                   default=None)
+    if wildcard is None:
+        return signal_topic(pattern)
+    return TOPIC_SIGNAL + pattern[:wildcard].encode('utf-8')
+
+
+def parse_fields(fields: Iterable[str]) -> Tuple[str, ...]:
+    """Validates the fields of a view and puts them in the order of
+    ``FIELDS``, so that every set of fields has a single view.
+
+    Raises:
+        ValueError: If a field is unknown or no field is given.
+    """
+    fields = set(fields)
+    if not fields:
+        raise ValueError('A view must hold at least one field.')
+    if (unknown := fields.difference(FIELDS)):
+        raise ValueError(f'Unknown fields {", ".join(sorted(unknown))}. '
+                         f'Valid fields are {", ".join(FIELDS)}.')
+    return tuple(field for field in FIELDS if field in fields)
+
+
+def view_topic(fields: Iterable[str]) -> bytes:
+    """Returns the topic on which the fleet is published holding only the
+    given fields.
+
+    Raises:
+        ValueError: If a field is unknown or no field is given.
+
+    Example:
+
+    .. code-block:: python
+
+       view_topic(['bat_voltage', 'is_on'])  # b'view/is_on,bat_voltage/'
+    """
+    return TOPIC_VIEW + ','.join(parse_fields(fields)).encode() + b'/'
+
+
+def view_fields(topic: bytes) -> Tuple[str, ...]:
+    """Returns the fields a ``view_topic`` was built from.
+
+    Raises:
+        ValueError: If the topic is not a valid view topic.
+    """
+    if not topic.startswith(TOPIC_VIEW) or not topic.endswith(b'/'):
+        raise ValueError(f'{topic!r} is not a view topic.')
+    fields = topic[len(TOPIC_VIEW):-1].decode('utf-8', 'replace').split(',')
+    if (parsed := parse_fields(fields)) != tuple(fields):
+        raise ValueError(f'{topic!r} is not a canonical view topic.')
+    return parsed
+
+
+def project(state: CoachbotState, fields: Container[str]) -> CoachbotState:
+    """Returns a copy of ``state`` holding only the given ``FIELDS``. The
+    other fields are ``None``."""
+    ucs = state.user_code_state
+    return CoachbotState(
+        *(getattr(state, field) if field in fields else None
+          for field in _STATE_FIELDS),
+        user_code_state=UserCodeState(**{
+            field.name: getattr(ucs, field.name)
+            if field.name in fields else None
+            for field in dataclasses.fields(UserCodeState)
+        }))
+
+
+class StateFeedGapError(Exception):
+    """Raised when a delta is received whose sequence number does not
+    immediately follow the last applied one, meaning a message was missed."""
+
+
+@dataclass
+class StateFeedMessage:
+    """Represents a single publication on the state feed.
+
+    Attributes:
+        seq (int): The sequence number of this message. For a keyframe, this
+            is the sequence number of the last delta it includes.
+        kind (str): Either ``delta`` or ``keyframe``.
+        states (Dict[int, CoachbotState]): The states of the bots contained in
+            this message, keyed by the bot identifier.
+        merged (int): The number of state updates **cctld** coalesced into
+            this delta. Always ``0`` for keyframes.
+    """
+    seq: int
+    kind: str
+    states: Dict[int, CoachbotState]
+    merged: int = 0
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Converts this object into a dictionary ready for serialization.
+
+        Note that JSON does not support integer keys, so the ``states``
+        dictionary is converted into a list of ``[id, state]`` pairs.
+        """
+        return {
+            'seq': self.seq,
+            'kind': self.kind,
+            'states': [[ident, state.to_dict()]
+                       for ident, state in self.states.items()],
+            'merged': self.merged
+        }
+
+    def serialize(self) -> str:
+        """Converts this message into a JSON string."""
+        return json.dumps(self.to_dict())
+
+    @staticmethod
+    def from_dict(as_dict: Dict[str, Any]) -> 'StateFeedMessage':
+        """Creates a StateFeedMessage from a dictionary."""
+        return StateFeedMessage(
+            seq=as_dict['seq'],
+            kind=as_dict['kind'],
+            states={int(ident): CoachbotState.from_dict(state)
+                    for ident, state in as_dict['states']},
+            merged=as_dict.get('merged', 0)
+        )
+
+    @staticmethod
+    def deserialize(data: str) -> 'StateFeedMessage':
+        """Creates a StateFeedMessage from a JSON string."""
+        return StateFeedMessage.from_dict(json.loads(data))
+
+
+class StateFeedReassembler:
+    """Rebuilds the full fleet state from a stream of ``StateFeedMessage``
+    objects.
+
+    The reassembler starts unsynchronized and ignores all deltas until a
+    keyframe (either published on the feed or fetched as a snapshot) is
+    applied.
+
+    If ``identifiers`` is given, the reassembler only tracks these bots and is
+    meant to be fed from their ``bot/<id>/`` topics. Since those only carry a
+    subset of all deltas, sequence gaps are expected and not reported.
+    Because every message holds whole states, each message is applied as long
+    as it is newer than the last one applied for the same bot.
+
+    Parameters:
+        identifiers (Optional[Container[int]]): The bots to track, or
+            ``None`` to track the whole fleet.
+
+    Example:
+
+    .. code-block:: python
+
+       reassembler = StateFeedReassembler()
+       reassembler.apply(await client.read_snapshot())
+       while True:
+           if reassembler.apply(await read_feed_message()):
+               print(reassembler.value)
+    """
+    def __init__(self,
+                 identifiers: Optional[Container[int]] = None) -> None:
+        self._identifiers = identifiers
+        self._seq: Optional[int] = None
+        self._states: Dict[int, CoachbotState] = {}
+        self._bot_seqs: Dict[int, int] = {}
+
+    @property
+    def seq(self) -> Optional[int]:
+        """The sequence number of the last applied message or ``None`` if the
+        reassembler is not synchronized."""
+        return self._seq
+
+    @property
+    def synchronized(self) -> bool:
+        """Whether a keyframe has been applied since the last reset."""
+        return self._seq is not None
+
+    @property
+    def states(self) -> Dict[int, CoachbotState]:
+        """The current fleet state, keyed by the bot identifier."""
+        return self._states
+
+    @property
+    def value(self) -> List[CoachbotState]:
+        """The current fleet state, ordered by the bot identifier."""
+        return [self._states[ident] for ident in sorted(self._states)]
+
+    def reset(self) -> None:
+        """Marks the reassembler as unsynchronized. Deltas will be ignored
+        until the next keyframe."""
+        self._seq = None
+
+    def apply(self, message: StateFeedMessage) -> bool:
+        """Applies a message onto the stored fleet state.
+
+        Parameters:
+            message (StateFeedMessage): The received message.
+
+        Returns:
+            bool: Whether the stored state was updated.
+
+        Raises:
+            StateFeedGapError: If a delta was missed. The reassembler is reset
+            before raising so you may resynchronize by applying a snapshot.
+        """
+        if self._identifiers is not None:
+            return self._apply_partial(message)
+
+        if message.kind == KIND_KEYFRAME:
+            if self._seq is not None and message.seq < self._seq:
+                return False
+            self._states = dict(message.states)
+            self._seq = message.seq
+            return True
+
+        if self._seq is None or message.seq <= self._seq:
+            return False
+
+        if message.seq != self._seq + 1:
+            missed = (self._seq + 1, message.seq - 1)
+            self.reset()
+            raise StateFeedGapError(
+                f'Missed state feed messages {missed[0]}-{missed[1]}.')
+
+        self._states.update(message.states)
+        self._seq = message.seq
+        return True
+
+    def _apply_partial(self, message: StateFeedMessage) -> bool:
+        assert self._identifiers is not None
+        updated = False
+        for ident, state in message.states.items():
+            if ident not in self._identifiers or \
+                    message.seq < self._bot_seqs.get(ident, -1):
+                continue
+            self._states[ident] = state
+            self._bot_seqs[ident] = message.seq
+            updated = True
+        if updated:
+            self._seq = max(message.seq, self._seq or 0)
+        return updated
@@ -0,0 +1,169 @@
+#!/usr/bin/env python
+
+"""This module defines the protocol of the fleet command channel, over which
+**cctld** sends a single command to many bots in a single UDP datagram.
+
+The datagram is sent to the broadcast address of the network, or to a
+multicast group, so that every bot receives it within one network hop of the
+others, which is what synchronized experiments need. A ``FleetCommand``
+datagram is laid out as follows, in network byte order:
+
+* ``CCFC`` -- The magic bytes.
+* ``seq`` (8 bytes) -- The sequence number of the command. **cctld** starts
+  counting from the current time in microseconds, so that sequence numbers
+  keep increasing across restarts.
+* The command as UTF-8 JSON: ``{"request": <coach_command.Request>,
+  "targets": [<id>, ...] | null}``. A ``null`` target list targets every
+  bot.
+* The HMAC-SHA256 of everything above (32 bytes), keyed with the secret
+  shared between **cctld** and the bots.
+
+Every command is repeated a few times for reliability. A bot executes a
+command only if its signature is valid, it is targeted and its sequence
+number is greater than that of the last command it executed, which also
+discards the repetitions and replayed datagrams. It then acknowledges every
+copy it receives with a ``FleetAck`` datagram sent back to the source
+address of the command:
+
+* ``CCFA`` -- The magic bytes.
+* ``seq`` (8 bytes) -- The sequence number of the acknowledged command.
+* ``id`` (2 bytes) -- The identifier of the bot.
+* ``status_code`` (2 bytes) -- The ``coach_command.StatusCode`` of the
+  command.
+* The HMAC-SHA256 of everything above (32 bytes).
+"""
+
+import hashlib
+import hmac
+import json
+import struct
+from dataclasses import dataclass
+from typing import List, Optional
+
+from cctl.protocols import coach_command
+
+
+__author__ = 'Marko Vejnovic <contact@markovejnovic.com>'
+__copyright__ = 'Copyright 2022, Northwestern University'
+__credits__ = ['Marko Vejnovic', 'Lin Liu', 'Billie Strong']
+__license__ = 'Proprietary'
+__version__ = '0.6.0'
+__maintainer__ = 'Marko Vejnovic'
+__email__ = 'contact@markovejnovic.com'
+__status__ = 'Development'
+
+
+MAGIC_COMMAND = b'CCFC'
+MAGIC_ACK = b'CCFA'
+
+_COMMAND_HEADER = struct.Struct('!4sQ')
+_ACK = struct.Struct('!4sQHH')
+_SIGNATURE_SIZE = hashlib.sha256().digest_size
+
+
+class FleetCommandError(ValueError):
+    """Raised when a datagram is malformed or its signature is invalid."""
+
+
+def _sign(key: bytes, data: bytes) -> bytes:
+    return hmac.new(key, data, hashlib.sha256).digest()
+
+
+def _verify(key: bytes, datagram: bytes, minimum: int) -> bytes:
+    """Returns the signed part of a datagram.
+
+    Raises:
+        FleetCommandError: If the datagram is too short or its signature is
+            invalid.
+    """
+    if len(datagram) < minimum + _SIGNATURE_SIZE:
+        raise FleetCommandError('The datagram is too short.')
+    data, signature = datagram[:-_SIGNATURE_SIZE], \
+        datagram[-_SIGNATURE_SIZE:]
+    if not hmac.compare_digest(_sign(key, data), signature):
+        raise FleetCommandError('The signature of the datagram is invalid.')
+    return data
+
+
+@dataclass
+class FleetCommand:
+    """Represents a command sent to many bots at once.
+
+    Attributes:
+        seq (int): The sequence number of the command.
+        request (coach_command.Request): The command itself, as it would be
+            sent to a single bot.
+        targets (Optional[List[int]]): The bots which are to execute the
+            command, or ``None`` for every bot.
+    """
+    seq: int
+    request: coach_command.Request
+    targets: Optional[List[int]] = None
+
+    def targets_bot(self, identifier: int) -> bool:
+        """Returns whether the given bot is to execute this command."""
+        return self.targets is None or identifier in self.targets
+
+    def encode(self, key: bytes) -> bytes:
+        """Encodes this command into a signed datagram."""
+        data = _COMMAND_HEADER.pack(MAGIC_COMMAND, self.seq) + json.dumps({
+            'request': self.request.to_dict(),
+            'targets': self.targets
+        }).encode('utf-8')
+        return data + _sign(key, data)
+
+    @staticmethod
+    def decode(datagram: bytes, key: bytes) -> 'FleetCommand':
+        """Decodes a signed datagram.
+
+        Raises:
+            FleetCommandError: If the datagram is not a valid command.
+        """
+        data = _verify(key, datagram, _COMMAND_HEADER.size)
+        magic, seq = _COMMAND_HEADER.unpack_from(data)
+        if magic != MAGIC_COMMAND:
+            raise FleetCommandError('The datagram is not a fleet command.')
+        try:
+            body = json.loads(data[_COMMAND_HEADER.size:])
+            return FleetCommand(
+                seq, coach_command.Request.from_dict(body['request']),
+                body['targets'])
+        except (ValueError, KeyError, TypeError) as err:
+            raise FleetCommandError(
+                f'The fleet command is malformed: {err}') from err
+
+
+@dataclass
+class FleetAck:
+    """Represents the acknowledgement of a ``FleetCommand`` by one bot.
+
+    Attributes:
+        seq (int): The sequence number of the acknowledged command.
+        identifier (int): The identifier of the bot.
+        status_code (int): The ``coach_command.StatusCode`` of the command.
+    """
+    seq: int
+    identifier: int
+    status_code: int
+
+    def encode(self, key: bytes) -> bytes:
+        """Encodes this acknowledgement into a signed datagram."""
+        data = _ACK.pack(MAGIC_ACK, self.seq, self.identifier,
+                         self.status_code)
+        return data + _sign(key, data)
+
+    @staticmethod
+    def decode(datagram: bytes, key: bytes) -> 'FleetAck':
+        """Decodes a signed datagram.
+
+        Raises:
+            FleetCommandError: If the datagram is not a valid
+                acknowledgement.
+        """
+        data = _verify(key, datagram, _ACK.size)
+        if len(data) != _ACK.size:
+            raise FleetCommandError('The acknowledgement is malformed.')
+        magic, seq, identifier, status_code = _ACK.unpack(data)
+        if magic != MAGIC_ACK:
+            raise FleetCommandError('The datagram is not an acknowledgement.')
+        return FleetAck(seq, identifier, status_code)
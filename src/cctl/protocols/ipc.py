@@ -63,6 +63,7 @@ class ResultCode(IntEnum):
     I_AM_A_TEAPOT = 418
 
     INTERNAL_SERVER_ERROR = 500
+    GATEWAY_TIMEOUT = 504
 
 
 @dataclass
@@ -0,0 +1,183 @@
+#!/usr/bin/env python
+
+"""This module defines the models of the **cctld** job API.
+
+Fleet operations which take long (booting, shutting down or deploying code to
+many bots) are submitted as *jobs* via ``create /jobs``. **cctld** replies
+with the job immediately and runs it in the background. While it runs, a
+``JobEvent`` is published on the ``job/<id>/`` topic of the state feed every
+time a bot completes, and a last one once the whole job completes. The state
+of a job may also be read at any time via ``read /jobs/<id>``.
+
+A client should subscribe to the topic of a job first, then read the job and
+apply every event with a greater ``seq`` via ``Job.apply``.
+"""
+
+import json
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+from cctl.protocols import ipc
+
+
+__author__ = 'Marko Vejnovic <contact@markovejnovic.com>'
+__copyright__ = 'Copyright 2022, Northwestern University'
+__credits__ = ['Marko Vejnovic', 'Lin Liu', 'Billie Strong']
+__license__ = 'Proprietary'
+__version__ = '0.6.0'
+__maintainer__ = 'Marko Vejnovic'
+__email__ = 'contact@markovejnovic.com'
+__status__ = 'Development'
+
+
+KIND_BOOT = 'boot'
+KIND_SHUTDOWN = 'shutdown'
+KIND_DEPLOY = 'deploy'
+KINDS = (KIND_BOOT, KIND_SHUTDOWN, KIND_DEPLOY)
+
+STATUS_RUNNING = 'running'
+STATUS_DONE = 'done'
+STATUS_CANCELLED = 'cancelled'
+
+EVENT_PROGRESS = 'progress'
+EVENT_DONE = 'done'
+
+
+def _response_to_dict(response: ipc.Response) -> Dict[str, Any]:
+    return {'result_code': int(response.result_code), 'body': response.body}
+
+
+def _response_from_dict(as_dict: Dict[str, Any]) -> ipc.Response:
+    return ipc.Response(ipc.ResultCode(as_dict['result_code']),
+                        as_dict['body'])
+
+
+@dataclass
+class JobEvent:
+    """Represents a single publication on the topic of a job.
+
+    Attributes:
+        job_id (int): The job the event belongs to.
+        seq (int): The number of events of the job up to and including this
+            one.
+        event (str): Either ``progress``, when a bot completed, or ``done``,
+            when the whole job completed.
+        identifier (Optional[int]): The bot that completed, for ``progress``
+            events.
+        result (Optional[ipc.Response]): The result of the bot, for
+            ``progress`` events.
+        status (Optional[str]): The final status of the job, for ``done``
+            events.
+    """
+    job_id: int
+    seq: int
+    event: str
+    identifier: Optional[int] = None
+    result: Optional[ipc.Response] = None
+    status: Optional[str] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Converts this object into a dictionary."""
+        return {
+            'job_id': self.job_id,
+            'seq': self.seq,
+            'event': self.event,
+            'identifier': self.identifier,
+            'result': None if self.result is None
+            else _response_to_dict(self.result),
+            'status': self.status
+        }
+
+    def serialize(self) -> str:
+        """Converts this object into a JSON string."""
+        return json.dumps(self.to_dict())
+
+    @staticmethod
+    def from_dict(as_dict: Dict[str, Any]) -> 'JobEvent':
+        """Creates a JobEvent from a dictionary."""
+        return JobEvent(
+            as_dict['job_id'], as_dict['seq'], as_dict['event'],
+            as_dict.get('identifier'),
+            None if (result := as_dict.get('result')) is None
+            else _response_from_dict(result),
+            as_dict.get('status'))
+
+    @staticmethod
+    def deserialize(data: str) -> 'JobEvent':
+        """Creates a JobEvent from a JSON string."""
+        return JobEvent.from_dict(json.loads(data))
+
+
+@dataclass
+class Job:
+    """Represents the state of a job.
+
+    Attributes:
+        job_id (int): The identifier of the job.
+        kind (str): One of ``KINDS``.
+        identifiers (List[int]): The bots the job targets.
+        status (str): ``running``, ``done`` or ``cancelled``.
+        seq (int): The ``seq`` of the last event published for this job.
+        results (Dict[int, ipc.Response]): The result of every bot that
+            completed so far.
+    """
+    job_id: int
+    kind: str
+    identifiers: List[int]
+    status: str = STATUS_RUNNING
+    seq: int = 0
+    results: Dict[int, ipc.Response] = field(default_factory=dict)
+
+    @property
+    def finished(self) -> bool:
+        """Whether the job completed or was cancelled."""
+        return self.status != STATUS_RUNNING
+
+    def apply(self, event: JobEvent) -> bool:
+        """Applies the event immediately following this state.
+
+        Returns:
+            bool: Whether the event was applied. Events which are not the next
+            one are ignored; if ``event.seq`` is greater than ``seq + 1``,
+            events were missed and the job should be read again.
+        """
+        if event.job_id != self.job_id or event.seq != self.seq + 1:
+            return False
+        if event.event == EVENT_PROGRESS:
+            assert event.identifier is not None and event.result is not None
+            self.results[event.identifier] = event.result
+        elif event.event == EVENT_DONE:
+            assert event.status is not None
+            self.status = event.status
+        self.seq = event.seq
+        return True
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Converts this object into a dictionary."""
+        return {
+            'job_id': self.job_id,
+            'kind': self.kind,
+            'identifiers': self.identifiers,
+            'status': self.status,
+            'seq': self.seq,
+            'results': [[ident, _response_to_dict(result)]
+                        for ident, result in self.results.items()]
+        }
+
+    def serialize(self) -> str:
+        """Converts this object into a JSON string."""
+        return json.dumps(self.to_dict())
+
+    @staticmethod
+    def from_dict(as_dict: Dict[str, Any]) -> 'Job':
+        """Creates a Job from a dictionary."""
+        return Job(
+            as_dict['job_id'], as_dict['kind'], list(as_dict['identifiers']),
+            as_dict['status'], as_dict['seq'],
+            {int(ident): _response_from_dict(result)
+             for ident, result in as_dict['results']})
+
+    @staticmethod
+    def deserialize(data: str) -> 'Job':
+        """Creates a Job from a JSON string."""
+        return Job.from_dict(json.loads(data))
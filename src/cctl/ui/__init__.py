@@ -2,7 +2,7 @@
 
 """This package exposes the main CCTL manage application."""
 
-from typing import Callable, List, Optional
+from typing import Callable, Dict, Iterable, List, Optional
 from reactivex import Observable
 from textual.app import App
 from textual.widgets import Footer, Header
@@ -25,13 +25,15 @@ class ManageApp(App):
 
     def __init__(self,
                  observable_stream: Observable[List[Coachbot]],
+                 identifiers: Iterable[int],
                  on_quit_callback: Optional[Callable[[], None]] = None,
                  driver_class=None):
         super().__init__(driver_class, None, False)
 
         self.observable_stream = observable_stream
+        self.identifiers = tuple(identifiers)
         self.on_quit = on_quit_callback
-        self.coachbot_lines = []
+        self.coachbot_lines: Dict[int, CoachbotStateDisplay] = {}
 
         data_stream_60hz = self.observable_stream.pipe(
             rxops.debounce(1.0 / 60.0))
@@ -50,18 +52,19 @@ class ManageApp(App):
             self._update_model(bot)
 
     def _update_model(self, bot: Coachbot):
-        display_widget = self.coachbot_lines[bot.identifier]
-        assert isinstance(display_widget, CoachbotStateDisplay)
+        # Bots missing from the inventory have no line to display them in.
+        if (display_widget := self.coachbot_lines.get(bot.identifier)) is None:
+            return
         display_widget.update_coachbot(bot)
 
     def compose(self):
         yield Header()
         yield CoachbotStateHeaderDisplay()
-        self.coachbot_lines = []
-        for i in range(100):
+        self.coachbot_lines = {}
+        for i in self.identifiers:
             coachbot_line = CoachbotStateDisplay(
                 i, id=f'coachbot-state-display__{i}')
-            self.coachbot_lines.append(coachbot_line)
+            self.coachbot_lines[i] = coachbot_line
             yield coachbot_line
         yield Footer()
 
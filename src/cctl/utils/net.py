@@ -2,6 +2,7 @@
 
 """Exposes network utilities."""
 
+from concurrent.futures import ThreadPoolExecutor
 from contextlib import contextmanager
 import logging
 import socket
@@ -10,12 +11,11 @@ import asyncio
 import fcntl
 import platform
 import subprocess
-from typing import Union
+from typing import Callable, Dict, Optional, Tuple, TypeVar, Union
 import paramiko
 from paramiko.client import SSHClient
 from paramiko import WarningPolicy
 
-from cctl.api import configuration  # TODO: This import should be removed.
 from cctl.res import RES_STR
 
 SIOCGIFADDR = 0x8915  # See man netdevice 7
@@ -93,28 +93,68 @@ def host_is_reachable(hostname: str, max_attempts: int = 3) -> bool:
         async_host_is_reachable(hostname, max_attempts))
 
 
-@contextmanager
-def ssh_client(hostname: str, *args, **kwargs):
-    """Opens up an SSH client with sane defaults.
+T = TypeVar('T')
 
-    These defaults are:
-        * Read username from the user configuration.
-        * Read key from the user configuration.
+
+def _ssh_credentials(user: Optional[str],
+                     key: Optional[str]) -> Tuple[str, str]:
+    """Fills in the SSH user and key missing from the user configuration."""
+    if user is None or key is None:
+        # Imported here since reading the configuration exits if it is
+        # missing, which callers passing their own credentials do not need.
+        from cctl.conf import Configuration
+        coachswarm = Configuration().coachswarm
+        user = coachswarm.ssh_user if user is None else user
+        key = coachswarm.ssh_key if key is None else key
+    return user, key
+
+
+def connect_ssh(hostname: str, user: Optional[str] = None,
+                key: Optional[str] = None, **kwargs) -> SSHClient:
+    """Connects an SSH client with sane defaults.
+
+    Parameters:
+        hostname (str): The host to connect to.
+        user (Optional[str]): The user to log in as. Read from the user
+            configuration if ``None``.
+        key (Optional[str]): The path to the private key. Read from the user
+            configuration if ``None``.
+        kwargs: Passed on to ``paramiko.SSHClient.connect``.
+
+    Returns:
+        SSHClient: The connected client, which the caller must close.
     """
-    user = configuration.get_coachswarm_ssh_user()
-    key = configuration.get_coachswarm_path_to_ssh_key()
+    user, key = _ssh_credentials(user, key)
 
     client = SSHClient()
     client.load_system_host_keys()
     client.set_missing_host_key_policy(WarningPolicy())
 
     try:
-        client.connect(hostname, username=user, key_filename=key, *args,
-                       **kwargs)
+        client.connect(hostname, username=user, key_filename=key, **kwargs)
     except paramiko.AuthenticationException as auth_ex:
         logging.error(RES_STR['ssh_auth_error'], user, key)
+        client.close()
         raise auth_ex
+    except Exception:
+        client.close()
+        raise
+    return client
+
+
+@contextmanager
+def ssh_client(hostname: str, **kwargs):
+    """Opens up an SSH client with sane defaults.
+
+    These defaults are:
+        * Read username from the user configuration.
+        * Read key from the user configuration.
 
+    Parameters:
+        hostname (str): The host to connect to.
+        kwargs: Passed on to ``connect_ssh``.
+    """
+    client = connect_ssh(hostname, **kwargs)
     try:
         yield client
     finally:
@@ -137,6 +177,153 @@ def sftp_client(hostname: str, *args, **kwargs):
             m_sftp_client.close()
 
 
+class SSHConnection:
+    """A pooled SSH connection to a single host. See ``SSHPool``.
+
+    Attributes:
+        client (SSHClient): The connected client.
+        timeout (Optional[float]): The number of seconds after which a
+            stalled read fails.
+    """
+    def __init__(self, client: SSHClient,
+                 timeout: Optional[float] = None) -> None:
+        self.client = client
+        self.timeout = timeout
+        self._sftp: Optional[paramiko.SFTPClient] = None
+
+    @property
+    def sftp(self) -> paramiko.SFTPClient:
+        """The SFTP session of this connection, opened on first use."""
+        if self._sftp is None:
+            self._sftp = self.client.open_sftp()
+            self._sftp.get_channel().settimeout(self.timeout)
+        return self._sftp
+
+    @property
+    def is_active(self) -> bool:
+        """Whether the connection is still usable."""
+        transport = self.client.get_transport()
+        return transport is not None and transport.is_active()
+
+    def close(self) -> None:
+        """Closes the SFTP session and the connection."""
+        if self._sftp is not None:
+            self._sftp.close()
+            self._sftp = None
+        self.client.close()
+
+
+class SSHPool:
+    """Keeps one SSH connection open per host and runs blocking ``paramiko``
+    work on many hosts at once.
+
+    Every host costs a single handshake, however many operations run on it.
+    At most ``max_concurrency`` operations run at once, each in a worker
+    thread, and operations on the same host run one after the other, since
+    an SFTP session serves one request at a time. A connection found dead is
+    reopened once before the operation fails.
+
+    Parameters:
+        user (Optional[str]): The user to log in as. Read from the user
+            configuration if ``None``.
+        key (Optional[str]): The path to the private key. Read from the user
+            configuration if ``None``.
+        max_concurrency (int): The maximum number of hosts worked on at once.
+        timeout (float): The number of seconds after which connecting or a
+            stalled read fails.
+
+    Example:
+
+    .. code-block:: python
+
+       async with SSHPool(max_concurrency=32) as pool:
+           sizes = await asyncio.gather(*[
+               pool.run(host, lambda conn: conn.sftp.stat('out').st_size)
+               for host in hosts
+           ])
+    """
+    def __init__(self, user: Optional[str] = None, key: Optional[str] = None,
+                 max_concurrency: int = 16, timeout: float = 10.0) -> None:
+        self.user = user
+        self.key = key
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self._connections: Dict[str, SSHConnection] = {}
+        self._locks: Dict[str, asyncio.Lock] = {}
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrency,
+                                            thread_name_prefix='ssh-pool')
+
+    def _connect(self, hostname: str) -> SSHConnection:
+        client = connect_ssh(hostname, self.user, self.key,
+                             timeout=self.timeout,
+                             banner_timeout=self.timeout,
+                             auth_timeout=self.timeout)
+        return SSHConnection(client, self.timeout)
+
+    def _connection(self, hostname: str) -> SSHConnection:
+        """Returns the open connection to ``hostname``, (re)connecting if
+        there is none."""
+        connection = self._connections.get(hostname)
+        if connection is None or not connection.is_active:
+            if connection is not None:
+                connection.close()
+            connection = self._connections[hostname] = \
+                self._connect(hostname)
+        return connection
+
+    def _call(self, hostname: str,
+              function: Callable[[SSHConnection], T]) -> T:
+        """Runs ``function`` on the connection to ``hostname``, in a worker
+        thread."""
+        connection = self._connection(hostname)
+        try:
+            return function(connection)
+        except (paramiko.SSHException, EOFError):
+            if connection.is_active:
+                raise
+            logging.getLogger('ssh-pool').info(
+                'The connection to %s dropped. Reconnecting.', hostname)
+        return function(self._connection(hostname))
+
+    async def run(self, hostname: str,
+                  function: Callable[[SSHConnection], T]) -> T:
+        """Runs blocking ``function`` on the pooled connection to
+        ``hostname`` in a worker thread.
+
+        Parameters:
+            hostname (str): The host to work on.
+            function (Callable[[SSHConnection], T]): The work to do.
+
+        Returns:
+            T: What ``function`` returned.
+
+        Raises:
+            paramiko.SSHException: If the host cannot be connected to.
+            OSError: If the host cannot be reached.
+        """
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        lock = self._locks.setdefault(hostname, asyncio.Lock())
+        async with lock, self._semaphore:
+            return await asyncio.get_running_loop().run_in_executor(
+                self._executor, self._call, hostname, function)
+
+    def close(self) -> None:
+        """Closes every connection."""
+        for connection in self._connections.values():
+            connection.close()
+        self._connections.clear()
+        self._executor.shutdown(wait=False)
+
+    async def __aenter__(self) -> 'SSHPool':
+        return self
+
+    async def __aexit__(self, exc_t, exc_v, exc_tb):
+        self.close()
+        return False
+
+
 def read_remote_file(hostname: str, remote_path: str,
                      mode: str = 'rb') -> bytes:
     """Reads a remote file in full.
@@ -0,0 +1,381 @@
+# -*- coding: utf-8 -*-
+
+"""Exposes ``fetch``, which collects files from many bots at once, and
+``sync``, which deploys a directory to many bots at once.
+
+Every bot is worked on over its pooled connection (see
+``cctl.utils.net.SSHPool``), so transferring to or from the whole fleet
+costs a single handshake per bot and runs on up to ``max_concurrency`` bots
+at once. Files are streamed straight to disk in ``CHUNK_SIZE`` chunks, with
+the reads pipelined, rather than being buffered in memory.
+
+A file is first written to ``<name>.part`` and only renamed once complete.
+An interrupted fetch therefore resumes from the end of the ``.part`` file
+and a file already fetched in full is skipped. Files are compared by size,
+since experiment outputs are only ever appended to.
+
+If ``compress`` is set, the bot packs the remote path with ``tar -z`` and
+the archive is streamed over the connection instead, which pays off for the
+text logs experiments write. Compressed transfers cannot be resumed.
+
+``sync`` only uploads the files which differ. The SHA-256 of every local
+file is computed once per deployment, and remembered across deployments by
+a ``HashCache``. Every bot then hashes its own copy (its *manifest*) and is
+sent the files whose hash differs, each written to ``<name>.part`` and
+renamed into place once complete, so a bot never runs a half-written file.
+"""
+
+from dataclasses import dataclass, field
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import posixpath
+import shlex
+import stat
+import time
+from typing import Dict, Iterable, Mapping, Optional, Set
+
+import paramiko
+
+from cctl.utils.net import SSHConnection, SSHPool
+
+
+CHUNK_SIZE = 32768
+PART_SUFFIX = '.part'
+
+
+@dataclass
+class TransferStats:
+    """Counts what a transfer moved.
+
+    Attributes:
+        files (int): The number of files transferred.
+        bytes (int): The number of bytes transferred.
+        skipped_bytes (int): The number of bytes not transferred since they
+            already were at the destination, either in files transferred
+            before or in resumed ``.part`` files.
+        seconds (float): The number of seconds the transfer took.
+    """
+    files: int = 0
+    bytes: int = 0
+    skipped_bytes: int = 0
+    seconds: float = 0.0
+
+    @property
+    def throughput(self) -> float:
+        """The number of bytes transferred per second."""
+        return self.bytes / self.seconds if self.seconds > 0 else 0.0
+
+
+@dataclass
+class TransferResult:
+    """Represents the outcome of a transfer to or from a single bot.
+
+    Attributes:
+        host (str): The bot transferred to or from.
+        destination (str): The path transferred into.
+        stats (TransferStats): What was transferred.
+        error (Optional[Exception]): Why the transfer failed, or ``None`` if
+            it succeeded.
+    """
+    host: str
+    destination: str
+    stats: TransferStats = field(default_factory=TransferStats)
+    error: Optional[Exception] = None
+
+
+def _fetch_file(sftp: paramiko.SFTPClient, remote_path: str, local_path: str,
+                size: int, stats: TransferStats) -> None:
+    if os.path.isfile(local_path) and os.path.getsize(local_path) == size:
+        stats.skipped_bytes += size
+        return
+
+    part_path = local_path + PART_SUFFIX
+    offset = os.path.getsize(part_path) if os.path.isfile(part_path) else 0
+    if offset > size:
+        offset = 0
+    stats.skipped_bytes += offset
+
+    with sftp.open(remote_path, 'rb') as remote_file, \
+            open(part_path, 'ab' if offset else 'wb') as local_file:
+        remote_file.seek(offset)
+        remote_file.prefetch(size)
+        while (chunk := remote_file.read(CHUNK_SIZE)):
+            local_file.write(chunk)
+            stats.bytes += len(chunk)
+    os.replace(part_path, local_path)
+    stats.files += 1
+
+
+def _fetch_tree(sftp: paramiko.SFTPClient, remote_path: str, local_path: str,
+                stats: TransferStats,
+                attributes: Optional[paramiko.SFTPAttributes] = None) -> None:
+    attributes = attributes or sftp.stat(remote_path)
+    if not stat.S_ISDIR(attributes.st_mode or 0):
+        _fetch_file(sftp, remote_path, local_path, attributes.st_size or 0,
+                    stats)
+        return
+
+    os.makedirs(local_path, exist_ok=True)
+    for entry in sftp.listdir_attr(remote_path):
+        _fetch_tree(sftp, posixpath.join(remote_path, entry.filename),
+                    os.path.join(local_path, entry.filename), stats, entry)
+
+
+def _fetch_compressed(client: paramiko.SSHClient, remote_path: str,
+                      local_path: str, stats: TransferStats,
+                      timeout: Optional[float]) -> None:
+    parent, name = posixpath.split(remote_path.rstrip('/'))
+    _, stdout, stderr = client.exec_command(
+        f'tar -czf - -C {shlex.quote(parent or "/")} {shlex.quote(name)}',
+        timeout=timeout)
+
+    part_path = local_path + PART_SUFFIX
+    with open(part_path, 'wb') as local_file:
+        while (chunk := stdout.read(CHUNK_SIZE)):
+            local_file.write(chunk)
+            stats.bytes += len(chunk)
+    if (status := stdout.channel.recv_exit_status()) != 0:
+        os.remove(part_path)
+        raise OSError(f'tar exited with {status}: '
+                      f'{stderr.read().decode(errors="replace").strip()}')
+    os.replace(part_path, local_path)
+    stats.files += 1
+
+
+async def fetch(pool: SSHPool, targets: Mapping[str, str], remote_path: str,
+                compress: bool = False) -> Dict[str, TransferResult]:
+    """Fetches a remote file or directory from many bots at once.
+
+    Parameters:
+        pool (SSHPool): The pool to fetch over.
+        targets (Mapping[str, str]): The local path to fetch into, keyed by
+            the host of every bot.
+        remote_path (str): The file or directory to fetch from every bot.
+        compress (bool): Whether the bots compress the remote path into a
+            ``.tar.gz`` archive, which is what is then written to the local
+            path.
+
+    Returns:
+        Dict[str, TransferResult]: The outcome of every bot, keyed by its
+        host. A bot which failed does not prevent the others from being
+        fetched.
+
+    Example:
+
+    .. code-block:: python
+
+       async with SSHPool(max_concurrency=32) as pool:
+           results = await fetch(pool, {
+               bot.ip_address: f'out/{bot.identifier}' for bot in bots
+           }, '/home/pi/experiment_output')
+    """
+    def work(connection: SSHConnection, result: TransferResult) -> None:
+        start = time.monotonic()
+        try:
+            if compress:
+                _fetch_compressed(connection.client, remote_path,
+                                  result.destination, result.stats,
+                                  connection.timeout)
+            else:
+                _fetch_tree(connection.sftp, remote_path, result.destination,
+                            result.stats)
+        finally:
+            result.stats.seconds += time.monotonic() - start
+
+    async def fetch_one(host: str, local_path: str) -> TransferResult:
+        result = TransferResult(host, local_path)
+        try:
+            await pool.run(host, lambda conn: work(conn, result))
+        except (paramiko.SSHException, OSError, EOFError) as err:
+            result.error = err
+        return result
+
+    return {result.host: result for result in await asyncio.gather(*[
+        fetch_one(host, local_path) for host, local_path in targets.items()
+    ])}
+
+
+class HashCache:
+    """Remembers the SHA-256 of local files, so that files which did not
+    change since they were last hashed are not read again. A file is assumed
+    unchanged if its size and modification time are.
+
+    Parameters:
+        path (Optional[str]): The JSON file the hashes are kept in between
+            runs, or ``None`` to only keep them in memory.
+
+    Example:
+
+    .. code-block:: python
+
+       cache = HashCache(os.path.expanduser('~/.cache/coachswarm/hashes'))
+       manifest = local_manifest('control', cache)
+       cache.save()
+    """
+    def __init__(self, path: Optional[str] = None) -> None:
+        self.path = path
+        self._entries: Dict[str, list] = {}
+        self._dirty = False
+        if path is not None and os.path.isfile(path):
+            try:
+                with open(path, 'r') as cache_file:
+                    self._entries = json.load(cache_file)
+            except (OSError, ValueError) as err:
+                logging.getLogger('transfer').warning(
+                    'Ignoring the unreadable hash cache %s: %s', path, err)
+
+    def hash(self, path: str) -> str:
+        """Returns the hex SHA-256 of a local file."""
+        path = os.path.abspath(path)
+        stat_result = os.stat(path)
+        key = [stat_result.st_size, stat_result.st_mtime_ns]
+        if (entry := self._entries.get(path)) is not None \
+                and entry[:2] == key:
+            return entry[2]
+
+        digest = hashlib.sha256()
+        with open(path, 'rb') as local_file:
+            while (chunk := local_file.read(1 << 20)):
+                digest.update(chunk)
+        self._entries[path] = [*key, digest.hexdigest()]
+        self._dirty = True
+        return digest.hexdigest()
+
+    def save(self) -> None:
+        """Writes the hashes to ``path``, if any changed."""
+        if self.path is None or not self._dirty:
+            return
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        with open(self.path + PART_SUFFIX, 'w') as cache_file:
+            json.dump(self._entries, cache_file)
+        os.replace(self.path + PART_SUFFIX, self.path)
+        self._dirty = False
+
+
+def local_manifest(root: str,
+                   cache: Optional[HashCache] = None) -> Dict[str, str]:
+    """Hashes every file under a local directory.
+
+    Parameters:
+        root (str): The directory.
+        cache (Optional[HashCache]): The cache to hash through.
+
+    Returns:
+        Dict[str, str]: The hex SHA-256 of every file, keyed by its path
+        relative to ``root``, ``/``-separated.
+    """
+    cache = cache or HashCache()
+    manifest = {}
+    for directory, _, files in os.walk(root):
+        for name in files:
+            path = os.path.join(directory, name)
+            manifest[os.path.relpath(path, root).replace(os.sep, '/')] = \
+                cache.hash(path)
+    return manifest
+
+
+def _remote_manifest(client: paramiko.SSHClient, remote_path: str,
+                     timeout: Optional[float]) -> Dict[str, str]:
+    """Hashes every file under a remote directory on the bot itself. A
+    missing directory has an empty manifest."""
+    _, stdout, _ = client.exec_command(
+        f'cd {shlex.quote(remote_path)} && find . -type f '
+        f"! -name '*{PART_SUFFIX}' -print0 | xargs -0 -r sha256sum",
+        timeout=timeout)
+    manifest = {}
+    for line in stdout.read().decode('utf-8', 'replace').splitlines():
+        digest, _, path = line.partition('  ')
+        if path.startswith('./'):
+            manifest[path[2:]] = digest
+    stdout.channel.recv_exit_status()
+    return manifest
+
+
+def _upload_file(sftp: paramiko.SFTPClient, local_path: str,
+                 remote_path: str, directories: Set[str]) -> int:
+    """Uploads a file through a ``.part`` file, creating the missing remote
+    directories.
+
+    Returns:
+        int: The size of the file.
+    """
+    parents = []
+    directory = posixpath.dirname(remote_path)
+    while directory not in ('', '/') and directory not in directories:
+        parents.append(directory)
+        directory = posixpath.dirname(directory)
+    for directory in reversed(parents):
+        try:
+            sftp.stat(directory)
+        except IOError:
+            sftp.mkdir(directory)
+        directories.add(directory)
+
+    part_path = remote_path + PART_SUFFIX
+    attributes = sftp.put(local_path, part_path)
+    sftp.chmod(part_path, stat.S_IMODE(os.stat(local_path).st_mode))
+    sftp.posix_rename(part_path, remote_path)
+    return attributes.st_size or 0
+
+
+async def sync(pool: SSHPool, hosts: Iterable[str], root: str,
+               manifest: Mapping[str, str],
+               remote_path: str) -> Dict[str, TransferResult]:
+    """Makes a remote directory of many bots hold the files of a local
+    directory, uploading only the files which differ. Remote files missing
+    from the local directory are kept.
+
+    Parameters:
+        pool (SSHPool): The pool to upload over.
+        hosts (Iterable[str]): The hosts of the bots.
+        root (str): The local directory.
+        manifest (Mapping[str, str]): The ``local_manifest`` of ``root``.
+        remote_path (str): The directory on every bot. Relative paths are
+            relative to the home directory of the SSH user.
+
+    Returns:
+        Dict[str, TransferResult]: The outcome of every bot, keyed by its
+        host. A bot which failed does not prevent the others from being
+        updated.
+
+    Example:
+
+    .. code-block:: python
+
+       cache = HashCache(HASH_CACHE_PATH)
+       manifest = local_manifest('control', cache)
+       async with SSHPool() as pool:
+           results = await sync(pool, hosts, 'control', manifest, 'control')
+    """
+    def work(connection: SSHConnection, result: TransferResult) -> None:
+        start = time.monotonic()
+        try:
+            remote = _remote_manifest(connection.client, remote_path,
+                                      connection.timeout)
+            directories: Set[str] = set()
+            for path, digest in sorted(manifest.items()):
+                local_path = os.path.join(root, *path.split('/'))
+                if remote.get(path) == digest:
+                    result.stats.skipped_bytes += os.path.getsize(local_path)
+                    continue
+                result.stats.bytes += _upload_file(
+                    connection.sftp, local_path,
+                    posixpath.join(remote_path, path), directories)
+                result.stats.files += 1
+        finally:
+            result.stats.seconds += time.monotonic() - start
+
+    async def sync_one(host: str) -> TransferResult:
+        result = TransferResult(host, remote_path)
+        try:
+            await pool.run(host, lambda conn: work(conn, result))
+        except (paramiko.SSHException, OSError, EOFError) as err:
+            result.error = err
+        return result
+
+    return {result.host: result for result in await asyncio.gather(*[
+        sync_one(host) for host in dict.fromkeys(hosts)
+    ])}
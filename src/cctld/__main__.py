@@ -6,53 +6,114 @@ import asyncio
 import logging
 import sys
 import os
+from typing import Optional
 from reactivex.subject.subject import Subject
 from serial import SerialException
 
+from cctl.models import Inventory
 from cctl.models.coachbot import Coachbot, CoachbotState
+from cctl.models.inventory import install as install_inventory
 from cctld import camera, daemon, servers
 from cctld.ble import BleManager
+from cctld.ble.health import HealthTracker
+from cctld.ble.scanner import PresenceScanner
+from cctld.coach_commands import CoachCommandPool
+from cctld.code_store import CodeStore
 from cctld.daughters.arduino import ArduinoInfo
+from cctld.fleet_commands import FleetCommandChannel
+from cctld.jobs import JobManager
+from cctld.liveness import LivenessTracker
 from cctld.conf import Config
 from cctld.models import AppState
 from cctld.models.app_state import CoachbotStateSubject
-from cctld.utils.net import host_is_reachable
+from cctld.res import ExitCode
+from cctld.utils.net import get_broadcast_address, probe_reachable
 
 
-async def auto_pruner(app_state: AppState):
-    """The auto_pruner is a truly hacky way to automatically purge values that
-    have possibly become stale from the ``coachbot_states``. How it works is
-    that it basically goes through each robot in a loop, checking if they are
-    currently awake and based on that setting them to ``None`` if they aren't.
+async def liveness_monitor(app_state: AppState) -> None:
+    """Marks the bots which stopped reporting their status as unreachable.
 
-    Todo:
-        Really shouldn't need to exist, I feel like. Likely there is a better
-        solution, but it's what we've got for now. This is not at all with what
-        reactivex is about but I just don't know better for now.
+    Bots are tracked by ``app_state.liveness`` (see ``cctld.liveness``), which
+    the status server feeds. Only bots which have not reported for
+    ``Config.CoachServers.liveness_timeout`` seconds are pinged. Those which
+    answer are given as long again to report, while the others are pruned.
+    All quiet bots are probed at once (see ``cctld.utils.net``).
     """
-    async def __helper(bot_id, bot_state):
-        bot = Coachbot(bot_id, bot_state)
-        if not app_state.coachbot_states.get_subject(bot_id).value[1].is_on:
-            return
-        if not await host_is_reachable(bot.ip_address):
-            logging.getLogger('auto-pruner').debug(
-                'Could not reach %d. Pruning away.', bot_id)
-            app_state.coachbot_states.get_subject(bot_id).on_next(
-                (bot_id, CoachbotState(None)))
+    liveness = app_state.liveness
+    port = app_state.config.coach_client.command_port
 
     while True:
-        asyncio.gather(*(__helper(bot_id, bot_state)
-                         for bot_id, bot_state in
-                         app_state.coachbot_states.tuple_value),
-                       return_exceptions=True)
-        await asyncio.sleep(5)
+        quiet = [bot_id for bot_id in liveness.take_quiet()
+                 if app_state.coachbot_states.value[bot_id].is_on]
+        if quiet:
+            hosts = {Coachbot.stateless(bot_id).ip_address: bot_id
+                     for bot_id in quiet}
+            reachable = await probe_reachable(hosts, tcp_port=port)
+            for host, bot_id in hosts.items():
+                if reachable[host]:
+                    liveness.heard(bot_id)
+                    continue
+                logging.getLogger('liveness').debug(
+                    'Could not reach %d. Pruning away.', bot_id)
+                app_state.coachbot_states.update(bot_id, CoachbotState(None))
+        deadline = liveness.next_deadline()
+        await asyncio.sleep(liveness.quiet_after if deadline is None
+                            else max(deadline - liveness.clock(), 0.05))
+
+
+def load_inventory(config: Config) -> Inventory:
+    """Loads the inventory of the arena and installs it for this process.
+
+    Exits if the configured inventory cannot be read.
+    """
+    path = config.inventory.path
+    try:
+        inventory = Inventory.load(path) if path else Inventory.legacy()
+    except (OSError, ValueError) as err:
+        logging.getLogger('inventory').error(
+            'Could not load the inventory %s: %s', path, err)
+        sys.exit(ExitCode.EX_CONFIG)
+    logging.getLogger('inventory').info('Loaded an inventory of %d bots.',
+                                        len(inventory))
+    install_inventory(inventory)
+    return inventory
+
+
+def load_fleet_commands(config: Config) -> Optional[FleetCommandChannel]:
+    """Builds the fleet command channel, if configured.
+
+    Returns ``None``, commanding every bot individually instead, if no key
+    file is configured or the key or broadcast address cannot be read.
+    """
+    conf = config.coach_client
+    if (key_file := conf.fleet_command_key_file) is None:
+        return None
+    try:
+        with open(key_file, 'rb') as key:
+            secret = key.read().strip()
+        address = conf.fleet_command_address or \
+            get_broadcast_address(conf.fleet_command_interface or '')
+    except OSError as err:
+        logging.getLogger('fleet-command').error(
+            'Could not set up fleet commands: %s. Commanding every bot '
+            'individually.', err)
+        return None
+    logging.getLogger('fleet-command').info(
+        'Sending fleet commands to %s:%d.', address, conf.fleet_command_port)
+    return FleetCommandChannel(address, conf.fleet_command_port, secret,
+                               repeats=conf.fleet_command_repeats,
+                               ack_timeout=conf.fleet_command_ack_timeout)
 
 
 async def __main(config: Config):
     """The main entry point of cctld."""
+    inventory = load_inventory(config)
+    presence = None if (scan_intf := config.bluetooth.scan_interface) is None \
+        else PresenceScanner(scan_intf, config.bluetooth.presence_timeout)
+    code_store = CodeStore()
     app_state = AppState(
-        coachbot_states=CoachbotStateSubject(
-            tuple(CoachbotState(False) for _ in range(100))),
+        coachbot_states=CoachbotStateSubject(inventory.identifiers,
+                                             code_store=code_store),
         coachbot_signals=Subject(),
         config=config,
         arduino_daughter=ArduinoInfo(
@@ -63,7 +124,33 @@ async def __main(config: Config):
             os.path.join(config.general.workdir, 'arduino')
         ),
         camera_stream=camera.ProcessingStream(config),
-        ble_manager=BleManager(config.bluetooth.interfaces)
+        ble_manager=BleManager(
+            config.bluetooth.interfaces,
+            notify=config.bluetooth.notify,
+            cache_size=config.bluetooth.cache_size,
+            idle_timeout=config.bluetooth.cache_idle_timeout,
+            presence=presence,
+            health=HealthTracker(
+                config.bluetooth.interfaces,
+                quarantine_after=config.bluetooth.quarantine_after,
+                quarantine_time=config.bluetooth.quarantine_time,
+                rssi_of=None if presence is None else presence.rssi,
+                scan_interface=scan_intf
+            )
+        ),
+        inventory=inventory,
+        jobs=JobManager(),
+        liveness=LivenessTracker(config.servers.liveness_timeout),
+        coach_commands=CoachCommandPool(
+            config.coach_client.command_port,
+            timeout=config.coach_client.command_timeout,
+            heartbeat=config.coach_client.heartbeat_interval,
+            min_timeout=config.coach_client.command_min_timeout,
+            max_timeout=config.coach_client.command_max_timeout,
+            retry_ratio=config.coach_client.command_retry_ratio
+        ),
+        code_store=code_store,
+        fleet_commands=load_fleet_commands(config)
     )
 
     try:
@@ -86,8 +173,10 @@ async def __main(config: Config):
         servers.start_ipc_request_server(app_state),
         servers.start_ipc_feed_server(app_state),
         servers.start_ipc_signal_forward_server(app_state),
+        app_state.coachbot_states.run_publisher(config.ipc.state_feed_rate),
         app_state.camera_stream.start_watchdog(),
-        auto_pruner(app_state)
+        liveness_monitor(app_state),
+        *([] if presence is None else [presence.run()])
     )
     await running_servers
 
@@ -4,17 +4,22 @@
 
 from __future__ import annotations
 from contextlib import asynccontextmanager
-from typing import Iterable, AsyncGenerator, Tuple
+from typing import AsyncGenerator, Callable, Iterable, List, Optional, Set, \
+    Tuple
 import asyncio
 import logging
+import time
 
 from bleak.exc import BleakError, BleakDBusError
 
 from cctl.models import Coachbot
-from cctl.protocols.ble import BluefruitMode
+from cctl.protocols.ble import BluefruitProtocolError
 
-from .client import CoachbotBLEClient
+from .cache import ClientCache
+from .client import CoachbotBLEClient, LatencyStats
 from .errors import BLENotReachableError
+from .health import HealthTracker
+from .scanner import PresenceScanner
 
 
 __author__ = 'Marko Vejnovic <contact@markovejnovic.com>'
@@ -27,80 +32,269 @@ __email__ = 'contact@markovejnovic.com'
 __status__ = 'Development'
 
 
+BLE_ERRORS = (BleakError, BleakDBusError, BluefruitProtocolError,
+              asyncio.TimeoutError)
+
+BootResultT = Tuple[Coachbot, Optional[BLENotReachableError]]
+
+
 class BleManager:
-    """Manages BLE transactions."""
+    """Manages BLE transactions.
 
-    def __init__(self, avail_interfaces: Iterable[int]) -> None:
-        """Manages BLE transactions.
+    Bots are booted by one worker per interface, all pulling from a shared
+    queue, so that a fleet boot uses every interface at once. Bots which
+    could not be reached are requeued with an exponential backoff, leaving
+    the interface free for other bots in the meantime. Bots are handed to
+    the free interface most likely to command them quickly, as scored by
+    ``health`` (see ``cctld.ble.health``).
 
-        Parameters:
-            avail_interfaces (Iterable[int]): The interfaces that this manager
-            has access to. These interfaces must be integers and correspond to
+    Clients stay connected after a successful operation, up to
+    ``cache_size`` per interface, and are reused by follow-up operations on
+    the same bot until they are unused for ``idle_timeout`` seconds.
+
+    Parameters:
+        avail_interfaces (Iterable[int]): The interfaces that this manager has
+            access to. These interfaces must be integers and correspond to
             the numbers that ``hciconfig`` will return.
-        """
-        intfcs = list(avail_interfaces)
-        self.queue: asyncio.Queue[int] = asyncio.Queue(maxsize=len(intfcs))
-        for intf in intfcs:
-            self.queue.put_nowait(intf)
+        client_factory (Callable[..., CoachbotBLEClient]): Creates the client
+            used to talk to a single bot. Replaceable for testing.
+        max_retries (int): The number of times a bot is retried before giving
+            up on it.
+        backoff (float): The number of seconds to wait before the first retry
+            of a bot. Every following retry waits twice as long.
+        notify (bool): Whether the clients receive responses via RX
+            notifications instead of polling (see ``cctld.ble.client``).
+        cache_size (int): The number of connected clients kept per interface.
+        idle_timeout (float): The number of seconds after which an unused
+            connected client is disconnected.
+        presence (Optional[PresenceScanner]): If given, bots whose boards are
+            known not to be advertising are reported as unreachable without
+            attempting to connect to them.
+        health (Optional[HealthTracker]): Scores the interfaces. Defaults to
+            a tracker with the default settings.
+
+    The latency of every command sent is accumulated in ``stats``.
+    """
+
+    def __init__(
+        self,
+        avail_interfaces: Iterable[int],
+        client_factory: Callable[..., CoachbotBLEClient] = CoachbotBLEClient,
+        max_retries: int = 5,
+        backoff: float = 0.5,
+        notify: bool = True,
+        cache_size: int = 4,
+        idle_timeout: float = 60.0,
+        presence: Optional[PresenceScanner] = None,
+        health: Optional[HealthTracker] = None
+    ) -> None:
+        self.interfaces = list(avail_interfaces)
+        self._free: List[int] = list(self.interfaces)
+        self._free_changed = asyncio.Condition()
+        self.client_factory = client_factory
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.notify = notify
+        self.stats = LatencyStats()
+        self.cache = ClientCache(cache_size, idle_timeout)
+        self._reaper: Optional[asyncio.Task] = None
+        self.presence = presence
+        self.health = HealthTracker(self.interfaces) if health is None \
+            else health
+
+    def _choose(self, addr: Optional[str]) -> Optional[int]:
+        if addr is not None and \
+                (cached := self.cache.adapter_of(addr)) in self._free:
+            return cached
+        return self.health.choose(self._free, addr)
 
     @asynccontextmanager
-    async def transaction(self):
-        """Yields an interface for use with transactions."""
-        intfc = await self.queue.get()
+    async def transaction(self, addr: Optional[str] = None):
+        """Yields an interface for use with transactions.
+
+        Parameters:
+            addr (Optional[str]): The bot the transaction is with. If given,
+                the interface holding a cached connection to it is preferred,
+                and the interface is otherwise picked for that bot.
+        """
+        async with self._free_changed:
+            await self._free_changed.wait_for(
+                lambda: self._choose(addr) is not None)
+            intfc = self._choose(addr)
+            self._free.remove(intfc)
         try:
             yield intfc
         finally:
-            await self.queue.put(intfc)
+            async with self._free_changed:
+                self._free.append(intfc)
+                # Waiters wait for different interfaces, so wake them all.
+                self._free_changed.notify_all()
 
-    async def boot_bots(
+    @staticmethod
+    async def _close(client: CoachbotBLEClient) -> None:
+        try:
+            await client.__aexit__(None, None, None)
+        except BLE_ERRORS as err:
+            logging.getLogger('bluetooth').debug(
+                'Could not disconnect %s cleanly: %s', client.address, err)
+
+    async def _connect(self, addr: str, intf: int) -> CoachbotBLEClient:
+        """Returns a client connected to ``addr`` through ``intf``, reusing
+        the cached one if it is still connected."""
+        client = self.cache.take(intf, addr)
+        if client is not None:
+            if client.is_connected:
+                logging.getLogger('bluetooth').debug(
+                    'Reusing the connection to %s on hci%d', addr, intf)
+                return client
+            await self._close(client)
+        for stale in self.cache.take_elsewhere(intf, addr):
+            await self._close(stale)
+
+        client = self.client_factory(
+            addr, pair=True, timeout=10,
+            adapter=f'hci{intf}', notify=self.notify, stats=self.stats
+        )
+        await client.__aenter__()
+        return client
+
+    async def _reap_idle(self) -> None:
+        """Disconnects idle clients until none are cached anymore."""
+        while len(self.cache) > 0:
+            await asyncio.sleep(self.cache.idle_timeout / 2)
+            for client in self.cache.take_idle():
+                logging.getLogger('bluetooth').debug(
+                    'Disconnecting idle client %s', client.address)
+                await self._close(client)
+
+    async def _release(self, addr: str, intf: int,
+                       client: CoachbotBLEClient) -> None:
+        """Caches a client which completed its operation."""
+        for evicted in self.cache.put(intf, addr, client):
+            await self._close(evicted)
+        if len(self.cache) > 0 and (self._reaper is None
+                                    or self._reaper.done()):
+            self._reaper = asyncio.create_task(self._reap_idle())
+
+    def _absent(self, addr: str) -> bool:
+        """Returns whether the board at ``addr`` is known not to be in
+        range. Boards stop advertising while connected, so cached
+        connections count as present."""
+        return self.presence is not None \
+            and self.cache.adapter_of(addr) is None \
+            and self.presence.present(addr) is False
+
+    async def _boot_bot(self, bot: Coachbot, state: bool) -> None:
+        addr = bot.bluetooth_mac_address
+        async with self.transaction(addr) as intf:
+            start = time.monotonic()
+            try:
+                client = await self._connect(addr, intf)
+            except BLE_ERRORS:
+                self.health.record(addr, intf, False,
+                                   time.monotonic() - start)
+                raise
+            try:
+                await client.boot(state)
+            except BaseException as err:
+                if isinstance(err, BLE_ERRORS):
+                    self.health.record(addr, intf, False,
+                                       time.monotonic() - start)
+                await self._close(client)
+                raise
+            self.health.record(addr, intf, True, time.monotonic() - start)
+            logging.getLogger('bluetooth').debug(
+                'Successfully booted bot %s on hci%d', addr, intf)
+            await self._release(addr, intf, client)
+
+    async def boot(
         self,
         bots: Iterable[Coachbot],
         state: bool
-    ) -> AsyncGenerator[BLENotReachableError, None]:
-        """Attempts to boot the given iterable MAC addresses up.
+    ) -> AsyncGenerator[BootResultT, None]:
+        """Boots the given bots up or down, yielding the result of every bot
+        as soon as it is known.
 
         Parameters:
-            ble_info (BleInfo): The BleInfo of the AppState.
-            bot_macs (Iterable[Coachbot]): The MAC addresses to attempt to boot
-            up. state (bool): The state to attempt to boot to. If True, the
-            bots turn on, otherwise they turn off.
+            bots (Iterable[Coachbot]): The bots to boot.
+            state (bool): The state to attempt to boot to. If True, the bots
+                turn on, otherwise they turn off.
 
         Returns:
-            A generator of ``BLENotReachableError`` objects which can be used
-            to figure out which robots could not be booted up.
+            A generator of ``(bot, error)`` tuples, in the order the bots
+            complete, where ``error`` is ``None`` if the bot was booted.
         """
-        max_attempts = 5
-
-        async def boot_bot(addr: str):
-            async with self.transaction() as intf:
-                async with CoachbotBLEClient(
-                    addr, pair=True, timeout=10,
-                    adapter=f'hci{intf}'
-                ) as client:
-                    await client.set_mode(BluefruitMode(True))
-                    await client.set_mode_led(state)
-                    await client.set_mode(BluefruitMode(False))
-                    logging.getLogger('bluetooth').debug(
-                        'Successfully booted bot %s', addr)
-
         bot_queue: asyncio.Queue[Tuple[Coachbot, int]] = asyncio.Queue()
         for bot in bots:
-            await bot_queue.put((bot, 0))
+            bot_queue.put_nowait((bot, 0))
+        n_bots = bot_queue.qsize()
+        results: asyncio.Queue[BootResultT] = asyncio.Queue()
+        retries: Set[asyncio.Task] = set()
 
-        while not bot_queue.empty():
-            bot, attempts = await bot_queue.get()
-            addr = bot.bluetooth_mac_address
+        async def retry(bot: Coachbot, attempts: int) -> None:
+            await asyncio.sleep(self.backoff * 2 ** (attempts - 1))
+            bot_queue.put_nowait((bot, attempts))
 
-            try:
-                await boot_bot(addr)
-            except (BleakError, BleakDBusError, asyncio.TimeoutError) as err:
-                if attempts < max_attempts:
-                    logging.getLogger('bluetooth').warning(
-                        'Could not command %s due to %s. Will Retry...',
-                        addr, err)
-                    await bot_queue.put((bot, attempts + 1))
-                else:
+        async def worker() -> None:
+            while True:
+                bot, attempts = await bot_queue.get()
+                try:
+                    if self._absent(bot.bluetooth_mac_address):
+                        logging.getLogger('bluetooth').warning(
+                            '%s is not advertising. Skipping.', bot)
+                        results.put_nowait((bot, BLENotReachableError(
+                            bot, 'Not advertising.')))
+                        continue
+                    await self._boot_bot(bot, state)
+                except BLE_ERRORS as err:
+                    if attempts < self.max_retries:
+                        logging.getLogger('bluetooth').warning(
+                            'Could not command %s due to %s. Will Retry...',
+                            bot, err)
+                        retries.add(task := asyncio.create_task(
+                            retry(bot, attempts + 1)))
+                        task.add_done_callback(retries.discard)
+                        continue
                     logging.getLogger('bluetooth').error(
                         'Could not command %s after %d attempts. Giving Up.',
-                        addr, max_attempts)
-                    yield BLENotReachableError(bot)
+                        bot, attempts + 1)
+                    results.put_nowait((bot, BLENotReachableError(bot)))
+                    continue
+                except Exception as err:  # pylint: disable=broad-except
+                    logging.getLogger('bluetooth').exception(
+                        'Could not command %s. Giving Up.', bot)
+                    results.put_nowait(
+                        (bot, BLENotReachableError(bot, str(err))))
+                    continue
+                results.put_nowait((bot, None))
+
+        workers = [asyncio.create_task(worker())
+                   for _ in range(min(len(self.interfaces), n_bots))]
+        try:
+            for _ in range(n_bots):
+                yield await results.get()
+        finally:
+            for task in workers + list(retries):
+                task.cancel()
+            logging.getLogger('bluetooth').debug(
+                'Command latencies: %s', self.stats.summary())
+
+    async def boot_bots(
+        self,
+        bots: Iterable[Coachbot],
+        state: bool
+    ) -> AsyncGenerator[BLENotReachableError, None]:
+        """Attempts to boot the given bots up or down.
+
+        Parameters:
+            bots (Iterable[Coachbot]): The bots to boot.
+            state (bool): The state to attempt to boot to. If True, the bots
+                turn on, otherwise they turn off.
+
+        Returns:
+            A generator of ``BLENotReachableError`` objects which can be used
+            to figure out which robots could not be booted up.
+        """
+        async for _, error in self.boot(bots, state):
+            if error is not None:
+                yield error
@@ -0,0 +1,83 @@
+#!/usr/bin/env python
+
+"""This module exposes the ``ClientCache``, which keeps recently used BLE
+clients connected so that follow-up commands to the same bot skip
+discovery, connection and pairing.
+
+The cache only does the bookkeeping. Connecting and disconnecting the
+clients is up to the ``BleManager``.
+"""
+
+from collections import OrderedDict
+import time
+from typing import Any, Dict, List, Optional
+
+
+class ClientCache:
+    """A least-recently-used cache of connected clients, per adapter.
+
+    A client is taken out of the cache while it is used and put back once
+    the operation succeeded, so that a client is never shared.
+
+    Parameters:
+        capacity (int): The maximum number of clients cached per adapter. If
+            ``0``, nothing is cached.
+        idle_timeout (float): The number of seconds after which an unused
+            client is evicted.
+    """
+    def __init__(self, capacity: int, idle_timeout: float) -> None:
+        self.capacity = capacity
+        self.idle_timeout = idle_timeout
+        # adapter -> address -> (client, time of last use)
+        self._clients: Dict[int, 'OrderedDict[str, Any]'] = {}
+
+    def __len__(self) -> int:
+        return sum(len(clients) for clients in self._clients.values())
+
+    def adapter_of(self, address: str) -> Optional[int]:
+        """Returns the adapter through which a client connected to
+        ``address`` is cached, if any."""
+        return next((adapter for adapter, clients in self._clients.items()
+                     if address in clients), None)
+
+    def take(self, adapter: int, address: str) -> Optional[Any]:
+        """Removes and returns the client connected to ``address`` through
+        ``adapter``, if there is one."""
+        entry = self._clients.get(adapter, OrderedDict()).pop(address, None)
+        return None if entry is None else entry[0]
+
+    def take_elsewhere(self, adapter: int, address: str) -> List[Any]:
+        """Removes and returns the clients connected to ``address`` through
+        any adapter other than ``adapter``. Bots accept a single connection,
+        so these must be closed before connecting through ``adapter``."""
+        return [entry[0] for other, clients in self._clients.items()
+                if other != adapter
+                and (entry := clients.pop(address, None)) is not None]
+
+    def put(self, adapter: int, address: str, client: Any) -> List[Any]:
+        """Caches a client as the most recently used one of ``adapter``.
+
+        Returns:
+            List[Any]: The clients evicted to make room, which should be
+            closed. This is ``[client]`` itself if caching is disabled.
+        """
+        if self.capacity <= 0:
+            return [client]
+        clients = self._clients.setdefault(adapter, OrderedDict())
+        clients[address] = (client, time.monotonic())
+        clients.move_to_end(address)
+        evicted = []
+        while len(clients) > self.capacity:
+            evicted.append(clients.popitem(last=False)[1][0])
+        return evicted
+
+    def take_idle(self, now: Optional[float] = None) -> List[Any]:
+        """Removes and returns every client unused for longer than
+        ``idle_timeout``."""
+        deadline = (time.monotonic() if now is None else now) \
+            - self.idle_timeout
+        idle = []
+        for clients in self._clients.values():
+            while clients and next(iter(clients.values()))[1] <= deadline:
+                idle.append(clients.popitem(last=False)[1][0])
+        return idle
@@ -1,10 +1,26 @@
 #!/usr/bin/env python
 
 """This module defines the basic BLE client that is used to communicate with
-the Coachbots."""
+the Coachbots.
+
+The client can run in one of two modes. In the legacy *polling* mode, every
+command is written to the TX characteristic and its response is read back
+from the RX characteristic after a fixed delay. In the *notify* mode, the
+client subscribes to notifications on the RX characteristic and resolves
+every command as soon as its response frame (terminated by ``OK`` or
+``ERROR``) arrives. Responses arrive in the order the commands were written,
+so multiple commands may be in flight at once (see
+``CoachbotBLEClient.pipeline``). The board still answers commands which
+timed out, so the next command waits for these late responses and drops
+them, rather than taking them for its own.
+"""
 
 import asyncio
+from collections import deque
 import logging
+import time
+from typing import Deque, Dict, List, Optional, Tuple
+
 from bleak import BleakClient
 from cctl.protocols import ble
 
@@ -15,19 +31,140 @@ _UUIDS = {
     'uart-rx-char': '6E400003-B5A3-F393-E0A9-E50E24DCCA9E'
 }
 
+_FRAME_TERMINATORS = (b'OK\r\n', b'ERROR\r\n')
+
+
+def _frame_end(buffer: bytes) -> Optional[int]:
+    """Returns the length of the first complete response frame in
+    ``buffer``, or ``None`` if it holds no complete frame."""
+    ends = [index + len(term) for term in _FRAME_TERMINATORS
+            if (index := buffer.find(term)) != -1]
+    return min(ends) if ends else None
+
+
+def _command_name(message: bytes) -> str:
+    """Returns the name of an AT command, without its arguments."""
+    return message.split(b'=', 1)[0].strip().decode('utf-8', 'replace')
+
+
+class LatencyStats:
+    """Accumulates the round trip latency of the commands sent to the
+    Bluefruit boards, per command.
+
+    Example:
+
+    .. code-block:: python
+
+       stats = LatencyStats()
+       async with CoachbotBLEClient(addr, notify=True, stats=stats) as c:
+           await c.boot(True)
+       print(stats.summary())
+    """
+    def __init__(self) -> None:
+        # command -> (count, total seconds, max seconds)
+        self._stats: Dict[str, Tuple[int, float, float]] = {}
+
+    def record(self, command: str, seconds: float) -> None:
+        """Records a single round trip of ``command``."""
+        count, total, max_s = self._stats.get(command, (0, 0.0, 0.0))
+        self._stats[command] = (count + 1, total + seconds,
+                                max(max_s, seconds))
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """Returns the number of round trips and their mean and maximum
+        latency in seconds, per command."""
+        return {
+            command: {'count': count, 'mean': total / count, 'max': max_s}
+            for command, (count, total, max_s) in self._stats.items()
+        }
+
 
 class CoachbotBLEClient(BleakClient):
     """This class defines the basic Client that is used to communicate with the
     Coachbots' Bluefruit boards.
+
+    Parameters:
+        notify (bool): Whether to receive responses via RX notifications
+            instead of polling the RX characteristic.
+        stats (Optional[LatencyStats]): Records the latency of every command,
+            if given.
+
+    All other parameters are passed to ``BleakClient``.
     """
     SLEEP_TIME = 25e-3
+    COMMAND_TIMEOUT = 2.0
+    MAX_ATTEMPTS = 5
+
+    def __init__(self, *args, notify: bool = False,
+                 stats: Optional[LatencyStats] = None, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.notify = notify
+        self.stats = stats
+        self._rx_buffer = bytearray()
+        self._pending: Deque[asyncio.Future] = deque()
+        # The number of late responses of abandoned commands still expected,
+        # and the event set once they all arrived.
+        self._abandoned = 0
+        self._drained: Optional[asyncio.Event] = None
 
     async def __aenter__(self, *args, **kwargs) -> 'CoachbotBLEClient':
         res = await super().__aenter__(*args, **kwargs)
         if kwargs.get('pair'):
             await self.pair()
+        if self.notify:
+            await self.start_notify(_UUIDS['uart-rx-char'], self._on_rx)
         return res
 
+    def _on_rx(self, _, data: bytearray) -> None:
+        """Splits the notified data into response frames and resolves the
+        oldest pending command with each."""
+        self._rx_buffer += data
+        while (end := _frame_end(self._rx_buffer)) is not None:
+            frame = bytes(self._rx_buffer[:end])
+            del self._rx_buffer[:end]
+            if self._abandoned:
+                self._abandoned -= 1
+                logging.getLogger('bluetooth').debug(
+                    'Dropping the late response %r of an abandoned command.',
+                    frame)
+                if not self._abandoned and self._drained is not None:
+                    self._drained.set()
+                continue
+            while self._pending:
+                future = self._pending.popleft()
+                if not future.done():
+                    future.set_result(frame)
+                    break
+            else:
+                logging.getLogger('bluetooth').debug(
+                    'Dropping unsolicited frame %r.', frame)
+
+    def _resync(self, abandoned: int) -> None:
+        """Forgets every pending command. The responses of the ``abandoned``
+        commands which were written may still arrive and are dropped by
+        ``_on_rx``, after which responses can be matched to commands again.
+        """
+        for future in self._pending:
+            future.cancel()
+        self._pending.clear()
+        if abandoned and not self._abandoned:
+            self._drained = asyncio.Event()
+        self._abandoned += abandoned
+
+    async def _drain(self) -> None:
+        """Waits for the late responses of abandoned commands, for at most
+        ``COMMAND_TIMEOUT`` seconds. Responses which did not arrive by then
+        are assumed lost."""
+        if not self._abandoned or self._drained is None:
+            return
+        try:
+            await asyncio.wait_for(self._drained.wait(), self.COMMAND_TIMEOUT)
+        except asyncio.TimeoutError:
+            logging.getLogger('bluetooth').debug(
+                '%d responses of abandoned commands to %s were lost.',
+                self._abandoned, self.address)
+            self._abandoned = 0
+
     async def toggle_mode(self) -> ble.BluefruitMode:
         """Switches the mode from UART to Command and vice-versa.
 
@@ -48,13 +185,27 @@ class CoachbotBLEClient(BleakClient):
 
         Parameters:
             mode (ble.BluefruitMode): The target mode to switch to.
+
+        Raises:
+            ble.BluefruitProtocolError: If the mode could not be set within
+                ``MAX_ATTEMPTS`` toggles.
         """
-        while True:
+        for _ in range(self.MAX_ATTEMPTS):
             try:
                 if await self.toggle_mode() == mode:
                     return
-            except ble.BluefruitProtocolError:
+            except (ble.BluefruitProtocolError, asyncio.TimeoutError):
                 pass
+        raise ble.BluefruitProtocolError(
+            f'Could not switch to {mode} in {self.MAX_ATTEMPTS} attempts.')
+
+    @staticmethod
+    def _led_message(value: bool) -> bytes:
+        return f'AT+HWMODELED=5,{"1" if value else "0"}\n'.encode('utf-8')
+
+    @staticmethod
+    def _is_ok(response: bytes) -> bool:
+        return response.decode('utf-8', 'replace').split('\r\n')[0] == 'OK'
 
     async def set_mode_led(self, value: bool) -> None:
         """Manually sets the mode LED to be on or off.
@@ -65,23 +216,54 @@ class CoachbotBLEClient(BleakClient):
         Parameters:
             value (bool): Whether the LED should be on or off.
 
+        Raises:
+            ble.BluefruitProtocolError: If the board did not acknowledge the
+                command within ``MAX_ATTEMPTS`` attempts.
         """
-        strv = '1' if value else '0'
-        while True:
+        for _ in range(self.MAX_ATTEMPTS):
             try:
-                resp = await self.request(
-                    f'AT+HWMODELED=5,{strv}\n'.encode('utf-8'))
-
-                if resp.decode('utf-8').split('\r\n')[0] != 'OK':
-                    # TODO: Handle failing case
-                    pass
-
-                logging.getLogger('bluetooth').debug(
-                    'Got response when setting LED: %s', resp)
-                return
+                resp = await self.request(self._led_message(value))
             except EOFError:
                 logging.getLogger('bluetooth').warning(
                     'Received EOF when sending AT+ command.')
+                continue
+            except asyncio.TimeoutError:
+                continue
+
+            logging.getLogger('bluetooth').debug(
+                'Got response when setting LED: %s', resp)
+            if self._is_ok(resp):
+                return
+        raise ble.BluefruitProtocolError(
+            f'Could not set the mode LED in {self.MAX_ATTEMPTS} attempts.')
+
+    async def boot(self, value: bool) -> None:
+        """Switches into command mode, sets the mode LED, which powers the
+        bot on or off, and switches back into UART mode.
+
+        In notify mode, the LED command and the switch back are written
+        without waiting on each other. Should either fail, the sequence is
+        retried one step at a time.
+
+        Parameters:
+            value (bool): Whether the bot should be on or off.
+        """
+        await self.set_mode(ble.BluefruitMode(True))
+        if self.notify:
+            try:
+                led, mode = await self.pipeline(self._led_message(value),
+                                                '+++\n'.encode('utf-8'))
+                if self._is_ok(led) and \
+                        ble.BluefruitMode.from_bytes(mode).command is False:
+                    return
+            except (ble.BluefruitProtocolError, asyncio.TimeoutError):
+                pass
+            logging.getLogger('bluetooth').debug(
+                'Pipelined boot of %s failed. Retrying step by step.',
+                self.address)
+            await self.set_mode(ble.BluefruitMode(True))
+        await self.set_mode_led(value)
+        await self.set_mode(ble.BluefruitMode(False))
 
     async def read(self) -> bytes:
         """Reads from the Adafruit board.
@@ -104,9 +286,63 @@ class CoachbotBLEClient(BleakClient):
             message,
             response=True
         )
-        await asyncio.sleep(self.__class__.SLEEP_TIME)
+        if not self.notify:
+            await asyncio.sleep(self.__class__.SLEEP_TIME)
+
+    def _record(self, message: bytes, start: float) -> None:
+        if self.stats is not None:
+            self.stats.record(_command_name(message),
+                              time.perf_counter() - start)
+
+    async def pipeline(self, *messages: bytes) -> List[bytes]:
+        """Writes every message without waiting for the previous responses,
+        then waits for all of them. In polling mode, the messages are sent one
+        at a time instead.
+
+        Parameters:
+            messages (bytes): The data to send to the board.
+
+        Returns:
+            List[bytes]: The response to every message, in order.
+
+        Raises:
+            asyncio.TimeoutError: If the responses did not arrive within
+                ``COMMAND_TIMEOUT`` seconds of the last write.
+        """
+        if not self.notify:
+            return [await self.request(message) for message in messages]
+
+        await self._drain()
+        loop = asyncio.get_running_loop()
+        futures = []
+        written = 0
+        try:
+            for message in messages:
+                future = loop.create_future()
+                start = time.perf_counter()
+                future.add_done_callback(
+                    lambda f, m=message, s=start:
+                    None if f.cancelled() else self._record(m, s))
+                self._pending.append(future)
+                futures.append(future)
+                await self.write(message)
+                written += 1
+
+            return list(await asyncio.wait_for(asyncio.gather(*futures),
+                                               self.COMMAND_TIMEOUT))
+        except BaseException:
+            # Timing out cancels the futures, so the written commands whose
+            # response is still due are the cancelled ones.
+            self._resync(sum(1 for future in futures[:written]
+                             if future.cancelled() or not future.done()))
+            raise
 
     async def request(self, message: bytes) -> bytes:
         """Makes a request to the Coachbot."""
+        if self.notify:
+            return (await self.pipeline(message))[0]
+        start = time.perf_counter()
         await self.write(message)
-        return await self.read()
+        response = await self.read()
+        self._record(message, start)
+        return response
@@ -0,0 +1,178 @@
+#!/usr/bin/env python
+
+"""This module exposes the ``HealthTracker``, which scores the bluetooth
+interfaces by how likely they are to command a bot quickly, so that the
+``BleManager`` can hand work to the best one.
+
+Every interface keeps an exponentially weighted success rate and latency.
+An interface failing ``quarantine_after`` times in a row is quarantined for
+``quarantine_time`` seconds, during which it is only used if every other
+interface is quarantined too.
+
+Every pair of a bot and an interface additionally keeps an *affinity*, the
+exponentially weighted success rate of that bot on that interface. Bots out
+of range of an interface quickly lose their affinity to it and are then
+only commanded through other interfaces. The affinity of a bot to the
+scanning interface starts off from the signal strength of its
+advertisements, if known.
+"""
+
+from dataclasses import dataclass
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+
+@dataclass
+class AdapterHealth:
+    """Holds the health of a single interface.
+
+    Attributes:
+        successes (int): The number of bots commanded successfully.
+        failures (int): The number of failed attempts.
+        success_rate (float): The weighted rate of recent successes.
+        latency (float): The weighted duration of recent successes, in
+            seconds.
+        consecutive_failures (int): The number of failures since the last
+            success.
+        quarantined_until (float): The ``time.monotonic`` time until which
+            the interface is quarantined.
+    """
+    successes: int = 0
+    failures: int = 0
+    success_rate: float = 1.0
+    latency: float = 1.0
+    consecutive_failures: int = 0
+    quarantined_until: float = 0.0
+
+    def quarantined(self, now: float) -> bool:
+        """Whether the interface is quarantined at ``now``."""
+        return now < self.quarantined_until
+
+    def to_dict(self, now: float) -> Dict[str, Any]:
+        """Converts this object into a dictionary, expressing the quarantine
+        as the number of seconds it still lasts."""
+        return {
+            'successes': self.successes,
+            'failures': self.failures,
+            'success_rate': self.success_rate,
+            'latency': self.latency,
+            'consecutive_failures': self.consecutive_failures,
+            'quarantined_for': max(self.quarantined_until - now, 0.0)
+        }
+
+
+def _rssi_affinity(rssi: int) -> float:
+    """Maps the signal strength of an advertisement, between -100 dBm and
+    -40 dBm, onto an affinity."""
+    return min(max((rssi + 100) / 60, 0.05), 1.0)
+
+
+class HealthTracker:
+    """Tracks the health of every interface and the affinity of every bot to
+    every interface.
+
+    Parameters:
+        interfaces (Iterable[int]): The interfaces to track.
+        quarantine_after (int): The number of consecutive failures after
+            which an interface is quarantined.
+        quarantine_time (float): The number of seconds a quarantine lasts.
+        alpha (float): The weight of the newest sample in the averages.
+        rssi_of (Optional[Callable[[str], Optional[int]]]): Returns the
+            signal strength of the advertisements of a board, if known.
+        scan_interface (Optional[int]): The interface ``rssi_of`` measures
+            from.
+    """
+    DEFAULT_AFFINITY = 0.5
+    MIN_AFFINITY = 0.2
+    AFFINITY_WEIGHT = 0.4
+
+    def __init__(
+        self,
+        interfaces: Iterable[int],
+        quarantine_after: int = 3,
+        quarantine_time: float = 30.0,
+        alpha: float = 0.2,
+        rssi_of: Optional[Callable[[str], Optional[int]]] = None,
+        scan_interface: Optional[int] = None
+    ) -> None:
+        self.adapters: Dict[int, AdapterHealth] = {
+            intf: AdapterHealth() for intf in interfaces
+        }
+        self.quarantine_after = quarantine_after
+        self.quarantine_time = quarantine_time
+        self.alpha = alpha
+        self.rssi_of = rssi_of
+        self.scan_interface = scan_interface
+        self._affinity: Dict[Tuple[str, int], float] = {}
+
+    def affinity(self, address: str, adapter: int) -> float:
+        """Returns the affinity of a bot to an interface."""
+        if (affinity := self._affinity.get((address, adapter))) is not None:
+            return affinity
+        if adapter == self.scan_interface and self.rssi_of is not None \
+                and (rssi := self.rssi_of(address)) is not None:
+            return _rssi_affinity(rssi)
+        return self.DEFAULT_AFFINITY
+
+    def score(self, address: Optional[str], adapter: int) -> float:
+        """Returns the expected rate of successes of commanding a bot, or
+        any bot if ``address`` is ``None``, through an interface."""
+        health = self.adapters[adapter]
+        affinity = self.DEFAULT_AFFINITY if address is None \
+            else self.affinity(address, adapter)
+        return health.success_rate * affinity / max(health.latency, 1e-3)
+
+    def record(self, address: str, adapter: int, success: bool,
+               seconds: float) -> None:
+        """Records the outcome of commanding a bot through an interface."""
+        health = self.adapters[adapter]
+        alpha = self.alpha
+        health.success_rate += alpha * (success - health.success_rate)
+        affinity = self.affinity(address, adapter)
+        self._affinity[(address, adapter)] = \
+            affinity + self.AFFINITY_WEIGHT * (success - affinity)
+        if success:
+            health.successes += 1
+            health.consecutive_failures = 0
+            health.latency += alpha * (seconds - health.latency)
+            return
+        health.failures += 1
+        health.consecutive_failures += 1
+        if health.consecutive_failures >= self.quarantine_after:
+            health.quarantined_until = time.monotonic() + self.quarantine_time
+            health.consecutive_failures = 0
+
+    def choose(self, free: List[int], address: Optional[str]) -> \
+            Optional[int]:
+        """Picks the interface to command a bot through.
+
+        Parameters:
+            free (List[int]): The interfaces which are not in use.
+            address (Optional[str]): The bot to command, if any.
+
+        Returns:
+            Optional[int]: The free interface with the best score, or
+            ``None`` if it is better to wait for an interface in use.
+        """
+        if not free:
+            return None
+        now = time.monotonic()
+        healthy = [intf for intf, health in self.adapters.items()
+                   if not health.quarantined(now)]
+        if not healthy:
+            return min(free,
+                       key=lambda intf: self.adapters[intf].quarantined_until)
+        if address is not None:
+            near = [intf for intf in healthy
+                    if self.affinity(address, intf) >= self.MIN_AFFINITY]
+            healthy = near or healthy
+        candidates = [intf for intf in free if intf in healthy]
+        if not candidates:
+            return None
+        return max(candidates, key=lambda intf: self.score(address, intf))
+
+    def to_dict(self) -> List[Dict[str, Any]]:
+        """Returns the health of every interface."""
+        now = time.monotonic()
+        return [{'interface': intf, **health.to_dict(now)}
+                for intf, health in self.adapters.items()]
@@ -0,0 +1,140 @@
+#!/usr/bin/env python
+
+"""This module exposes the ``PresenceScanner``, which passively listens to
+the advertisements of the Bluefruit boards on one interface and keeps track
+of which boards are in range.
+
+Bluefruit boards advertise whenever nobody is connected to them, regardless
+of whether the bot they power is on. A board which has not been heard of in
+a while is therefore most likely out of range or out of battery, and
+connecting to it is bound to time out.
+"""
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional
+
+from bleak import BleakScanner
+from bleak.exc import BleakError
+
+from cctl.protocols.ble import Sighting
+
+from .client import _UUIDS
+
+
+_BLUEFRUIT_NAME = 'Adafruit Bluefruit'
+
+
+@dataclass
+class _LastSeen:
+    rssi: int
+    last_seen: float
+
+
+class PresenceScanner:
+    """Keeps a table of the Bluefruit boards advertising around one
+    interface.
+
+    Parameters:
+        adapter (int): The interface to scan on, as ``hciconfig`` numbers it.
+        stale_after (float): The number of seconds after which a board that
+            was not heard of is considered absent.
+        scanner_factory (Callable[..., BleakScanner]): Creates the scanner.
+            Replaceable for testing.
+
+    Example:
+
+    .. code-block:: python
+
+       scanner = PresenceScanner(0)
+       asyncio.create_task(scanner.run())
+       ...
+       if scanner.present('e2:21:04:b6:49:cc') is False:
+           print('Bot 0 is out of range.')
+    """
+    RESTART_DELAY = 10.0
+
+    def __init__(
+        self,
+        adapter: int,
+        stale_after: float = 30.0,
+        scanner_factory: Callable[..., BleakScanner] = BleakScanner
+    ) -> None:
+        self.adapter = adapter
+        self.stale_after = stale_after
+        self.scanner_factory = scanner_factory
+        self._sightings: Dict[str, _LastSeen] = {}
+        self._scanning_since: Optional[float] = None
+
+    def on_advertisement(self, device: Any, advertisement: Any) -> None:
+        """Records an advertisement if it comes from a Bluefruit board."""
+        name = advertisement.local_name or ''
+        uuids = [uuid.lower() for uuid in advertisement.service_uuids]
+        if _UUIDS['uart'].lower() not in uuids and \
+                not name.startswith(_BLUEFRUIT_NAME):
+            return
+        # bleak 0.14 only reports the RSSI on the device, later versions on
+        # the advertisement.
+        if (rssi := getattr(advertisement, 'rssi', None)) is None:
+            rssi = device.rssi
+        self._sightings[device.address.lower()] = _LastSeen(
+            rssi, time.monotonic())
+
+    @property
+    def warm(self) -> bool:
+        """Whether the scanner has been scanning for long enough that every
+        board in range must have been heard of."""
+        return self._scanning_since is not None and \
+            time.monotonic() - self._scanning_since >= self.stale_after
+
+    def present(self, mac_address: str) -> Optional[bool]:
+        """Returns whether a board was heard of in the last ``stale_after``
+        seconds, or ``None`` if the scanner is not warm yet and cannot
+        tell."""
+        sighting = self._sightings.get(mac_address.lower())
+        if sighting is not None and \
+                time.monotonic() - sighting.last_seen < self.stale_after:
+            return True
+        return False if self.warm else None
+
+    def rssi(self, mac_address: str) -> Optional[int]:
+        """Returns the signal strength of the last advertisement of a board,
+        if it is present."""
+        if not self.present(mac_address):
+            return None
+        return self._sightings[mac_address.lower()].rssi
+
+    def sightings(self) -> List[Sighting]:
+        """Returns the last advertisement of every board heard of in the
+        last ``stale_after`` seconds, strongest first. The sightings have no
+        ``identifier``."""
+        now = time.monotonic()
+        return sorted((
+            Sighting(mac, sighting.rssi, now - sighting.last_seen)
+            for mac, sighting in self._sightings.items()
+            if now - sighting.last_seen < self.stale_after
+        ), key=lambda sighting: -sighting.rssi)
+
+    async def run(self) -> None:
+        """Scans until cancelled. Should the scanner fail, it is restarted
+        after ``RESTART_DELAY`` seconds."""
+        while True:
+            try:
+                async with self.scanner_factory(
+                    detection_callback=self.on_advertisement,
+                    adapter=f'hci{self.adapter}'
+                ):
+                    self._scanning_since = time.monotonic()
+                    logging.getLogger('bluetooth').info(
+                        'Scanning for Bluefruit boards on hci%d.',
+                        self.adapter)
+                    await asyncio.Future()
+            except BleakError as err:
+                logging.getLogger('bluetooth').error(
+                    'Could not scan on hci%d: %s. Retrying in %.0f s.',
+                    self.adapter, err, self.RESTART_DELAY)
+            finally:
+                self._scanning_since = None
+            await asyncio.sleep(self.RESTART_DELAY)
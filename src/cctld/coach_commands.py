@@ -1,38 +1,230 @@
 #!/usr/bin/env python
 
-"""This module exposes functions which send commands to coachbots."""
+"""This module exposes functions which send commands to coachbots.
 
+Commands are sent through the ``CoachCommandPool``, which keeps one
+``CommandChannel`` per bot for the lifetime of the daemon. A channel is a
+``zmq.DEALER`` socket connected to the ``zmq.REP`` socket of the bot. Every
+request is prefixed with a request id and an empty delimiter frame, which the
+``REP`` socket echoes back with the reply, so that many requests may be in
+flight and replies are matched to them regardless of order. ZMTP heartbeats
+detect dead connections, which zmq then re-establishes on its own.
+
+How long a channel waits for a reply follows the round-trip times of the
+bot (see ``cctld.utils.rtt``). Retries are delayed by a jittered exponential
+backoff and drawn from a retry budget shared by every channel.
+"""
+
+import asyncio
+import itertools
+import json
 import logging
+import time
 import traceback
-from typing import Any, Callable, Coroutine, Tuple
+from typing import Any, Callable, Coroutine, Dict, Optional, Tuple
 import zmq
 import zmq.asyncio
 
 from cctl.protocols import coach_command
+from cctld.utils.rtt import RetryBudget, RttEstimator, backoff_delay
 
 
 class CoachCommandError(Exception):
     """Represents an error that occurred when communicating with a Coachbot."""
 
 
+class CommandChannel:
+    """A long-lived connection to the command socket of a single bot.
+
+    Parameters:
+        context (zmq.asyncio.Context): The context to create the socket in.
+        endpoint (str): The endpoint of the bot, e.g. ``tcp://10.0.0.3:16891``.
+        rtt (Optional[RttEstimator]): Estimates the round-trip time of the
+            bot, which decides how long to wait for a reply before retrying.
+        max_retries (int): The number of attempts made per request.
+        budget (Optional[RetryBudget]): Limits the number of retries. If
+            ``None``, every request is attempted ``max_retries`` times.
+        heartbeat (float): The interval between ZMTP heartbeats, in seconds.
+            The connection is dropped and re-established after three missed
+            heartbeats.
+    """
+    def __init__(self, context: zmq.asyncio.Context, endpoint: str,
+                 rtt: Optional[RttEstimator] = None, max_retries: int = 3,
+                 heartbeat: float = 1.0,
+                 budget: Optional[RetryBudget] = None) -> None:
+        self.endpoint = endpoint
+        self.rtt = rtt or RttEstimator()
+        self.max_retries = max_retries
+        self.budget = budget
+        heartbeat_ms = int(heartbeat * 1000)
+        self._socket = context.socket(zmq.DEALER)
+        self._socket.setsockopt(zmq.LINGER, 0)
+        # Only queue requests on live connections, so that a request which
+        # timed out is not delivered once the bot comes back.
+        self._socket.setsockopt(zmq.IMMEDIATE, 1)
+        self._socket.setsockopt(zmq.HEARTBEAT_IVL, heartbeat_ms)
+        self._socket.setsockopt(zmq.HEARTBEAT_TIMEOUT, 3 * heartbeat_ms)
+        self._socket.setsockopt(zmq.HEARTBEAT_TTL, 3 * heartbeat_ms)
+        self._socket.setsockopt(zmq.RECONNECT_IVL, 100)
+        self._socket.setsockopt(zmq.RECONNECT_IVL_MAX, 5000)
+        self._socket.connect(endpoint)
+        self._ids = itertools.count()
+        self._pending: Dict[bytes, asyncio.Future] = {}
+        self._receiver: Optional[asyncio.Task] = None
+
+    async def _receive(self) -> None:
+        while True:
+            frames = await self._socket.recv_multipart()
+            future = self._pending.get(frames[0])
+            if future is None or future.done():
+                logging.getLogger('coach-command').debug(
+                    'Dropping a late reply from %s.', self.endpoint)
+                continue
+            future.set_result(frames[-1])
+
+    async def request(self, message: Dict[str, Any]) -> \
+            coach_command.Response:
+        """Sends a request to the bot and waits for its response, retrying
+        up to ``max_retries`` times while the retry budget allows it.
+
+        Raises:
+            CoachCommandError: If the bot did not reply.
+        """
+        if self._receiver is None or self._receiver.done():
+            self._receiver = asyncio.create_task(self._receive())
+        payload = json.dumps(message).encode()
+        loop = asyncio.get_running_loop()
+        if self.budget is not None:
+            self.budget.deposit()
+
+        for attempt in range(self.max_retries):
+            if attempt > 0:
+                if self.budget is not None and not self.budget.withdraw():
+                    break
+                await asyncio.sleep(backoff_delay(attempt - 1))
+            # Every attempt has its own id, so that a reply always tells
+            # which attempt it answers and is a valid sample.
+            request_id = next(self._ids).to_bytes(8, 'big')
+            self._pending[request_id] = future = loop.create_future()
+            timeout = self.rtt.timeout
+            try:
+                # Sending blocks while the bot is not connected, which says
+                # nothing about its round-trip time.
+                await asyncio.wait_for(self._socket.send_multipart(
+                    [request_id, b'', payload]), timeout)
+                start = time.monotonic()
+                reply = await asyncio.wait_for(future, timeout)
+                self.rtt.sample(time.monotonic() - start)
+                return coach_command.Response.from_dict(json.loads(reply))
+            except asyncio.TimeoutError:
+                self.rtt.backoff()
+                logging.getLogger('coach-command').warning(
+                    'Did not receive a reply from %s within %.3f s.',
+                    self.endpoint, timeout)
+            finally:
+                self._pending.pop(request_id, None)
+        logging.getLogger('coach-command').error(
+            'Did not receive a reply from %s.', self.endpoint)
+        raise CoachCommandError('Did not receive a reply from the Coachbot.')
+
+    def close(self) -> None:
+        """Closes the connection, failing every pending request."""
+        if self._receiver is not None:
+            self._receiver.cancel()
+        for future in self._pending.values():
+            future.cancel()
+        self._socket.close()
+
+
+class CoachCommandPool:
+    """Holds one ``CommandChannel`` per bot, created on first use.
+
+    Parameters:
+        port (int): The port on which the bots listen for commands.
+        timeout (float): The number of seconds to wait for the first reply
+            of a bot.
+        max_retries (int): The number of attempts made per request.
+        heartbeat (float): The interval between ZMTP heartbeats, in seconds.
+        min_timeout (float): The least number of seconds to wait for a reply.
+        max_timeout (float): The most number of seconds to wait for a reply.
+        retry_ratio (float): The number of retries allowed per request,
+            across every bot.
+
+    Example:
+
+    .. code-block:: python
+
+       pool = CoachCommandPool(16891)
+       async with pool.command('192.168.1.3') as command:
+           await command.set_led_color((255, 0, 0))
+    """
+    def __init__(self, port: int, timeout: float = 1.0,
+                 max_retries: int = 3, heartbeat: float = 1.0,
+                 min_timeout: float = 0.05, max_timeout: float = 2.0,
+                 retry_ratio: float = 0.2) -> None:
+        self.port = port
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.heartbeat = heartbeat
+        self.min_timeout = min_timeout
+        self.max_timeout = max_timeout
+        self.budget = RetryBudget(retry_ratio)
+        self._context: Optional[zmq.asyncio.Context] = None
+        self._channels: Dict[str, CommandChannel] = {}
+
+    def channel(self, host: str) -> CommandChannel:
+        """Returns the channel to the bot at ``host``."""
+        if (channel := self._channels.get(host)) is None:
+            if self._context is None:
+                self._context = zmq.asyncio.Context()
+            channel = self._channels[host] = CommandChannel(
+                self._context, f'tcp://{host}:{self.port}',
+                RttEstimator(self.timeout, self.min_timeout, self.max_timeout),
+                self.max_retries, self.heartbeat, self.budget)
+        return channel
+
+    def rtt(self, host: str) -> Optional[RttEstimator]:
+        """Returns the round-trip time estimate of the bot at ``host``, if
+        it was ever commanded."""
+        channel = self._channels.get(host)
+        return None if channel is None else channel.rtt
+
+    def command(self, host: str) -> 'CoachCommand':
+        """Returns a ``CoachCommand`` sending through the channel to the bot
+        at ``host``."""
+        return CoachCommand(host, self.port, self.channel(host))
+
+    def close(self) -> None:
+        """Closes every channel."""
+        for channel in self._channels.values():
+            channel.close()
+        self._channels.clear()
+        if self._context is not None:
+            self._context.term()
+            self._context = None
+
+
 class CoachCommand:
-    def __init__(self, host: str, coachbot_command_port: int) -> None:
+    def __init__(self, host: str, coachbot_command_port: int,
+                 channel: Optional[CommandChannel] = None) -> None:
         """Initializes a CoachCommand.
 
         Parameters:
             host (str): The host location of the coachbot.
             coachbot_command_port (int): The port to which the commands are to
             be sent.
+            channel (Optional[CommandChannel]): The channel to send commands
+            through. If ``None``, a new socket is created for every command.
         """
         self._host = host
         self._port = coachbot_command_port
-        self._context = zmq.asyncio.Context()
+        self._channel = channel
+        self._context = zmq.asyncio.Context() if channel is None else None
         self._socket = None
 
     def _build_socket(self):
         sock = self._context.socket(zmq.REQ)
         sock.setsockopt(zmq.RCVTIMEO, 100)
-        sock.setsockopt(zmq.RCVTIMEO, 100)
         return sock
 
     def _close_socket(self):
@@ -41,7 +233,8 @@ class CoachCommand:
         self._socket = None
 
     async def __aenter__(self) -> 'CoachCommand':
-        self._socket = self._build_socket()
+        if self._channel is None:
+            self._socket = self._build_socket()
         return self
 
     async def close(self):
@@ -103,6 +296,15 @@ class CoachCommand:
         finally:
             self._close_socket()
 
+    async def _execute(self, message: Dict[str, Any]) -> \
+            coach_command.Response:
+        if self._channel is not None:
+            return await self._channel.request(message)
+
+        async def worker(sock: zmq.asyncio.Socket):
+            await sock.send_json(message)
+        return await self._execute_socket(worker)
+
     async def set_user_code_running(self, value: bool):
         """Sends the start/stop user code command.
 
@@ -117,34 +319,38 @@ class CoachCommand:
             '/user-code/running'
         ).to_dict()
 
-        async def worker(sock: zmq.asyncio.Socket):
-            await sock.send_json(msg)
-        await self._execute_socket(worker)
+        await self._execute(msg)
 
-    async def set_user_code(self, value: str):
+    async def set_user_code(self, value: str,
+                            compressed: Optional[str] = None,
+                            code_hash: Optional[str] = None):
         """Sends a new user code to the coachbot.
 
         Parameters:
             value (str): The user code to be executed. Must be a valid python
             program.
+            compressed (Optional[str]): The user code, zlib-compressed and
+            base64-encoded (see ``cctld.code_store.CodeStore.compressed``).
+            If given, it is sent under ``code_zlib`` instead of ``code``,
+            which the bot must support.
+            code_hash (Optional[str]): The hash of the user code, sent along
+            with the compressed user code so that the bot can verify it.
 
         Todo:
             Rewrite. Legacy implementation.
         """
+        body = {'code': value} if compressed is None \
+            else {'code_zlib': compressed, 'hash': code_hash}
         msg = coach_command.Request('update', '/user-code/code',
-                                    body={'code': value}).to_dict()
+                                    body=body).to_dict()
 
-        async def worker(sock: zmq.asyncio.Socket):
-            await sock.send_json(msg)
         # TODO: Use response
-        response = await self._execute_socket(worker)  # noqa: F841
+        response = await self._execute(msg)  # noqa: F841
 
     async def set_led_color(self, value: Tuple[int, int, int]):
         """Sends a command to the coachbot to set the LED on or off."""
         msg = coach_command.Request('update', '/led/color',
                                     body={'color': value}).to_dict()
 
-        async def worker(sock: zmq.asyncio.Socket):
-            await sock.send_json(msg)
         # TODO: Use response
-        response = await self._execute_socket(worker)  # noqa: F841
+        response = await self._execute(msg)  # noqa: F841
@@ -0,0 +1,104 @@
+#!/usr/bin/env python
+
+"""This module exposes the ``CodeStore``, which holds user code by its
+content hash (see ``cctl.models.coachbot.user_code_hash``).
+
+Bots report the user code they hold with every state. **cctld** keeps a
+single copy of every distinct user code in the store and replaces it with
+its hash in the states it keeps and publishes, so that the state feed does
+not carry the full source of every bot. Knowing the hash of the code of
+every bot also lets deployments skip the bots which already run it.
+
+The store also caches the compressed form of every user code, which is what
+is sent to bots supporting it.
+"""
+
+import base64
+import dataclasses
+import zlib
+from collections import OrderedDict
+from typing import Dict, Optional
+
+from cctl.models import CoachbotState
+from cctl.models.coachbot import normalize_user_code_hash, user_code_hash
+
+
+class CodeStore:
+    """Holds the most recently used user codes by their content hash.
+
+    Parameters:
+        capacity (int): The number of user codes held. The least recently
+            used one is dropped first.
+
+    Example:
+
+    .. code-block:: python
+
+       store = CodeStore()
+       code_hash = store.put('print("Hello")')
+       assert store.get(code_hash) == 'print("Hello")'
+    """
+    def __init__(self, capacity: int = 64) -> None:
+        self.capacity = capacity
+        self._codes: 'OrderedDict[str, str]' = OrderedDict()
+        # Hashing the same code over and over, as every state report of a
+        # bot carries it, costs more than looking it up.
+        self._hashes: Dict[str, str] = {}
+        self._compressed: Dict[str, str] = {}
+
+    def __len__(self) -> int:
+        return len(self._codes)
+
+    def __contains__(self, code_hash: object) -> bool:
+        return code_hash in self._codes
+
+    def put(self, user_code: str) -> str:
+        """Stores a user code.
+
+        Returns:
+            str: The hash of the user code.
+        """
+        if (code_hash := self._hashes.get(user_code)) is None:
+            code_hash = user_code_hash(user_code)
+            self._hashes[user_code] = code_hash
+            self._codes[code_hash] = user_code
+            while len(self._codes) > self.capacity:
+                evicted_hash, evicted = self._codes.popitem(last=False)
+                del self._hashes[evicted]
+                self._compressed.pop(evicted_hash, None)
+        self._codes.move_to_end(code_hash)
+        return code_hash
+
+    def get(self, code_hash: str) -> Optional[str]:
+        """Returns the user code with the given hash, if held."""
+        return self._codes.get(code_hash)
+
+    def compressed(self, code_hash: str) -> Optional[str]:
+        """Returns the user code with the given hash, zlib-compressed and
+        base64-encoded, if held."""
+        if (user_code := self._codes.get(code_hash)) is None:
+            return None
+        if (compressed := self._compressed.get(code_hash)) is None:
+            compressed = self._compressed[code_hash] = base64.b64encode(
+                zlib.compress(user_code.encode('utf-8'), 9)).decode('ascii')
+        return compressed
+
+    def strip(self, state: CoachbotState) -> CoachbotState:
+        """Moves the user code of a state into the store. A state without
+        user code keeps the hash it holds only if it is well-formed.
+
+        Returns:
+            CoachbotState: The state, holding the hash of its user code
+            rather than the code itself.
+        """
+        ucs = state.user_code_state
+        if ucs.user_code is None:
+            code_hash = normalize_user_code_hash(ucs.user_code_hash)
+            if code_hash == ucs.user_code_hash:
+                return state
+            return dataclasses.replace(
+                state, user_code_state=dataclasses.replace(
+                    ucs, user_code_hash=code_hash))
+        return dataclasses.replace(
+            state, user_code_state=dataclasses.replace(
+                ucs, user_code=None, user_code_hash=self.put(ucs.user_code)))
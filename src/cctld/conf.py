@@ -80,6 +80,91 @@ class Config:
             commands."""
             return config.getint('coach_client', 'command_port')
 
+        @property
+        def command_timeout(self) -> float:
+            """Returns the number of seconds to wait for the first reply of a
+            bot before retrying the command."""
+            return config.getfloat('coach_client', 'command_timeout',
+                                   fallback=1.0)
+
+        @property
+        def command_min_timeout(self) -> float:
+            """Returns the least number of seconds to wait for a reply to a
+            command, however fast the bot usually replies."""
+            return config.getfloat('coach_client', 'command_min_timeout',
+                                   fallback=0.05)
+
+        @property
+        def command_max_timeout(self) -> float:
+            """Returns the most number of seconds to wait for a reply to a
+            command, however slow the bot usually replies."""
+            return config.getfloat('coach_client', 'command_max_timeout',
+                                   fallback=2.0)
+
+        @property
+        def command_retry_ratio(self) -> float:
+            """Returns the number of retries allowed per command, across
+            every bot."""
+            return config.getfloat('coach_client', 'command_retry_ratio',
+                                   fallback=0.2)
+
+        @property
+        def heartbeat_interval(self) -> float:
+            """Returns the number of seconds between the heartbeats sent on
+            the command connection to every bot."""
+            return config.getfloat('coach_client', 'heartbeat_interval',
+                                   fallback=1.0)
+
+        @property
+        def compress_user_code(self) -> bool:
+            """Returns whether user code is sent to the coachbots compressed,
+            which they must support."""
+            return config.getboolean('coach_client', 'compress_user_code',
+                                     fallback=False)
+
+        @property
+        def fleet_command_address(self) -> Optional[str]:
+            """Returns the broadcast address or multicast group fleet
+            commands are sent to. If ``None``, the broadcast address of
+            ``fleet_command_interface`` is used."""
+            return config.get('coach_client', 'fleet_command_address',
+                              fallback=None) or None
+
+        @property
+        def fleet_command_interface(self) -> Optional[str]:
+            """Returns the network interface whose broadcast address fleet
+            commands are sent to."""
+            return config.get('coach_client', 'fleet_command_interface',
+                              fallback=None) or None
+
+        @property
+        def fleet_command_port(self) -> int:
+            """Returns the port on which the coachbots listen for fleet
+            commands."""
+            return config.getint('coach_client', 'fleet_command_port',
+                                 fallback=16893)
+
+        @property
+        def fleet_command_key_file(self) -> Optional[str]:
+            """Returns the path to the secret fleet commands are signed with,
+            or ``None`` if fleet commands are disabled."""
+            return config.get('coach_client', 'fleet_command_key_file',
+                              fallback=None) or None
+
+        @property
+        def fleet_command_repeats(self) -> int:
+            """Returns the number of times every fleet command is sent."""
+            return config.getint('coach_client', 'fleet_command_repeats',
+                                 fallback=3)
+
+        @property
+        def fleet_command_ack_timeout(self) -> float:
+            """Returns the number of seconds to wait for the bots to
+            acknowledge a fleet command before commanding them
+            individually."""
+            return config.getfloat('coach_client', 'fleet_command_ack_timeout',
+                                   fallback=0.25)
+
     class CoachServers:
         """Returns the configurations under the ``coach_servers``header."""
 
@@ -88,6 +173,27 @@ class Config:
             """Returns the host/port which will listen for Coachbot statues."""
             return config.get('coach_servers', 'status_host')
 
+        @property
+        def status_router_host(self) -> Optional[str]:
+            """Returns the host/port of the acknowledged, batched status
+            endpoint or ``None`` if it is disabled."""
+            return config.get('coach_servers', 'status_router_host',
+                              fallback=None) or None
+
+        @property
+        def status_pull_host(self) -> Optional[str]:
+            """Returns the host/port of the fire-and-forget, batched status
+            endpoint or ``None`` if it is disabled."""
+            return config.get('coach_servers', 'status_pull_host',
+                              fallback=None) or None
+
+        @property
+        def liveness_timeout(self) -> float:
+            """Returns the number of seconds without a status report after
+            which a bot is pinged to check whether it is still alive."""
+            return config.getfloat('coach_servers', 'liveness_timeout',
+                                   fallback=5.0)
+
     class IPC:
         """Returns the configs under the ``api`` header."""
         @property
@@ -106,6 +212,44 @@ class Config:
             signals."""
             return config.get('api', 'signal_feed')
 
+        @property
+        def state_feed_keyframe_interval(self) -> float:
+            """Returns the number of seconds between two full-fleet keyframes
+            on the state feed. Between keyframes, only deltas are published.
+            """
+            return config.getfloat('api', 'state_feed_keyframe_interval',
+                                   fallback=5.0)
+
+        @property
+        def state_feed_rate(self) -> float:
+            """Returns the number of state feed publications per second. All
+            status updates received within one publication period are merged
+            into a single publication. A non-positive value publishes every
+            update immediately."""
+            return config.getfloat('api', 'state_feed_rate', fallback=20.0)
+
+        @property
+        def feed_encoding(self) -> str:
+            """Returns the encoding used on the state and signal feeds. Either
+            ``binary`` or ``json``. See ``cctl.protocols.codec``."""
+            return config.get('api', 'feed_encoding', fallback='binary')
+
+        @property
+        def batch_concurrency(self) -> int:
+            """Returns the maximum number of bots a single ``/bots/batch``
+            request commands concurrently."""
+            return config.getint('api', 'batch_concurrency', fallback=16)
+
+    class Inventory:
+        """Returns all the information under the ``inventory`` header."""
+
+        @property
+        def path(self) -> Optional[str]:
+            """Returns the path to the CSV file listing every bot of the arena
+            (see ``cctl.models.inventory``). Returns ``None`` if the legacy
+            fleet of 100 bots should be used."""
+            return config.get('inventory', 'path', fallback=None) or None
+
     class Bluetooth:
         """Returns all the information under the ``bluetooth`` header."""
 
@@ -116,6 +260,52 @@ class Config:
             return [int(i) for i in
                     config.get('bluetooth', 'interfaces').split(',')]
 
+        @property
+        def notify(self) -> bool:
+            """Returns whether responses of the Bluefruit boards are received
+            via notifications rather than by polling."""
+            return config.getboolean('bluetooth', 'notify', fallback=True)
+
+        @property
+        def cache_size(self) -> int:
+            """Returns the number of connections to bots kept open per
+            interface for reuse."""
+            return config.getint('bluetooth', 'cache_size', fallback=4)
+
+        @property
+        def cache_idle_timeout(self) -> float:
+            """Returns the number of seconds after which an unused cached
+            connection is closed."""
+            return config.getfloat('bluetooth', 'cache_idle_timeout',
+                                   fallback=60.0)
+
+        @property
+        def scan_interface(self) -> Optional[int]:
+            """Returns the interface on which Bluefruit advertisements are
+            scanned for, or ``None`` if scanning is disabled."""
+            value = config.get('bluetooth', 'scan_interface', fallback='')
+            return int(value) if value.strip() else None
+
+        @property
+        def presence_timeout(self) -> float:
+            """Returns the number of seconds after which a Bluefruit board
+            that did not advertise is considered absent."""
+            return config.getfloat('bluetooth', 'presence_timeout',
+                                   fallback=30.0)
+
+        @property
+        def quarantine_after(self) -> int:
+            """Returns the number of consecutive failures after which an
+            interface is quarantined."""
+            return config.getint('bluetooth', 'quarantine_after', fallback=3)
+
+        @property
+        def quarantine_time(self) -> float:
+            """Returns the number of seconds an interface stays
+            quarantined."""
+            return config.getfloat('bluetooth', 'quarantine_time',
+                                   fallback=30.0)
+
     class Arduino:
         """Returns all the information under the ``arduino`` header."""
 
@@ -222,6 +412,10 @@ class Config:
     def bluetooth(self) -> 'Config.Bluetooth':
         return Config.Bluetooth()
 
+    @property
+    def inventory(self) -> 'Config.Inventory':
+        return Config.Inventory()
+
     @property
     def log(self) -> 'Config.Log':
         return Config.Log()
@@ -0,0 +1,278 @@
+#!/usr/bin/env python
+
+"""This module exposes the ``FleetStateStore``, the columnar store holding the
+latest ``CoachbotState`` of every bot in the fleet.
+
+Rather than keeping one ``CoachbotState`` object per bot, the store keeps a
+single NumPy structured array with one row per bot. Numeric fields are stored
+in place, using ``NaN`` for unknown floats and ``-1`` for unknown booleans.
+String fields are interned into a side table shared by all bots, so that the
+array only holds indices into it. This means that:
+
+* Updating a single bot is ``O(1)`` and allocates nothing but the interned
+  strings it introduces.
+* Fleet-wide queries (e.g. which bots are on) are vectorized and return
+  read-only views rather than allocating ``CoachbotState`` objects.
+* ``CoachbotState`` objects are only materialized when a single bot is read.
+
+Every update marks the bot as dirty, so that publishers may only publish the
+bots that changed since their last publication.
+"""
+
+from typing import Dict, Iterable, Iterator, List, Mapping, Optional
+
+import numpy as np
+
+from cctl.models import CoachbotState, UserCodeState
+from cctl.utils.math import Vec2
+
+
+STRING_FIELDS = ('os_version', 'version', 'name', 'author',
+                 'requires_version', 'user_code', 'user_code_hash')
+
+FLEET_DTYPE = np.dtype([
+    ('is_on', 'i1'),
+    ('is_running', 'i1'),
+    ('bat_voltage', 'f8'),
+    ('x', 'f8'),
+    ('y', 'f8'),
+    ('theta', 'f8'),
+    *((field, 'u4') for field in STRING_FIELDS),
+])
+
+# Reinterprets the adjacent ``x`` and ``y`` fields as one ``(2,)`` field so
+# that fleet positions can be viewed as a ``(N, 2)`` array without copying.
+_POSITION_DTYPE = np.dtype({
+    'names': ['position'],
+    'formats': [('f8', (2,))],
+    'offsets': [FLEET_DTYPE.fields['x'][1]],
+    'itemsize': FLEET_DTYPE.itemsize
+})
+
+_UNKNOWN_BOOL = -1
+_NONE_STRING = 0
+
+
+def _from_bool(value: Optional[bool]) -> int:
+    return _UNKNOWN_BOOL if value is None else int(value)
+
+
+def _to_bool(value: int) -> Optional[bool]:
+    return None if value == _UNKNOWN_BOOL else value == 1
+
+
+def _to_float(value: float) -> Optional[float]:
+    return None if value != value else value
+
+
+class _StringTable:
+    """Interns strings into integer indices. Index ``0`` always represents
+    ``None``."""
+    def __init__(self) -> None:
+        self._strings: List[Optional[str]] = [None]
+        self._indices: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._strings)
+
+    def intern(self, value: Optional[str]) -> int:
+        """Returns the index of the given string, adding it if needed."""
+        if value is None:
+            return _NONE_STRING
+        if (index := self._indices.get(value)) is None:
+            index = self._indices[value] = len(self._strings)
+            self._strings.append(value)
+        return index
+
+    def lookup(self, index: int) -> Optional[str]:
+        """Returns the string at the given index."""
+        return self._strings[index]
+
+    def compact(self, data: np.ndarray) -> None:
+        """Drops every string not referenced by ``data`` and rewrites the
+        indices held in ``data`` accordingly."""
+        used = np.unique(np.concatenate(
+            [data[field] for field in STRING_FIELDS] +
+            [np.array([_NONE_STRING], dtype=np.uint32)]))
+        remap = np.zeros(len(self._strings), dtype=np.uint32)
+        remap[used] = np.arange(len(used), dtype=np.uint32)
+        for field in STRING_FIELDS:
+            data[field] = remap[data[field]]
+        self._strings = [self._strings[index] for index in used]
+        self._indices = {string: index
+                         for index, string in enumerate(self._strings)
+                         if string is not None}
+
+
+class UnknownBotError(KeyError):
+    """Raised when a bot that is not part of the fleet is accessed."""
+
+
+class FleetStateStore(Mapping[int, CoachbotState]):
+    """Holds the latest ``CoachbotState`` of every bot in the fleet.
+
+    The store behaves as a read-only ``Mapping`` from the bot identifier to
+    its ``CoachbotState``, materializing each value upon access. Identifiers
+    need not be contiguous. Rows of the underlying array are ordered by
+    ascending identifier; ``identifiers`` holds the identifier of each row.
+    Use ``update`` to modify the store.
+
+    Parameters:
+        identifiers (Iterable[int]): The identifiers of the bots in the
+            fleet.
+        initial (CoachbotState): The state every bot starts with.
+
+    Example:
+
+    .. code-block:: python
+
+       store = FleetStateStore(range(100), CoachbotState(False))
+       store.update(4, CoachbotState(True, bat_voltage=3.9))
+       assert store[4].is_on
+       print(store.ids_on())  # [4]
+    """
+    def __init__(self, identifiers: Iterable[int],
+                 initial: CoachbotState = CoachbotState()) -> None:
+        self._ids = np.unique(np.fromiter(identifiers, dtype=np.int64))
+        self._ids.flags.writeable = False
+        self._rows: Dict[int, int] = {int(ident): row for row, ident
+                                      in enumerate(self._ids)}
+        self._data = np.zeros(len(self._ids), dtype=FLEET_DTYPE)
+        self._dirty = np.zeros(len(self._ids), dtype=np.bool_)
+        self._strings = _StringTable()
+        for row in range(len(self._ids)):
+            self._write(row, initial)
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(self._rows)
+
+    def __contains__(self, ident: object) -> bool:
+        return ident in self._rows
+
+    def _row(self, ident: int) -> int:
+        try:
+            return self._rows[ident]
+        except KeyError:
+            raise UnknownBotError(
+                f'Bot {ident} is not part of the fleet.') from None
+
+    @property
+    def identifiers(self) -> np.ndarray:
+        """A read-only array holding the identifier of every row."""
+        return self._ids
+
+    def _write(self, row: int, state: CoachbotState) -> None:
+        ucs = state.user_code_state
+        intern = self._strings.intern
+        position = state.position
+        self._data[row] = (
+            _from_bool(state.is_on),
+            _from_bool(ucs.is_running),
+            np.nan if state.bat_voltage is None else state.bat_voltage,
+            np.nan if position is None else position.x,
+            np.nan if position is None else position.y,
+            np.nan if state.theta is None else state.theta,
+            intern(state.os_version), intern(ucs.version), intern(ucs.name),
+            intern(ucs.author), intern(ucs.requires_version),
+            intern(ucs.user_code), intern(ucs.user_code_hash)
+        )
+
+    def update(self, ident: int, state: CoachbotState) -> None:
+        """Stores the new state of a bot and marks it as dirty.
+
+        Parameters:
+            ident (int): The identifier of the bot.
+            state (CoachbotState): Its new state.
+
+        Raises:
+            UnknownBotError: If the bot is not part of the fleet.
+        """
+        row = self._row(ident)
+        self._write(row, state)
+        self._dirty[row] = True
+        # Strings no longer referenced by any bot (e.g. replaced user code)
+        # would otherwise accumulate forever.
+        if len(self._strings) > 4 * len(STRING_FIELDS) * max(len(self), 1):
+            self._strings.compact(self._data)
+
+    def __getitem__(self, ident: int) -> CoachbotState:
+        """Materializes the state of a single bot.
+
+        Raises:
+            UnknownBotError: If the bot is not part of the fleet.
+        """
+        (is_on, is_running, bat_voltage, x, y, theta,
+         os_version, version, name, author, requires_version,
+         user_code, code_hash) = self._data[self._row(ident)].item()
+        lookup = self._strings.lookup
+        return CoachbotState(
+            is_on=_to_bool(is_on),
+            os_version=lookup(os_version),
+            bat_voltage=_to_float(bat_voltage),
+            position=None if x != x else Vec2(x, y),
+            theta=_to_float(theta),
+            user_code_state=UserCodeState(
+                _to_bool(is_running), lookup(version), lookup(name),
+                lookup(author), lookup(requires_version), lookup(user_code),
+                lookup(code_hash))
+        )
+
+    def states(self, idents: Optional[Iterable[int]] = None
+               ) -> Dict[int, CoachbotState]:
+        """Materializes the states of the given bots, or the whole fleet if
+        ``idents`` is ``None``.
+
+        Returns:
+            Dict[int, CoachbotState]: The states keyed by the bot identifier.
+        """
+        if idents is None:
+            idents = self._rows
+        return {int(ident): self[int(ident)] for ident in idents}
+
+    @property
+    def data(self) -> np.ndarray:
+        """A read-only, zero-copy view of the underlying structured array,
+        with rows in the order of ``identifiers``. String fields hold indices
+        into an internal table; index the store to resolve them.
+
+        Note:
+            The view reflects later updates. Use ``np.copy`` if you need a
+            frozen copy.
+        """
+        view = self._data.view()
+        view.flags.writeable = False
+        return view
+
+    def column(self, field: str) -> np.ndarray:
+        """Returns a read-only, zero-copy view of one numeric column, where
+        ``field`` is one of ``is_on``, ``is_running``, ``bat_voltage``,
+        ``x``, ``y`` or ``theta``."""
+        if field in STRING_FIELDS:
+            raise KeyError(f'{field} is not a numeric column.')
+        return self.data[field]
+
+    @property
+    def positions(self) -> np.ndarray:
+        """A read-only, zero-copy ``(N, 2)`` view of the fleet positions.
+        Unknown positions are ``NaN``."""
+        return self.data.view(_POSITION_DTYPE)['position']
+
+    def ids_on(self) -> np.ndarray:
+        """Returns the identifiers of all bots which are known to be on."""
+        return self._ids[self._data['is_on'] == 1]
+
+    @property
+    def dirty(self) -> np.ndarray:
+        """Returns the identifiers of all bots updated since the last
+        ``take_dirty``."""
+        return self._ids[self._dirty]
+
+    def take_dirty(self) -> np.ndarray:
+        """Returns the identifiers of all bots updated since the last call
+        and clears their dirty bits."""
+        dirty = self._ids[self._dirty]
+        self._dirty[:] = False
+        return dirty
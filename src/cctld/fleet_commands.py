@@ -0,0 +1,150 @@
+#!/usr/bin/env python
+
+"""This module exposes the ``FleetCommandChannel``, which sends one command
+to many bots in a single signed UDP datagram (see
+``cctl.protocols.fleet_command``).
+
+Unlike commanding every bot through its ``cctld.coach_commands`` channel,
+which starts the bots one round trip after the other, every bot receives the
+datagram at the same time. The datagram is repeated ``repeats`` times, after
+which the acknowledgements of the bots are collected for up to
+``ack_timeout`` seconds. Bots which did not acknowledge the command are
+expected to be commanded individually by the caller.
+"""
+
+import asyncio
+import ipaddress
+import logging
+import socket
+import time
+from typing import Dict, Iterable, Optional, Set, Tuple
+
+from cctl.protocols import coach_command
+from cctl.protocols.fleet_command import FleetAck, FleetCommand, \
+    FleetCommandError
+
+
+class _Pending:
+    """Collects the acknowledgements of a single command."""
+    def __init__(self, targets: Set[int]) -> None:
+        self.targets = targets
+        self.acks: Dict[int, int] = {}
+        self.complete = asyncio.Event()
+
+    def ack(self, identifier: int, status_code: int) -> None:
+        if identifier not in self.targets:
+            return
+        self.acks.setdefault(identifier, status_code)
+        if len(self.acks) == len(self.targets):
+            self.complete.set()
+
+
+class _AckProtocol(asyncio.DatagramProtocol):
+    def __init__(self, channel: 'FleetCommandChannel') -> None:
+        self.channel = channel
+
+    def datagram_received(self, data: bytes, addr: Tuple[str, int]) -> None:
+        self.channel._on_datagram(data, addr)
+
+
+class FleetCommandChannel:
+    """Sends signed, sequence-numbered commands to the whole fleet at once.
+
+    Parameters:
+        address (str): The broadcast address of the network of the bots, or
+            a multicast group.
+        port (int): The port on which the bots listen for fleet commands.
+        key (bytes): The secret shared with the bots.
+        repeats (int): The number of times every datagram is sent.
+        interval (float): The number of seconds between the repetitions.
+        ack_timeout (float): The number of seconds to wait for the
+            acknowledgements after the last repetition.
+
+    Example:
+
+    .. code-block:: python
+
+       channel = FleetCommandChannel('192.168.1.255', 16893, b'secret')
+       acks = await channel.send(
+           coach_command.Request('create', '/user-code/running'), [3, 4])
+       missing = {3, 4} - acks.keys()
+    """
+    def __init__(self, address: str, port: int, key: bytes,
+                 repeats: int = 3, interval: float = 0.005,
+                 ack_timeout: float = 0.25) -> None:
+        self.address = address
+        self.port = port
+        self.key = key
+        self.repeats = repeats
+        self.interval = interval
+        self.ack_timeout = ack_timeout
+        self._seq = time.time_ns() // 1000
+        self._pending: Dict[int, _Pending] = {}
+        self._transport: Optional[asyncio.DatagramTransport] = None
+
+    async def _ensure_transport(self) -> asyncio.DatagramTransport:
+        if self._transport is None:
+            sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_BROADCAST, 1)
+            if ipaddress.ip_address(self.address).is_multicast:
+                sock.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_TTL, 1)
+            sock.bind(('', 0))
+            self._transport, _ = \
+                await asyncio.get_running_loop().create_datagram_endpoint(
+                    lambda: _AckProtocol(self), sock=sock)
+        return self._transport
+
+    def _on_datagram(self, data: bytes, addr: Tuple[str, int]) -> None:
+        try:
+            ack = FleetAck.decode(data, self.key)
+        except FleetCommandError as err:
+            logging.getLogger('fleet-command').warning(
+                'Ignoring a datagram from %s: %s', addr[0], err)
+            return
+        if (pending := self._pending.get(ack.seq)) is not None:
+            pending.ack(ack.identifier, ack.status_code)
+
+    async def send(self, request: coach_command.Request,
+                   targets: Iterable[int]) -> Dict[int, int]:
+        """Sends a command to the given bots.
+
+        Parameters:
+            request (coach_command.Request): The command.
+            targets (Iterable[int]): The bots which are to execute it.
+
+        Returns:
+            Dict[int, int]: The ``coach_command.StatusCode`` every bot which
+            acknowledged the command replied with.
+        """
+        targets = list(dict.fromkeys(targets))
+        if not targets:
+            return {}
+        transport = await self._ensure_transport()
+        self._seq += 1
+        seq = self._seq
+        datagram = FleetCommand(seq, request, targets).encode(self.key)
+        self._pending[seq] = pending = _Pending(set(targets))
+        try:
+            for i in range(self.repeats):
+                if i > 0:
+                    await asyncio.sleep(self.interval)
+                if pending.complete.is_set():
+                    break
+                transport.sendto(datagram, (self.address, self.port))
+            try:
+                await asyncio.wait_for(pending.complete.wait(),
+                                       self.ack_timeout)
+            except asyncio.TimeoutError:
+                logging.getLogger('fleet-command').info(
+                    '%d of %d bots did not acknowledge fleet command %d.',
+                    len(pending.targets) - len(pending.acks),
+                    len(pending.targets), seq)
+            return dict(pending.acks)
+        finally:
+            del self._pending[seq]
+
+    def close(self) -> None:
+        """Closes the socket."""
+        if self._transport is not None:
+            self._transport.close()
+            self._transport = None
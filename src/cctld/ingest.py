@@ -0,0 +1,157 @@
+#!/usr/bin/env python
+
+"""This module exposes the status ingest loops that receive the reports
+``Coachbots`` send to **cctld**.
+
+Three socket types are supported:
+
+* ``zmq.REP`` -- The legacy endpoint. Messages are handled strictly in
+  lockstep, one at a time. Kept for older coach-os versions.
+* ``zmq.ROUTER`` -- Acknowledged ingest. Bots may connect with either ``REQ``
+  or ``DEALER`` sockets. Messages are drained in batches and acknowledged
+  after the whole batch is handled.
+* ``zmq.PULL`` -- Fire-and-forget ingest. Bots connect with ``PUSH`` sockets
+  and never wait for an acknowledgement.
+
+Every endpoint accepts both JSON and binary (see ``cctl.protocols.codec``)
+reports, sniffed per message.
+"""
+
+import logging
+from typing import Callable, List, Optional, Tuple
+
+import zmq
+import zmq.asyncio
+
+from cctl.protocols import codec, status
+
+
+StatusBatchHandlerT = Callable[[List[status.Request]], None]
+
+DEFAULT_MAX_BATCH = 256
+
+
+async def recv_batch(sock: zmq.asyncio.Socket,
+                     max_batch: int = DEFAULT_MAX_BATCH) -> List[List[bytes]]:
+    """Waits for at least one multipart message and then drains, without
+    blocking, up to ``max_batch`` messages that are already queued.
+
+    Parameters:
+        sock (zmq.asyncio.Socket): The socket to receive on.
+        max_batch (int): The maximum number of messages to return.
+
+    Returns:
+        List[List[bytes]]: The received multipart messages.
+    """
+    batch = [await sock.recv_multipart()]
+    while len(batch) < max_batch:
+        try:
+            batch.append(await sock.recv_multipart(zmq.NOBLOCK))
+        except zmq.Again:
+            break
+    return batch
+
+
+def _decode(payload: bytes) -> Optional[status.Request]:
+    try:
+        return codec.loads(payload, status.Request)
+    except (ValueError, KeyError, TypeError) as err:
+        logging.getLogger('servers.status').warning(
+            'Dropping malformed status message: %s', err)
+        return None
+
+
+def _split_envelope(frames: List[bytes]) -> Tuple[List[bytes], bytes]:
+    """Splits a message received on a ``zmq.ROUTER`` into its routing
+    envelope and payload. The envelope is everything but the last frame, so
+    this supports both ``REQ`` (which adds an empty delimiter) and ``DEALER``
+    peers."""
+    return frames[:-1], frames[-1]
+
+
+async def serve_rep(sock: zmq.asyncio.Socket,
+                    on_batch: StatusBatchHandlerT,
+                    max_rep_retry: int = 3) -> None:
+    """Runs the legacy lockstep ingest loop on a ``zmq.REP`` socket.
+
+    Parameters:
+        sock (zmq.asyncio.Socket): A bound ``zmq.REP`` socket.
+        on_batch (StatusBatchHandlerT): Called with every received request.
+        max_rep_retry (int): The number of attempts made to send a reply.
+    """
+    while True:
+        request = _decode(await sock.recv())
+        if request is None:
+            reply = status.Response(status.StatusCode.BAD_REQUEST)
+        else:
+            on_batch([request])
+            reply = status.Response()
+
+        for _ in range(max_rep_retry):
+            try:
+                await sock.send_string(reply.serialize())
+                break
+            except zmq.Again:
+                pass
+        else:
+            logging.getLogger('servers.status').warning(
+                'Could not send status reply message. Failing')
+
+
+async def serve_router(sock: zmq.asyncio.Socket,
+                       on_batch: StatusBatchHandlerT,
+                       max_batch: int = DEFAULT_MAX_BATCH) -> None:
+    """Runs the acknowledged batch ingest loop on a ``zmq.ROUTER`` socket.
+
+    Acknowledgements are sent without blocking. A peer that disconnected
+    before its acknowledgement could be sent is simply dropped by the
+    ``zmq.ROUTER`` and cannot wedge the loop.
+
+    Parameters:
+        sock (zmq.asyncio.Socket): A bound ``zmq.ROUTER`` socket.
+        on_batch (StatusBatchHandlerT): Called once per drained batch.
+        max_batch (int): The maximum number of messages handled per batch.
+    """
+    ok_reply = status.Response().serialize().encode('utf-8')
+    bad_reply = status.Response(
+        status.StatusCode.BAD_REQUEST).serialize().encode('utf-8')
+
+    while True:
+        requests = []
+        replies = []
+        for frames in await recv_batch(sock, max_batch):
+            envelope, payload = _split_envelope(frames)
+            request = _decode(payload)
+            if request is not None:
+                requests.append(request)
+            replies.append(envelope + [ok_reply if request is not None
+                                       else bad_reply])
+
+        if requests:
+            on_batch(requests)
+
+        for reply in replies:
+            try:
+                await sock.send_multipart(reply, zmq.NOBLOCK)
+            except zmq.Again:
+                logging.getLogger('servers.status').debug(
+                    'Dropping acknowledgement to an unresponsive peer.')
+
+
+async def serve_pull(sock: zmq.asyncio.Socket,
+                     on_batch: StatusBatchHandlerT,
+                     max_batch: int = DEFAULT_MAX_BATCH) -> None:
+    """Runs the fire-and-forget batch ingest loop on a ``zmq.PULL`` socket.
+
+    Parameters:
+        sock (zmq.asyncio.Socket): A bound ``zmq.PULL`` socket.
+        on_batch (StatusBatchHandlerT): Called once per drained batch.
+        max_batch (int): The maximum number of messages handled per batch.
+    """
+    while True:
+        requests = [request for request in
+                    (_decode(frames[-1])
+                     for frames in await recv_batch(sock, max_batch))
+                    if request is not None]
+        if requests:
+            on_batch(requests)
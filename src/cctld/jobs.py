@@ -0,0 +1,189 @@
+#!/usr/bin/env python
+
+"""This module exposes the ``JobManager``, which runs long fleet operations
+(see ``cctl.protocols.job``) in the background.
+
+A job applies one operation to every targeted bot, either bot by bot with
+bounded concurrency or to all of them at once, and records the result of each
+bot as it completes. Every change is emitted as a ``JobEvent`` on
+``JobManager.events`` so that the feed server can publish it.
+"""
+
+import asyncio
+import itertools
+import logging
+from typing import Awaitable, Callable, Dict, Iterable, List
+
+from reactivex.subject import Subject
+
+from cctl.protocols import ipc
+from cctl.protocols.job import EVENT_DONE, EVENT_PROGRESS, STATUS_CANCELLED, \
+    STATUS_DONE, Job, JobEvent
+
+
+JobOperationT = Callable[[int], Awaitable[ipc.Response]]
+JobReportT = Callable[[int, ipc.Response], None]
+JobBatchOperationT = Callable[[List[int], JobReportT],
+                              Awaitable[List[ipc.Response]]]
+
+DEFAULT_HISTORY = 64
+
+
+class UnknownJobError(KeyError):
+    """Raised when a job that does not exist (anymore) is accessed."""
+
+
+class JobManager:
+    """Runs jobs and keeps the state of the most recent ones.
+
+    Parameters:
+        history (int): The number of finished jobs to remember.
+
+    Example:
+
+    .. code-block:: python
+
+       jobs = JobManager()
+       jobs.events.subscribe(on_next=print)
+       job = jobs.submit('boot', range(10), boot_one, max_concurrency=4)
+       print(jobs[job.job_id].status)
+    """
+    def __init__(self, history: int = DEFAULT_HISTORY) -> None:
+        self.events: Subject = Subject()
+        self._history = history
+        self._jobs: Dict[int, Job] = {}
+        self._tasks: Dict[int, asyncio.Task] = {}
+        self._ids = itertools.count(1)
+
+    def __getitem__(self, job_id: int) -> Job:
+        """Returns the state of a job.
+
+        Raises:
+            UnknownJobError: If the job does not exist or was forgotten.
+        """
+        try:
+            return self._jobs[job_id]
+        except KeyError:
+            raise UnknownJobError(f'Job {job_id} does not exist.') from None
+
+    def jobs(self) -> List[Job]:
+        """Returns every remembered job, oldest first."""
+        return list(self._jobs.values())
+
+    def submit(self, kind: str, identifiers: Iterable[int],
+               operation: JobOperationT, max_concurrency: int) -> Job:
+        """Starts a job in the background.
+
+        Parameters:
+            kind (str): The kind of the job. See ``cctl.protocols.job``.
+            identifiers (Iterable[int]): The bots to apply ``operation`` on.
+            operation (JobOperationT): The coroutine applied to every bot. Its
+                response is the result of the bot.
+            max_concurrency (int): The maximum number of bots ``operation``
+                runs on at once.
+
+        Returns:
+            Job: The state of the started job.
+        """
+        job = self._create(kind, identifiers)
+        self._tasks[job.job_id] = asyncio.create_task(
+            self._run(job, self._run_each(job, operation, max_concurrency)))
+        return job
+
+    def submit_batch(self, kind: str, identifiers: Iterable[int],
+                     operation: JobBatchOperationT) -> Job:
+        """Starts a job in the background, for operations which handle many
+        bots at once better than one at a time.
+
+        ``operation`` is given the bots and a ``report`` callback, which it
+        calls with the identifier and the response of every bot as soon as
+        the bot completes, so that the progress of the job is recorded as it
+        happens.
+
+        Parameters:
+            kind (str): The kind of the job. See ``cctl.protocols.job``.
+            identifiers (Iterable[int]): The bots to apply ``operation`` on.
+            operation (JobBatchOperationT): The coroutine applied to all the
+                bots at once. Its responses, in the order of the identifiers
+                it is given, are the results of the bots it did not report.
+
+        Returns:
+            Job: The state of the started job.
+        """
+        job = self._create(kind, identifiers)
+        self._tasks[job.job_id] = asyncio.create_task(
+            self._run(job, self._run_batch(job, operation)))
+        return job
+
+    def _create(self, kind: str, identifiers: Iterable[int]) -> Job:
+        job = Job(next(self._ids), kind, list(dict.fromkeys(identifiers)))
+        self._jobs[job.job_id] = job
+        return job
+
+    def cancel(self, job_id: int) -> bool:
+        """Cancels a running job. Bots which already completed keep their
+        results.
+
+        Returns:
+            bool: Whether the job was running.
+
+        Raises:
+            UnknownJobError: If the job does not exist or was forgotten.
+        """
+        if self[job_id].finished or (task := self._tasks.get(job_id)) is None:
+            return False
+        return task.cancel()
+
+    def _emit(self, job: Job, event: str, **fields) -> None:
+        event_o = JobEvent(job.job_id, job.seq + 1, event, **fields)
+        job.apply(event_o)
+        self.events.on_next(event_o)
+
+    async def _run(self, job: Job, work: Awaitable[None]) -> None:
+        try:
+            await work
+            self._emit(job, EVENT_DONE, status=STATUS_DONE)
+        except asyncio.CancelledError:
+            self._emit(job, EVENT_DONE, status=STATUS_CANCELLED)
+        finally:
+            self._tasks.pop(job.job_id, None)
+            self._forget_finished()
+
+    async def _run_each(self, job: Job, operation: JobOperationT,
+                        max_concurrency: int) -> None:
+        semaphore = asyncio.Semaphore(max_concurrency)
+
+        async def run_one(ident: int) -> None:
+            async with semaphore:
+                try:
+                    result = await operation(ident)
+                except Exception as err:  # pylint: disable=broad-except
+                    logging.getLogger('jobs').exception(
+                        'Job %d failed on bot %d.', job.job_id, ident)
+                    result = ipc.Response(
+                        ipc.ResultCode.INTERNAL_SERVER_ERROR, str(err))
+            self._emit(job, EVENT_PROGRESS, identifier=ident, result=result)
+
+        await asyncio.gather(*(run_one(ident) for ident in job.identifiers))
+
+    async def _run_batch(self, job: Job,
+                         operation: JobBatchOperationT) -> None:
+        def report(ident: int, result: ipc.Response) -> None:
+            if ident in job.identifiers and ident not in job.results:
+                self._emit(job, EVENT_PROGRESS, identifier=ident,
+                           result=result)
+
+        try:
+            results = await operation(list(job.identifiers), report)
+        except Exception as err:  # pylint: disable=broad-except
+            logging.getLogger('jobs').exception('Job %d failed.', job.job_id)
+            results = [ipc.Response(ipc.ResultCode.INTERNAL_SERVER_ERROR,
+                                    str(err))] * len(job.identifiers)
+        for ident, result in zip(job.identifiers, results):
+            report(ident, result)
+
+    def _forget_finished(self) -> None:
+        finished = [job_id for job_id, job in self._jobs.items()
+                    if job.finished]
+        for job_id in finished[:max(len(finished) - self._history, 0)]:
+            del self._jobs[job_id]
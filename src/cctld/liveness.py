@@ -0,0 +1,97 @@
+#!/usr/bin/env python
+
+"""This module exposes the ``LivenessTracker``, which derives whether bots are
+alive from the status reports they send, rather than by pinging them.
+
+Every tracked bot has a single deadline in a heap, so that finding the bots
+which went quiet costs ``O(log n)`` per bot, regardless of how often bots
+report. A report only updates the time the bot was last heard from. Once a
+deadline is reached, it is either pushed back according to that time or, if
+the bot has not reported since, the bot is considered quiet.
+"""
+
+import heapq
+import time
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+
+class LivenessTracker:
+    """Tracks when every bot was last heard from.
+
+    Parameters:
+        quiet_after (float): The number of seconds without hearing from a bot
+            after which it is considered quiet.
+        clock (Callable[[], float]): Returns the current time in seconds.
+            Replaceable for testing.
+
+    Example:
+
+    .. code-block:: python
+
+       liveness = LivenessTracker(quiet_after=5)
+       liveness.heard(4)
+       ...
+       for bot_id in liveness.take_quiet():
+           print(f'Bot {bot_id} has not reported in 5 seconds.')
+    """
+    def __init__(self, quiet_after: float = 5.0,
+                 clock: Callable[[], float] = time.monotonic) -> None:
+        self.quiet_after = quiet_after
+        self.clock = clock
+        self._last_seen: Dict[int, float] = {}
+        self._deadlines: List[Tuple[float, int]] = []
+        self._armed: Set[int] = set()
+
+    def __contains__(self, ident: object) -> bool:
+        return ident in self._last_seen
+
+    def heard(self, ident: int) -> None:
+        """Records that a bot was heard from just now."""
+        now = self.clock()
+        self._last_seen[ident] = now
+        if ident not in self._armed:
+            self._armed.add(ident)
+            heapq.heappush(self._deadlines, (now + self.quiet_after, ident))
+
+    def forget(self, ident: int) -> None:
+        """Stops tracking a bot until it is heard from again."""
+        self._last_seen.pop(ident, None)
+
+    def last_seen(self, ident: int) -> Optional[float]:
+        """Returns when a bot was last heard from, if it is tracked."""
+        return self._last_seen.get(ident)
+
+    def next_deadline(self) -> Optional[float]:
+        """Returns the earliest time at which a bot may go quiet, or ``None``
+        if no bot is tracked."""
+        self._settle()
+        return self._deadlines[0][0] if self._deadlines else None
+
+    def take_quiet(self) -> List[int]:
+        """Returns every bot whose deadline passed and stops tracking them."""
+        now = self.clock()
+        quiet = []
+        self._settle()
+        while self._deadlines and self._deadlines[0][0] <= now:
+            _, ident = heapq.heappop(self._deadlines)
+            self._armed.discard(ident)
+            del self._last_seen[ident]
+            quiet.append(ident)
+            self._settle()
+        return quiet
+
+    def _settle(self) -> None:
+        """Pushes back the earliest deadlines of bots which reported since
+        they were set, and drops those of forgotten bots, until the earliest
+        deadline is current."""
+        deadlines = self._deadlines
+        while deadlines:
+            deadline, ident = deadlines[0]
+            if (last_seen := self._last_seen.get(ident)) is None:
+                heapq.heappop(deadlines)
+                self._armed.discard(ident)
+            elif last_seen + self.quiet_after > deadline:
+                heapq.heapreplace(deadlines,
+                                  (last_seen + self.quiet_after, ident))
+            else:
+                return
@@ -4,61 +4,150 @@
 state."""
 
 
-from typing import Iterable, Tuple
+import asyncio
+import logging
+from typing import Dict, Iterable, NamedTuple, Optional, Tuple
 from dataclasses import dataclass
-from reactivex.subject import BehaviorSubject
 from reactivex.subject.subject import Subject
 
+from cctl.models import Inventory
 from cctl.models.coachbot import CoachbotState, Signal
 from cctld.daughters.arduino import ArduinoInfo
 from cctld.ble import BleManager
+from cctld.code_store import CodeStore
+from cctld.coach_commands import CoachCommandPool
 from cctld.conf import Config
+from cctld.fleet import FleetStateStore
+from cctld.fleet_commands import FleetCommandChannel
+from cctld.jobs import JobManager
+from cctld.liveness import LivenessTracker
 from cctld import camera
 
 
-class CoachbotStateSubject(Subject):
-    """Implements a ZIPping State-tracking subject for the Coachbot.
+class CoachbotStateDelta(NamedTuple):
+    """Represents one publication of the ``CoachbotStateSubject``.
 
-    Todo:
-        This implementation is really really bad and is bound to fail.
+    Attributes:
+        seq (int): The monotonically increasing sequence number of this
+            publication.
+        states (Dict[int, CoachbotState]): The bots whose state changed since
+            the last publication.
+        merged (int): The number of state updates that were coalesced into
+            this publication.
     """
-    MAX_TIME_BEFORE_PRUNE = 6
-
-    def __init__(self, bots: Iterable[CoachbotState]) -> None:
-        super().__init__()
-        self._internal_states = [BehaviorSubject((i, bot)) for i, bot in
-                                 enumerate(bots)]
-        for state in self._internal_states:
-            state.subscribe(on_next=self._emit, on_completed=self._close,
-                            on_error=self._close_err)
-
-    def _emit(self, _):
-        self.on_next(self.value)
+    seq: int
+    states: Dict[int, CoachbotState]
+    merged: int
 
-    def _close(self):
-        for state in self._internal_states:
-            state.dispose()
 
-    def _close_err(self, error):
-        for state in self._internal_states:
-            state.on_error(error)
-            state.dispose()
+class CoachbotStateSubject(Subject):
+    """Tracks the state of every Coachbot in the fleet.
+
+    The states are held in a ``cctld.fleet.FleetStateStore``. Updates are not
+    emitted as they arrive. Instead, all updates received within one
+    publisher tick (see ``run_publisher``) are coalesced into a single
+    publication. Every publication is numbered with a monotonically
+    increasing sequence number and emitted as a ``CoachbotStateDelta`` on the
+    ``deltas`` subject, which is what the state feed publishes. The store
+    itself is emitted on this subject.
+
+    If a ``code_store`` is given, the user code of every state is moved into
+    it, so that the states only hold its hash.
+    """
+    def __init__(self, identifiers: Iterable[int],
+                 initial: CoachbotState = CoachbotState(False),
+                 code_store: Optional[CodeStore] = None) -> None:
+        super().__init__()
+        self._store = FleetStateStore(identifiers, initial)
+        self.code_store = code_store
+        self._seq = 0
+        self._merged = 0
+        self._coalescing = False
+        self.ticks = 0
+        self.updates = 0
+        self.last_merged = 0
+        self.deltas: Subject[CoachbotStateDelta] = Subject()
+
+    def update(self, ident: int, state: CoachbotState) -> None:
+        """Stores the new state of a bot. It is published on the next
+        publisher tick, or immediately if the publisher is not running.
+
+        Raises:
+            UnknownBotError: If the bot is not part of the fleet.
+        """
+        if self.code_store is not None:
+            state = self.code_store.strip(state)
+        self._store.update(ident, state)
+        self._merged += 1
+        if not self._coalescing:
+            self.flush()
+
+    def flush(self) -> None:
+        """Publishes all pending updates, if any, as a single publication."""
+        dirty = self._store.take_dirty()
+        if len(dirty) == 0:
+            return
+
+        merged = self._merged
+        self._merged = 0
+        self._seq += 1
+        self.ticks += 1
+        self.updates += merged
+        self.last_merged = merged
+
+        self.deltas.on_next(CoachbotStateDelta(
+            self._seq, self._store.states(dirty), merged))
+        self.on_next(self._store)
+
+    async def run_publisher(self, rate: float) -> None:
+        """Runs the publisher which coalesces updates into ticks.
+
+        Parameters:
+            rate (float): The number of publications per second. If this is
+                not positive, every update is published immediately.
+        """
+        if rate <= 0:
+            return
+
+        self._coalescing = True
+        try:
+            while True:
+                await asyncio.sleep(1.0 / rate)
+                if self._merged > 1:
+                    logging.getLogger('coachbot-states').debug(
+                        'Coalesced %d updates of %d bots into tick %d.',
+                        self._merged, len(self._store.dirty), self._seq + 1)
+                self.flush()
+        finally:
+            self._coalescing = False
+            self.flush()
 
     @property
-    def value(self) -> Tuple[CoachbotState, ...]:
-        """Returns the currently stored value of the BehaviorSubject.
+    def value(self) -> FleetStateStore:
+        """Returns the store holding the current fleet state, keyed by the
+        bot identifier. Indexing it materializes that bot's
+        ``CoachbotState``.
 
-        Todo:
-            Possible concurrency headache.
+        Note:
+            This is a live view rather than a copy.
         """
-        return tuple(state.value[1] for state in self._internal_states)
+        return self._store
 
     @property
-    def tuple_value(self) -> Tuple[Tuple[int, CoachbotState], ...]:
-        return tuple(state.value for state in self._internal_states)
-
-    def get_subject(self, i: int):
-        return self._internal_states[i]
+    def seq(self) -> int:
+        """Returns the sequence number of the last publication."""
+        return self._seq
+
+    def snapshot(self) -> Tuple[int, FleetStateStore]:
+        """Returns the current fleet state along with the sequence number of
+        the last publication it includes.
+
+        Note:
+            The returned state may already include updates that are pending
+            publication. Since deltas hold whole states, applying these deltas
+            onto the snapshot is harmless.
+        """
+        return self._seq, self._store
 
 
 @dataclass
@@ -68,6 +157,13 @@ class AppState:
     Attributes:
         coachbot_states: Holds the current state of the Coachbots.
         config: Holds the current application configuration.
+        inventory: Holds every Coachbot of the arena.
+        jobs: Runs the long fleet operations submitted via ``/jobs``.
+        liveness: Tracks when every bot last reported its status.
+        coach_commands: Holds the command connection to every bot.
+        code_store: Holds the user code of every bot by its hash.
+        fleet_commands: Sends commands to many bots at once, if a fleet
+            command channel is configured.
     """
     coachbot_states: CoachbotStateSubject
     config: Config
@@ -75,3 +171,9 @@ class AppState:
     arduino_daughter: ArduinoInfo
     camera_stream: camera.ProcessingStream
     ble_manager: BleManager
+    inventory: Inventory
+    jobs: JobManager
+    liveness: LivenessTracker
+    coach_commands: CoachCommandPool
+    code_store: CodeStore
+    fleet_commands: Optional[FleetCommandChannel] = None
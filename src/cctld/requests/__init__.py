@@ -5,29 +5,274 @@ handle. This is facilitated through the ``ENDPOINT_HANDLERS`` dictionary which
 is buit upon the import of this module."""
 
 import asyncio
+import dataclasses
 import json
 import logging
 from serial import SerialException
-from typing import Any, Tuple, Union
-from cctl.models import Coachbot
-from cctl.protocols import ipc
-from cctld.coach_commands import CoachCommand, CoachCommandError
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, \
+    Optional, Tuple, Union
+from cctl.models import Coachbot, CoachbotState
+from cctl.protocols import coach_command, codec, feed, ipc, job
+from cctld.coach_commands import CoachCommandError
+from cctld.fleet import UnknownBotError
+from cctld.jobs import UnknownJobError
 from cctld.models.app_state import AppState
 from cctld.requests.handler import handler
 from cctl.utils.color import hex_to_rgb
 from cctld.utils.reactive import wait_until
 
 
+def _encoding(request: ipc.Request) -> str:
+    """Returns the encoding the client asked the response body to be in via
+    the ``encoding`` head field. Defaults to ``json``.
+
+    Raises:
+        ValueError: If the requested encoding is not supported.
+    """
+    if (encoding := request.head.get('encoding', codec.ENCODING_JSON)) \
+            not in codec.ENCODINGS:
+        raise ValueError(f'Unsupported encoding {encoding}.')
+    return encoding
+
+
+def _fields(request: ipc.Request) -> Optional[Tuple[str, ...]]:
+    """Returns the fields of the ``CoachbotState`` the client asked for via
+    the ``fields`` head field (see ``cctl.protocols.feed.FIELDS``), or
+    ``None`` for every field.
+
+    Raises:
+        ValueError: If a requested field is unknown.
+    """
+    if (fields := request.head.get('fields')) is None:
+        return None
+    if isinstance(fields, str) or not isinstance(fields, list):
+        raise ValueError('The fields must be a list of field names.')
+    return feed.parse_fields(fields)
+
+
+def _project(states: Dict[int, CoachbotState],
+             fields: Optional[Tuple[str, ...]]) -> Dict[int, CoachbotState]:
+    """Returns ``states`` holding only the given fields."""
+    if fields is None:
+        return states
+    return {ident: feed.project(state, fields)
+            for ident, state in states.items()}
+
+
+def _batch_ids(app_state: AppState, body: Dict[str, Any]) -> List[int]:
+    """Returns the identifiers targeted by a ``/bots/batch`` request. The
+    ``ids`` field holds either a list of identifiers, ``"all"`` for every bot
+    in the inventory or ``"on"`` for every bot currently on.
+
+    Raises:
+        ValueError: If ``ids`` is missing or malformed.
+    """
+    ids = body.get('ids')
+    if ids == 'all':
+        return list(app_state.inventory.identifiers)
+    if ids == 'on':
+        return [int(ident)
+                for ident in app_state.coachbot_states.value.ids_on()]
+    if not isinstance(ids, list) or \
+            not all(isinstance(ident, int) for ident in ids):
+        raise ValueError('ids must be a list of bot identifiers, "all" or '
+                         '"on".')
+    return list(dict.fromkeys(ids))
+
+
+async def _guarded(operation: Callable[[int], Awaitable[ipc.Response]],
+                   ident: int) -> ipc.Response:
+    """Runs ``operation`` on a single bot of a multi-bot request, turning the
+    errors it may raise into the response of that bot."""
+    try:
+        return await operation(ident)
+    except UnknownBotError as err:
+        return ipc.Response(ipc.ResultCode.NOT_FOUND, str(err))
+    except CoachCommandError as c_err:
+        return ipc.Response(ipc.ResultCode.INTERNAL_SERVER_ERROR, str(c_err))
+
+
+async def _fan_out(
+    app_state: AppState,
+    idents: List[int],
+    operation: Callable[[int], Awaitable[ipc.Response]]
+) -> ipc.Response:
+    """Runs ``operation`` on every bot, at most
+    ``Config.IPC.batch_concurrency`` at a time, and collects the per-bot
+    responses into the body of a single response, as
+    ``[[id, {"result_code": ..., "body": ...}], ...]``."""
+    return _batch_response(zip(idents, await _run_all(app_state, idents,
+                                                      operation)))
+
+
+async def _run_all(
+    app_state: AppState,
+    idents: List[int],
+    operation: Callable[[int], Awaitable[ipc.Response]]
+) -> List[ipc.Response]:
+    """Runs ``operation`` on every bot, at most
+    ``Config.IPC.batch_concurrency`` at a time, and returns the per-bot
+    responses in the order of ``idents``."""
+    semaphore = asyncio.Semaphore(app_state.config.ipc.batch_concurrency)
+
+    async def run(ident: int) -> ipc.Response:
+        async with semaphore:
+            return await _guarded(operation, ident)
+
+    return list(await asyncio.gather(*(run(ident) for ident in idents)))
+
+
+def _batch_response(
+    responses: Iterable[Tuple[int, ipc.Response]]
+) -> ipc.Response:
+    """Collects per-bot responses into the body of a single response."""
+    return ipc.Response(ipc.ResultCode.OK, json.dumps([
+        [ident, {'result_code': response.result_code,
+                 'body': response.body}]
+        for ident, response in responses
+    ]))
+
+
+def _parse_batch(app_state: AppState,
+                 request: ipc.Request) -> Tuple[Dict[str, Any], List[int]]:
+    """Parses the JSON body of a ``/bots/batch`` request.
+
+    Returns:
+        Tuple[Dict[str, Any], List[int]]: The body and the targeted bots.
+
+    Raises:
+        ValueError: If the body is malformed.
+    """
+    body = json.loads(request.body)
+    if not isinstance(body, dict):
+        raise ValueError('The body must be a JSON object.')
+    return body, _batch_ids(app_state, body)
+
+
 @handler(r'^/bots/?$', 'read')
-async def read_bots(app_state: AppState, _, __) -> ipc.Response:
-    """Returns very basic information about the coachbots."""
-    bot_states = app_state.coachbot_states.value
+async def read_bots(app_state: AppState, req: ipc.Request,
+                    _) -> ipc.Response:
+    """Returns very basic information about the coachbots. Only the fields
+    listed in the ``fields`` head field are filled in, if given."""
+    try:
+        encoding = _encoding(req)
+        fields = _fields(req)
+    except ValueError as err:
+        return ipc.Response(ipc.ResultCode.BAD_REQUEST, str(err))
+
+    bot_states = _project(app_state.coachbot_states.value.states(), fields)
+    if encoding == codec.ENCODING_JSON:
+        return ipc.Response(
+            ipc.ResultCode.OK,
+            json.dumps([[ident, state.to_dict()]
+                        for ident, state in bot_states.items()])
+        )
     return ipc.Response(
         ipc.ResultCode.OK,
-        json.dumps([state.to_dict() for state in bot_states])
+        codec.dumps_text(bot_states, encoding)
     )
 
 
+@handler(r'^/inventory/?$', 'read')
+async def read_inventory(app_state: AppState, *args, **kwargs):
+    """Returns every bot of the arena along with its addresses."""
+    return ipc.Response(ipc.ResultCode.OK, app_state.inventory.serialize())
+
+
+@handler(r'^/bots/snapshot/?$', 'read')
+async def read_bots_snapshot(app_state: AppState, req: ipc.Request,
+                             _) -> ipc.Response:
+    """Returns a keyframe of the full fleet state, stamped with the sequence
+    number of the last state feed delta it includes. Late state feed
+    subscribers use this to synchronize. Subscribers of a ``view/<fields>/``
+    topic pass the same ``fields`` in the head."""
+    try:
+        encoding = _encoding(req)
+        fields = _fields(req)
+    except ValueError as err:
+        return ipc.Response(ipc.ResultCode.BAD_REQUEST, str(err))
+
+    seq, bot_states = app_state.coachbot_states.snapshot()
+    return ipc.Response(
+        ipc.ResultCode.OK,
+        codec.dumps_text(feed.StateFeedMessage(
+            seq, feed.KIND_KEYFRAME, _project(bot_states.states(), fields)),
+                         encoding)
+    )
+
+
+@handler(r'^/bots/rtt/?$', 'read')
+async def read_bots_rtt(app_state: AppState, *args, **kwargs):
+    """Returns the round-trip time estimate of every bot which was commanded
+    since cctld started."""
+    return ipc.Response(ipc.ResultCode.OK, json.dumps([
+        {'id': entry.identifier, **rtt.to_dict()}
+        for entry in app_state.inventory
+        if (rtt := app_state.coach_commands.rtt(entry.ip_address)) is not None
+    ]))
+
+
+async def _set_is_on(
+    app_state: AppState,
+    idents: List[int],
+    state: bool,
+    force: bool,
+    report: Optional[Callable[[int, ipc.Response], None]] = None
+) -> List[ipc.Response]:
+    """Boots the given bots on or off over bluetooth and waits for them to
+    report the new state.
+
+    Parameters:
+        report (Optional[Callable[[int, ipc.Response], None]]): Called with
+            the response of every bot as soon as it is known, that is when
+            the bot fails to boot or reports the new state.
+
+    Raises:
+        UnknownBotError: If any of the bots is not part of the fleet.
+    """
+    bot_states = app_state.coachbot_states.value
+    bots = [Coachbot(ident, bot_states[ident]) for ident in idents]
+    responses: Dict[int, ipc.Response] = {}
+    waiting: List[int] = []
+
+    def settle(ident: int, response: ipc.Response) -> None:
+        responses[ident] = response
+        if report is not None:
+            report(ident, response)
+
+    def confirm(states) -> bool:
+        for ident in [ident for ident in waiting
+                      if states[ident].is_on == state]:
+            waiting.remove(ident)
+            settle(ident, ipc.Response(ipc.ResultCode.OK))
+        return not waiting
+
+    targets = [bot for bot in bots if force or bot.state.is_on != state]
+    for bot in bots:
+        if not force and bot.state.is_on == state:
+            settle(bot.identifier, ipc.Response(ipc.ResultCode.OK))
+
+    async for bot, err in app_state.ble_manager.boot(targets, state):
+        if err is None:
+            waiting.append(bot.identifier)
+            confirm(app_state.coachbot_states.value)
+            continue
+        logging.getLogger('bluetooth').error(
+            'Could not turn bot %s %s.', err.offender,
+            'on' if state else 'off')
+        settle(bot.identifier, ipc.Response(ipc.ResultCode.STATE_CONFLICT,
+                                            str(err)))
+
+    try:
+        await wait_until(app_state.coachbot_states, confirm,
+                         app_state.config.constants.boot_timeout)
+    except asyncio.TimeoutError:
+        for ident in list(waiting):
+            settle(ident, ipc.Response(ipc.ResultCode.STATE_CONFLICT,
+                                       'Network Layer Error'))
+    return [responses[ident] for ident in idents]
+
+
 @handler(r'^/bots/([0-9]+)/state/is-on/?$', 'create')
 async def create_bot_is_on(
     app_state: AppState,
@@ -35,32 +280,12 @@ async def create_bot_is_on(
     endpoint_groups: Tuple[Union[str, Any], ...],
 ):
     """Turns a bot on."""
-    bot = Coachbot((ident := int(endpoint_groups[0])),
-                   app_state.coachbot_states.value[ident])
-
     body = json.loads(req.body)
     if body.get('force') is None:
         return ipc.Response(ipc.ResultCode.BAD_REQUEST)
 
-    if not body.get('force') and bot.state.is_on:
-        return ipc.Response(ipc.ResultCode.OK)
-
-    errors = []
-    async for err in app_state.ble_manager.boot_bots([bot], True):
-        errors.append(err)
-
-    if len(errors) != 0:
-        logging.getLogger('bluetooth').error('Could not turn bot %s on.', bot)
-        return ipc.Response(ipc.ResultCode.STATE_CONFLICT, str(errors[0]))
-
-    try:
-        await wait_until(app_state.coachbot_states,
-                         lambda states: states[bot.identifier].is_on,
-                         app_state.config.constants.boot_timeout)
-    except asyncio.TimeoutError:
-        return ipc.Response(ipc.ResultCode.STATE_CONFLICT,
-                            'Network Layer Error')
-    return ipc.Response(ipc.ResultCode.OK)
+    return (await _set_is_on(app_state, [int(endpoint_groups[0])], True,
+                             body['force']))[0]
 
 
 @handler(r'^/bots/([0-9]+)/state/is-on/?$', 'delete')
@@ -70,65 +295,125 @@ async def delete_bot_is_on(
     endpoint_groups: Tuple[Union[str, Any], ...]
 ):
     """Turns a bot off."""
-    bot = Coachbot((ident := int(endpoint_groups[0])),
-                   app_state.coachbot_states.value[ident])
-
     body = json.loads(req.body)
     if body.get('force') is None:
         return ipc.Response(ipc.ResultCode.BAD_REQUEST)
 
-    if not body.get('force') and not bot.state.is_on:
-        return ipc.Response(ipc.ResultCode.OK)
-
-    errors = []
-    async for err in app_state.ble_manager.boot_bots([bot], False):
-        errors.append(err)
+    return (await _set_is_on(app_state, [int(endpoint_groups[0])], False,
+                             body['force']))[0]
 
-    if len(errors) != 0:
-        logging.getLogger('bluetooth').error('Could not turn bot %s on.',
-                                             bot)
-        return ipc.Response(ipc.ResultCode.STATE_CONFLICT, str(errors[0]))
 
+async def _set_fleet_is_on(
+    app_state: AppState,
+    idents: List[int],
+    state: bool,
+    force: bool,
+    report: Optional[Callable[[int, ipc.Response], None]] = None
+) -> List[ipc.Response]:
+    """Boots the given bots on or off like ``_set_is_on``, answering
+    ``NOT_FOUND`` for the bots which are not part of the fleet instead of
+    raising."""
+    responses = {
+        ident: ipc.Response(ipc.ResultCode.NOT_FOUND,
+                            f'Bot {ident} is not part of the fleet.')
+        for ident in idents if ident not in app_state.inventory}
+    if report is not None:
+        for ident, response in responses.items():
+            report(ident, response)
+
+    known = [ident for ident in idents if ident not in responses]
+    responses.update(zip(known, await _set_is_on(app_state, known, state,
+                                                 force, report)))
+    return [responses[ident] for ident in idents]
+
+
+async def _set_bots_is_on(app_state: AppState, request: ipc.Request,
+                          state: bool) -> ipc.Response:
+    """Boots many bots at once. The bluetooth manager already spreads the
+    bots over the adapters, so they are handed to it as a single batch."""
     try:
-        await wait_until(app_state.coachbot_states,
-                         lambda states: not states[bot.identifier].is_on,
-                         app_state.config.constants.boot_timeout)
-    except TimeoutError:
-        return ipc.Response(ipc.ResultCode.STATE_CONFLICT,
-                            'Network Layer Error')
-    return ipc.Response(ipc.ResultCode.OK)
+        body, idents = _parse_batch(app_state, request)
+    except ValueError as err:
+        return ipc.Response(ipc.ResultCode.BAD_REQUEST, str(err))
+
+    return _batch_response(zip(idents, await _set_fleet_is_on(
+        app_state, idents, state, bool(body.get('force', False)))))
+
+
+@handler(r'^/bots/batch/state/is-on/?$', 'create', max_concurrency=1)
+async def create_bots_is_on(app_state: AppState, request: ipc.Request, _):
+    """Turns many bots on."""
+    return await _set_bots_is_on(app_state, request, True)
+
+
+@handler(r'^/bots/batch/state/is-on/?$', 'delete', max_concurrency=1)
+async def delete_bots_is_on(app_state: AppState, request: ipc.Request, _):
+    """Turns many bots off."""
+    return await _set_bots_is_on(app_state, request, False)
 
 
 @handler(r'^/bots/([0-9]+)/state/?$', 'read')
 async def read_bot_state(
     app_state: AppState,
-    _: ipc.Request,
+    req: ipc.Request,
     endpoint_groups: Tuple[Union[str, Any], ...]
 ) -> ipc.Response:
-    """Returns the specific bot state."""
+    """Returns the specific bot state, holding only the fields listed in the
+    ``fields`` head field, if given."""
+    try:
+        encoding = _encoding(req)
+        fields = _fields(req)
+    except ValueError as err:
+        return ipc.Response(ipc.ResultCode.BAD_REQUEST, str(err))
+
+    state = app_state.coachbot_states.value[int(endpoint_groups[0])]
     return ipc.Response(
         ipc.ResultCode.OK,
-        app_state.coachbot_states.value[int(endpoint_groups[0])].serialize()
+        codec.dumps_text(state if fields is None
+                         else feed.project(state, fields), encoding)
     )
 
 
-@handler(r'^/bots/([0-9]+)/user-code/running/?$', 'create')
-async def create_bot_user_running(app_state: AppState, _, endpoint_groups):
-    """Starts the user code."""
-    ident = int(endpoint_groups[0])
+@handler(r'^/bots/([0-9]+)/user-code/?$', 'read')
+async def read_bot_user_code(
+    app_state: AppState,
+    req: ipc.Request,
+    endpoint_groups: Tuple[Union[str, Any], ...]
+) -> ipc.Response:
+    """Returns the user code a bot holds, which the states only refer to by
+    its hash. If the ``if_none_match`` head field holds that hash, the
+    client already has the code and ``NO_CONTENT`` is returned instead."""
+    code_hash = app_state.coachbot_states.value[int(endpoint_groups[0])] \
+        .user_code_state.user_code_hash
+    if code_hash is None:
+        return ipc.Response(ipc.ResultCode.NOT_FOUND,
+                            'The bot did not report any user code.')
+    if req.head.get('if_none_match') == code_hash:
+        return ipc.Response(ipc.ResultCode.NO_CONTENT)
+    if (user_code := app_state.code_store.get(code_hash)) is None:
+        return ipc.Response(ipc.ResultCode.NOT_FOUND,
+                            f'The user code {code_hash} is no longer held.')
+    return ipc.Response(ipc.ResultCode.OK, json.dumps({
+        'user_code_hash': code_hash,
+        'user_code': user_code
+    }))
+
+
+async def _set_user_code_running(app_state: AppState, ident: int,
+                                 state: bool) -> ipc.Response:
+    """Starts or stops the user code of a single bot."""
     current_state = app_state.coachbot_states.value[ident]
 
     if not current_state.is_on:
         return ipc.Response(ipc.ResultCode.STATE_CONFLICT)
 
-    if current_state.user_code_state.is_running:
+    if current_state.user_code_state.is_running == state:
         return ipc.Response(ipc.ResultCode.OK)
 
     try:
-        async with CoachCommand(
-            Coachbot(ident, current_state).ip_address,
-                app_state.config.coach_client.command_port) as command:
-            await command.set_user_code_running(True)
+        async with app_state.coach_commands.command(
+                Coachbot(ident, current_state).ip_address) as command:
+            await command.set_user_code_running(state)
     except CoachCommandError as c_err:
         return ipc.Response(ipc.ResultCode.INTERNAL_SERVER_ERROR,
                             str(c_err))
@@ -136,98 +421,223 @@ async def create_bot_user_running(app_state: AppState, _, endpoint_groups):
     return ipc.Response(ipc.ResultCode.OK)
 
 
-@handler(r'^/bots/([0-9]+)/user-code/running/?$', 'delete')
+@handler(r'^/bots/([0-9]+)/user-code/running/?$', 'create', timeout=30)
+async def create_bot_user_running(app_state: AppState, _, endpoint_groups):
+    """Starts the user code."""
+    return await _set_user_code_running(app_state, int(endpoint_groups[0]),
+                                        True)
+
+
+@handler(r'^/bots/([0-9]+)/user-code/running/?$', 'delete', timeout=30)
 async def delete_bot_user_running(app_state: AppState, _, endpoint_groups):
     """Stops the user code."""
-    ident = int(endpoint_groups[0])
+    return await _set_user_code_running(app_state, int(endpoint_groups[0]),
+                                        False)
+
+
+async def _set_bots_user_code_running(app_state: AppState,
+                                      request: ipc.Request,
+                                      state: bool) -> ipc.Response:
+    try:
+        _, idents = _parse_batch(app_state, request)
+    except ValueError as err:
+        return ipc.Response(ipc.ResultCode.BAD_REQUEST, str(err))
+    if app_state.fleet_commands is None:
+        return await _fan_out(
+            app_state, idents,
+            lambda ident: _set_user_code_running(app_state, ident, state))
+    return _batch_response(zip(idents, await _broadcast_user_code_running(
+        app_state, idents, state)))
+
+
+async def _broadcast_user_code_running(app_state: AppState,
+                                       idents: List[int],
+                                       state: bool) -> List[ipc.Response]:
+    """Starts or stops the user code of many bots with a single fleet
+    command, so that they start at the same time. Bots which do not
+    acknowledge the fleet command are commanded individually."""
+    bot_states = app_state.coachbot_states.value
+    responses: Dict[int, ipc.Response] = {}
+    targets = []
+    for ident in idents:
+        try:
+            current_state = bot_states[ident]
+        except UnknownBotError as err:
+            responses[ident] = ipc.Response(ipc.ResultCode.NOT_FOUND,
+                                            str(err))
+            continue
+        if not current_state.is_on:
+            responses[ident] = ipc.Response(ipc.ResultCode.STATE_CONFLICT)
+        elif current_state.user_code_state.is_running == state:
+            responses[ident] = ipc.Response(ipc.ResultCode.OK)
+        else:
+            targets.append(ident)
+
+    acks = await app_state.fleet_commands.send(coach_command.Request(
+        'create' if state else 'delete', '/user-code/running'), targets)
+    for ident, status_code in acks.items():
+        responses[ident] = ipc.Response(
+            ipc.ResultCode.OK if status_code == coach_command.StatusCode.OK
+            else ipc.ResultCode.STATE_CONFLICT
+            if status_code == coach_command.StatusCode.STATE_CONFLICT
+            else ipc.ResultCode.INTERNAL_SERVER_ERROR)
+
+    missing = [ident for ident in targets if ident not in acks]
+    if missing:
+        logging.getLogger('fleet-command').warning(
+            'Commanding %d bots which did not acknowledge individually.',
+            len(missing))
+    responses.update(zip(missing, await _run_all(
+        app_state, missing,
+        lambda ident: _set_user_code_running(app_state, ident, state))))
+    return [responses[ident] for ident in idents]
+
+
+@handler(r'^/bots/batch/user-code/running/?$', 'create',
+         max_concurrency=4, timeout=120)
+async def create_bots_user_running(app_state: AppState, request: ipc.Request,
+                                   _) -> ipc.Response:
+    """Starts the user code on many bots."""
+    return await _set_bots_user_code_running(app_state, request, True)
+
+
+@handler(r'^/bots/batch/user-code/running/?$', 'delete',
+         max_concurrency=4, timeout=120)
+async def delete_bots_user_running(app_state: AppState, request: ipc.Request,
+                                   _) -> ipc.Response:
+    """Stops the user code on many bots."""
+    return await _set_bots_user_code_running(app_state, request, False)
+
+
+async def _update_user_code(app_state: AppState, ident: int,
+                            user_code: str,
+                            force: bool = False) -> ipc.Response:
+    """Stops the user code of a single bot, if running, and replaces it.
+    Bots which already hold the same user code are left alone, unless
+    ``force`` is set."""
     current_state = app_state.coachbot_states.value[ident]
 
     if not current_state.is_on:
         return ipc.Response(ipc.ResultCode.STATE_CONFLICT)
 
-    if not current_state.user_code_state.is_running:
+    code_hash = app_state.code_store.put(user_code)
+    if not force and \
+            current_state.user_code_state.user_code_hash == code_hash:
         return ipc.Response(ipc.ResultCode.OK)
 
+    if current_state.user_code_state.is_running:
+        try:
+            async with app_state.coach_commands.command(
+                    Coachbot(ident, current_state).ip_address) as command:
+                await command.set_user_code_running(False)
+        except CoachCommandError as c_err:
+            return ipc.Response(ipc.ResultCode.INTERNAL_SERVER_ERROR,
+                                str(c_err))
+
     try:
-        async with CoachCommand(
-            Coachbot(ident, current_state).ip_address,
-                app_state.config.coach_client.command_port) as command:
-            await command.set_user_code_running(False)
+        async with app_state.coach_commands.command(
+                Coachbot(ident, current_state).ip_address) as command:
+            await command.set_user_code(
+                user_code,
+                app_state.code_store.compressed(code_hash)
+                if app_state.config.coach_client.compress_user_code
+                else None,
+                code_hash)
     except CoachCommandError as c_err:
         return ipc.Response(ipc.ResultCode.INTERNAL_SERVER_ERROR,
                             str(c_err))
-
     return ipc.Response(ipc.ResultCode.OK)
 
 
-@handler(r'^/bots/([0-9]+)/user-code/code/?$', 'update')
+@handler(r'^/bots/([0-9]+)/user-code/code/?$', 'update', timeout=30)
 async def update_bot_user_code(app_state: AppState, request: ipc.Request,
                                endpoint_groups):
     """Updates the user code."""
-    ident = int(endpoint_groups[0])
+    return await _update_user_code(app_state, int(endpoint_groups[0]),
+                                   request.body)
+
+
+@handler(r'^/bots/batch/user-code/code/?$', 'update', max_concurrency=4,
+         timeout=120)
+async def update_bots_user_code(app_state: AppState, request: ipc.Request,
+                                _) -> ipc.Response:
+    """Updates the user code on many bots. The body holds the code under
+    ``code``. Bots which already hold it are skipped unless ``force`` is
+    set."""
+    try:
+        body, idents = _parse_batch(app_state, request)
+        if not isinstance(user_code := body.get('code'), str):
+            raise ValueError('The body must hold the user code under code.')
+    except ValueError as err:
+        return ipc.Response(ipc.ResultCode.BAD_REQUEST, str(err))
+    force = bool(body.get('force'))
+    return await _fan_out(
+        app_state, idents,
+        lambda ident: _update_user_code(app_state, ident, user_code, force))
+
+
+async def _set_led_color(app_state: AppState, ident: int,
+                         color: Tuple[int, int, int]) -> ipc.Response:
+    """Sets the LED color of a single bot."""
     current_state = app_state.coachbot_states.value[ident]
 
     if not current_state.is_on:
         return ipc.Response(ipc.ResultCode.STATE_CONFLICT)
 
-    if current_state.user_code_state.is_running:
-        try:
-            async with CoachCommand(
-                Coachbot(ident, current_state).ip_address,
-                    app_state.config.coach_client.command_port) as command:
-                await command.set_user_code_running(False)
-        except CoachCommandError as c_err:
-            return ipc.Response(ipc.ResultCode.INTERNAL_SERVER_ERROR,
-                                str(c_err))
+    async with app_state.coach_commands.command(
+            Coachbot(ident, current_state).ip_address) as command:
+        await command.set_led_color(color)
 
-    try:
-        async with CoachCommand(
-            Coachbot(ident, current_state).ip_address,
-                app_state.config.coach_client.command_port) as command:
-            await command.set_user_code(request.body)
-    except CoachCommandError as c_err:
-        return ipc.Response(ipc.ResultCode.INTERNAL_SERVER_ERROR,
-                            str(c_err))
     return ipc.Response(ipc.ResultCode.OK)
 
 
-@handler(r'^/bots/([0-9]+)/led/color/?$', 'update')
+@handler(r'^/bots/([0-9]+)/led/color/?$', 'update', timeout=30)
 async def update_bot_led_color(app_state: AppState, request: ipc.Request,
                                endpoint_groups) -> ipc.Response:
     """Updates the BOT LED color."""
     ident = int(endpoint_groups[0])
-    color = request.body  # TODO: Convert to RGB tuple.
-    current_state = app_state.coachbot_states.value[ident]
+    app_state.coachbot_states.value[ident]  # Raises if the bot is unknown.
 
     try:
-        color_t = hex_to_rgb(color)
+        color_t = hex_to_rgb(request.body)
     except RuntimeError:
         return ipc.Response(ipc.ResultCode.BAD_REQUEST)
 
-    if not current_state.is_on:
-        return ipc.Response(ipc.ResultCode.STATE_CONFLICT)
-
-    async with CoachCommand(
-        Coachbot(ident, current_state).ip_address,
-            app_state.config.coach_client.command_port) as command:
-        await command.set_led_color(color_t)
-
-    return ipc.Response(ipc.ResultCode.OK)
+    return await _set_led_color(app_state, ident, color_t)
 
 
-@handler(r'^/bots/led/color/?$', 'update')
+@handler(r'^/bots/batch/led/color/?$', 'update', max_concurrency=4,
+         timeout=120)
+async def update_bots_batch_led_color(app_state: AppState,
+                                      request: ipc.Request,
+                                      _) -> ipc.Response:
+    """Updates the LED color on many bots. The body holds the hex color
+    under ``color``."""
+    try:
+        body, idents = _parse_batch(app_state, request)
+        try:
+            color_t = hex_to_rgb(str(body.get('color')))
+        except RuntimeError as err:
+            raise ValueError(f'{body.get("color")} is not a color.') from err
+    except ValueError as err:
+        return ipc.Response(ipc.ResultCode.BAD_REQUEST, str(err))
+    return await _fan_out(
+        app_state, idents,
+        lambda ident: _set_led_color(app_state, ident, color_t))
+
+
+@handler(r'^/bots/led/color/?$', 'update', max_concurrency=4,
+         timeout=120)
 async def update_bots_led_color(app_state: AppState, request: ipc.Request,
                                 _) -> ipc.Response:
     """Updates the bots LED color on all turned on bots."""
-    on_bots = [Coachbot(i, state) for i, state
-               in enumerate(app_state.coachbot_states.value) if state.is_on]
+    bot_states = app_state.coachbot_states.value
+    on_bots = [Coachbot(int(i), bot_states[i]) for i in bot_states.ids_on()]
 
     color = request.body  # TODO: Convert to RGB tuple.
 
     async def set_bot_color(address: str):
-        async with CoachCommand(
-                address,
-                app_state.config.coach_client.command_port) as command:
+        async with app_state.coach_commands.command(address) as command:
             await command.set_led_color(hex_to_rgb(color))
 
     await asyncio.gather(*[set_bot_color(bot.ip_address) for bot in on_bots])
@@ -235,13 +645,120 @@ async def update_bots_led_color(app_state: AppState, request: ipc.Request,
     return ipc.Response(ipc.ResultCode.OK)
 
 
+@handler(r'^/jobs/?$', 'create')
+async def create_job(app_state: AppState, request: ipc.Request,
+                     _) -> ipc.Response:
+    """Submits a fleet operation as a job and returns it immediately. The
+    body holds the targeted ``ids`` (as in ``/bots/batch``) and the ``kind``
+    of the job: ``boot`` or ``shutdown`` (accepting ``force``), or ``deploy``
+    (requiring the user ``code`` and accepting ``force``)."""
+    try:
+        body, idents = _parse_batch(app_state, request)
+        kind = body.get('kind')
+        if kind in (job.KIND_BOOT, job.KIND_SHUTDOWN):
+            state, force = kind == job.KIND_BOOT, bool(body.get('force'))
+        elif kind == job.KIND_DEPLOY:
+            if not isinstance(user_code := body.get('code'), str):
+                raise ValueError('The body must hold the user code under '
+                                 'code.')
+            force = bool(body.get('force'))
+        else:
+            raise ValueError(f'kind must be one of {", ".join(job.KINDS)}.')
+    except ValueError as err:
+        return ipc.Response(ipc.ResultCode.BAD_REQUEST, str(err))
+
+    if kind == job.KIND_DEPLOY:
+        async def operation(ident: int) -> ipc.Response:
+            return await _update_user_code(app_state, ident, user_code, force)
+
+        submitted = app_state.jobs.submit(
+            kind, idents, lambda ident: _guarded(operation, ident),
+            app_state.config.ipc.batch_concurrency)
+    else:
+        # The bluetooth manager spreads the bots over the adapters itself, so
+        # they are handed to it as a single batch.
+        submitted = app_state.jobs.submit_batch(
+            kind, idents, lambda targets, report: _set_fleet_is_on(
+                app_state, targets, state, force, report))
+    return ipc.Response(ipc.ResultCode.ACCEPTED, submitted.serialize())
+
+
+@handler(r'^/jobs/?$', 'read')
+async def read_jobs(app_state: AppState, *args, **kwargs) -> ipc.Response:
+    """Returns every job cctld remembers, oldest first."""
+    return ipc.Response(ipc.ResultCode.OK, json.dumps(
+        [job_o.to_dict() for job_o in app_state.jobs.jobs()]))
+
+
+@handler(r'^/jobs/([0-9]+)/?$', 'read')
+async def read_job(app_state: AppState, _,
+                   endpoint_groups) -> ipc.Response:
+    """Returns the state of a job."""
+    try:
+        return ipc.Response(ipc.ResultCode.OK, app_state.jobs[
+            int(endpoint_groups[0])].serialize())
+    except UnknownJobError as err:
+        return ipc.Response(ipc.ResultCode.NOT_FOUND, str(err))
+
+
+@handler(r'^/jobs/([0-9]+)/?$', 'delete')
+async def delete_job(app_state: AppState, _,
+                     endpoint_groups) -> ipc.Response:
+    """Cancels a running job. Bots which already completed keep their
+    results."""
+    try:
+        if not app_state.jobs.cancel(job_id := int(endpoint_groups[0])):
+            return ipc.Response(ipc.ResultCode.STATE_CONFLICT,
+                                f'Job {job_id} is not running.')
+    except UnknownJobError as err:
+        return ipc.Response(ipc.ResultCode.NOT_FOUND, str(err))
+    return ipc.Response(ipc.ResultCode.OK)
+
+
+@handler(r'^/stats/state-feed/?$', 'read')
+async def read_state_feed_stats(app_state: AppState, *args, **kwargs):
+    """Returns statistics about the coalescing of state updates into state
+    feed publications."""
+    states = app_state.coachbot_states
+    return ipc.Response(ipc.ResultCode.OK, json.dumps({
+        'rate': app_state.config.ipc.state_feed_rate,
+        'seq': states.seq,
+        'ticks': states.ticks,
+        'updates': states.updates,
+        'last_merged': states.last_merged
+    }))
+
+
+@handler(r'^/bluetooth/presence/?$', 'read')
+async def read_bluetooth_presence(app_state: AppState, *args, **kwargs):
+    """Returns every Bluefruit board recently heard advertising, along with
+    the bot it belongs to if it is in the inventory."""
+    if (presence := app_state.ble_manager.presence) is None:
+        return ipc.Response(ipc.ResultCode.NOT_FOUND,
+                            'Presence scanning is disabled.')
+    owners = {entry.mac_address.lower(): entry.identifier
+              for entry in app_state.inventory if entry.mac_address}
+    return ipc.Response(ipc.ResultCode.OK, json.dumps([
+        dataclasses.replace(
+            sighting, identifier=owners.get(sighting.mac_address)).to_dict()
+        for sighting in presence.sightings()
+    ]))
+
+
+@handler(r'^/bluetooth/adapters/?$', 'read')
+async def read_bluetooth_adapters(app_state: AppState, *args, **kwargs):
+    """Returns the health of every bluetooth interface."""
+    return ipc.Response(ipc.ResultCode.OK, json.dumps(
+        app_state.ble_manager.health.to_dict()))
+
+
 @handler(r'^/teapot/?$', 'read')
 async def i_am_a_teapot(*args, **kwargs):
     """This function does not require documentation."""
     return ipc.Response(ipc.ResultCode.I_AM_A_TEAPOT)
 
 
-@handler(r'^/rail/is-on/?$', 'create')
+@handler(r'^/rail/is-on/?$', 'create', max_concurrency=1, timeout=30)
 async def create_power_rail(app_state: AppState, *args, **kwargs):
     """Starts the power rail on."""
     try:
@@ -251,7 +768,7 @@ async def create_power_rail(app_state: AppState, *args, **kwargs):
         return ipc.Response(ipc.ResultCode.INTERNAL_SERVER_ERROR, str(s_ex))
 
 
-@handler(r'^/rail/is-on/?$', 'delete')
+@handler(r'^/rail/is-on/?$', 'delete', max_concurrency=1, timeout=30)
 async def delete_power_rail(app_state: AppState, *args, **kwargs):
     """Starts the power rail on."""
     try:
@@ -269,7 +786,7 @@ async def read_config(app_state: AppState, *args, **kwargs):
         'feeds': {
             'request': app_state.config.ipc.request_feed,
             'state': app_state.config.ipc.state_feed,
-            'signal': app_state.config.ipc.state_feed
+            'signal': app_state.config.ipc.signal_feed
         },
         'video': {
             'stream': app_state.config.video_stream.rtsp_host,
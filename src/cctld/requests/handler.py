@@ -2,9 +2,16 @@
 
 """This module defines the ``handler`` decorator which registeres handlers in
 ``ENDPOINT_HANDLERS``, a variable from which the IPC Request server then
-reads."""
+reads.
 
-from typing import Callable, Coroutine, Dict, Tuple, Union, Any
+Since the request server runs every request concurrently, a handler may limit
+how many of its requests run at once and for how long each may run. Requests
+over the limit wait for their turn without holding back requests to other
+endpoints, and requests running over their timeout are answered with
+``GATEWAY_TIMEOUT``."""
+
+import asyncio
+from typing import Callable, Coroutine, Dict, Optional, Tuple, Union, Any
 from typing_extensions import Literal
 import re
 from cctl.protocols import ipc
@@ -18,11 +25,56 @@ IPCOperationT = str
 ENDPOINT_HANDLERS: Dict[str, Dict[IPCOperationT, Callable]] = {}
 
 
+class _Limited:
+    """Wraps a handler so that at most ``max_concurrency`` of its calls run at
+    once, each for at most ``timeout`` seconds."""
+    def __init__(self, function: IPCReqHandlerT,
+                 max_concurrency: Optional[int],
+                 timeout: Optional[float]) -> None:
+        self.function = function
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self.__doc__ = function.__doc__
+        # Created lazily so that it binds to the running event loop.
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    async def _call(self, *args, **kwargs) -> ipc.Response:
+        try:
+            return await asyncio.wait_for(self.function(*args, **kwargs),
+                                          self.timeout)
+        except asyncio.TimeoutError:
+            return ipc.Response(
+                ipc.ResultCode.GATEWAY_TIMEOUT,
+                f'The request did not complete within {self.timeout}s.')
+
+    async def __call__(self, *args, **kwargs) -> ipc.Response:
+        if self.max_concurrency is None:
+            return await self._call(*args, **kwargs)
+        if self._semaphore is None or \
+                self._loop is not asyncio.get_running_loop():
+            self._loop = asyncio.get_running_loop()
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        async with self._semaphore:
+            return await self._call(*args, **kwargs)
+
+
 def handler(endpoint_regex: str,
-            operation: Literal['create', 'read', 'update', 'delete']):
+            operation: Literal['create', 'read', 'update', 'delete'],
+            max_concurrency: Optional[int] = None,
+            timeout: Optional[float] = None):
     """The handler decorator registers your endpoint handler for a given IPC
     request operation.
 
+    Parameters:
+        endpoint_regex (str): The regex the endpoint must match.
+        operation (str): The method the handler handles.
+        max_concurrency (Optional[int]): The maximum number of requests to
+            this handler running at once. Unlimited if ``None``.
+        timeout (Optional[float]): The number of seconds after which a
+            request is cancelled and answered with ``GATEWAY_TIMEOUT``.
+            Unlimited if ``None``.
+
     For example:
 
     .. code-block:: python
@@ -39,7 +91,9 @@ def handler(endpoint_regex: str,
     def factory(function: IPCReqHandlerT):
         if ENDPOINT_HANDLERS.get(endpoint_regex) is None:
             ENDPOINT_HANDLERS[endpoint_regex] = {}
-        ENDPOINT_HANDLERS[endpoint_regex][operation] = function
+        ENDPOINT_HANDLERS[endpoint_regex][operation] = \
+            function if max_concurrency is None and timeout is None \
+            else _Limited(function, max_concurrency, timeout)
 
         def wrapper(*args, **kwargs):
             return function(*args, **kwargs)
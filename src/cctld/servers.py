@@ -7,17 +7,23 @@ Currently, the following servers are exposed:
 """
 
 import asyncio
+import dataclasses
 import sys
 import logging
-from typing import Awaitable, Callable, Tuple
+from typing import Dict, List, Mapping, Set
 
 import zmq
 import zmq.asyncio
 
-from cctl.protocols import ipc, status
+from cctl.protocols import codec, feed, ipc, status
+from cctl.protocols.job import JobEvent
 from cctl.models import CoachbotState, Signal
-from cctld.utils.zmq import async_proxy
+from cctl.models.coachbot import normalize_user_code_hash
+from cctld import ingest
+from cctld.fleet import UnknownBotError
+from cctld.utils.zmq import SubscriptionTracker
 from cctld.models import AppState
+from cctld.models.app_state import CoachbotStateDelta
 from cctld.res import ExitCode
 from cctld.requests.handler import get as get_handler
 
@@ -32,74 +38,30 @@ __email__ = 'contact@markovejnovic.com'
 __status__ = 'Development'
 
 
-async def _retried_reply(sock, reply: str, max_n: int) -> int:
-    for _ in range(max_n):
-        try:
-            await sock.send_string(reply)
-            return 0
-        except zmq.Again:
-            pass
-    logging.getLogger('servers').warning(
-        'Could not send status reply message. Failing')
-    return -1
-
-
 async def start_ipc_request_server(app_state: AppState):
     """The IPCServer is a server that is used to communicate with other
     processes that may query the state of the Coachbots.
 
     .. note::
 
-       Although this server is to be used as a REP server, under the bonnet
-       it's actually a ROUTER-DEALER server feeding into worker REP servers.
-       This ensures that the server does not end up bottlenecking due to one
-       long request.
+       The server is a single ``zmq.ROUTER`` socket which runs every request
+       as its own ``asyncio.Task``, so that a long request (e.g. booting a
+       bot) never holds back others. Handlers may bound their own concurrency
+       and running time (see ``cctld.requests.handler``). Every frame
+       preceding the request is echoed back in front of the response, so both
+       ``zmq.REQ`` and ``zmq.DEALER`` clients are supported.
     """
-    # Detrmines the maximum number of attempts to reply.
-
-    num_workers = 8
-    max_rep_retry = 3
-    BACKEND_ADDRESS = 'inproc://ipc-dealer'
-
-    async def create_router(
-        ctx: zmq.asyncio.Context,
-        frontend_address: str = app_state.config.ipc.request_feed,
-        backend_address: str = BACKEND_ADDRESS
-    ) -> Tuple[zmq.asyncio.Socket, zmq.asyncio.Socket]:
-        """Creates and binds a a ``zmq.ROUTER``, ``zmq.DEALER`` server.
-
-        Returns:
-            Tuple[zmq.Socket, zmq.Socket]: The frontend and backend sockets
-            respectivelly.
-        """
-        frontend = ctx.socket(zmq.ROUTER)
-        frontend.setsockopt(zmq.SNDTIMEO, 100)
-        backend = ctx.socket(zmq.DEALER)
-        try:
-            frontend.bind(frontend_address)
-            backend.bind(backend_address)
-        except zmq.ZMQError as zmq_err:
-            logging.getLogger('servers.router').error(
-                'Could not bind to the requested UNIX file %s. Please check '
-                'permissions. Error: %s',
-                app_state.config.ipc.request_feed, zmq_err)
-            sys.exit(ExitCode.EX_NOPERM)
-        return frontend, backend
-
-    async def create_reply(
-        ctx: zmq.asyncio.Context,
-        address: str = BACKEND_ADDRESS
-    ) -> zmq.asyncio.Socket:
-        """Creates a reply worker."""
-        server = ctx.socket(zmq.REP)
-        try:
-            server.connect(address)
-        except zmq.ZMQError as zmq_err:
-            logging.getLogger('servers.router').error(
-                'Could not bind to the Dealer. This likely indicates a bug. '
-                'Error: %s', zmq_err)
-            sys.exit(ExitCode.EX_NOPERM)
-        return server
+    ctx = zmq.asyncio.Context()
+    sock = ctx.socket(zmq.ROUTER)
+    sock.setsockopt(zmq.SNDTIMEO, 100)
+    try:
+        sock.bind(app_state.config.ipc.request_feed)
+    except zmq.ZMQError as zmq_err:
+        logging.getLogger('servers.router').error(
+            'Could not bind to the requested UNIX file %s. Please check '
+            'permissions. Error: %s',
+            app_state.config.ipc.request_feed, zmq_err)
+        sys.exit(ExitCode.EX_NOPERM)
 
     async def handle_client(request: ipc.Request) -> ipc.Response:
         """This function handles a client asking a request to this server. """
@@ -120,30 +82,86 @@ async def start_ipc_request_server(app_state: AppState):
         except ValueError:
             return ipc.Response(ipc.ResultCode.NOT_FOUND)
 
-        return await handler(app_state, request, tuple(matchs))
-
-    async def rep_listen(
-        sock: zmq.asyncio.Socket,
-        handle_client: Callable[[ipc.Request], Awaitable[ipc.Response]]
-    ) -> None:
-        while True:
-            request_raw = await sock.recv_string()
-            request = ipc.Request.deserialize(request_raw)
-            response = await handle_client(request)
-            logging.getLogger('servers.request').debug(
-                'Responding with: %s', response)
-            await _retried_reply(sock, response.serialize(), max_rep_retry)
+        try:
+            return await handler(app_state, request, tuple(matchs))
+        except UnknownBotError as err:
+            return ipc.Response(ipc.ResultCode.NOT_FOUND, str(err))
 
-    ctx = zmq.asyncio.Context()
-    frontend, backend = await create_router(ctx)
+    async def respond(envelope: List[bytes], request_raw: bytes) -> None:
+        try:
+            request = ipc.Request.deserialize(request_raw.decode())
+        except (ValueError, KeyError, TypeError) as err:
+            request = None
+            response = ipc.Response(ipc.ResultCode.BAD_REQUEST,
+                                    f'Malformed request: {err}')
+        if request is not None:
+            try:
+                response = await handle_client(request)
+            except Exception as err:  # pylint: disable=broad-except
+                logging.getLogger('servers.request').exception(
+                    'Request handler failed.')
+                response = ipc.Response(
+                    ipc.ResultCode.INTERNAL_SERVER_ERROR, str(err))
+        logging.getLogger('servers.request').debug(
+            'Responding with: %s', response)
+        try:
+            await sock.send_multipart(
+                envelope + [response.serialize().encode()])
+        except zmq.ZMQError as zmq_err:
+            logging.getLogger('servers.request').warning(
+                'Could not send reply message due to %s.', zmq_err)
 
-    rep_workers = [await create_reply(ctx) for _ in range(num_workers)]
-    rep_tasks = [  # noqa: F841
-        asyncio.create_task(rep_listen(sock, handle_client))
-        for sock in rep_workers
-    ]
+    # Running tasks must be referenced or they may be garbage collected.
+    in_flight: Set[asyncio.Task] = set()
+    while True:
+        *envelope, request_raw = await sock.recv_multipart()
+        task = asyncio.create_task(respond(envelope, request_raw))
+        in_flight.add(task)
+        task.add_done_callback(in_flight.discard)
+
+
+def _checked_code_hash(ident: int, state: CoachbotState) -> CoachbotState:
+    """Drops the user code hash a bot reported if it is malformed, since it
+    could not be published."""
+    ucs = state.user_code_state
+    code_hash = normalize_user_code_hash(ucs.user_code_hash)
+    if code_hash == ucs.user_code_hash:
+        return state
+    if code_hash is None:
+        logging.getLogger('servers.status.state').warning(
+            'Dropping the malformed user code hash %r of bot %d.',
+            ucs.user_code_hash, ident)
+    return dataclasses.replace(state, user_code_state=dataclasses.replace(
+        ucs, user_code_hash=code_hash))
+
+
+def _handle_status_batch(app_state: AppState,
+                         requests: List[status.Request]) -> None:
+    """Handles a batch of status requests. If a bot reported its state
+    more than once within a batch, only the latest state is applied."""
+    new_states: Dict[int, CoachbotState] = {}
+    for request in requests:
+        if request.type == 'signal':
+            assert isinstance(request.body, Signal)
+            logging.getLogger('servers.status.signal').debug(
+                'Received signal %s.', request.body)
+            app_state.coachbot_signals.on_next(request.body)
+        elif request.type == 'state':
+            assert isinstance(request.body, CoachbotState)
+            logging.getLogger('servers.status.state').debug(
+                'Received state from %d: %s.', request.identifier,
+                request.body)
+            new_states[request.identifier] = _checked_code_hash(
+                request.identifier, request.body)
 
-    await async_proxy(frontend, backend)
+    for req_id, new_state in new_states.items():
+        try:
+            app_state.coachbot_states.update(req_id, new_state)
+            app_state.liveness.heard(req_id)
+        except UnknownBotError:
+            logging.getLogger('servers.status.state').warning(
+                'Dropping state of bot %d, which is not in the '
+                'inventory.', req_id)
 
 
 async def start_status_server(app_state: AppState) -> None:
@@ -151,64 +169,63 @@ async def start_status_server(app_state: AppState) -> None:
     status via TCP. This is the server that communicates with Coachbots getting
     their data and metrics.
 
+    Besides the legacy ``zmq.REP`` endpoint, the server can listen on a
+    ``zmq.ROUTER`` (acknowledged) and a ``zmq.PULL`` (fire-and-forget)
+    endpoint, depending on the configuration. These drain messages in batches
+    so that hundreds of bots reporting concurrently do not wait on each
+    other. See ``cctld.ingest``.
+
     Parameters:
         app_state (AppState): The application state.
     """
-    # Detrmines the number of retries attempted before giving up on a reply.
-    max_rep_retry = 3
-
-    async def handle_client(request: status.Request) -> status.Response:
-        """This function handles a client asking a request to this server."""
-
-        if request.type == 'signal':
-            assert isinstance(request.body, Signal)
-            logging.getLogger('servers.status.signal').debug(
-                'Received signal %s.', request.body)
-            app_state.coachbot_signals.on_next(request.body)
-            return status.Response()
-
-        if request.type == 'state':
-            req_id, new_state = request.identifier, request.body
-            logging.getLogger('servers.status.state').debug(
-                'Received state from %d: %s.', req_id, new_state)
-
-            assert isinstance(new_state, CoachbotState)
-            app_state.coachbot_states.get_subject(req_id).on_next(
-                (req_id, new_state))
+    def handle_batch(requests: List[status.Request]) -> None:
+        _handle_status_batch(app_state, requests)
 
-            return status.Response()
-
-        return status.Response(status_code=status.StatusCode.OK)
+    def bind(sock_type: int, address: str) -> zmq.asyncio.Socket:
+        sock = ctx.socket(sock_type)
+        sock.setsockopt(zmq.SNDTIMEO, 100)
+        try:
+            sock.bind(address)
+        except zmq.ZMQError as zmq_err:
+            logging.getLogger('servers').error(
+                'Could not bind to %s. Please check whether another '
+                'process is using it. Error: %s', address, zmq_err)
+            sys.exit(ExitCode.EX_UNAVAILABLE)
+        return sock
 
     ctx = zmq.asyncio.Context()
-    sock = ctx.socket(zmq.REP)
-    sock.setsockopt(zmq.SNDTIMEO, 100)
-    try:
-        sock.bind(app_state.config.servers.status_host)
-    except zmq.ZMQError as zmq_err:
-        logging.getLogger('servers').error(
-            'Could not bind to %s. Please check whether another '
-            'process is using it. Error: %s',
-            app_state.config.servers.status_host, zmq_err)
-        sys.exit(ExitCode.EX_UNAVAILABLE)
+    servers = [ingest.serve_rep(
+        bind(zmq.REP, app_state.config.servers.status_host), handle_batch)]
 
-    while True:
-        request_raw = await sock.recv_string()
-        request = status.Request.deserialize(request_raw)
+    if (router_host := app_state.config.servers.status_router_host):
+        servers.append(ingest.serve_router(bind(zmq.ROUTER, router_host),
+                                           handle_batch))
+    if (pull_host := app_state.config.servers.status_pull_host):
+        servers.append(ingest.serve_pull(bind(zmq.PULL, pull_host),
+                                         handle_batch))
 
-        response = await handle_client(request)
-        logging.getLogger('servers.status').debug('Responding with: %s.',
-                                                  response)
-
-        await _retried_reply(sock, response.serialize(), max_rep_retry)
+    await asyncio.gather(*servers)
 
 
 async def start_ipc_feed_server(app_state: AppState) -> None:
     """This function starts the IPC feed server on the requested feed. This
-    will end up being a ``zmq.PUB`` transprort that will publish its data every
-    time relevant ``reactivex.subject``s change their value."""
+    will end up being a ``zmq.XPUB`` transprort that will publish its data
+    every time relevant ``reactivex.subject``s change their value.
+
+    Only the bots whose state changed are published (see
+    ``cctl.protocols.feed``). Every
+    ``Config.IPC.state_feed_keyframe_interval`` seconds, a keyframe holding
+    the full fleet state is published so that subscribers which missed a
+    delta can recover.
+
+    Every delta and keyframe is published on the ``fleet/`` topic and, split
+    per bot, on the ``bot/<id>/`` topics. Projected onto the requested
+    fields, they are also published on every subscribed ``view/<fields>/``
+    topic, where deltas only hold the bots whose projected state changed.
+    The events of every job are published on its ``job/<id>/`` topic.
+    Messages are only built for topics somebody is subscribed to."""
     ctx = zmq.asyncio.Context()
-    sock = ctx.socket(zmq.PUB)
+    sock = ctx.socket(zmq.XPUB)
     try:
         sock.bind(app_state.config.ipc.state_feed)
     except zmq.ZMQError as zmq_err:
@@ -218,16 +235,75 @@ async def start_ipc_feed_server(app_state: AppState) -> None:
             app_state.config.ipc.state_feed, zmq_err)
         sys.exit(ExitCode.EX_NOPERM)
 
-    def on_coachbot_state_change(new_states: Tuple[CoachbotState, ...]):
-        sock.send_json([new_state.to_dict() for new_state in new_states])
+    encoding = app_state.config.ipc.feed_encoding
+    subscriptions = SubscriptionTracker()
+    # The last projected state of every bot published on every view, so that
+    # deltas only carry the bots whose projection changed.
+    views: Dict[bytes, Dict[int, CoachbotState]] = {}
+
+    def publish_views(seq: int, kind: str,
+                      states: Mapping[int, CoachbotState], merged: int):
+        topics = subscriptions.topics(feed.TOPIC_VIEW)
+        for topic in set(views).difference(topics):
+            del views[topic]
+        for topic in topics:
+            try:
+                fields = feed.view_fields(topic)
+            except ValueError:
+                continue
+            published = views.setdefault(topic, {})
+            projected = {}
+            for ident, state in states.items():
+                view = feed.project(state, fields)
+                if kind == feed.KIND_KEYFRAME or \
+                        published.get(ident) != view:
+                    projected[ident] = published[ident] = view
+            # Empty deltas are still published, so that subscribers can tell
+            # them apart from dropped ones.
+            sock.send_multipart([topic, codec.dumps(
+                feed.StateFeedMessage(seq, kind, projected, merged),
+                encoding)])
+
+    def publish(seq: int, kind: str, states: Mapping[int, CoachbotState],
+                merged: int = 0):
+        if subscriptions.wants(feed.TOPIC_FLEET):
+            sock.send_multipart([feed.TOPIC_FLEET, codec.dumps(
+                feed.StateFeedMessage(seq, kind, dict(states), merged),
+                encoding)])
+        for ident in states:
+            if subscriptions.wants(topic := feed.bot_topic(ident)):
+                sock.send_multipart([topic, codec.dumps(
+                    feed.StateFeedMessage(seq, kind, {ident: states[ident]}),
+                    encoding)])
+        publish_views(seq, kind, states, merged)
+
+    def on_coachbot_state_delta(delta: CoachbotStateDelta):
+        publish(delta.seq, feed.KIND_DELTA, delta.states, delta.merged)
+
+    def on_job_event(event: JobEvent):
+        if subscriptions.wants(topic := feed.job_topic(event.job_id)):
+            sock.send_multipart([topic, event.serialize().encode()])
 
     def close():
         logging.getLogger('servers.feed').info('Closing IPC Feed Server.')
         sock.close()
 
-    app_state.coachbot_states.subscribe(on_next=on_coachbot_state_change,
-                                        on_completed=close,
-                                        on_error=lambda _: close())
+    async def publish_keyframes():
+        keyframe_interval = app_state.config.ipc.state_feed_keyframe_interval
+        while not sock.closed:
+            await asyncio.sleep(keyframe_interval)
+            seq, states = app_state.coachbot_states.snapshot()
+            # The store materializes states lazily, so only the bots which
+            # are actually published are materialized.
+            publish(seq, feed.KIND_KEYFRAME, states)
+
+    app_state.coachbot_states.deltas.subscribe(
+        on_next=on_coachbot_state_delta,
+        on_completed=close,
+        on_error=lambda _: close())
+    app_state.jobs.events.subscribe(on_next=on_job_event)
+
+    await asyncio.gather(subscriptions.run(sock), publish_keyframes())
 
 
 async def start_ipc_signal_forward_server(app_state: AppState) -> None:
@@ -235,7 +311,7 @@ async def start_ipc_signal_forward_server(app_state: AppState) -> None:
     the registered feed. APIs can then listen for these to trigger events.
     """
     ctx = zmq.asyncio.Context()
-    sock = ctx.socket(zmq.PUB)
+    sock = ctx.socket(zmq.XPUB)
 
     try:
         sock.bind(app_state.config.ipc.signal_feed)
@@ -243,11 +319,15 @@ async def start_ipc_signal_forward_server(app_state: AppState) -> None:
         logging.getLogger('servers.signalforward').error(
             'Could not bind to %s. Please check whether you have permissions.'
             'Error: %s',
-            app_state.config.ipc.state_feed, zmq_err)
+            app_state.config.ipc.signal_feed, zmq_err)
         sys.exit(ExitCode.EX_NOPERM)
 
+    encoding = app_state.config.ipc.feed_encoding
+    subscriptions = SubscriptionTracker()
+
     def on_signal(signal: Signal):
-        sock.send_json(signal.to_dict())
+        if subscriptions.wants(topic := feed.signal_topic(signal.name)):
+            sock.send_multipart([topic, codec.dumps(signal, encoding)])
 
     def close():
         logging.getLogger('servers.signalforward').info(
@@ -257,3 +337,5 @@ async def start_ipc_signal_forward_server(app_state: AppState) -> None:
     app_state.coachbot_signals.subscribe(on_next=on_signal,
                                          on_completed=close,
                                          on_error=lambda _: close())
+
+    await subscriptions.run(sock)
@@ -1,8 +1,25 @@
 #!/usr/bin/env python
 
-"""This module exposes small network-related utilities."""
+"""This module exposes small network-related utilities.
+
+``probe_reachable`` checks the reachability of many hosts at once: it sends
+an ICMP echo request to every host from a single socket and matches the
+replies to the hosts by their sequence number, so that sweeping the fleet
+takes a single round trip. Sending ICMP requires either ``CAP_NET_RAW`` or
+the group of the process to be within ``net.ipv4.ping_group_range``. If
+neither is the case, a TCP connection to ``tcp_port`` is attempted instead.
+A host which refuses the connection is still reachable.
+"""
 
 import asyncio
+import errno
+import fcntl
+import itertools
+import logging
+import os
+import socket
+import struct
+from typing import Dict, Iterable, List, Optional
 
 
 async def ping(hostname: str, count: int = 1,
@@ -29,7 +46,8 @@ async def ping(hostname: str, count: int = 1,
 
 async def host_is_reachable(hostname: str,
                             max_attempts: int = 1) -> bool:
-    """Asynchronously checks whether a host is reachable via ping.
+    """Asynchronously checks whether a host is reachable. See
+    ``probe_reachable``.
 
     Parameters:
         hostname (str): The target to ping.
@@ -40,6 +58,164 @@ async def host_is_reachable(hostname: str,
         bool: Whether the host was reachable on any attempt.
     """
     for _ in range(max_attempts):
-        if await ping(hostname, 1, 1) == 0:
+        if (await probe_reachable([hostname]))[hostname]:
             return True
     return False
+
+
+ICMP_ECHO_REQUEST = 8
+ICMP_ECHO_REPLY = 0
+
+_sequence = itertools.count()
+
+
+def _checksum(data: bytes) -> int:
+    """Returns the internet checksum (RFC 1071) of ``data``."""
+    if len(data) % 2:
+        data += b'\x00'
+    total = sum(struct.unpack(f'!{len(data) // 2}H', data))
+    total = (total >> 16) + (total & 0xFFFF)
+    total += total >> 16
+    return ~total & 0xFFFF
+
+
+def _echo_request(ident: int, seq: int) -> bytes:
+    """Builds an ICMP echo request."""
+    payload = b'cctld'
+    header = struct.pack('!BBHHH', ICMP_ECHO_REQUEST, 0, 0, ident, seq)
+    return struct.pack('!BBHHH', ICMP_ECHO_REQUEST, 0,
+                       _checksum(header + payload), ident, seq) + payload
+
+
+def _icmp_socket() -> Optional[socket.socket]:
+    """Opens an unprivileged ICMP socket, or a raw one if that is not
+    permitted. Returns ``None`` if neither is."""
+    for sock_type in (socket.SOCK_DGRAM, socket.SOCK_RAW):
+        try:
+            sock = socket.socket(socket.AF_INET, sock_type,
+                                 socket.IPPROTO_ICMP)
+        except OSError:
+            continue
+        sock.setblocking(False)
+        return sock
+    return None
+
+
+def _parse_echo_reply(packet: bytes, raw: bool) -> Optional[int]:
+    """Returns the sequence number of an ICMP echo reply, or ``None`` if the
+    packet is not one."""
+    if raw:
+        packet = packet[(packet[0] & 0x0F) * 4:]
+    if len(packet) < 8:
+        return None
+    icmp_type, _, _, _, seq = struct.unpack('!BBHHH', packet[:8])
+    return seq if icmp_type == ICMP_ECHO_REPLY else None
+
+
+async def _probe_icmp(sock: socket.socket, hosts: List[str],
+                      timeout: float) -> Dict[str, bool]:
+    raw = sock.type == socket.SOCK_RAW
+    ident = os.getpid() & 0xFFFF
+    base = next(_sequence) * len(hosts)
+    pending = {(base + i) & 0xFFFF: host for i, host in enumerate(hosts)}
+    reachable = {host: False for host in hosts}
+    loop = asyncio.get_running_loop()
+    done = loop.create_future()
+
+    def on_readable() -> None:
+        while True:
+            try:
+                packet, (address, *_) = sock.recvfrom(1024)
+            except (BlockingIOError, InterruptedError):
+                return
+            except OSError as err:
+                if not done.done():
+                    done.set_exception(err)
+                return
+            seq = _parse_echo_reply(packet, raw)
+            if pending.get(seq) == address:
+                reachable[pending.pop(seq)] = True
+                if not pending and not done.done():
+                    done.set_result(None)
+
+    loop.add_reader(sock.fileno(), on_readable)
+    try:
+        for seq, host in list(pending.items()):
+            try:
+                sock.sendto(_echo_request(ident, seq), (host, 0))
+            except OSError as err:
+                logging.getLogger('net').debug(
+                    'Could not send an echo request to %s: %s', host, err)
+                pending.pop(seq)
+        if pending:
+            await asyncio.wait_for(done, timeout)
+    except asyncio.TimeoutError:
+        pass
+    finally:
+        loop.remove_reader(sock.fileno())
+    return reachable
+
+
+async def _tcp_reachable(host: str, port: int, timeout: float) -> bool:
+    try:
+        _, writer = await asyncio.wait_for(
+            asyncio.open_connection(host, port), timeout)
+    except ConnectionRefusedError:
+        return True
+    except (OSError, asyncio.TimeoutError):
+        return False
+    writer.close()
+    return True
+
+
+async def probe_reachable(hosts: Iterable[str], timeout: float = 1,
+                          tcp_port: Optional[int] = None) -> Dict[str, bool]:
+    """Checks whether many hosts are reachable at once.
+
+    Parameters:
+        hosts (Iterable[str]): The IPv4 addresses of the hosts.
+        timeout (float): The number of seconds to wait for the replies.
+        tcp_port (Optional[int]): The port connected to if ICMP is not
+            permitted. If ``None``, the ``ping`` binary is used instead.
+
+    Returns:
+        Dict[str, bool]: Whether every host replied.
+    """
+    hosts = list(dict.fromkeys(hosts))
+    if not hosts:
+        return {}
+    if (sock := _icmp_socket()) is not None:
+        try:
+            with sock:
+                return await _probe_icmp(sock, hosts, timeout)
+        except OSError as err:
+            if err.errno not in (errno.EPERM, errno.EACCES):
+                raise
+    logging.getLogger('net').debug('ICMP is not permitted. Falling back.')
+    if tcp_port is None:
+        results = await asyncio.gather(*(ping(host, 1, timeout)
+                                         for host in hosts))
+        return {host: code == 0 for host, code in zip(hosts, results)}
+    results = await asyncio.gather(*(_tcp_reachable(host, tcp_port, timeout)
+                                     for host in hosts))
+    return dict(zip(hosts, results))
+
+
+_SIOCGIFBRDADDR = 0x8919  # See man netdevice 7
+
+
+def get_broadcast_address(ifname: str) -> str:
+    """Returns the broadcast address of the specified interface name.
+
+    Parameters:
+        ifname (str): The target interface name.
+
+    Returns:
+        str: The broadcast IP address of that interface.
+    """
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+        return socket.inet_ntoa(fcntl.ioctl(
+            sock.fileno(),
+            _SIOCGIFBRDADDR,
+            struct.pack('256s', bytes(ifname[:15], 'utf-8'))
+        )[20:24])
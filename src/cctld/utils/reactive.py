@@ -22,8 +22,11 @@ async def wait_until(subject: BehaviorSubject,
         if predicate(value):
             event.set()
 
-    subject.subscribe(on_next=wrapper)
-    await asyncio.wait_for(
-        event.wait(),
-        None if timeout in (float('inf'), None) else timeout
-    )
+    subscription = subject.subscribe(on_next=wrapper)
+    try:
+        await asyncio.wait_for(
+            event.wait(),
+            None if timeout in (float('inf'), None) else timeout
+        )
+    finally:
+        subscription.dispose()
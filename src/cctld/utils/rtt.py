@@ -0,0 +1,129 @@
+#!/usr/bin/env python
+
+"""This module exposes the utilities which decide how long to wait for a bot
+and how often to retry.
+
+``RttEstimator`` keeps the smoothed round-trip time of one peer and its
+variation as described in RFC 6298, from which it derives the retransmission
+timeout: a bot which usually answers in 5 ms is given up on after tens of
+milliseconds, while a bot on a congested link is waited for as long as it
+usually takes. Every timeout doubles the retransmission timeout until the
+next reply.
+
+``RetryBudget`` bounds the retries of many peers to a fraction of the
+requests, so that a fleet of dead bots fails fast instead of being retried
+over and over.
+"""
+
+import random
+from typing import Any, Dict, Optional
+
+
+class RttEstimator:
+    """Estimates the round-trip time of a single peer.
+
+    Parameters:
+        initial (float): The timeout, in seconds, before the first sample.
+        min_timeout (float): The lower bound of the timeout, in seconds.
+        max_timeout (float): The upper bound of the timeout, in seconds.
+        granularity (float): The clock granularity, in seconds, which the
+            variation term never falls below.
+    """
+    ALPHA = 1 / 8
+    BETA = 1 / 4
+    K = 4
+
+    def __init__(self, initial: float = 1.0, min_timeout: float = 0.05,
+                 max_timeout: float = 2.0, granularity: float = 0.001) -> None:
+        self.min_timeout = min_timeout
+        self.max_timeout = max_timeout
+        self.granularity = granularity
+        self.srtt: Optional[float] = None
+        self.rttvar: Optional[float] = None
+        self.samples = 0
+        self.timeouts = 0
+        self._rto = self._clamp(initial)
+
+    def _clamp(self, value: float) -> float:
+        return min(max(value, self.min_timeout), self.max_timeout)
+
+    @property
+    def timeout(self) -> float:
+        """Returns the current retransmission timeout, in seconds."""
+        return self._rto
+
+    def sample(self, rtt: float) -> None:
+        """Records the round-trip time of a reply, in seconds."""
+        if self.srtt is None or self.rttvar is None:
+            self.srtt = rtt
+            self.rttvar = rtt / 2
+        else:
+            self.rttvar += self.BETA * (abs(self.srtt - rtt) - self.rttvar)
+            self.srtt += self.ALPHA * (rtt - self.srtt)
+        self.samples += 1
+        self._rto = self._clamp(
+            self.srtt + max(self.granularity, self.K * self.rttvar))
+
+    def backoff(self) -> None:
+        """Doubles the timeout after a request timed out."""
+        self.timeouts += 1
+        self._rto = self._clamp(2 * self._rto)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Converts this object into a dictionary."""
+        return {
+            'srtt': self.srtt,
+            'rttvar': self.rttvar,
+            'timeout': self._rto,
+            'samples': self.samples,
+            'timeouts': self.timeouts
+        }
+
+
+class RetryBudget:
+    """Allows retries as long as they stay below a fraction of the requests.
+
+    Every request deposits ``ratio`` of a retry and every retry withdraws
+    one, up to a balance of ``reserve`` retries, which is also the initial
+    balance.
+
+    Parameters:
+        ratio (float): The number of retries allowed per request.
+        reserve (float): The maximum number of retries allowed in a burst.
+    """
+    def __init__(self, ratio: float = 0.2, reserve: float = 10.0) -> None:
+        self.ratio = ratio
+        self.reserve = reserve
+        self._balance = reserve
+
+    def deposit(self) -> None:
+        """Records a request."""
+        self._balance = min(self._balance + self.ratio, self.reserve)
+
+    def withdraw(self) -> bool:
+        """Records a retry, if the budget allows it.
+
+        Returns:
+            bool: Whether the retry may be made.
+        """
+        if self._balance < 1:
+            return False
+        self._balance -= 1
+        return True
+
+
+def backoff_delay(attempt: int, base: float = 0.05, cap: float = 1.0,
+                  rng: Optional[random.Random] = None) -> float:
+    """Returns how long to wait before a retry, in seconds.
+
+    The delay is drawn uniformly between zero and ``base * 2 ** attempt``,
+    capped at ``cap``, so that retries to many bots are spread out.
+
+    Parameters:
+        attempt (int): The number of the failed attempt, starting at 0.
+        base (float): The upper bound of the first delay.
+        cap (float): The upper bound of every delay.
+        rng (Optional[random.Random]): The source of randomness. Defaults to
+            the ``random`` module.
+    """
+    return (rng or random).uniform(0, min(cap, base * 2 ** attempt))
@@ -2,6 +2,9 @@
 
 """This module exposes some helpful zmq-related network utilities."""
 
+import logging
+from typing import Dict, List
+
 import zmq
 import zmq.asyncio
 
@@ -29,3 +32,63 @@ async def async_proxy(frontend: zmq.asyncio.Socket,
         if socks.get(backend) == zmq.POLLIN:
             request_raw = await backend.recv_multipart()
             await frontend.send_multipart(request_raw)
+
+
+class SubscriptionTracker:
+    """Tracks the topics subscribed to on a ``zmq.XPUB`` socket, so that a
+    publisher can skip building messages nobody would receive.
+
+    ``zmq.XPUB`` only forwards the first subscription and the last
+    unsubscription of every topic, so the tracker only needs to know which
+    topics have at least one subscriber.
+
+    Example:
+
+    .. code-block:: python
+
+       tracker = SubscriptionTracker()
+       asyncio.create_task(tracker.run(xpub_socket))
+       if tracker.wants(b'bot/17/'):
+           xpub_socket.send_multipart([b'bot/17/', build_message()])
+    """
+    def __init__(self) -> None:
+        self._topics: Dict[bytes, int] = {}
+
+    def on_message(self, message: bytes) -> None:
+        """Applies a subscription message received on a ``zmq.XPUB``
+        socket."""
+        if not message:
+            return
+        topic = message[1:]
+        if message[0] == 1:
+            self._topics[topic] = self._topics.get(topic, 0) + 1
+        elif message[0] == 0 and topic in self._topics:
+            if self._topics[topic] <= 1:
+                del self._topics[topic]
+            else:
+                self._topics[topic] -= 1
+
+    def wants(self, topic: bytes) -> bool:
+        """Returns whether anyone is subscribed to a prefix of ``topic``."""
+        topics = self._topics
+        if not topics:
+            return False
+        return any(topic[:i] in topics for i in range(len(topic) + 1))
+
+    def topics(self, prefix: bytes = b'') -> List[bytes]:
+        """Returns the subscribed topics starting with ``prefix``."""
+        return [topic for topic in self._topics if topic.startswith(prefix)]
+
+    async def run(self, sock: zmq.asyncio.Socket) -> None:
+        """Receives subscription messages from ``sock`` until it is
+        closed."""
+        while not sock.closed:
+            try:
+                message = await sock.recv()
+            except zmq.ZMQError:
+                if sock.closed:
+                    return
+                raise
+            logging.getLogger('zmq.subscriptions').debug(
+                'Subscription change %r.', message)
+            self.on_message(message)
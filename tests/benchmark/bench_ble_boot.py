@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Benchmarks booting a fleet over bluetooth with ``cctld.ble.BleManager``
+against a fake bleak backend.
+
+The fake client takes ``--latency`` seconds to connect and to complete every
+command, and fails to connect with a probability of ``--failure-rate``. The
+fleet is booted with a single interface, which is how the legacy manager
+behaved regardless of the number of interfaces, and then with every count up
+to ``--interfaces``.
+
+Finally, ``--subset`` bots are power-cycled ``--rounds`` times, once
+reconnecting every time and once reusing the cached connections.
+
+Run with ``python -m tests.benchmark.bench_ble_boot`` from the repository root.
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import random
+import sys
+import time
+
+from bleak.exc import BleakError
+
+sys.path.insert(0, os.path.abspath('./src'))
+
+from cctl.models import Coachbot
+from cctld.ble import BleManager
+
+
+class FakeClient:
+    """Mimics ``CoachbotBLEClient`` with a fixed latency per operation."""
+    latency = 0.01
+    failure_rate = 0.0
+    rng = random.Random(0)
+
+    def __init__(self, address: str, **kwargs) -> None:
+        self.address = address
+        self.adapter = kwargs['adapter']
+        self.is_connected = False
+
+    async def __aenter__(self) -> 'FakeClient':
+        await asyncio.sleep(self.latency)
+        if self.rng.random() < self.failure_rate:
+            raise BleakError(f'Could not connect to {self.address}.')
+        self.is_connected = True
+        return self
+
+    async def __aexit__(self, *_) -> None:
+        self.is_connected = False
+
+    async def boot(self, _: bool) -> None:
+        await asyncio.sleep(self.latency)
+
+
+async def _boot(n_interfaces: int, bots, backoff: float, rounds: int = 1,
+                **kwargs) -> float:
+    manager = BleManager(range(n_interfaces), client_factory=FakeClient,
+                         backoff=backoff, **kwargs)
+    start = time.perf_counter()
+    failed = []
+    for i in range(rounds):
+        failed += [error
+                   async for error in manager.boot_bots(bots, i % 2 == 0)]
+    elapsed = time.perf_counter() - start
+    if failed:
+        print(f'  ({len(failed)} bots failed)')
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--bots', type=int, default=100,
+                        help='The number of bots to boot.')
+    parser.add_argument('--interfaces', type=int, default=4,
+                        help='The maximum number of bluetooth interfaces.')
+    parser.add_argument('--latency', type=float, default=0.01,
+                        help='The latency of every fake BLE operation.')
+    parser.add_argument('--failure-rate', type=float, default=0.1,
+                        help='The probability a connection attempt fails.')
+    parser.add_argument('--subset', type=int, default=4,
+                        help='The number of bots power-cycled repeatedly.')
+    parser.add_argument('--rounds', type=int, default=10,
+                        help='The number of times the subset is booted.')
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)
+    FakeClient.latency = args.latency
+    FakeClient.failure_rate = args.failure_rate
+    bots = [Coachbot.stateless(i) for i in range(args.bots)]
+
+    print(f'{"interfaces":<12}{"seconds":>10}{"bots/s":>10}{"speedup":>10}')
+    baseline = None
+    for n_interfaces in range(1, args.interfaces + 1):
+        FakeClient.rng.seed(0)
+        elapsed = asyncio.run(_boot(n_interfaces, bots, args.latency))
+        baseline = baseline or elapsed
+        print(f'{n_interfaces:<12}{elapsed:>10.3f}'
+              f'{args.bots / elapsed:>10.1f}{baseline / elapsed:>10.2f}')
+
+
+    print()
+    print(f'{"cache":<12}{"seconds":>10}{"boots/s":>10}{"speedup":>10}')
+    baseline = None
+    for cache_size in (0, args.subset):
+        FakeClient.rng.seed(0)
+        elapsed = asyncio.run(_boot(
+            args.interfaces, bots[:args.subset], args.latency, args.rounds,
+            cache_size=cache_size))
+        baseline = baseline or elapsed
+        boots = args.subset * args.rounds
+        print(f'{cache_size:<12}{elapsed:>10.3f}'
+              f'{boots / elapsed:>10.1f}{baseline / elapsed:>10.2f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Benchmarks the binary codec of ``cctl.protocols.codec`` against JSON.
+
+For every message type, the time taken to encode and decode a single message
+is measured with both encodings, along with the size of the encoded message.
+``fleet`` is a state feed keyframe holding ``--bots`` fully populated states.
+
+Run with ``python -m tests.benchmark.bench_codec`` from the repository root.
+"""
+
+import argparse
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.abspath('./src'))
+
+from cctl.models import CoachbotState, Signal, UserCodeState
+from cctl.protocols import codec, feed, status
+from cctl.utils.math import Vec2
+
+
+def _state(identifier: int) -> CoachbotState:
+    return CoachbotState(
+        is_on=True, os_version='1.3.0', bat_voltage=3.7 + identifier / 1000,
+        position=Vec2(identifier / 10, -identifier / 10), theta=0.5,
+        user_code_state=UserCodeState(is_running=True, version='1.0.0',
+                                      name='Demo', author='Lab'))
+
+
+def _time(func, number: int) -> float:
+    """Returns the best time of a single call, in microseconds."""
+    return min(timeit.repeat(func, number=number, repeat=5)) / number * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--bots', type=int, default=100,
+                        help='The number of bots in the fleet message.')
+    parser.add_argument('--number', type=int, default=2000,
+                        help='The number of calls per timing.')
+    args = parser.parse_args()
+
+    messages = {
+        'state': (_state(1), CoachbotState),
+        'user_code': (_state(1).user_code_state, UserCodeState),
+        'signal': (Signal('measure', {'value': 1.5}), Signal),
+        'status': (status.Request(1, 'state', _state(1)), status.Request),
+        'fleet': (feed.StateFeedMessage(
+            1, feed.KIND_KEYFRAME,
+            {i: _state(i) for i in range(args.bots)}), feed.StateFeedMessage),
+    }
+
+    print(f'{"message":<11}{"codec":<8}{"bytes":>8}{"enc us":>10}'
+          f'{"dec us":>10}{"enc x":>8}{"dec x":>8}')
+    for name, (message, cls) in messages.items():
+        number = max(1, args.number // (args.bots if name == 'fleet' else 1))
+        timings = {}
+        for encoding in (codec.ENCODING_JSON, codec.ENCODING_BINARY):
+            data = codec.dumps(message, encoding)
+            timings[encoding] = (
+                len(data),
+                _time(lambda: codec.dumps(message, encoding), number),
+                _time(lambda: codec.loads(data, cls), number))
+        for encoding, (size, enc, dec) in timings.items():
+            _, json_enc, json_dec = timings[codec.ENCODING_JSON]
+            print(f'{name:<11}{encoding:<8}{size:>8}{enc:>10.1f}{dec:>10.1f}'
+                  f'{json_enc / enc:>8.1f}{json_dec / dec:>8.1f}')
+
+
+if __name__ == '__main__':
+    main()
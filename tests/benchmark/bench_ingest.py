@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Benchmarks the status ingest loops of ``cctld.ingest``.
+
+For every ingest mode and fleet size, simulated bots report their state to
+the ingest loop. The bots are spread across several load-generating processes
+so that they do not compete with the ingest loop for its event loop. ``rep``
+and ``router`` bots wait for an acknowledgement before sending their next
+report, while ``pull`` bots never wait.
+
+By default, every bot reports at ``--rate`` Hz, which mimics a real fleet.
+Pass ``--rate 0`` to have every bot report as fast as it can, which measures
+the saturation throughput instead.
+
+The latency reported is the time between a bot sending a report and the
+ingest loop handling it. The simulated bots abuse the ``theta`` field to carry
+the (``time.monotonic``) time the report was sent.
+
+Run with ``python -m tests.benchmark.bench_ingest`` from the repository root.
+"""
+
+import argparse
+import asyncio
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+from typing import List
+
+import zmq
+import zmq.asyncio
+
+sys.path.insert(0, os.path.abspath('./src'))
+
+from cctl.models import CoachbotState
+from cctl.protocols import status
+from cctld import ingest
+
+
+MODES = {
+    'rep': (zmq.REP, zmq.REQ, ingest.serve_rep),
+    'router': (zmq.ROUTER, zmq.DEALER, ingest.serve_router),
+    'pull': (zmq.PULL, zmq.PUSH, ingest.serve_pull),
+}
+
+
+def _report(identifier: int) -> bytes:
+    return status.Request(identifier, 'state', CoachbotState(
+        is_on=True, os_version='1.0.0', bat_voltage=4.0,
+        theta=time.monotonic())).serialize().encode('utf-8')
+
+
+def _load_generator(mode: str, address: str, bot_ids: List[int],
+                    reports_per_bot: int, rate: float) -> None:
+    """Simulates the given bots. Runs in its own process."""
+    client_type = MODES[mode][1]
+
+    async def bot(ctx: zmq.asyncio.Context, identifier: int) -> None:
+        sock = ctx.socket(client_type)
+        sock.connect(address)
+        # Spread the bots evenly over one reporting period.
+        if rate > 0:
+            await asyncio.sleep((identifier % 100) / 100 / rate)
+        for _ in range(reports_per_bot):
+            sent_at = time.monotonic()
+            if client_type == zmq.DEALER:
+                await sock.send_multipart([b'', _report(identifier)])
+            else:
+                await sock.send(_report(identifier))
+            if client_type != zmq.PUSH:
+                await sock.recv_multipart()
+            if rate > 0:
+                await asyncio.sleep(max(0.0, 1 / rate -
+                                        (time.monotonic() - sent_at)))
+        # Fire-and-forget sockets must linger until the data is sent.
+        sock.close(linger=-1 if client_type == zmq.PUSH else 0)
+
+    async def run_bots() -> None:
+        ctx = zmq.asyncio.Context()
+        await asyncio.gather(*(bot(ctx, i) for i in bot_ids))
+        ctx.term()
+
+    asyncio.run(run_bots())
+
+
+async def run(mode: str, n_bots: int, reports_per_bot: int, rate: float,
+              n_procs: int):
+    """Runs the benchmark for one mode and fleet size.
+
+    Returns:
+        Tuple[float, float]: The throughput in messages per second and the
+        99th percentile latency in milliseconds.
+    """
+    server_type, _, serve = MODES[mode]
+    total = n_bots * reports_per_bot
+    latencies: List[float] = []
+    first_sent = float('inf')
+    done = asyncio.Event()
+
+    def on_batch(requests: List[status.Request]) -> None:
+        nonlocal first_sent
+        now = time.monotonic()
+        first_sent = min(first_sent,
+                         min(request.body.theta for request in requests))
+        latencies.extend(now - request.body.theta for request in requests)
+        if len(latencies) >= total:
+            done.set()
+
+    ctx = zmq.asyncio.Context()
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        address = f'ipc://{tmp_dir}/status'
+        server = ctx.socket(server_type)
+        server.bind(address)
+        server_task = asyncio.create_task(serve(server, on_batch))
+
+        procs = [multiprocessing.Process(
+            target=_load_generator,
+            args=(mode, address, list(range(n_bots))[i::n_procs],
+                  reports_per_bot, rate))
+            for i in range(n_procs)]
+        for proc in procs:
+            proc.start()
+
+        await done.wait()
+        elapsed = time.monotonic() - first_sent
+
+        for proc in procs:
+            proc.join()
+        server_task.cancel()
+        server.close(linger=0)
+    ctx.term()
+
+    latencies.sort()
+    return total / elapsed, latencies[int(0.99 * (len(latencies) - 1))] * 1e3
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--bots', type=int, nargs='+',
+                        default=[100, 500, 1000])
+    parser.add_argument('--reports', type=int, default=20,
+                        help='The number of reports each bot sends.')
+    parser.add_argument('--rate', type=float, default=10.0,
+                        help='The reporting rate of each bot in Hz. 0 '
+                             'reports as fast as possible.')
+    parser.add_argument('--procs', type=int, default=4,
+                        help='The number of load-generating processes.')
+    parser.add_argument('--modes', nargs='+', default=list(MODES),
+                        choices=list(MODES))
+    args = parser.parse_args()
+
+    print(f'{"mode":<8}{"bots":>6}{"msg/s":>12}{"p99 ms":>10}')
+    for mode in args.modes:
+        for n_bots in args.bots:
+            throughput, p99 = asyncio.run(
+                run(mode, n_bots, args.reports, args.rate, args.procs))
+            print(f'{mode:<8}{n_bots:>6}{throughput:>12.0f}{p99:>10.2f}')
+
+
+if __name__ == '__main__':
+    main()
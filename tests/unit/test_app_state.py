@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Holds the CoachbotStateSubject unit test cases."""
+
+import asyncio
+import json
+import unittest
+import os
+import sys
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.abspath('./src'))
+
+from cctl.models import CoachbotState
+from cctl.protocols import ipc
+from cctld import requests  # noqa: F401 -- Registers the handlers.
+from cctld.models.app_state import CoachbotStateSubject
+from cctld.requests.handler import get as get_handler
+
+
+class TestCoachbotStateSubject(unittest.TestCase):
+    """TestCase for the coalescing of state updates into publications."""
+
+    def setUp(self) -> None:
+        self.subject = CoachbotStateSubject(range(3))
+        self.deltas = []
+        self.subject.deltas.subscribe(on_next=self.deltas.append)
+
+    def test_coalesces_updates(self):
+        """Updates within one tick are published once, holding the latest
+        state of every updated bot."""
+        async def run():
+            publisher = asyncio.create_task(self.subject.run_publisher(50))
+            await asyncio.sleep(0)
+            self.subject.update(0, CoachbotState(True))
+            self.subject.update(1, CoachbotState(True))
+            self.subject.update(0, CoachbotState(False, bat_voltage=3.7))
+            self.assertEqual([], self.deltas)
+            while not self.deltas:
+                await asyncio.sleep(0.01)
+            publisher.cancel()
+            await asyncio.gather(publisher, return_exceptions=True)
+
+        asyncio.run(run())
+        self.assertEqual(1, len(self.deltas))
+        delta = self.deltas[0]
+        self.assertEqual((1, 3), (delta.seq, delta.merged))
+        self.assertEqual({0: CoachbotState(False, bat_voltage=3.7),
+                          1: CoachbotState(True)}, delta.states)
+        self.assertEqual((1, 3, 3), (self.subject.ticks, self.subject.updates,
+                                     self.subject.last_merged))
+
+    def test_idle_ticks(self):
+        """Ticks without any update publish nothing."""
+        async def run():
+            publisher = asyncio.create_task(self.subject.run_publisher(200))
+            await asyncio.sleep(0.05)
+            publisher.cancel()
+            await asyncio.gather(publisher, return_exceptions=True)
+
+        asyncio.run(run())
+        self.assertEqual([], self.deltas)
+        self.assertEqual(0, self.subject.seq)
+
+    def test_flushes_when_stopped(self):
+        """Updates pending when the publisher stops are published."""
+        async def run():
+            publisher = asyncio.create_task(self.subject.run_publisher(1))
+            await asyncio.sleep(0)
+            self.subject.update(2, CoachbotState(True))
+            publisher.cancel()
+            await asyncio.gather(publisher, return_exceptions=True)
+
+        asyncio.run(run())
+        self.assertEqual([(1, 1)], [(delta.seq, delta.merged)
+                                    for delta in self.deltas])
+
+    def test_unthrottled(self):
+        """Without a positive rate, every update is published immediately."""
+        asyncio.run(self.subject.run_publisher(0))
+        published = []
+        self.subject.subscribe(on_next=published.append)
+        self.subject.update(0, CoachbotState(True))
+        self.subject.update(0, CoachbotState(False))
+        self.assertEqual([(1, 1), (2, 1)], [(delta.seq, delta.merged)
+                                            for delta in self.deltas])
+        self.assertEqual([self.subject.value] * 2, published)
+        self.assertFalse(self.subject.value[0].is_on)
+
+    def test_stats(self):
+        """The state feed statistics report the coalescing."""
+        self.subject.update(0, CoachbotState(True))
+        self.subject.update(1, CoachbotState(True))
+        handler, groups = get_handler('/stats/state-feed', 'read')
+        response = asyncio.run(handler(SimpleNamespace(
+            config=SimpleNamespace(ipc=SimpleNamespace(state_feed_rate=0)),
+            coachbot_states=self.subject),
+            ipc.Request('read', '/stats/state-feed'), groups))
+        self.assertEqual(ipc.ResultCode.OK, response.result_code)
+        self.assertEqual({'rate': 0, 'seq': 2, 'ticks': 2, 'updates': 2,
+                          'last_merged': 1}, json.loads(response.body))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Holds the /bots/batch and /jobs request handler unit test cases."""
+
+import asyncio
+import json
+import unittest
+import os
+import sys
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.abspath('./src'))
+
+from cctl.models import CoachbotState, Inventory, InventoryEntry, \
+    UserCodeState
+from cctl.protocols import ipc
+from cctld import requests
+from cctld.ble.errors import BLENotReachableError
+from cctld.code_store import CodeStore
+from cctld.fleet import FleetStateStore
+from cctld.jobs import JobManager
+from cctld.requests.handler import get as get_handler
+
+
+class TestBatchRequests(unittest.TestCase):
+    """TestCase for the /bots/batch endpoints."""
+
+    def setUp(self) -> None:
+        states = FleetStateStore(range(3), CoachbotState(False))
+        states.update(1, CoachbotState(True, user_code_state=UserCodeState(
+            is_running=True)))
+        self.app_state = SimpleNamespace(
+            config=SimpleNamespace(ipc=SimpleNamespace(batch_concurrency=2)),
+            inventory=Inventory(InventoryEntry(i, f'10.0.0.{i}')
+                                for i in range(3)),
+            coachbot_states=SimpleNamespace(value=states),
+            jobs=JobManager(),
+            code_store=CodeStore(),
+            fleet_commands=None)
+
+    def request_async(self, method: str, endpoint: str, body: str):
+        """Returns the coroutine handling the given request."""
+        handler, groups = get_handler(endpoint, method)
+        return handler(self.app_state,
+                       ipc.Request(method, endpoint, body=body), groups)
+
+    def request(self, method: str, endpoint: str,
+                body: str) -> ipc.Response:
+        """Handles the given request."""
+        return asyncio.run(self.request_async(method, endpoint, body))
+
+    def test_per_bot_results(self):
+        """Every targeted bot gets its own result code."""
+        response = self.request('create', '/bots/batch/user-code/running',
+                                json.dumps({'ids': [0, 1, 7]}))
+        self.assertEqual(ipc.ResultCode.OK, response.result_code)
+        self.assertEqual(
+            [ipc.ResultCode.STATE_CONFLICT, ipc.ResultCode.OK,
+             ipc.ResultCode.NOT_FOUND],
+            [result['result_code']
+             for _, result in json.loads(response.body)])
+
+    def test_fleet_command(self):
+        """Bots are started with a single fleet command, and commanded
+        individually if they do not acknowledge it."""
+        for ident in (0, 2):
+            self.app_state.coachbot_states.value.update(
+                ident, CoachbotState(True, user_code_state=UserCodeState(
+                    is_running=False)))
+        sent = []
+        commanded = []
+
+        async def send(request, targets):
+            sent.append((request.method, request.endpoint, targets))
+            return {0: 200}
+
+        class Command:
+            def __init__(self, host):
+                self.host = host
+
+            async def __aenter__(self):
+                return self
+
+            async def __aexit__(self, *_):
+                pass
+
+            async def set_user_code_running(self, value):
+                commanded.append((self.host, value))
+
+        self.app_state.fleet_commands = SimpleNamespace(send=send)
+        self.app_state.coach_commands = SimpleNamespace(command=Command)
+        response = self.request('create', '/bots/batch/user-code/running',
+                                json.dumps({'ids': [0, 1, 2, 7]}))
+        self.assertEqual(
+            [ipc.ResultCode.OK] * 3 + [ipc.ResultCode.NOT_FOUND],
+            [result['result_code']
+             for _, result in json.loads(response.body)])
+        self.assertEqual(sent, [('create', '/user-code/running', [0, 2])])
+        self.assertEqual(len(commanded), 1)
+        self.assertTrue(commanded[0][1])
+
+    def test_skips_deployed_code(self):
+        """Bots which already hold the user code are not sent it again,
+        unless forced."""
+        sent = []
+
+        class Command:
+            def __init__(self, host):
+                self.host = host
+
+            async def __aenter__(self):
+                return self
+
+            async def __aexit__(self, *_):
+                pass
+
+            async def set_user_code_running(self, value):
+                pass
+
+            async def set_user_code(self, code, compressed, code_hash):
+                sent.append((self.host, code, compressed, code_hash))
+
+        states = self.app_state.coachbot_states.value
+        code_hash = self.app_state.code_store.put('print(1)')
+        states.update(0, CoachbotState(True, user_code_state=UserCodeState(
+            user_code_hash=code_hash)))
+        self.app_state.coach_commands = SimpleNamespace(command=Command)
+        self.app_state.config.coach_client = SimpleNamespace(
+            compress_user_code=True)
+        body = {'ids': [0, 1], 'code': 'print(1)'}
+        response = self.request('update', '/bots/batch/user-code/code',
+                                json.dumps(body))
+        self.assertEqual([ipc.ResultCode.OK] * 2,
+                         [result['result_code']
+                          for _, result in json.loads(response.body)])
+        self.assertEqual([('print(1)',
+                           self.app_state.code_store.compressed(code_hash),
+                           code_hash)], [tuple(args) for _, *args in sent])
+        self.request('update', '/bots/batch/user-code/code',
+                     json.dumps({**body, 'force': True}))
+        self.assertEqual(3, len(sent))
+
+    def test_on_selector(self):
+        """``on`` targets every bot which is on."""
+        response = self.request('create', '/bots/batch/user-code/running',
+                                json.dumps({'ids': 'on'}))
+        self.assertEqual([1], [ident for ident, _
+                               in json.loads(response.body)])
+
+    def test_bad_request(self):
+        """Malformed bodies are rejected as a whole."""
+        for body in ('{}', '[1, 2]', json.dumps({'ids': ['a']})):
+            self.assertEqual(
+                ipc.ResultCode.BAD_REQUEST,
+                self.request('create', '/bots/batch/user-code/running',
+                             body).result_code)
+
+    def test_bounded_concurrency(self):
+        """No more than ``batch_concurrency`` bots are commanded at once."""
+        running = peak = 0
+
+        async def operation(_):
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.01)
+            running -= 1
+            return ipc.Response(ipc.ResultCode.OK)
+
+        # pylint: disable=protected-access
+        response = asyncio.run(requests._fan_out(self.app_state,
+                                                 list(range(8)), operation))
+        self.assertEqual(8, len(json.loads(response.body)))
+        self.assertEqual(2, peak)
+
+    def test_job(self):
+        """Jobs are accepted immediately and record every bot's result."""
+        async def run():
+            response = await self.request_async(
+                'create', '/jobs',
+                json.dumps({'kind': 'deploy', 'ids': [0, 9], 'code': ''}))
+            job_id = json.loads(response.body)['job_id']
+            while not self.app_state.jobs[job_id].finished:
+                await asyncio.sleep(0)
+            return response, self.app_state.jobs[job_id]
+
+        response, finished = asyncio.run(run())
+        self.assertEqual(ipc.ResultCode.ACCEPTED, response.result_code)
+        self.assertEqual(ipc.ResultCode.STATE_CONFLICT,
+                         finished.results[0].result_code)
+        self.assertEqual(ipc.ResultCode.NOT_FOUND,
+                         finished.results[9].result_code)
+
+    def test_boot_job(self):
+        """Boot jobs hand every bot to the bluetooth manager at once and
+        record the result of each bot as soon as it is known."""
+        batches = []
+        states = self.app_state.coachbot_states.value
+
+        async def run():
+            release = asyncio.Event()
+
+            async def boot(bots, state):
+                batches.append([bot.identifier for bot in bots])
+                for bot in bots:
+                    if bot.identifier == 2:
+                        await release.wait()
+                        yield bot, BLENotReachableError(bot, 'Unreachable')
+                    else:
+                        states.update(bot.identifier, CoachbotState(state))
+                        yield bot, None
+
+            self.app_state.ble_manager = SimpleNamespace(boot=boot)
+            response = await self.request_async(
+                'create', '/jobs',
+                json.dumps({'kind': 'boot', 'ids': [0, 1, 2, 9]}))
+            submitted = self.app_state.jobs[json.loads(response.body)[
+                'job_id']]
+            while len(submitted.results) < 3:
+                await asyncio.sleep(0)
+            progress = dict(submitted.results)
+            release.set()
+            while not submitted.finished:
+                await asyncio.sleep(0)
+            return progress, submitted
+
+        self.app_state.config.constants = SimpleNamespace(boot_timeout=1)
+        progress, finished = asyncio.run(run())
+        self.assertEqual([0, 1, 9], sorted(progress))
+        self.assertEqual([[0, 2]], batches)
+        self.assertEqual(
+            [ipc.ResultCode.OK, ipc.ResultCode.OK,
+             ipc.ResultCode.STATE_CONFLICT, ipc.ResultCode.NOT_FOUND],
+            [finished.results[ident].result_code for ident in (0, 1, 2, 9)])
+        self.assertTrue(states[0].is_on)
+
+    def test_job_kind(self):
+        """Unknown job kinds are rejected."""
+        self.assertEqual(
+            ipc.ResultCode.BAD_REQUEST,
+            self.request('create', '/jobs', json.dumps(
+                {'kind': 'dance', 'ids': 'all'})).result_code)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Holds the CoachbotBLEClient unit test cases."""
+
+import asyncio
+import unittest
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath('./src'))
+
+from cctl.protocols import ble
+from cctld.ble.client import CoachbotBLEClient, LatencyStats
+
+
+class FakeBoard(CoachbotBLEClient):
+    """A client talking to a simulated Bluefruit board, which notifies its
+    responses in small chunks."""
+    CHUNK = 3
+
+    def __init__(self, **kwargs) -> None:
+        super().__init__('AA:BB:CC:DD:EE:FF', **kwargs)
+        self.command_mode = False
+        self.led = None
+        self.silent = False
+        self.garbled = False
+        self.written = []
+        # The number of seconds after which the next responses are notified.
+        self.delays = []
+
+    def respond(self, message: bytes) -> bytes:
+        """Returns the response of the board to ``message``."""
+        if self.garbled:
+            return b'?\r\nOK\r\n'
+        if message == b'+++\n':
+            self.command_mode = not self.command_mode
+            return f'{int(self.command_mode)}\r\nOK\r\n'.encode('utf-8')
+        if not self.command_mode:
+            return b''
+        self.led = message.endswith(b'1\n')
+        return b'OK\r\n'
+
+    async def write_gatt_char(self, *args, **kwargs):
+        message = args[1]
+        self.written.append(message)
+        response = self.respond(message)
+        if self.silent or not response:
+            return
+        loop = asyncio.get_running_loop()
+        delay = self.delays.pop(0) if self.delays else 0
+        for i in range(0, len(response), self.CHUNK):
+            loop.call_later(delay, self._on_rx, None,
+                            bytearray(response[i:i + self.CHUNK]))
+
+
+class TestCoachbotBLEClient(unittest.TestCase):
+    """TestCase for the notify mode of the CoachbotBLEClient class."""
+
+    def test_boot(self):
+        """Tests that booting switches the LED and returns to UART mode,
+        pipelining the LED and the switch back."""
+        stats = LatencyStats()
+        board = FakeBoard(notify=True, stats=stats)
+        asyncio.run(board.boot(True))
+        self.assertTrue(board.led)
+        self.assertFalse(board.command_mode)
+        self.assertEqual(board.written,
+                         [b'+++\n', b'AT+HWMODELED=5,1\n', b'+++\n'])
+        summary = stats.summary()
+        self.assertEqual(summary['+++']['count'], 2)
+        self.assertEqual(summary['AT+HWMODELED']['count'], 1)
+
+    def test_boot_from_command_mode(self):
+        """Tests that a board left in command mode is still booted."""
+        board = FakeBoard(notify=True)
+        board.command_mode = True
+        asyncio.run(board.boot(False))
+        self.assertFalse(board.led)
+        self.assertFalse(board.command_mode)
+
+    def test_frames_in_one_notification(self):
+        """Tests that responses notified together resolve in order."""
+        board = FakeBoard(notify=True)
+
+        async def run():
+            pending = asyncio.ensure_future(
+                board.pipeline(b'+++\n', b'+++\n'))
+            await asyncio.sleep(0)
+            board._on_rx(None, bytearray(b'1\r\nOK\r\n0\r\nOK\r\n'))
+            return await pending
+
+        board.silent = True
+        self.assertEqual(asyncio.run(run()),
+                         [b'1\r\nOK\r\n', b'0\r\nOK\r\n'])
+
+    def test_timeout_resyncs(self):
+        """Tests that a missing response times out and forgets the pending
+        command."""
+        board = FakeBoard(notify=True)
+        board.COMMAND_TIMEOUT = 0.01
+        board.silent = True
+        with self.assertRaises(asyncio.TimeoutError):
+            asyncio.run(board.request(b'+++\n'))
+        self.assertFalse(board._pending)
+
+    def test_drops_late_responses(self):
+        """Tests that the response of a command which timed out is not taken
+        for the response of the next command."""
+        board = FakeBoard(notify=True)
+        board.COMMAND_TIMEOUT = 0.1
+        board.delays = [0.15, 0.1]
+
+        async def run():
+            with self.assertRaises(asyncio.TimeoutError):
+                await board.request(b'+++\n')
+            return await board.request(b'+++\n')
+
+        self.assertEqual(b'0\r\nOK\r\n', asyncio.run(run()))
+
+    def test_lost_responses(self):
+        """Tests that a response which never arrives does not shift the
+        following responses."""
+        board = FakeBoard(notify=True)
+        board.COMMAND_TIMEOUT = 0.05
+
+        async def run():
+            board.silent = True
+            with self.assertRaises(asyncio.TimeoutError):
+                await board.request(b'+++\n')
+            board.silent = False
+            return [await board.request(b'+++\n') for _ in range(2)]
+
+        self.assertEqual([b'0\r\nOK\r\n', b'1\r\nOK\r\n'],
+                         asyncio.run(run()))
+
+    def test_set_mode_is_bounded(self):
+        """Tests that set_mode gives up on a misbehaving board."""
+        board = FakeBoard(notify=True)
+        board.garbled = True
+        with self.assertRaises(ble.BluefruitProtocolError):
+            asyncio.run(board.set_mode(ble.BluefruitMode(True)))
+        self.assertEqual(len(board.written), board.MAX_ATTEMPTS)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Holds the HealthTracker unit test cases."""
+
+import unittest
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath('./src'))
+
+from cctld.ble.health import HealthTracker
+
+
+BOT = 'aa:aa:aa:aa:aa:aa'
+OTHER = 'bb:bb:bb:bb:bb:bb'
+
+
+class TestHealthTracker(unittest.TestCase):
+    """TestCase for the HealthTracker class."""
+
+    def setUp(self) -> None:
+        self.tracker = HealthTracker([0, 1, 2], quarantine_after=3,
+                                     quarantine_time=60)
+
+    def test_prefers_fast_adapters(self):
+        """Tests that the adapter with the lowest latency is preferred."""
+        for _ in range(5):
+            self.tracker.record(OTHER, 0, True, 2.0)
+            self.tracker.record(OTHER, 1, True, 0.5)
+            self.tracker.record(OTHER, 2, True, 1.0)
+        self.assertEqual(self.tracker.choose([0, 1, 2], BOT), 1)
+        self.assertEqual(self.tracker.choose([0, 2], BOT), 2)
+
+    def test_quarantine(self):
+        """Tests that failing adapters are quarantined and only used if
+        every adapter is."""
+        for _ in range(3):
+            self.tracker.record(OTHER, 0, False, 10.0)
+        self.assertEqual(self.tracker.to_dict()[0]['failures'], 3)
+        self.assertGreater(self.tracker.to_dict()[0]['quarantined_for'], 0)
+        self.assertIsNone(self.tracker.choose([0], None))
+        self.assertEqual(self.tracker.choose([0, 2], None), 2)
+        for intf in (1, 2):
+            for _ in range(3):
+                self.tracker.record(OTHER, intf, False, 10.0)
+        self.assertEqual(self.tracker.choose([0], None), 0)
+
+    def test_affinity(self):
+        """Tests that a bot failing on an adapter moves to another one,
+        while other bots keep using it."""
+        self.tracker.record(BOT, 0, False, 10.0)
+        self.tracker.record(BOT, 0, False, 10.0)
+        self.tracker.record(OTHER, 0, True, 0.1)
+        self.assertIsNone(self.tracker.choose([0], BOT))
+        self.assertEqual(self.tracker.choose([0, 1], BOT), 1)
+        self.assertEqual(self.tracker.choose([0, 1], OTHER), 0)
+
+    def test_rssi_affinity(self):
+        """Tests that the advertised signal strength seeds the affinity of
+        bots to the scanning adapter."""
+        tracker = HealthTracker([0, 1], rssi_of=lambda _: -95,
+                                scan_interface=0)
+        self.assertLess(tracker.affinity(BOT, 0), tracker.MIN_AFFINITY)
+        self.assertEqual(tracker.choose([0, 1], BOT), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Holds the BleManager unit test cases."""
+
+import asyncio
+import logging
+import unittest
+import os
+import sys
+import time
+
+from bleak.exc import BleakError
+
+sys.path.insert(0, os.path.abspath('./src'))
+
+from cctl.models import Coachbot
+from cctld.ble import BleManager
+from cctld.ble.cache import ClientCache
+from cctld.ble.scanner import PresenceScanner
+from cctld.ble.errors import BLENotReachableError
+
+
+class FakeClient:
+    """A fake ``CoachbotBLEClient`` which records the adapters in use and the
+    connections made."""
+    active = set()
+    max_active = 0
+    failing = set()
+    failing_adapters = set()
+    connected = []
+    attempts = {}
+
+    def __init__(self, address, **kwargs) -> None:
+        self.address = address
+        self.adapter = kwargs['adapter']
+        self.is_connected = False
+
+    async def __aenter__(self):
+        await self._use_adapter()
+        FakeClient.attempts[self.adapter] = \
+            FakeClient.attempts.get(self.adapter, 0) + 1
+        if self.address in FakeClient.failing or \
+                self.adapter in FakeClient.failing_adapters:
+            raise BleakError('Unreachable.')
+        self.is_connected = True
+        FakeClient.connected.append(self)
+        return self
+
+    async def __aexit__(self, *_):
+        self.is_connected = False
+        FakeClient.connected.remove(self)
+
+    async def _use_adapter(self):
+        assert self.adapter not in FakeClient.active
+        FakeClient.active.add(self.adapter)
+        FakeClient.max_active = max(FakeClient.max_active,
+                                    len(FakeClient.active))
+        await asyncio.sleep(0.01)
+        FakeClient.active.discard(self.adapter)
+
+    async def boot(self, _):
+        await asyncio.sleep(0)
+
+
+class TestBleManager(unittest.TestCase):
+    """TestCase for the BleManager class."""
+
+    def setUp(self) -> None:
+        logging.disable(logging.WARNING)
+        FakeClient.active = set()
+        FakeClient.max_active = 0
+        FakeClient.failing = set()
+        FakeClient.failing_adapters = set()
+        FakeClient.connected = []
+        FakeClient.attempts = {}
+        self.bots = [Coachbot.stateless(i) for i in range(8)]
+
+    def tearDown(self) -> None:
+        logging.disable(logging.NOTSET)
+
+    def boot(self, interfaces, rounds=1, **kwargs):
+        manager = BleManager(interfaces, client_factory=FakeClient,
+                             max_retries=2, backoff=0.001, **kwargs)
+
+        async def collect():
+            results = []
+            for _ in range(rounds):
+                results = [result
+                           async for result in manager.boot(self.bots, True)]
+            return results
+
+        return asyncio.run(collect())
+
+    def test_uses_every_interface(self):
+        """Tests that every interface boots bots at the same time."""
+        results = self.boot([0, 1, 2, 3])
+        self.assertEqual(FakeClient.max_active, 4)
+        self.assertCountEqual([bot.identifier for bot, _ in results],
+                              range(8))
+        self.assertTrue(all(error is None for _, error in results))
+
+    def test_reports_unreachable_bots(self):
+        """Tests that bots are retried and then reported as unreachable,
+        without holding back the rest."""
+        FakeClient.failing = {self.bots[2].bluetooth_mac_address}
+        results = self.boot([0, 1])
+        errors = {bot.identifier: error for bot, error in results}
+        self.assertEqual(len(errors), 8)
+        self.assertIsInstance(errors.pop(2), BLENotReachableError)
+        self.assertTrue(all(error is None for error in errors.values()))
+        self.assertEqual(results[-1][0].identifier, 2)
+
+    def test_reuses_connections(self):
+        """Tests that booting the same bots again reuses their
+        connections."""
+        self.boot([0, 1], rounds=3)
+        self.assertEqual(len(FakeClient.connected), 8)
+        self.assertCountEqual(
+            [client.address for client in FakeClient.connected],
+            [bot.bluetooth_mac_address for bot in self.bots])
+
+    def test_cache_is_bounded(self):
+        """Tests that only ``cache_size`` connections are kept per
+        adapter."""
+        self.boot([0, 1], cache_size=2)
+        self.assertEqual(len(FakeClient.connected), 4)
+        self.boot([0, 1], cache_size=0)
+        self.assertEqual(len(FakeClient.connected), 4)
+
+    def test_idle_connections_are_closed(self):
+        """Tests that connections unused for ``idle_timeout`` are closed."""
+        manager = BleManager([0], client_factory=FakeClient,
+                             idle_timeout=0.05)
+
+        async def run():
+            async for _ in manager.boot(self.bots[:2], True):
+                pass
+            self.assertEqual(len(FakeClient.connected), 2)
+            await asyncio.sleep(0.2)
+
+        asyncio.run(run())
+        self.assertEqual(len(FakeClient.connected), 0)
+
+    def test_skips_absent_bots(self):
+        """Tests that bots known not to be advertising are not connected
+        to."""
+        presence = PresenceScanner(0, stale_after=0)
+        presence._scanning_since = 0
+        results = self.boot([0], presence=presence)
+        self.assertTrue(all(isinstance(error, BLENotReachableError)
+                            for _, error in results))
+        self.assertEqual(FakeClient.max_active, 0)
+
+    def test_avoids_failing_interface(self):
+        """Tests that a failing interface is quarantined and the bots are
+        booted through the other ones."""
+        FakeClient.failing_adapters = {'hci0'}
+        results = self.boot([0, 1], cache_size=0)
+        self.assertTrue(all(error is None for _, error in results))
+        self.assertEqual(FakeClient.attempts['hci0'], 3)
+
+
+class TestClientCache(unittest.TestCase):
+    """TestCase for the ClientCache class."""
+
+    def test_lru(self):
+        """Tests that the least recently used client is evicted first."""
+        cache = ClientCache(2, 60)
+        self.assertEqual(cache.put(0, 'a', 'A'), [])
+        self.assertEqual(cache.put(0, 'b', 'B'), [])
+        self.assertEqual(cache.put(0, 'a', 'A'), [])
+        self.assertEqual(cache.put(0, 'c', 'C'), ['B'])
+        self.assertEqual(cache.put(1, 'd', 'D'), [])
+        self.assertEqual(len(cache), 3)
+
+    def test_take(self):
+        """Tests that clients are only taken from their own adapter."""
+        cache = ClientCache(2, 60)
+        cache.put(0, 'a', 'A')
+        self.assertEqual(cache.adapter_of('a'), 0)
+        self.assertIsNone(cache.take(1, 'a'))
+        self.assertEqual(cache.take_elsewhere(1, 'a'), ['A'])
+        self.assertIsNone(cache.adapter_of('a'))
+
+    def test_take_idle(self):
+        """Tests that only idle clients are taken."""
+        cache = ClientCache(2, 10)
+        cache.put(0, 'a', 'A')
+        self.assertEqual(cache.take_idle(), [])
+        self.assertEqual(cache.take_idle(time.monotonic() + 10), ['A'])
+        self.assertEqual(len(cache), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
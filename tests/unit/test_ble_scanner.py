@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Holds the PresenceScanner unit test cases."""
+
+import asyncio
+import json
+import unittest
+import os
+import sys
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.abspath('./src'))
+
+from cctl.models import Inventory, InventoryEntry
+from cctl.protocols import ble, ipc
+from cctld import requests
+from cctld.ble.scanner import PresenceScanner
+from cctld.requests.handler import get as get_handler
+
+
+UART = '6e400001-b5a3-f393-e0a9-e50e24dcca9e'
+
+
+def advertise(scanner, address, rssi=-60, uuids=(UART,), name=None):
+    """Feeds an advertisement to the scanner."""
+    scanner.on_advertisement(
+        SimpleNamespace(address=address),
+        SimpleNamespace(local_name=name, service_uuids=list(uuids),
+                        rssi=rssi))
+
+
+class FakeScanner:
+    """A fake ``BleakScanner`` which advertises a single board."""
+    def __init__(self, detection_callback, adapter) -> None:
+        self.callback = detection_callback
+        self.adapter = adapter
+
+    async def __aenter__(self):
+        self.callback(SimpleNamespace(address='AA:AA:AA:AA:AA:AA'),
+                      SimpleNamespace(local_name='Adafruit Bluefruit LE',
+                                      service_uuids=[], rssi=-50))
+        return self
+
+    async def __aexit__(self, *_):
+        pass
+
+
+class TestPresenceScanner(unittest.TestCase):
+    """TestCase for the PresenceScanner class."""
+
+    def setUp(self) -> None:
+        self.scanner = PresenceScanner(0, stale_after=60)
+
+    def test_only_bluefruits(self):
+        """Tests that only Bluefruit boards are recorded."""
+        advertise(self.scanner, 'AA:AA:AA:AA:AA:AA')
+        advertise(self.scanner, 'BB:BB:BB:BB:BB:BB', uuids=(),
+                  name='Adafruit Bluefruit LE')
+        advertise(self.scanner, 'CC:CC:CC:CC:CC:CC', uuids=(), name='Phone')
+        self.assertEqual([s.mac_address for s in self.scanner.sightings()],
+                         ['aa:aa:aa:aa:aa:aa', 'bb:bb:bb:bb:bb:bb'])
+
+    def test_rssi_on_device(self):
+        """Tests that the RSSI is read from the device when the
+        advertisement does not carry it, as in bleak 0.14."""
+        self.scanner.on_advertisement(
+            SimpleNamespace(address='AA:AA:AA:AA:AA:AA', rssi=-70),
+            SimpleNamespace(local_name=None, service_uuids=[UART]))
+        self.assertEqual(-70, self.scanner.rssi('aa:aa:aa:aa:aa:aa'))
+
+    def test_present(self):
+        """Tests that absence is only reported once the scanner is warm."""
+        advertise(self.scanner, 'AA:AA:AA:AA:AA:AA')
+        self.assertTrue(self.scanner.present('aa:aa:aa:aa:aa:aa'))
+        self.assertIsNone(self.scanner.present('bb:bb:bb:bb:bb:bb'))
+        self.scanner.stale_after = 0
+        self.scanner._scanning_since = 0
+        self.assertFalse(self.scanner.present('aa:aa:aa:aa:aa:aa'))
+        self.assertFalse(self.scanner.present('bb:bb:bb:bb:bb:bb'))
+
+    def test_sightings_order(self):
+        """Tests that the strongest boards come first."""
+        advertise(self.scanner, 'AA:AA:AA:AA:AA:AA', rssi=-80)
+        advertise(self.scanner, 'BB:BB:BB:BB:BB:BB', rssi=-40)
+        self.assertEqual([s.rssi for s in self.scanner.sightings()],
+                         [-40, -80])
+
+    def test_run(self):
+        """Tests that running the scanner records advertisements."""
+        scanner = PresenceScanner(1, scanner_factory=FakeScanner)
+
+        async def run():
+            task = asyncio.create_task(scanner.run())
+            await asyncio.sleep(0.01)
+            self.assertIsNotNone(scanner._scanning_since)
+            task.cancel()
+
+        asyncio.run(run())
+        self.assertTrue(scanner.present('AA:AA:AA:AA:AA:AA'))
+        self.assertIsNone(scanner._scanning_since)
+
+    def test_presence_endpoint(self):
+        """Tests that sightings are matched to the inventory."""
+        advertise(self.scanner, 'E2:21:04:B6:49:CC', rssi=-40)
+        advertise(self.scanner, 'AA:AA:AA:AA:AA:AA', rssi=-80)
+        app_state = SimpleNamespace(
+            ble_manager=SimpleNamespace(presence=self.scanner),
+            inventory=Inventory([
+                InventoryEntry(5, '10.0.0.5', 'e2:21:04:b6:49:cc'),
+                InventoryEntry(6, '10.0.0.6')]))
+        handler, groups = get_handler('/bluetooth/presence', 'read')
+        response = asyncio.run(handler(
+            app_state, ipc.Request('read', '/bluetooth/presence'), groups))
+        self.assertEqual(response.result_code, ipc.ResultCode.OK)
+        sightings = [ble.Sighting.from_dict(sighting)
+                     for sighting in json.loads(response.body)]
+        self.assertEqual([s.identifier for s in sightings], [5, None])
+
+        app_state.ble_manager.presence = None
+        response = asyncio.run(handler(
+            app_state, ipc.Request('read', '/bluetooth/presence'), groups))
+        self.assertEqual(response.result_code, ipc.ResultCode.NOT_FOUND)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Holds the CCTLDClient unit test cases."""
+
+import asyncio
+import json
+import unittest
+import os
+import sys
+from unittest import mock
+
+import zmq
+import zmq.asyncio
+
+sys.path.insert(0, os.path.abspath('./src'))
+
+from cctl.api.cctld import CCTLDClient
+from cctl.protocols import ipc
+
+
+class TestCCTLDClient(unittest.TestCase):
+    """TestCase for the multiplexed CCTLDClient."""
+
+    ENDPOINT = 'inproc://test-cctld-client'
+
+    async def serve(self, ctx: zmq.asyncio.Context, n_requests: int) -> int:
+        """Answers ``n_requests`` requests of the most recent one first and
+        returns how many were in flight at once."""
+        sock = ctx.socket(zmq.ROUTER)
+        sock.bind(self.ENDPOINT)
+        try:
+            pending = [await sock.recv_multipart()
+                       for _ in range(n_requests)]
+            for *envelope, request_raw in reversed(pending):
+                request = ipc.Request.deserialize(request_raw.decode())
+                await sock.send_multipart(envelope + [ipc.Response(
+                    ipc.ResultCode.OK,
+                    json.dumps({'endpoint': request.endpoint})
+                ).serialize().encode()])
+            return len(pending)
+        finally:
+            sock.close(0)
+
+    def test_pipelines_requests(self):
+        """Concurrent requests share one connection and each call gets its
+        own response, even if the server answers out of order."""
+        # pylint: disable=protected-access
+        async def run():
+            client = CCTLDClient(self.ENDPOINT)
+            server = None
+            async with client:
+                # Both ends must share the context for inproc transports.
+                server = asyncio.create_task(self.serve(client._ctx, 20))
+                await asyncio.sleep(0)
+                responses = await asyncio.gather(*(
+                    client._request(ipc.Request('read', f'/bots/{i}/state'))
+                    for i in range(20)))
+            return await server, responses
+
+        in_flight, responses = asyncio.run(run())
+        self.assertEqual(20, in_flight)
+        self.assertEqual(
+            [f'/bots/{i}/state' for i in range(20)],
+            [json.loads(response.body)['endpoint']
+             for response in responses])
+
+    def test_fails_after_connection_error(self):
+        """Once responses cannot be received anymore, requests fail rather
+        than wait forever."""
+        # pylint: disable=protected-access
+        async def run():
+            errors = []
+            with mock.patch.object(zmq.asyncio.Socket, 'recv_multipart',
+                                   side_effect=zmq.ZMQError(zmq.ETERM)):
+                async with CCTLDClient(self.ENDPOINT) as client:
+                    await asyncio.sleep(0)
+                    for _ in range(2):
+                        try:
+                            await asyncio.wait_for(client._request(
+                                ipc.Request('read', '/bots')), 1)
+                        except zmq.ZMQError as err:
+                            errors.append(err.errno)
+            return errors
+
+        with self.assertLogs('cctld-api', 'ERROR'):
+            self.assertEqual([zmq.ETERM] * 2, asyncio.run(run()))
+
+    def test_requires_context(self):
+        """Requests outside of the context are refused."""
+        with self.assertRaises(ValueError):
+            asyncio.run(CCTLDClient(self.ENDPOINT).read_config())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Holds the CoachCommandPool unit test cases."""
+
+import asyncio
+import unittest
+import os
+import sys
+
+import zmq
+import zmq.asyncio
+
+sys.path.insert(0, os.path.abspath('./src'))
+
+from cctl.protocols import coach_command
+from cctld.coach_commands import CoachCommandError, CoachCommandPool
+from cctld.utils.rtt import RetryBudget
+
+
+class FakeBot:
+    """Mimics the command server of coach-os, answering every request with
+    200."""
+    def __init__(self, context: zmq.asyncio.Context, port: int = 0) -> None:
+        self.socket = context.socket(zmq.REP)
+        self.socket.setsockopt(zmq.LINGER, 0)
+        if port:
+            self.socket.bind(f'tcp://127.0.0.1:{port}')
+            self.port = port
+        else:
+            self.port = self.socket.bind_to_random_port('tcp://127.0.0.1')
+        self.requests = []
+        self.task = asyncio.create_task(self._serve())
+
+    async def _serve(self) -> None:
+        while True:
+            self.requests.append(await self.socket.recv_json())
+            await self.socket.send_json(
+                coach_command.Response(coach_command.StatusCode.OK).to_dict())
+
+    def close(self) -> None:
+        self.task.cancel()
+        self.socket.close()
+
+
+class TestCoachCommandPool(unittest.TestCase):
+    """TestCase for the CoachCommandPool class."""
+
+    def test_reuses_channel(self):
+        """Tests that every command to a bot goes through one channel."""
+        async def run():
+            context = zmq.asyncio.Context()
+            bot = FakeBot(context)
+            pool = CoachCommandPool(bot.port, timeout=1)
+            for color in ((255, 0, 0), (0, 255, 0)):
+                async with pool.command('127.0.0.1') as command:
+                    await command.set_led_color(color)
+            self.assertIs(pool.channel('127.0.0.1'),
+                          pool.channel('127.0.0.1'))
+            pool.close()
+            bot.close()
+            context.term()
+            return bot.requests
+
+        requests = asyncio.run(run())
+        self.assertEqual([r['body']['color'] for r in requests],
+                         [[255, 0, 0], [0, 255, 0]])
+
+    def test_correlates_out_of_order_replies(self):
+        """Tests that replies are matched to their requests by id."""
+        async def run():
+            context = zmq.asyncio.Context()
+            router = context.socket(zmq.ROUTER)
+            router.setsockopt(zmq.LINGER, 0)
+            port = router.bind_to_random_port('tcp://127.0.0.1')
+
+            async def serve():
+                received = [await router.recv_multipart() for _ in range(3)]
+                for identity, rid, delim, payload in reversed(received):
+                    status = 200 if b'"on"' in payload else 409
+                    await router.send_multipart([
+                        identity, rid, delim,
+                        b'{"status_code": %d}' % status])
+
+            server = asyncio.create_task(serve())
+            pool = CoachCommandPool(port, timeout=1)
+            channel = pool.channel('127.0.0.1')
+            responses = await asyncio.gather(*[
+                channel.request(coach_command.Request(
+                    'update', '/led', body={'value': value}).to_dict())
+                for value in ('on', 'off', 'on')
+            ])
+            await server
+            pool.close()
+            router.close()
+            context.term()
+            return [response.status_code for response in responses]
+
+        self.assertEqual(asyncio.run(run()), [200, 409, 200])
+
+    def test_samples_rtt(self):
+        """Tests that replies shrink the timeout of a fast bot."""
+        async def run():
+            context = zmq.asyncio.Context()
+            bot = FakeBot(context)
+            pool = CoachCommandPool(bot.port, timeout=1, min_timeout=0.05)
+            for _ in range(20):
+                async with pool.command('127.0.0.1') as command:
+                    await command.set_led_color((0, 0, 0))
+            rtt = pool.rtt('127.0.0.1')
+            pool.close()
+            bot.close()
+            context.term()
+            return rtt
+
+        rtt = asyncio.run(run())
+        self.assertEqual(rtt.samples, 20)
+        self.assertLess(rtt.timeout, 1)
+        self.assertIsNone(CoachCommandPool(1).rtt('127.0.0.1'))
+
+    def test_retry_budget(self):
+        """Tests that unreachable bots stop being retried once the retry
+        budget is spent."""
+        async def run():
+            pool = CoachCommandPool(1, timeout=0.05, max_retries=3,
+                                    max_timeout=0.05)
+            pool.budget = RetryBudget(ratio=0, reserve=2)
+
+            async def attempt(host):
+                try:
+                    async with pool.command(host) as command:
+                        await command.set_led_color((0, 0, 0))
+                except CoachCommandError:
+                    pass
+            await asyncio.gather(*[attempt(f'127.0.0.{i}')
+                                   for i in range(1, 5)])
+            timeouts = sum(pool.rtt(f'127.0.0.{i}').timeouts
+                           for i in range(1, 5))
+            pool.close()
+            return timeouts
+
+        # Four first attempts, and only two retries out of eight.
+        self.assertEqual(asyncio.run(run()), 6)
+
+    def test_unreachable(self):
+        """Tests that a bot which does not reply raises after the retries."""
+        async def run():
+            pool = CoachCommandPool(1, timeout=0.05, max_retries=2)
+            try:
+                async with pool.command('127.0.0.1') as command:
+                    await command.set_led_color((0, 0, 0))
+            finally:
+                pool.close()
+
+        with self.assertRaises(CoachCommandError):
+            asyncio.run(run())
+
+    def test_reconnects(self):
+        """Tests that the channel survives a restart of the bot."""
+        async def run():
+            context = zmq.asyncio.Context()
+            bot = FakeBot(context)
+            pool = CoachCommandPool(bot.port, timeout=0.5, max_retries=10,
+                                    heartbeat=0.1)
+            async with pool.command('127.0.0.1') as command:
+                await command.set_led_color((1, 1, 1))
+            bot.close()
+            await asyncio.sleep(0.1)
+            bot = FakeBot(context, bot.port)
+            async with pool.command('127.0.0.1') as command:
+                await command.set_led_color((2, 2, 2))
+            pool.close()
+            bot.close()
+            context.term()
+            return bot.requests
+
+        # A retried command may be delivered more than once.
+        requests = asyncio.run(run())
+        self.assertTrue(requests)
+        self.assertTrue(all(r['body']['color'] == [2, 2, 2]
+                            for r in requests))
+
+
+if __name__ == '__main__':
+    unittest.main()
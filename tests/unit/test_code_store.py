@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Holds the CodeStore unit test cases."""
+
+import base64
+import unittest
+import os
+import sys
+import zlib
+
+sys.path.insert(0, os.path.abspath('./src'))
+
+from cctl.models import CoachbotState, UserCodeState
+from cctl.models.coachbot import user_code_hash
+from cctld.code_store import CodeStore
+
+
+class TestCodeStore(unittest.TestCase):
+    """TestCase for the CodeStore class."""
+
+    def setUp(self) -> None:
+        self.store = CodeStore(capacity=2)
+
+    def test_put_get(self):
+        """Tests that user code is addressed by its content hash."""
+        code_hash = self.store.put('print("a")')
+        self.assertEqual(code_hash, user_code_hash('print("a")'))
+        self.assertEqual(self.store.put('print("a")'), code_hash)
+        self.assertIn(code_hash, self.store)
+        self.assertEqual(self.store.get(code_hash), 'print("a")')
+        self.assertIsNone(self.store.get(user_code_hash('other')))
+
+    def test_evicts_least_recently_used(self):
+        """Tests that the least recently used user code is dropped."""
+        first = self.store.put('a')
+        second = self.store.put('b')
+        self.store.put('a')
+        self.store.put('c')
+        self.assertEqual(len(self.store), 2)
+        self.assertIn(first, self.store)
+        self.assertNotIn(second, self.store)
+        self.assertIsNone(self.store.compressed(second))
+
+    def test_compressed(self):
+        """Tests that the compressed user code decompresses to the code."""
+        code = 'for i in range(10):\n    print(i)\n' * 50
+        compressed = self.store.compressed(self.store.put(code))
+        self.assertLess(len(compressed), len(code))
+        self.assertEqual(zlib.decompress(base64.b64decode(compressed))
+                         .decode('utf-8'), code)
+
+    def test_strip(self):
+        """Tests that stripped states hold the hash rather than the code."""
+        state = CoachbotState(True, user_code_state=UserCodeState(
+            is_running=True, user_code='pass'))
+        stripped = self.store.strip(state)
+        self.assertIsNone(stripped.user_code_state.user_code)
+        self.assertTrue(stripped.user_code_state.is_running)
+        self.assertEqual(self.store.get(
+            stripped.user_code_state.user_code_hash), 'pass')
+        self.assertIs(self.store.strip(stripped), stripped)
+
+    def test_strip_reported_hash(self):
+        """Tests that hashes reported without the code are normalized, or
+        dropped if malformed."""
+        code_hash = user_code_hash('pass')
+        for reported, expected in ((code_hash.upper(), code_hash),
+                                   ('abcd', None), ('z' * 64, None)):
+            stripped = self.store.strip(CoachbotState(
+                True, user_code_state=UserCodeState(user_code_hash=reported)))
+            self.assertEqual(expected,
+                             stripped.user_code_state.user_code_hash)
+
+
+if __name__ == '__main__':
+    unittest.main()
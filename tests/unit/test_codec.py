@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Holds the binary codec unit test cases."""
+
+import unittest
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath('./src'))
+
+from cctl.models import CoachbotState, Signal, UserCodeState
+from cctl.models.coachbot import user_code_hash
+from cctl.protocols import codec, feed, status
+from cctl.utils.math import Vec2
+
+
+class TestCodec(unittest.TestCase):
+    """TestCase for the cctl.protocols.codec module."""
+
+    def setUp(self) -> None:
+        self.state = CoachbotState(
+            is_on=True, os_version='1.3.0', bat_voltage=3.91,
+            position=Vec2(0.25, -1.5), theta=1.2,
+            user_code_state=UserCodeState(
+                is_running=False, name='Hello, wörld', user_code='pass'))
+
+    def test_state_round_trip(self):
+        """Tests whether fully and sparsely populated states survive."""
+        for state in (self.state, CoachbotState(), CoachbotState(False)):
+            for encoding in codec.ENCODINGS:
+                self.assertEqual(state, codec.loads(
+                    codec.dumps(state, encoding), CoachbotState))
+
+    def test_messages_round_trip(self):
+        """Tests whether every supported message type survives."""
+        messages = (
+            UserCodeState(is_running=True, version='2'),
+            Signal('measure', {'value': [1, 2]}),
+            status.Request(7, 'state', self.state),
+            status.Request(7, 'signal', Signal('ping', {})),
+            feed.StateFeedMessage(3, feed.KIND_DELTA,
+                                  {4: self.state, 99: CoachbotState()}, 2),
+        )
+        for message in messages:
+            self.assertEqual(message, codec.loads(codec.dumps(message),
+                                                  type(message)))
+
+    def test_user_code_hash(self):
+        """Tests that the user code hash survives as 32 raw bytes and that
+        version 1 messages, which never hold it, still decode."""
+        code_hash = user_code_hash('pass')
+        state = CoachbotState(True, user_code_state=UserCodeState(
+            is_running=True, user_code_hash=code_hash))
+        for encoding in codec.ENCODINGS:
+            self.assertEqual(state, codec.loads(
+                codec.dumps(state, encoding), CoachbotState))
+        self.assertEqual(len(codec.dumps(state)),
+                         len(codec.dumps(CoachbotState(
+                             True, user_code_state=UserCodeState(
+                                 is_running=True)))) + 32)
+        legacy = codec.dumps(self.state)
+        self.assertEqual(self.state, codec.loads(
+            bytes([0x80 | 1]) + legacy[1:], CoachbotState))
+
+    def test_rejects_malformed_user_code_hash(self):
+        """States holding a hash which is not 32 bytes of hex must not be
+        encoded, since they would corrupt the whole message."""
+        for code_hash in ('abcd', 'z' * 64, user_code_hash('pass') + '00'):
+            state = CoachbotState(True, user_code_state=UserCodeState(
+                user_code_hash=code_hash))
+            with self.assertRaises(codec.CodecError):
+                codec.dumps(state)
+            with self.assertRaises(codec.CodecError):
+                codec.dumps({0: CoachbotState(False), 1: state})
+
+    def test_sniffs_encoding(self):
+        """Binary messages must never be mistaken for JSON and vice versa."""
+        self.assertTrue(codec.is_binary(codec.dumps(self.state)))
+        self.assertFalse(codec.is_binary(codec.dumps(self.state, 'json')))
+        self.assertEqual(self.state, codec.loads_text(
+            codec.dumps_text(self.state), CoachbotState))
+        self.assertEqual(self.state, codec.loads_text(
+            self.state.serialize(), CoachbotState))
+
+    def test_rejects_malformed(self):
+        """Truncated, mistyped and future-version messages must raise."""
+        data = codec.dumps(self.state)
+        with self.assertRaises(codec.CodecError):
+            codec.loads(data[:-1], CoachbotState)
+        with self.assertRaises(codec.CodecError):
+            codec.loads(data, Signal)
+        with self.assertRaises(codec.CodecError):
+            codec.loads(bytes([data[0] + 1]) + data[1:], CoachbotState)
+
+
+if __name__ == '__main__':
+    unittest.main()
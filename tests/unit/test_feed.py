@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Holds the state feed protocol unit test cases."""
+
+import unittest
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath('./src'))
+
+from cctl.models import CoachbotState, UserCodeState
+from cctl.protocols import feed
+
+
+class TestStateFeedReassembler(unittest.TestCase):
+    """TestCase for the StateFeedReassembler class."""
+
+    def setUp(self) -> None:
+        self.reassembler = feed.StateFeedReassembler()
+        self.keyframe = feed.StateFeedMessage(
+            10, feed.KIND_KEYFRAME,
+            {i: CoachbotState(False) for i in range(3)})
+
+    def test_ignores_deltas_before_keyframe(self):
+        """Deltas are meaningless without a keyframe to apply them to."""
+        self.assertFalse(self.reassembler.apply(feed.StateFeedMessage(
+            1, feed.KIND_DELTA, {0: CoachbotState(True)})))
+        self.assertFalse(self.reassembler.synchronized)
+
+    def test_applies_consecutive_deltas(self):
+        """Tests whether deltas following a keyframe are merged in."""
+        self.reassembler.apply(self.keyframe)
+        self.assertTrue(self.reassembler.apply(feed.StateFeedMessage(
+            11, feed.KIND_DELTA, {1: CoachbotState(True)})))
+        self.assertEqual([False, True, False],
+                         [s.is_on for s in self.reassembler.value])
+        self.assertEqual(11, self.reassembler.seq)
+
+    def test_skips_deltas_covered_by_snapshot(self):
+        """Deltas older than the snapshot must not overwrite it."""
+        self.reassembler.apply(self.keyframe)
+        self.assertFalse(self.reassembler.apply(feed.StateFeedMessage(
+            9, feed.KIND_DELTA, {1: CoachbotState(True)})))
+        self.assertFalse(self.reassembler.states[1].is_on)
+
+    def test_raises_on_gap(self):
+        """A missed delta must desynchronize the reassembler."""
+        self.reassembler.apply(self.keyframe)
+        with self.assertRaises(feed.StateFeedGapError):
+            self.reassembler.apply(feed.StateFeedMessage(
+                13, feed.KIND_DELTA, {1: CoachbotState(True)}))
+        self.assertFalse(self.reassembler.synchronized)
+
+    def test_serialization_round_trip(self):
+        """Tests whether messages survive serialization."""
+        message = feed.StateFeedMessage(
+            3, feed.KIND_DELTA, {42: CoachbotState(True, bat_voltage=3.9)})
+        self.assertEqual(
+            message,
+            feed.StateFeedMessage.deserialize(message.serialize()))
+
+
+class TestPartialStateFeedReassembler(unittest.TestCase):
+    """TestCase for a StateFeedReassembler fed from per-bot topics."""
+
+    def setUp(self) -> None:
+        self.reassembler = feed.StateFeedReassembler({1, 2})
+
+    def test_filters_snapshot(self):
+        """Only the tracked bots are kept from a snapshot."""
+        self.reassembler.apply(feed.StateFeedMessage(
+            10, feed.KIND_KEYFRAME,
+            {i: CoachbotState(False) for i in range(4)}))
+        self.assertEqual({1, 2}, set(self.reassembler.states))
+
+    def test_tolerates_gaps(self):
+        """Per-bot topics skip sequence numbers, which is not an error."""
+        self.reassembler.apply(feed.StateFeedMessage(
+            10, feed.KIND_DELTA, {1: CoachbotState(False)}))
+        self.assertTrue(self.reassembler.apply(feed.StateFeedMessage(
+            15, feed.KIND_DELTA, {1: CoachbotState(True)})))
+        self.assertTrue(self.reassembler.states[1].is_on)
+
+    def test_skips_stale_messages(self):
+        """An older keyframe must not overwrite a newer delta."""
+        self.reassembler.apply(feed.StateFeedMessage(
+            12, feed.KIND_DELTA, {2: CoachbotState(True)}))
+        self.assertFalse(self.reassembler.apply(feed.StateFeedMessage(
+            11, feed.KIND_KEYFRAME, {2: CoachbotState(False)})))
+        self.assertTrue(self.reassembler.states[2].is_on)
+
+
+class TestTopics(unittest.TestCase):
+    """TestCase for the feed topic helpers."""
+
+    def test_bot_topics_do_not_prefix_each_other(self):
+        """Subscribing to bot 1 must not deliver bot 17."""
+        self.assertFalse(feed.bot_topic(17).startswith(feed.bot_topic(1)))
+        self.assertTrue(feed.bot_topic(1).startswith(feed.TOPIC_BOT))
+
+    def test_signal_name_round_trip(self):
+        """Tests whether signal names can be recovered from their topic."""
+        self.assertEqual('led-on',
+                         feed.signal_name(feed.signal_topic('led-on')))
+
+    def test_signal_topic_prefix(self):
+        """Patterns subscribe to the literal prefix before any wildcard."""
+        self.assertEqual(b'signal/ping/', feed.signal_topic_prefix('ping'))
+        self.assertEqual(b'signal/led-', feed.signal_topic_prefix('led-*'))
+        self.assertEqual(b'signal/', feed.signal_topic_prefix('[ab]*'))
+
+
+class TestViews(unittest.TestCase):
+    """TestCase for the field projection helpers."""
+
+    def test_view_topic_is_canonical(self):
+        """Every set of fields maps onto a single topic."""
+        topic = feed.view_topic(['bat_voltage', 'is_on', 'is_on'])
+        self.assertEqual(b'view/is_on,bat_voltage/', topic)
+        self.assertEqual(('is_on', 'bat_voltage'), feed.view_fields(topic))
+        with self.assertRaises(ValueError):
+            feed.view_fields(b'view/bat_voltage,is_on/')
+
+    def test_rejects_unknown_fields(self):
+        """Unknown and missing fields are rejected."""
+        for fields in (['is_on', 'user_code'], []):
+            with self.assertRaises(ValueError):
+                feed.parse_fields(fields)
+
+    def test_project(self):
+        """Only the requested fields are kept."""
+        state = CoachbotState(True, '1.0', 3.9, None, 0.5, UserCodeState(
+            True, name='demo', user_code='pass', user_code_hash='ab'))
+        projected = feed.project(state, ('bat_voltage', 'user_code_hash'))
+        self.assertEqual(CoachbotState(bat_voltage=3.9, user_code_state=(
+            UserCodeState(user_code_hash='ab'))), projected)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Holds the fleet state store unit test cases."""
+
+import unittest
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath('./src'))
+
+from cctl.models import CoachbotState, UserCodeState
+from cctl.utils.math import Vec2
+from cctld.fleet import FleetStateStore, UnknownBotError
+
+
+class TestFleetStateStore(unittest.TestCase):
+    """TestCase for the FleetStateStore class."""
+
+    def setUp(self) -> None:
+        self.store = FleetStateStore(range(10), CoachbotState(False))
+        self.state = CoachbotState(
+            is_on=True, os_version='1.3.0', bat_voltage=3.9,
+            position=Vec2(0.5, -0.25), theta=1.0,
+            user_code_state=UserCodeState(is_running=True, name='demo'))
+
+    def test_round_trip(self):
+        """Tests whether stored states are materialized unchanged."""
+        self.store.update(3, self.state)
+        self.store.update(4, CoachbotState())
+        self.assertEqual(self.state, self.store[3])
+        self.assertEqual(CoachbotState(), self.store[4])
+        self.assertEqual(CoachbotState(False), self.store[5])
+
+    def test_dirty_tracking(self):
+        """Only bots updated since the last take_dirty are reported."""
+        self.assertEqual([], list(self.store.take_dirty()))
+        self.store.update(7, self.state)
+        self.store.update(2, self.state)
+        self.store.update(7, self.state)
+        self.assertEqual([2, 7], list(self.store.take_dirty()))
+        self.assertEqual([], list(self.store.take_dirty()))
+
+    def test_vectorized_queries(self):
+        """Tests whether column queries reflect updates without copying."""
+        positions = self.store.positions
+        self.store.update(1, self.state)
+        self.store.update(6, self.state)
+        self.assertEqual([1, 6], list(self.store.ids_on()))
+        np.testing.assert_array_equal([0.5, -0.25], positions[6])
+        self.assertTrue(np.isnan(self.store.column('bat_voltage')[0]))
+        with self.assertRaises(ValueError):
+            self.store.column('theta')[0] = 1.0
+
+    def test_non_contiguous_identifiers(self):
+        """Tests whether sparse identifiers are mapped onto rows."""
+        store = FleetStateStore([1500, 7, 300], CoachbotState(False))
+        store.update(1500, self.state)
+        self.assertEqual([7, 300, 1500], list(store))
+        self.assertEqual([1500], list(store.ids_on()))
+        self.assertEqual([1500], list(store.take_dirty()))
+        self.assertEqual(self.state, store[1500])
+        self.assertIsNone(store.get(8))
+        with self.assertRaises(UnknownBotError):
+            store.update(8, self.state)
+
+    def test_compacts_strings(self):
+        """Replaced strings must not accumulate in the string table."""
+        for i in range(1000):
+            self.store.update(0, CoachbotState(
+                True, user_code_state=UserCodeState(user_code=str(i))))
+        self.store.update(1, self.state)
+        self.assertLess(len(self.store._strings), 300)
+        self.assertEqual('999', self.store[0].user_code_state.user_code)
+        self.assertEqual(self.state, self.store[1])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Holds the fleet command protocol and FleetCommandChannel unit test
+cases."""
+
+import asyncio
+import socket
+import unittest
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath('./src'))
+
+from cctl.protocols import coach_command
+from cctl.protocols.fleet_command import FleetAck, FleetCommand, \
+    FleetCommandError
+from cctld.fleet_commands import FleetCommandChannel
+
+
+KEY = b'secret'
+START = coach_command.Request('create', '/user-code/running')
+
+
+class TestFleetCommandProtocol(unittest.TestCase):
+    """TestCase for the FleetCommand and FleetAck datagrams."""
+
+    def test_command_round_trip(self):
+        """Tests that a command survives encoding."""
+        command = FleetCommand(2 ** 40 + 3, START, [1, 5])
+        decoded = FleetCommand.decode(command.encode(KEY), KEY)
+        self.assertEqual(decoded, command)
+        self.assertTrue(decoded.targets_bot(5))
+        self.assertFalse(decoded.targets_bot(2))
+        self.assertTrue(FleetCommand(1, START).targets_bot(2))
+
+    def test_ack_round_trip(self):
+        """Tests that an acknowledgement survives encoding."""
+        ack = FleetAck(17, 99, coach_command.StatusCode.OK)
+        self.assertEqual(FleetAck.decode(ack.encode(KEY), KEY), ack)
+
+    def test_rejects_forgeries(self):
+        """Tests that datagrams signed with another key, tampered with or
+        truncated are rejected."""
+        datagram = FleetCommand(1, START, [1]).encode(KEY)
+        tampered = datagram.replace(b'create', b'delete')
+        for bad in (FleetCommand(1, START, [1]).encode(b'other'), tampered,
+                    datagram[:20], FleetAck(1, 1, 200).encode(KEY)):
+            with self.assertRaises(FleetCommandError):
+                FleetCommand.decode(bad, KEY)
+
+
+class FakeFleet:
+    """Mimics the fleet command listener of many bots on one socket,
+    acknowledging every command for the bots in ``acking``."""
+    def __init__(self, acking) -> None:
+        self.acking = acking
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.bind(('127.0.0.1', 0))
+        self.sock.setblocking(False)
+        self.port = self.sock.getsockname()[1]
+        self.received = []
+        self.task = asyncio.create_task(self._serve())
+
+    async def _serve(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            data, addr = await loop.sock_recvfrom(self.sock, 4096)
+            command = FleetCommand.decode(data, KEY)
+            self.received.append(command)
+            for ident in self.acking:
+                if command.targets_bot(ident):
+                    self.sock.sendto(FleetAck(
+                        command.seq, ident,
+                        coach_command.StatusCode.OK).encode(KEY), addr)
+
+    def close(self) -> None:
+        self.task.cancel()
+        self.sock.close()
+
+
+class TestFleetCommandChannel(unittest.TestCase):
+    """TestCase for the FleetCommandChannel class."""
+
+    def run_fleet(self, acking, targets, repeats=3):
+        async def run():
+            fleet = FakeFleet(acking)
+            channel = FleetCommandChannel('127.0.0.1', fleet.port, KEY,
+                                          repeats=repeats, ack_timeout=0.1)
+            first = await channel.send(START, targets)
+            second = await channel.send(START, targets)
+            channel.close()
+            fleet.close()
+            return first, second, fleet.received
+
+        return asyncio.run(run())
+
+    def test_collects_acks(self):
+        """Tests that the acknowledgements of the targeted bots are
+        collected and the missing bots left out."""
+        acks, _, received = self.run_fleet([1, 2, 3], [1, 2, 4])
+        self.assertEqual(acks, {1: 200, 2: 200})
+        self.assertEqual(len(received), 6)
+
+    def test_stops_repeating(self):
+        """Tests that a command acknowledged by every bot is not repeated."""
+        first, second, received = self.run_fleet([1, 2], [1, 2], repeats=5)
+        self.assertEqual(first, {1: 200, 2: 200})
+        self.assertLess(len(received), 10)
+        self.assertGreater(received[-1].seq, received[0].seq)
+        self.assertEqual(second, first)
+
+    def test_no_targets(self):
+        """Tests that nothing is sent without targets."""
+        self.assertEqual(self.run_fleet([1], [])[2], [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Holds the status ingest unit test cases."""
+
+import asyncio
+import unittest
+import os
+import sys
+from types import SimpleNamespace
+
+import zmq
+import zmq.asyncio
+from reactivex.subject import Subject
+
+sys.path.insert(0, os.path.abspath('./src'))
+
+from cctl.models import CoachbotState, Signal
+from cctl.protocols import status
+from cctld import ingest
+from cctld.fleet import FleetStateStore
+from cctld.servers import _handle_status_batch
+
+MALFORMED = b'{"not": "a status"}'
+
+
+def report(ident: int, state: CoachbotState = CoachbotState(True)) -> bytes:
+    """Returns the status report of a bot."""
+    return status.Request(ident, 'state', state).serialize().encode('utf-8')
+
+
+def status_code(reply: bytes) -> int:
+    """Returns the status code of an acknowledgement."""
+    return status.Response.deserialize(reply.decode('utf-8')).status_code
+
+
+class TestIngest(unittest.TestCase):
+    """TestCase for the cctld.ingest loops."""
+
+    ADDRESS = 'inproc://cctld-test-ingest'
+
+    def setUp(self) -> None:
+        self.batches = []
+
+    def serve(self, server_type: int, serve, clients, max_batch=None):
+        """Runs ``serve`` on a bound socket while ``clients`` is awaited with
+        a function creating connected sockets."""
+        async def run():
+            context = zmq.asyncio.Context()
+            sockets = []
+
+            def connect(sock_type: int) -> zmq.asyncio.Socket:
+                sock = context.socket(sock_type)
+                sock.setsockopt(zmq.LINGER, 0)
+                sock.connect(self.ADDRESS)
+                sockets.append(sock)
+                return sock
+
+            server_sock = context.socket(server_type)
+            server_sock.setsockopt(zmq.LINGER, 0)
+            server_sock.bind(self.ADDRESS)
+            kwargs = {} if max_batch is None else {'max_batch': max_batch}
+            server = asyncio.create_task(
+                serve(server_sock, self.batches.append, **kwargs))
+            try:
+                return await asyncio.wait_for(clients(connect), 5)
+            finally:
+                server.cancel()
+                await asyncio.gather(server, return_exceptions=True)
+                for sock in sockets + [server_sock]:
+                    sock.close()
+                context.term()
+
+        return asyncio.run(run())
+
+    def test_router_acknowledges_every_peer(self):
+        """REQ and DEALER peers each receive their own acknowledgement."""
+        async def clients(connect):
+            req, dealer, bad_dealer = (connect(zmq.REQ), connect(zmq.DEALER),
+                                       connect(zmq.DEALER))
+            await req.send(report(1))
+            await dealer.send(report(2))
+            await bad_dealer.send(MALFORMED)
+            return [status_code((await sock.recv_multipart())[-1])
+                    for sock in (req, dealer, bad_dealer)]
+
+        codes = self.serve(zmq.ROUTER, ingest.serve_router, clients)
+        self.assertEqual([status.StatusCode.OK, status.StatusCode.OK,
+                          status.StatusCode.BAD_REQUEST], codes)
+        self.assertEqual([1, 2], sorted(request.identifier
+                                        for batch in self.batches
+                                        for request in batch))
+
+    def test_rep_rejects_malformed(self):
+        """Malformed reports are answered with BAD_REQUEST."""
+        async def clients(connect):
+            req = connect(zmq.REQ)
+            codes = []
+            for payload in (MALFORMED, report(3)):
+                await req.send(payload)
+                codes.append(status_code(await req.recv()))
+            return codes
+
+        codes = self.serve(zmq.REP, ingest.serve_rep, clients)
+        self.assertEqual([status.StatusCode.BAD_REQUEST,
+                          status.StatusCode.OK], codes)
+        self.assertEqual([[3]], [[request.identifier for request in batch]
+                                 for batch in self.batches])
+
+    def test_pull_drops_malformed(self):
+        """Malformed reports are dropped and batches hold at most
+        ``max_batch`` reports."""
+        async def clients(connect):
+            push = connect(zmq.PUSH)
+            await push.send(MALFORMED)
+            for ident in range(5):
+                await push.send(report(ident))
+            while sum(len(batch) for batch in self.batches) < 5:
+                await asyncio.sleep(0.01)
+
+        self.serve(zmq.PULL, ingest.serve_pull, clients, max_batch=2)
+        self.assertEqual(list(range(5)), [request.identifier
+                                          for batch in self.batches
+                                          for request in batch])
+        self.assertTrue(all(0 < len(batch) <= 2 for batch in self.batches))
+
+    def test_recv_batch(self):
+        """Queued messages are drained up to ``max_batch`` at once."""
+        async def run():
+            context = zmq.asyncio.Context()
+            pull, push = context.socket(zmq.PULL), context.socket(zmq.PUSH)
+            pull.bind(self.ADDRESS)
+            push.connect(self.ADDRESS)
+            try:
+                for ident in range(5):
+                    await push.send(report(ident))
+                await pull.poll()
+                return [len(await ingest.recv_batch(pull, 3))
+                        for _ in range(2)]
+            finally:
+                push.close(0)
+                pull.close(0)
+                context.term()
+
+        self.assertEqual([3, 2], asyncio.run(run()))
+
+
+class TestHandleStatusBatch(unittest.TestCase):
+    """TestCase for the handling of ingested status batches."""
+
+    def test_keeps_latest_state(self):
+        """Only the latest state of every bot within a batch is applied, and
+        signals are forwarded in order."""
+        updates = []
+        signals = []
+        heard = []
+        states = FleetStateStore(range(2), CoachbotState(False))
+
+        def update(ident, state):
+            states.update(ident, state)
+            updates.append(ident)
+
+        app_state = SimpleNamespace(
+            coachbot_states=SimpleNamespace(update=update),
+            coachbot_signals=Subject(),
+            liveness=SimpleNamespace(heard=heard.append))
+        app_state.coachbot_signals.subscribe(on_next=signals.append)
+        _handle_status_batch(app_state, [
+            status.Request(0, 'state', CoachbotState(True)),
+            status.Request(1, 'signal', Signal('a', {})),
+            status.Request(1, 'state', CoachbotState(True)),
+            status.Request(0, 'state', CoachbotState(False, bat_voltage=3.5)),
+            status.Request(7, 'state', CoachbotState(True)),
+        ])
+        self.assertEqual([0, 1], updates)
+        self.assertEqual([0, 1], heard)
+        self.assertEqual(3.5, states[0].bat_voltage)
+        self.assertEqual([Signal('a', {})], signals)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Holds the inventory unit test cases."""
+
+import unittest
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.abspath('./src'))
+
+from cctl.models import Coachbot, Inventory, InventoryEntry
+from cctl.models import inventory
+
+
+class TestInventory(unittest.TestCase):
+    """TestCase for the Inventory class."""
+
+    def _load(self, contents: str) -> Inventory:
+        with tempfile.NamedTemporaryFile('w', suffix='.csv',
+                                         delete=False) as inventory_f:
+            inventory_f.write(contents)
+        self.addCleanup(os.remove, inventory_f.name)
+        return Inventory.load(inventory_f.name)
+
+    def test_load(self):
+        """Tests whether sparse identifiers are loaded and sorted."""
+        loaded = self._load('# identifier,ip_address,mac_address\n'
+                            '250, 10.0.2.3, d1:0b:5c:94:90:6b\n'
+                            '\n'
+                            '3,10.0.0.6\n')
+        self.assertEqual((3, 250), loaded.identifiers)
+        self.assertEqual('10.0.2.3', loaded.ip_address(250))
+        self.assertEqual('d1:0b:5c:94:90:6b', loaded.mac_address(250))
+        with self.assertRaises(KeyError):
+            loaded.mac_address(3)
+        self.assertNotIn(4, loaded)
+
+    def test_rejects_malformed(self):
+        """Duplicate identifiers and malformed lines must be refused."""
+        with self.assertRaises(ValueError):
+            self._load('1,10.0.0.1\n1,10.0.0.2\n')
+        with self.assertRaises(ValueError):
+            self._load('one,10.0.0.1\n')
+
+    def test_serialization_round_trip(self):
+        """Tests whether the inventory survives serialization."""
+        original = Inventory([InventoryEntry(7, '10.0.0.7', 'aa:bb'),
+                              InventoryEntry(1000, '10.0.3.232')])
+        self.assertEqual(original,
+                         Inventory.deserialize(original.serialize()))
+
+    def test_legacy_addresses(self):
+        """The legacy inventory must match the historical addressing."""
+        legacy = Inventory.legacy()
+        self.assertEqual(tuple(range(100)), legacy.identifiers)
+        self.assertEqual('192.168.1.8', legacy.ip_address(5))
+
+    def test_coachbot_resolves_installed(self):
+        """Coachbot addresses resolve against the installed inventory."""
+        self.addCleanup(inventory.install, inventory.current())
+        inventory.install(Inventory([InventoryEntry(42, '10.0.0.42')]))
+        self.assertEqual('10.0.0.42', Coachbot.stateless(42).ip_address)
+        with self.assertRaises(KeyError):
+            Coachbot.stateless(5).ip_address  # pylint: disable=W0106
+
+
+if __name__ == '__main__':
+    unittest.main()
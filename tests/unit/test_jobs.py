@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Holds the job API unit test cases."""
+
+import asyncio
+import unittest
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath('./src'))
+
+from cctl.protocols import ipc, job
+from cctld.jobs import JobManager, UnknownJobError
+
+
+async def succeed(_):
+    """An operation which succeeds immediately."""
+    return ipc.Response(ipc.ResultCode.OK)
+
+
+class TestJobManager(unittest.TestCase):
+    """TestCase for the JobManager class."""
+
+    def setUp(self) -> None:
+        self.manager = JobManager(history=2)
+        self.events = []
+        self.manager.events.subscribe(on_next=self.events.append)
+
+    def run_job(self, operation=succeed, identifiers=range(3)) -> job.Job:
+        """Submits a job and waits for it to complete."""
+        async def run():
+            submitted = self.manager.submit(job.KIND_BOOT, identifiers,
+                                            operation, 2)
+            while not submitted.finished:
+                await asyncio.sleep(0)
+            return submitted
+        return asyncio.run(run())
+
+    def test_reports_every_bot(self):
+        """Every bot produces a progress event, followed by a done event."""
+        finished = self.run_job()
+        self.assertEqual(job.STATUS_DONE, finished.status)
+        self.assertEqual([0, 1, 2], sorted(finished.results))
+        self.assertEqual([job.EVENT_PROGRESS] * 3 + [job.EVENT_DONE],
+                         [event.event for event in self.events])
+        self.assertEqual([1, 2, 3, 4], [event.seq for event in self.events])
+
+    def test_operation_errors_are_results(self):
+        """A failing bot does not fail the job."""
+        async def fail(_):
+            raise RuntimeError('boom')
+        finished = self.run_job(fail, [5])
+        self.assertEqual(ipc.ResultCode.INTERNAL_SERVER_ERROR,
+                         finished.results[5].result_code)
+
+    def test_batch(self):
+        """Batch operations run once for every bot. Reported results are
+        recorded as they come, the returned ones for the remaining bots."""
+        batches = []
+
+        async def boot_all(identifiers, report):
+            batches.append(identifiers)
+            report(2, ipc.Response(ipc.ResultCode.STATE_CONFLICT))
+            return [ipc.Response(ipc.ResultCode.OK),
+                    ipc.Response(ipc.ResultCode.INTERNAL_SERVER_ERROR)]
+
+        async def run():
+            submitted = self.manager.submit_batch(job.KIND_BOOT, [4, 2, 4],
+                                                  boot_all)
+            while not submitted.finished:
+                await asyncio.sleep(0)
+            return submitted
+        finished = asyncio.run(run())
+        self.assertEqual([[4, 2]], batches)
+        self.assertEqual([2, 4], [event.identifier
+                                  for event in self.events[:2]])
+        self.assertEqual(ipc.ResultCode.STATE_CONFLICT,
+                         finished.results[2].result_code)
+        self.assertEqual([job.EVENT_PROGRESS] * 2 + [job.EVENT_DONE],
+                         [event.event for event in self.events])
+
+    def test_cancel(self):
+        """Cancelled jobs report it in their last event."""
+        async def run():
+            async def hang(_):
+                await asyncio.sleep(10)
+            submitted = self.manager.submit(job.KIND_DEPLOY, [1], hang, 1)
+            await asyncio.sleep(0)
+            self.assertTrue(self.manager.cancel(submitted.job_id))
+            while not submitted.finished:
+                await asyncio.sleep(0)
+            return submitted
+        self.assertEqual(job.STATUS_CANCELLED, asyncio.run(run()).status)
+
+    def test_forgets_old_jobs(self):
+        """Only the most recent finished jobs are remembered."""
+        ids = [self.run_job().job_id for _ in range(4)]
+        self.run_job()
+        with self.assertRaises(UnknownJobError):
+            self.manager[ids[0]]  # pylint: disable=pointless-statement
+        self.assertEqual(2, len(self.manager.jobs()))
+
+
+class TestJob(unittest.TestCase):
+    """TestCase for the Job model."""
+
+    def test_replaying_events(self):
+        """A job read mid-way catches up by applying the following events,
+        and detects missed ones."""
+        state = job.Job(1, job.KIND_BOOT, [0, 1], seq=1, results={
+            0: ipc.Response(ipc.ResultCode.OK)})
+        self.assertFalse(state.apply(job.JobEvent(1, 1, job.EVENT_PROGRESS,
+                                                  0, ipc.Response(200))))
+        self.assertFalse(state.apply(job.JobEvent(
+            1, 3, job.EVENT_DONE, status=job.STATUS_DONE)))
+        self.assertTrue(state.apply(job.JobEvent(
+            1, 2, job.EVENT_PROGRESS, 1,
+            ipc.Response(ipc.ResultCode.STATE_CONFLICT))))
+        self.assertTrue(state.apply(job.JobEvent(
+            1, 3, job.EVENT_DONE, status=job.STATUS_DONE)))
+        self.assertTrue(state.finished)
+
+    def test_serialization_round_trip(self):
+        """Tests whether jobs and events survive serialization."""
+        state = job.Job(4, job.KIND_DEPLOY, [3], job.STATUS_DONE, 2, {
+            3: ipc.Response(ipc.ResultCode.NOT_FOUND, 'gone')})
+        self.assertEqual(state, job.Job.deserialize(state.serialize()))
+        event = job.JobEvent(4, 1, job.EVENT_PROGRESS, 3,
+                             ipc.Response(ipc.ResultCode.OK))
+        self.assertEqual(event, job.JobEvent.deserialize(event.serialize()))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Holds the LivenessTracker unit test cases."""
+
+import unittest
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath('./src'))
+
+from cctld.liveness import LivenessTracker
+
+
+class TestLivenessTracker(unittest.TestCase):
+    """TestCase for the LivenessTracker class."""
+
+    def setUp(self) -> None:
+        self.now = 0.0
+        self.liveness = LivenessTracker(quiet_after=5,
+                                        clock=lambda: self.now)
+
+    def test_quiet(self):
+        """Tests that only bots which stopped reporting go quiet."""
+        self.liveness.heard(1)
+        self.liveness.heard(2)
+        self.now = 3
+        self.liveness.heard(2)
+        self.assertEqual(self.liveness.next_deadline(), 5)
+        self.now = 5
+        self.assertEqual(self.liveness.take_quiet(), [1])
+        self.assertNotIn(1, self.liveness)
+        self.assertEqual(self.liveness.next_deadline(), 8)
+        self.now = 8
+        self.assertEqual(self.liveness.take_quiet(), [2])
+        self.assertIsNone(self.liveness.next_deadline())
+
+    def test_one_deadline_per_bot(self):
+        """Tests that frequent reports do not grow the heap."""
+        for i in range(100):
+            self.now = i / 10
+            for bot_id in range(10):
+                self.liveness.heard(bot_id)
+        self.assertEqual(len(self.liveness._deadlines), 10)
+        self.assertEqual(self.liveness.take_quiet(), [])
+
+    def test_forget(self):
+        """Tests that forgotten bots do not go quiet, unless heard again."""
+        self.liveness.heard(1)
+        self.liveness.heard(2)
+        self.liveness.forget(1)
+        self.liveness.forget(2)
+        self.now = 1
+        self.liveness.heard(2)
+        self.now = 5
+        self.assertEqual(self.liveness.take_quiet(), [])
+        self.now = 6
+        self.assertEqual(self.liveness.take_quiet(), [2])
+
+
+if __name__ == '__main__':
+    unittest.main()
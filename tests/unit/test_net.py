@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Holds the reachability prober unit test cases."""
+
+import asyncio
+import struct
+import unittest
+from unittest import mock
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath('./src'))
+
+from cctld.utils import net
+
+
+class TestProbeReachable(unittest.TestCase):
+    """TestCase for the probe_reachable function."""
+
+    def test_echo_request(self):
+        """Tests that echo requests carry a valid checksum."""
+        packet = net._echo_request(0x1234, 7)
+        self.assertEqual(net._checksum(packet), 0)
+        self.assertEqual(struct.unpack('!BBHHH', packet[:8])[3:], (0x1234, 7))
+
+    def test_parse_echo_reply(self):
+        """Tests that replies are matched by sequence number, with or without
+        an IP header."""
+        reply = struct.pack('!BBHHH', net.ICMP_ECHO_REPLY, 0, 0, 1, 42)
+        ip_header = bytes([0x45]) + bytes(19)
+        self.assertEqual(net._parse_echo_reply(reply, False), 42)
+        self.assertEqual(net._parse_echo_reply(ip_header + reply, True), 42)
+        self.assertIsNone(net._parse_echo_reply(
+            net._echo_request(1, 42), False))
+
+    def test_loopback(self):
+        """Tests that the loopback is reachable."""
+        self.assertEqual(asyncio.run(net.probe_reachable(['127.0.0.1'])),
+                         {'127.0.0.1': True})
+
+    def test_tcp_fallback(self):
+        """Tests that hosts are connected to if ICMP is not permitted, and
+        that refusing the connection counts as reachable."""
+        async def run():
+            server = await asyncio.start_server(
+                lambda _, writer: writer.close(), '127.0.0.1', 0)
+            port = server.sockets[0].getsockname()[1]
+            async with server:
+                with mock.patch.object(net, '_icmp_socket',
+                                       return_value=None):
+                    return await net.probe_reachable(
+                        ['127.0.0.1', '127.0.0.1'], tcp_port=port)
+
+        self.assertEqual(asyncio.run(run()), {'127.0.0.1': True})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Holds the state and user code read request handler unit test cases."""
+
+import asyncio
+import json
+import unittest
+import os
+import sys
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.abspath('./src'))
+
+from cctl.models import CoachbotState, UserCodeState
+from cctl.protocols import codec, feed, ipc
+from cctld import requests  # noqa: F401 -- Registers the handlers.
+from cctld.code_store import CodeStore
+from cctld.fleet import FleetStateStore
+from cctld.requests.handler import get as get_handler
+
+
+class TestReadRequests(unittest.TestCase):
+    """TestCase for the field projection of the state reads and the
+    /bots/{id}/user-code endpoint."""
+
+    def setUp(self) -> None:
+        self.code_store = CodeStore()
+        states = FleetStateStore(range(2), CoachbotState(False))
+        states.update(1, self.code_store.strip(CoachbotState(
+            True, bat_voltage=3.9, user_code_state=UserCodeState(
+                is_running=True, user_code='print("Hello")'))))
+        self.code_hash = states[1].user_code_state.user_code_hash
+        self.app_state = SimpleNamespace(
+            coachbot_states=SimpleNamespace(value=states,
+                                            snapshot=lambda: (5, states)),
+            code_store=self.code_store)
+
+    def request(self, endpoint: str, **head) -> ipc.Response:
+        """Handles the given read request."""
+        handler, groups = get_handler(endpoint, 'read')
+        return asyncio.run(handler(
+            self.app_state, ipc.Request('read', endpoint, head=head), groups))
+
+    def test_fields(self):
+        """Only the requested fields are returned."""
+        response = self.request('/bots/1/state',
+                                encoding=codec.ENCODING_BINARY,
+                                fields=['bat_voltage', 'user_code_hash'])
+        self.assertEqual(ipc.ResultCode.OK, response.result_code)
+        state = codec.loads_text(response.body, CoachbotState)
+        self.assertIsNone(state.is_on)
+        self.assertEqual(3.9, state.bat_voltage)
+        self.assertEqual(self.code_hash,
+                         state.user_code_state.user_code_hash)
+
+        states = json.loads(self.request('/bots', fields=['is_on']).body)
+        self.assertEqual([False, True],
+                         [state['is_on'] for _, state in states])
+        self.assertTrue(all(state['bat_voltage'] is None
+                            for _, state in states))
+
+    def test_unknown_fields(self):
+        """Unknown fields are rejected."""
+        for endpoint in ('/bots', '/bots/snapshot', '/bots/1/state'):
+            self.assertEqual(ipc.ResultCode.BAD_REQUEST, self.request(
+                endpoint, fields=['user_code']).result_code)
+
+    def test_user_code(self):
+        """The user code is served by hash, unless the client has it."""
+        response = self.request('/bots/1/user-code')
+        self.assertEqual(ipc.ResultCode.OK, response.result_code)
+        self.assertEqual({'user_code_hash': self.code_hash,
+                          'user_code': 'print("Hello")'},
+                         json.loads(response.body))
+        self.assertEqual(ipc.ResultCode.NO_CONTENT, self.request(
+            '/bots/1/user-code', if_none_match=self.code_hash).result_code)
+        self.assertEqual(ipc.ResultCode.NOT_FOUND,
+                         self.request('/bots/0/user-code').result_code)
+
+    def test_snapshot_view(self):
+        """Snapshots can be projected like the view topics."""
+        message = codec.loads_text(
+            self.request('/bots/snapshot', fields=['is_on']).body,
+            feed.StateFeedMessage)
+        self.assertEqual((5, feed.KIND_KEYFRAME), (message.seq, message.kind))
+        self.assertEqual(CoachbotState(True), message.states[1])
+
+
+if __name__ == '__main__':
+    unittest.main()
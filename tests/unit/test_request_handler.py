@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Holds the request handler registry unit test cases."""
+
+import asyncio
+import unittest
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath('./src'))
+
+from cctl.protocols import ipc
+from cctld.requests.handler import ENDPOINT_HANDLERS, get, handler
+
+
+class TestHandlerLimits(unittest.TestCase):
+    """TestCase for the per-endpoint concurrency limits and timeouts."""
+
+    ENDPOINT = r'^/test/limits/?$'
+
+    def tearDown(self) -> None:
+        ENDPOINT_HANDLERS.pop(self.ENDPOINT, None)
+
+    def test_timeout(self):
+        """Requests running over their timeout are answered with 504."""
+        @handler(self.ENDPOINT, 'read', timeout=0.01)
+        async def slow(*_):
+            await asyncio.sleep(1)
+            return ipc.Response(ipc.ResultCode.OK)
+
+        function, groups = get('/test/limits', 'read')
+        response = asyncio.run(function(None, None, groups))
+        self.assertEqual(ipc.ResultCode.GATEWAY_TIMEOUT,
+                         response.result_code)
+
+    def test_max_concurrency(self):
+        """No more than ``max_concurrency`` requests run at once."""
+        running = peak = 0
+
+        @handler(self.ENDPOINT, 'read', max_concurrency=2)
+        async def tracked(*_):
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.01)
+            running -= 1
+            return ipc.Response(ipc.ResultCode.OK)
+
+        async def run():
+            function, groups = get('/test/limits', 'read')
+            return await asyncio.gather(*(function(None, None, groups)
+                                          for _ in range(6)))
+
+        self.assertEqual(6, len(asyncio.run(run())))
+        self.assertEqual(2, peak)
+
+    def test_unlimited_handlers_are_unwrapped(self):
+        """Handlers without limits are registered as they are."""
+        @handler(self.ENDPOINT, 'read')
+        async def plain(*_):
+            return ipc.Response(ipc.ResultCode.OK)
+
+        self.assertEqual('plain', get('/test/limits', 'read')[0].__name__)
+
+
+if __name__ == '__main__':
+    unittest.main()
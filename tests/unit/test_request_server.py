@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Holds the IPC request server unit test cases."""
+
+import asyncio
+import unittest
+import os
+import sys
+from types import SimpleNamespace
+
+import zmq
+import zmq.asyncio
+
+sys.path.insert(0, os.path.abspath('./src'))
+
+from cctl.api.cctld import CCTLDClient
+from cctl.protocols import ipc
+from cctld.requests.handler import ENDPOINT_HANDLERS, handler
+from cctld.servers import start_ipc_request_server
+
+
+class TestRequestServer(unittest.TestCase):
+    """TestCase for the ROUTER-based request server."""
+
+    ENDPOINT = r'^/test/slow/?$'
+    FEED = 'ipc:///tmp/cctld-test-request-feed'
+
+    def tearDown(self) -> None:
+        ENDPOINT_HANDLERS.pop(self.ENDPOINT, None)
+
+    def test_reads_do_not_queue_behind_slow_requests(self):
+        """A cheap request is answered while slow ones are still running."""
+        release = None
+
+        @handler(self.ENDPOINT, 'create')
+        async def slow(*_):
+            await release.wait()
+            return ipc.Response(ipc.ResultCode.OK)
+
+        async def run():
+            # pylint: disable=protected-access
+            nonlocal release
+            release = asyncio.Event()
+            app_state = SimpleNamespace(config=SimpleNamespace(
+                ipc=SimpleNamespace(request_feed=self.FEED)))
+            server = asyncio.create_task(start_ipc_request_server(app_state))
+            try:
+                async with CCTLDClient(self.FEED) as client:
+                    # More slow requests than the legacy server had workers.
+                    slow_requests = [asyncio.ensure_future(client._request(
+                        ipc.Request('create', '/test/slow')))
+                        for _ in range(16)]
+                    teapot = await asyncio.wait_for(
+                        client._request(ipc.Request('read', '/teapot')), 5)
+                    self.assertFalse(any(r.done() for r in slow_requests))
+                    release.set()
+                    slow_responses = await asyncio.gather(*slow_requests)
+            finally:
+                server.cancel()
+            return teapot, slow_responses
+
+        teapot, slow_responses = asyncio.run(run())
+        self.assertEqual(ipc.ResultCode.I_AM_A_TEAPOT, teapot.result_code)
+        self.assertTrue(all(r.result_code == ipc.ResultCode.OK
+                            for r in slow_responses))
+
+    def test_handler_errors_are_server_errors(self):
+        """Errors raised by handlers are answered with
+        INTERNAL_SERVER_ERROR, while malformed requests are answered with
+        BAD_REQUEST."""
+        @handler(self.ENDPOINT, 'create')
+        async def broken(*_):
+            return {}['missing']
+
+        async def run():
+            app_state = SimpleNamespace(config=SimpleNamespace(
+                ipc=SimpleNamespace(request_feed=self.FEED)))
+            server = asyncio.create_task(start_ipc_request_server(app_state))
+            context = zmq.asyncio.Context()
+            sock = context.socket(zmq.DEALER)
+            sock.setsockopt(zmq.LINGER, 0)
+            sock.connect(self.FEED)
+            try:
+                responses = []
+                for raw in (ipc.Request('create', '/test/slow').serialize(),
+                            '{"method": '):
+                    await sock.send_multipart([raw.encode()])
+                    (reply,) = await asyncio.wait_for(
+                        sock.recv_multipart(), 5)
+                    responses.append(ipc.Response.deserialize(
+                        reply.decode()))
+                return responses
+            finally:
+                sock.close()
+                context.term()
+                server.cancel()
+
+        with self.assertLogs('servers.request', 'ERROR'):
+            broken_response, malformed = asyncio.run(run())
+        self.assertEqual(ipc.ResultCode.INTERNAL_SERVER_ERROR,
+                         broken_response.result_code)
+        self.assertEqual(ipc.ResultCode.BAD_REQUEST, malformed.result_code)
+
+
+if __name__ == '__main__':
+    unittest.main()
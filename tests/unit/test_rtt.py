@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Holds the RttEstimator and RetryBudget unit test cases."""
+
+import random
+import unittest
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath('./src'))
+
+from cctld.utils.rtt import RetryBudget, RttEstimator, backoff_delay
+
+
+class TestRttEstimator(unittest.TestCase):
+    """TestCase for the RttEstimator class."""
+
+    def test_first_sample(self):
+        """Tests that the first sample sets the timeout as in RFC 6298."""
+        rtt = RttEstimator(initial=1.0, min_timeout=0.01)
+        self.assertEqual(rtt.timeout, 1.0)
+        rtt.sample(0.1)
+        self.assertAlmostEqual(rtt.srtt, 0.1)
+        self.assertAlmostEqual(rtt.rttvar, 0.05)
+        self.assertAlmostEqual(rtt.timeout, 0.3)
+
+    def test_converges(self):
+        """Tests that a steady round-trip time shrinks the timeout to the
+        lower bound."""
+        rtt = RttEstimator(min_timeout=0.05)
+        for _ in range(50):
+            rtt.sample(0.005)
+        self.assertAlmostEqual(rtt.srtt, 0.005)
+        self.assertEqual(rtt.timeout, 0.05)
+
+    def test_slow_peer(self):
+        """Tests that a slow peer is waited for longer than it takes."""
+        rtt = RttEstimator()
+        for sample in (0.3, 0.5, 0.4, 0.6):
+            rtt.sample(sample)
+        self.assertGreater(rtt.timeout, 0.6)
+
+    def test_backoff(self):
+        """Tests that timeouts double the timeout up to the upper bound."""
+        rtt = RttEstimator(initial=0.5, max_timeout=2.0)
+        rtt.backoff()
+        self.assertEqual(rtt.timeout, 1.0)
+        rtt.backoff()
+        rtt.backoff()
+        self.assertEqual(rtt.timeout, 2.0)
+        self.assertEqual(rtt.to_dict()['timeouts'], 3)
+
+
+class TestRetryBudget(unittest.TestCase):
+    """TestCase for the RetryBudget class."""
+
+    def test_budget(self):
+        """Tests that retries are bounded by the reserve and refilled by
+        requests."""
+        budget = RetryBudget(ratio=0.5, reserve=2)
+        self.assertTrue(budget.withdraw())
+        self.assertTrue(budget.withdraw())
+        self.assertFalse(budget.withdraw())
+        budget.deposit()
+        self.assertFalse(budget.withdraw())
+        budget.deposit()
+        self.assertTrue(budget.withdraw())
+        for _ in range(10):
+            budget.deposit()
+        self.assertTrue(budget.withdraw())
+        self.assertTrue(budget.withdraw())
+        self.assertFalse(budget.withdraw())
+
+
+class TestBackoffDelay(unittest.TestCase):
+    """TestCase for the backoff_delay function."""
+
+    def test_bounds(self):
+        """Tests that delays grow exponentially up to the cap."""
+        rng = random.Random(0)
+        for attempt in range(10):
+            bound = min(1.0, 0.05 * 2 ** attempt)
+            for _ in range(20):
+                self.assertTrue(0 <= backoff_delay(attempt, rng=rng) <= bound)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Holds the IPC signal forward server unit test cases."""
+
+import asyncio
+import unittest
+import os
+import sys
+from types import SimpleNamespace
+
+import zmq
+import zmq.asyncio
+from reactivex.subject import Subject
+
+sys.path.insert(0, os.path.abspath('./src'))
+
+from cctl.models import Signal
+from cctl.protocols import codec, feed
+from cctld.servers import start_ipc_signal_forward_server
+
+
+class TestSignalForwardServer(unittest.TestCase):
+    """TestCase for the XPUB-based signal forward server."""
+
+    FEED = 'ipc:///tmp/cctld-test-signal-feed'
+
+    def test_forwards_to_subscribers(self):
+        """A subscriber receives the signals on the topics it subscribed
+        to."""
+        async def run():
+            signals = Subject()
+            app_state = SimpleNamespace(
+                config=SimpleNamespace(ipc=SimpleNamespace(
+                    signal_feed=self.FEED,
+                    feed_encoding=codec.ENCODING_JSON)),
+                coachbot_signals=signals)
+            server = asyncio.create_task(
+                start_ipc_signal_forward_server(app_state))
+            context = zmq.asyncio.Context()
+            sock = context.socket(zmq.SUB)
+            sock.setsockopt(zmq.LINGER, 0)
+            sock.connect(self.FEED)
+            sock.setsockopt(zmq.SUBSCRIBE, feed.signal_topic('ping'))
+            try:
+                # The subscription reaches the server asynchronously, so
+                # signals are sent until one arrives.
+                for _ in range(100):
+                    signals.on_next(Signal('pong', {}))
+                    signals.on_next(Signal('ping', {'id': 3}))
+                    if await sock.poll(50):
+                        return await sock.recv_multipart()
+                return None
+            finally:
+                sock.close()
+                context.term()
+                signals.on_completed()
+                server.cancel()
+
+        message = asyncio.run(run())
+        self.assertIsNotNone(message)
+        topic, payload = message
+        self.assertEqual(feed.signal_topic('ping'), topic)
+        self.assertEqual(Signal('ping', {'id': 3}),
+                         codec.loads(payload, Signal))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,298 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Holds the SSHPool and parallel fetch unit test cases."""
+
+import asyncio
+import io
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from unittest import mock
+from types import SimpleNamespace
+
+import paramiko
+
+sys.path.insert(0, os.path.abspath('./src'))
+
+from cctl.utils import transfer
+from cctl.utils.net import SSHPool
+
+
+class LocalFile:
+    """Mimics a ``paramiko.SFTPFile`` over a local file."""
+    def __init__(self, path: str) -> None:
+        self.file = open(path, 'rb')
+
+    def seek(self, offset: int) -> None:
+        self.file.seek(offset)
+
+    def prefetch(self, file_size: int) -> None:
+        pass
+
+    def read(self, size: int) -> bytes:
+        return self.file.read(size)
+
+    def __enter__(self) -> 'LocalFile':
+        return self
+
+    def __exit__(self, *_) -> None:
+        self.file.close()
+
+
+class LocalSFTP:
+    """Mimics a ``paramiko.SFTPClient`` serving the local file system."""
+    def stat(self, path: str) -> paramiko.SFTPAttributes:
+        return paramiko.SFTPAttributes.from_stat(os.stat(path))
+
+    def listdir_attr(self, path: str):
+        return [paramiko.SFTPAttributes.from_stat(
+            os.stat(os.path.join(path, name)), name)
+            for name in sorted(os.listdir(path))]
+
+    def open(self, path: str, mode: str) -> LocalFile:
+        return LocalFile(path)
+
+    def mkdir(self, path: str) -> None:
+        os.mkdir(path)
+
+    def put(self, local_path: str,
+            remote_path: str) -> paramiko.SFTPAttributes:
+        shutil.copyfile(local_path, remote_path)
+        return self.stat(remote_path)
+
+    def chmod(self, path: str, mode: int) -> None:
+        os.chmod(path, mode)
+
+    def posix_rename(self, old_path: str, new_path: str) -> None:
+        os.replace(old_path, new_path)
+
+
+class LocalStream(io.BytesIO):
+    """Mimics the output of a ``paramiko.SSHClient.exec_command``."""
+    def __init__(self, data: bytes, status: int) -> None:
+        super().__init__(data)
+        self.channel = SimpleNamespace(recv_exit_status=lambda: status)
+
+
+class LocalClient:
+    """Mimics a ``paramiko.SSHClient`` running commands locally."""
+    def __init__(self) -> None:
+        self.commands = []
+
+    def exec_command(self, command: str, timeout=None):
+        self.commands.append(command)
+        process = subprocess.run(command, shell=True, capture_output=True)
+        return (None, LocalStream(process.stdout, process.returncode),
+                LocalStream(process.stderr, process.returncode))
+
+
+class LocalConnection:
+    """Mimics a pooled ``SSHConnection``."""
+    def __init__(self) -> None:
+        self.sftp = LocalSFTP()
+        self.client = LocalClient()
+        self.timeout = None
+        self.is_active = True
+
+    def close(self) -> None:
+        self.is_active = False
+
+
+class LocalPool(SSHPool):
+    """An ``SSHPool`` whose hosts are all the local file system."""
+    def __init__(self, **kwargs) -> None:
+        super().__init__('pi', 'key', **kwargs)
+        self.connects = []
+        self.running = self.peak = 0
+        self.lock = threading.Lock()
+
+    def _connect(self, hostname: str) -> LocalConnection:
+        self.connects.append(hostname)
+        return LocalConnection()
+
+    def _call(self, hostname, function):
+        with self.lock:
+            self.running += 1
+            self.peak = max(self.peak, self.running)
+        try:
+            time.sleep(0.01)
+            return super()._call(hostname, function)
+        finally:
+            with self.lock:
+                self.running -= 1
+
+
+class TestSSHPool(unittest.TestCase):
+    """TestCase for the SSHPool class."""
+
+    def test_pools_connections(self):
+        """Every host is connected to once, and at most ``max_concurrency``
+        hosts are worked on at once."""
+        async def run():
+            async with LocalPool(max_concurrency=2) as pool:
+                await asyncio.gather(*[
+                    pool.run(f'10.0.0.{i % 4}', lambda conn: None)
+                    for i in range(12)
+                ])
+            return pool
+
+        pool = asyncio.run(run())
+        self.assertEqual(4, len(pool.connects))
+        self.assertEqual(2, pool.peak)
+
+    def test_reconnects(self):
+        """A dropped connection is reopened."""
+        async def run():
+            async with LocalPool() as pool:
+                await pool.run('10.0.0.1', LocalConnection.close)
+                await pool.run('10.0.0.1', lambda conn: None)
+            return pool.connects
+
+        self.assertEqual(['10.0.0.1', '10.0.0.1'], asyncio.run(run()))
+
+
+class TestFetch(unittest.TestCase):
+    """TestCase for the fetch function."""
+
+    def setUp(self) -> None:
+        self.tmp = tempfile.TemporaryDirectory()
+        self.remote = os.path.join(self.tmp.name, 'remote')
+        os.makedirs(os.path.join(self.remote, 'logs'))
+        with open(os.path.join(self.remote, 'out.txt'), 'wb') as out:
+            out.write(b'x' * 100000)
+        with open(os.path.join(self.remote, 'logs', 'a.log'), 'wb') as log:
+            log.write(b'hello')
+        self.local = os.path.join(self.tmp.name, 'local')
+
+    def tearDown(self) -> None:
+        self.tmp.cleanup()
+
+    def fetch(self, hosts=('10.0.0.1',), remote_path=None):
+        async def run():
+            async with LocalPool() as pool:
+                return await transfer.fetch(pool, {
+                    host: os.path.join(self.local, host) for host in hosts
+                }, remote_path or self.remote)
+        return asyncio.run(run())
+
+    def test_fetches_tree(self):
+        """Directories are mirrored file by file."""
+        results = self.fetch(['10.0.0.1', '10.0.0.2'])
+        for host, result in results.items():
+            self.assertIsNone(result.error)
+            self.assertEqual((2, 100005),
+                             (result.stats.files, result.stats.bytes))
+            with open(os.path.join(self.local, host, 'logs', 'a.log'),
+                      'rb') as log:
+                self.assertEqual(b'hello', log.read())
+
+    def test_resumes(self):
+        """Partial files are resumed and complete ones skipped."""
+        destination = os.path.join(self.local, '10.0.0.1')
+        os.makedirs(os.path.join(destination, 'logs'))
+        with open(os.path.join(destination, 'logs', 'a.log'), 'wb') as log:
+            log.write(b'hello')
+        with open(os.path.join(destination, 'out.txt.part'), 'wb') as part:
+            part.write(b'x' * 60000)
+
+        stats = self.fetch()['10.0.0.1'].stats
+        self.assertEqual((1, 40000, 60005),
+                         (stats.files, stats.bytes, stats.skipped_bytes))
+        self.assertEqual(100000, os.path.getsize(
+            os.path.join(destination, 'out.txt')))
+        self.assertFalse(os.path.exists(
+            os.path.join(destination, 'out.txt.part')))
+
+    def test_reports_errors(self):
+        """A missing remote path fails only its bot."""
+        result = self.fetch(remote_path=os.path.join(self.remote, 'nope'))
+        self.assertIsInstance(result['10.0.0.1'].error, OSError)
+
+    def test_compressed(self):
+        """Compressed outputs arrive as an archive of the remote path."""
+        async def run():
+            async with LocalPool() as pool:
+                return await transfer.fetch(pool, {
+                    '10.0.0.1': self.local + '.tar.gz'
+                }, self.remote, compress=True)
+
+        self.assertIsNone(asyncio.run(run())['10.0.0.1'].error)
+        names = subprocess.run(['tar', '-tzf', self.local + '.tar.gz'],
+                               capture_output=True, check=True).stdout
+        self.assertIn(b'remote/logs/a.log', names.split())
+
+
+class TestSync(unittest.TestCase):
+    """TestCase for the sync function and the HashCache class."""
+
+    def setUp(self) -> None:
+        self.tmp = tempfile.TemporaryDirectory()
+        self.source = os.path.join(self.tmp.name, 'control')
+        os.makedirs(os.path.join(self.source, 'lib'))
+        for path, data in (('main.py', b'run()'), ('lib/a.py', b'a = 1'),
+                           ('lib/b.py', b'b = 2' * 1000)):
+            with open(os.path.join(self.source, path), 'wb') as source:
+                source.write(data)
+        self.remotes = [os.path.join(self.tmp.name, f'bot{i}')
+                        for i in range(3)]
+
+    def tearDown(self) -> None:
+        self.tmp.cleanup()
+
+    def sync(self, remotes):
+        """Syncs the source to every remote directory, using the directory
+        itself as the host."""
+        manifest = transfer.local_manifest(self.source)
+
+        async def run():
+            async with LocalPool() as pool:
+                results = {}
+                for remote in remotes:
+                    results.update(await transfer.sync(
+                        pool, [remote], self.source, manifest, remote))
+                return results
+
+        return asyncio.run(run())
+
+    def test_uploads_only_changes(self):
+        """Only the files which differ on a bot are uploaded."""
+        first = self.sync(self.remotes)
+        for remote in self.remotes:
+            self.assertEqual(3, first[remote].stats.files)
+            with open(os.path.join(remote, 'lib', 'b.py'), 'rb') as synced:
+                self.assertEqual(b'b = 2' * 1000, synced.read())
+
+        with open(os.path.join(self.source, 'lib', 'a.py'), 'wb') as source:
+            source.write(b'a = 3')
+        os.remove(os.path.join(self.remotes[1], 'main.py'))
+        second = self.sync(self.remotes)
+        self.assertEqual([1, 2, 1], [second[remote].stats.files
+                                     for remote in self.remotes])
+        self.assertEqual(5, second[self.remotes[0]].stats.bytes)
+        self.assertFalse(any(name.endswith(transfer.PART_SUFFIX)
+                             for name in os.listdir(self.remotes[0])))
+
+    def test_hash_cache(self):
+        """Hashes survive between runs and follow changes of the file."""
+        cache_path = os.path.join(self.tmp.name, 'cache', 'hashes.json')
+        path = os.path.join(self.source, 'main.py')
+        cache = transfer.HashCache(cache_path)
+        digest = cache.hash(path)
+        cache.save()
+
+        cached = transfer.HashCache(cache_path)
+        with mock.patch('hashlib.sha256', side_effect=AssertionError):
+            self.assertEqual(digest, cached.hash(path))
+        with open(path, 'wb') as source:
+            source.write(b'run(fast=True)')
+        self.assertNotEqual(digest, cached.hash(path))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Holds the cctld zmq utility unit test cases."""
+
+import unittest
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath('./src'))
+
+from cctld.utils.zmq import SubscriptionTracker
+
+
+class TestSubscriptionTracker(unittest.TestCase):
+    """TestCase for the SubscriptionTracker class."""
+
+    def setUp(self) -> None:
+        self.tracker = SubscriptionTracker()
+
+    def test_wants_nothing_initially(self):
+        """Nothing is wanted before anyone subscribes."""
+        self.assertFalse(self.tracker.wants(b'bot/1/'))
+
+    def test_matches_prefixes(self):
+        """A subscription covers every topic it prefixes."""
+        self.tracker.on_message(b'\x01bot/')
+        self.assertTrue(self.tracker.wants(b'bot/1/'))
+        self.assertFalse(self.tracker.wants(b'fleet/'))
+
+    def test_empty_subscription_matches_all(self):
+        """Subscribing to the empty topic receives everything."""
+        self.tracker.on_message(b'\x01')
+        self.assertTrue(self.tracker.wants(b'fleet/'))
+
+    def test_unsubscribe(self):
+        """Topics are dropped once unsubscribed from."""
+        self.tracker.on_message(b'\x01bot/1/')
+        self.tracker.on_message(b'\x00bot/1/')
+        self.assertFalse(self.tracker.wants(b'bot/1/'))
+
+    def test_topics(self):
+        """The subscribed topics are listed by prefix."""
+        self.tracker.on_message(b'\x01view/is_on/')
+        self.tracker.on_message(b'\x01fleet/')
+        self.assertEqual([b'view/is_on/'], self.tracker.topics(b'view/'))
+        self.assertEqual(2, len(self.tracker.topics()))
+
+
+if __name__ == '__main__':
+    unittest.main()